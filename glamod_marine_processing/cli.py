@@ -206,11 +206,17 @@ class Options:
             is_flag=True,
             help="Run job scripts interactively in parallel. This is mainly for BASTION machine.",
         )
+        self.pool_jobs = click.option(
+            "-pool",
+            "--pool_jobs",
+            is_flag=True,
+            help="Run the jobs of each source-deck in one pool of processes, which import the data model only once. Only for level1a.",
+        )
         self.n_max_jobs = click.option(
             "-n_max",
             "--n_max_jobs",
             default="12",
-            help="Maximum number of jobs running in parallel. Use only with parallel_jobs.",
+            help="Maximum number of jobs running in parallel. Use only with parallel_jobs or pool_jobs.",
         )
         self.level = click.option(
             "-l",
@@ -45,6 +45,7 @@ def obs_cli(
     submit_jobs,
     run_jobs,
     parallel_jobs,
+    pool_jobs,
     n_max_jobs,
     overwrite,
 ):
@@ -99,6 +100,7 @@ def obs_cli(
     level_config["submit_jobs"] = submit_jobs
     level_config["run_jobs"] = run_jobs
     level_config["parallel_jobs"] = parallel_jobs
+    level_config["pool_jobs"] = pool_jobs
     level_config["n_max_jobs"] = n_max_jobs
     level_config["level"] = level
     level_config["overwrite"] = overwrite
@@ -56,6 +56,7 @@ def qc_cli(
     metoffice_qc_directory = os.path.join(p.data_directory, release, "metoffice_qc")
     out_dir = os.path.join(metoffice_qc_directory, "base")
     icoads_dir = os.path.join(metoffice_qc_directory, "corrected")
+    climatology_cache = os.path.join(metoffice_qc_directory, "climatology_cache")
     ids_to_exclude = os.path.join(
         p.config_directory, "list_of_ids_that_are_not_ships.txt"
     )
@@ -99,6 +100,7 @@ def qc_cli(
         ICOADS_dir=icoads_dir,
         track_out_dir=out_dir,
         external_files=external_qc_files,
+        climatology_cache=climatology_cache,
         key="Directories",
     )
 
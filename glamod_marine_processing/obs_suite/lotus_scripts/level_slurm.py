@@ -297,6 +297,35 @@ for sid_dck in process_list:
         logging.info("No tasks to be calculated")
         continue
 
+    # Optionally, run the tasks in pools of processes, one pool per node
+    # Each pool gets as many tasks as processes, so that no task waits for another
+    # and the time limit of a single task still holds
+    cpus_per_taski = 1
+    if script_config.get("pool_jobs") is True and level in slurm_preferences.pool:
+        pool_py_path = os.path.join(scripts_dir, slurm_preferences.pool[level])
+        processes = min(TaskPNi, int(script_config["n_max_jobs"]))
+        with open(taskfarm_file) as fh:
+            tasks = fh.readlines()
+        nodesi = len(tasks) // processes + (len(tasks) % processes > 0)
+        pool_file = f"{file_}.pool"
+        with open(pool_file, "w") as fh:
+            for i in range(nodesi):
+                node_file = f"{file_}_{i}.tasks"
+                with open(node_file, "w") as fn:
+                    fn.writelines(tasks[i * processes : (i + 1) * processes])
+                fh.writelines(
+                    "python {0} {1} -processes {2} > {3}_{4}.out 2> {3}_{4}.out\n".format(
+                        pool_py_path, node_file, processes, file_, i
+                    )
+                )
+        # One pool per node, with a CPU for each of its processes
+        TaskPNi = 1
+        cpus_per_taski = processes
+        logging.info(
+            f"Tasks of {taskfarm_file} are run in {nodesi} pools by {pool_file}."
+        )
+        taskfarm_file = pool_file
+
     header = read_txt(os.path.join(lotus_dir, "header", f"slurm_header_{MACHINE}.txt"))
 
     with open(job_file, "w") as fh:
@@ -25,6 +25,8 @@ source_pattern = {
 
 one_task = ["level2"]
 
+pool = {"level1a": "level1a_pool.py"}
+
 nodesi = {
     "level1d": 1,
     "level2": 1,
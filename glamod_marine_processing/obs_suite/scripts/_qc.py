@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import os
+
+import numpy as np
+import pandas as pd
 
 
 class QualityControl:
@@ -63,3 +68,48 @@ def wind_qc(table_wd, table_ws):
         table_ws["quality_flag"] = table_ws["quality_flag"].mask(masked, "1")
 
     return QualityControl(table_ws, table_wd)
+
+
+def read_qc_dataset(qc_dataset, columns, uids):
+    """
+    Read the QC flags of some UIDs from a partition of a Parquet dataset. The
+    partition is sorted by UID, so the UID range skips the row groups without
+    any of the UIDs before the rows are matched to them.
+    """
+    filters = None
+    if len(uids) > 0:
+        filters = [
+            ("UID", ">=", uids.min()),
+            ("UID", "<=", uids.max()),
+            ("UID", "in", list(uids)),
+        ]
+    qc_df = pd.read_parquet(
+        qc_dataset, engine="pyarrow", columns=columns, filters=filters
+    )
+    # same types as read from the csv files
+    return qc_df.astype({col: "int64" for col in qc_df.columns if col != "UID"})
+
+
+def read_qc_index(qc_index, qc, columns, uids):
+    """
+    Read the QC flags of some UIDs from the monthly index of the QC flags. The UIDs
+    and flags of the index are memory-mapped and the UIDs are found in the sorted
+    UIDs of the index with a searchsorted, so only the rows that are needed are read.
+    """
+    index_uids = np.load(os.path.join(qc_index, "UID.npy"), mmap_mode="r")
+    index_flags = np.load(os.path.join(qc_index, "flags.npy"), mmap_mode="r")
+    with open(os.path.join(qc_index, "columns.json")) as f:
+        index_columns = json.load(f)[qc]
+
+    uids = uids.unique()
+    keys = np.array(uids, dtype=object).astype("S")
+    rows = np.searchsorted(index_uids, keys)
+    found = rows < len(index_uids)
+    found[found] = index_uids[rows[found]] == keys[found]
+
+    qc_df = pd.DataFrame({"UID": uids[found]})
+    flags = index_flags[rows[found]]
+    # same order and types as read from the csv files
+    for col in sorted(set(columns) - {"UID"}, key=index_columns.get):
+        qc_df[col] = flags[:, index_columns[col]].astype("int64")
+    return qc_df
@@ -27,12 +27,6 @@ add_data_paths = {
     "level3": [],
 }
 
-chunksizes = {
-    "C-RAID_1.2": None,
-    "ICOADS_R3.0.2T": 200000,
-    "ICOADS_R3.0.0T": 200000,
-}
-
 level3_columns = [
     ("header", "station_name"),
     ("header", "primary_station_id"),
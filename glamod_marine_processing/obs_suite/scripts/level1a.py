@@ -10,6 +10,13 @@ Script to generate the C3S CDM Marine level1a data.
     - maps to the C3S CDM header and observations tables if there is data left
       after cleaning (table[i].psv CDM table-like files)
 
+The input file is read in chunks and each chunk goes through all these steps and is
+appended to the output files before the next one is read, so the input is parsed
+only once and only one chunk is held in memory.
+
+A file is processed by main(), which level1a_pool.py also calls to run the
+files of many tasks in the same process.
+
 The processing unit is the source-deck monthly file.
 Outputs data to /<data_path>/<release>/<dataset>/level1a/<sid-dck>/table[i]-fileID.psv
 Outputs invalid data to /<data_path>/<release>/<dataset>/level1a/invalid/<sid-dck>/fileID-data|mask.psv
@@ -48,6 +55,10 @@ settings:
     - supplemental data model
     - processing options: supplemental replacements,
       record selection/filtering by field (i.e. PT....)
+    - map_processes: number of processes mapping chunks to the CDM concurrently
+      (optional, chunks are mapped one after the other otherwise)
+    - chunksize: number of records per chunk (optional, otherwise chunks are
+      sized to fit in job_memo_mb, from the memory taken by the first records)
 
 .....
 
@@ -58,236 +69,501 @@ from __future__ import annotations
 
 import logging
 import os
+import pickle  # noqa: S403
 import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from importlib import reload
-from io import StringIO
+from types import SimpleNamespace
 
 import numpy as np
 import pandas as pd
-from _utilities import FFS, chunksizes, date_handler, save_quicklook, script_setup
-from cdm_reader_mapper import read_mdf
+from _utilities import FFS, date_handler, save_quicklook, script_setup
+from cdm_reader_mapper import DataBundle, map_model, read_mdf, write_tables
 from cdm_reader_mapper.cdm_mapper import properties
-from cdm_reader_mapper.common import inspect, pandas_TextParser_hdlr
+from cdm_reader_mapper.cdm_mapper.tables.tables import get_cdm_atts
+from cdm_reader_mapper.common import get_filename
+from cdm_reader_mapper.mdf_reader.properties import open_file
 
 reload(logging)  # This is to override potential previous config of logging
 
+# Number of records read to measure the memory taken by a record
+probe_records = 1000
+# Peak memory of processing a chunk relative to the memory of its data and mask
+processing_factor = 10
+# Data models with one record per line of the input file
+line_models = ("icoads", "imma1")
+# Number of distinct invalid values of a numeric column counted exactly, and of the
+# bins they are counted in beyond that
+histogram_values = 10000
+
+
+# CLASSES ---------------------------------------------------------------------
+class ValueHistogram:
+    """Mergeable histogram of the invalid values of a numeric column.
+
+    The distinct values are counted while there are at most `nbins` of them, which
+    gives the same histogram as all the values. Beyond that the values are counted in
+    `nbins` equal bins, the width of which is doubled whenever a value falls outside
+    them, so the memory taken does not grow with the number of values.
+    """
+
+    def __init__(self, nbins=histogram_values):
+        self.nbins = nbins
+        self.values = Counter()
+        self.counts = None
+        self.start = None
+        self.width = None
+        self.min = np.inf
+        self.max = -np.inf
+        self.total = 0
+        self.nulls = 0
+
+    def add(self, values):
+        """Count the values of a chunk, nulls (and infinite values) apart."""
+        values = pd.to_numeric(pd.Series(values), errors="coerce")
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+        nulls = ~np.isfinite(values)
+        self.nulls += int(nulls.sum())
+        values = values[~nulls]
+        if len(values) == 0:
+            return
+        self.total += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self.counts is None:
+            unique, counts = np.unique(values, return_counts=True)
+            self.values.update(dict(zip(unique.tolist(), counts.tolist())))
+            if len(self.values) <= self.nbins:
+                return
+            values = np.fromiter(self.values.keys(), float)
+            weights = np.fromiter(self.values.values(), float)
+            self.values = Counter()
+            self.counts = np.zeros(self.nbins)
+            self.start = self.min
+            self.width = (self.max - self.min) / (self.nbins - 1)
+        else:
+            weights = np.ones(len(values))
+        self._rebin()
+        index = ((values - self.start) / self.width).astype(int)
+        index = np.clip(index, 0, self.nbins - 1)
+        self.counts += np.bincount(index, weights=weights, minlength=self.nbins)
+
+    def _rebin(self):
+        """Double the width of the bins until they hold all the values counted."""
+        half = self.nbins // 2
+        while self.min < self.start or self.max >= self.start + self.nbins * self.width:
+            pairs = self.counts[: 2 * half].reshape(half, 2).sum(axis=1)
+            pairs[-1] += self.counts[2 * half :].sum()
+            self.counts = np.zeros(self.nbins)
+            if self.min < self.start:
+                self.counts[self.nbins - half :] = pairs
+                self.start -= (self.nbins - half) * 2 * self.width
+            else:
+                self.counts[:half] = pairs
+            self.width *= 2
+
+    def histogram(self, bins=10):
+        """Get the histogram of the values in `bins` bins between their min and max."""
+        if self.counts is None:
+            return np.histogram(
+                np.fromiter(self.values.keys(), float),
+                bins=bins,
+                weights=np.fromiter(self.values.values(), float),
+            )
+        centres = self.start + (np.arange(self.nbins) + 0.5) * self.width
+        return np.histogram(
+            np.clip(centres, self.min, self.max),
+            bins=bins,
+            range=(self.min, self.max),
+            weights=self.counts,
+        )
+
 
 # FUNCTIONS -------------------------------------------------------------------
-def write_out_junk(dataObj, filename):
-    """Write to disk."""
-    v = [dataObj] if not read_kwargs.get("chunksize") else dataObj
-    c = 0
-    for df in v:
-        wmode = "a" if c > 0 else "w"
-        header = False if c > 0 else True
-        df.to_csv(filename, sep="|", mode=wmode, header=header)
-        c += 1
-
+def write_out_junk(df, filename, written_files):
+    """Write to disk, appending all but the first chunk."""
+    header = filename not in written_files
+    wmode = "w" if header else "a"
+    df.to_csv(filename, sep="|", mode=wmode, header=header)
+    written_files.add(filename)
+
+
+def append_table(df, filename):
+    """Append CDM table to a table file written by cdm_mapper, in the same format."""
+    df.dropna(how="all").to_csv(
+        filename, index=False, sep="|", mode="a", header=False, encoding="utf-8"
+    )
 
-# MAIN ------------------------------------------------------------------------
 
-# PROCESS INPUT AND MAKE SOME CHECKS ------------------------------------------
-logging.basicConfig(
-    format="%(levelname)s\t[%(asctime)s](%(filename)s)\t%(message)s",
-    level=logging.INFO,
-    datefmt="%Y%m%d %H:%M:%S",
-    filename=None,
-)
-
-process_options = [
-    "data_model",
-    "read_sections",
-    "filter_reports_by",
-]
-params = script_setup(process_options, sys.argv)
-
-L0_filename = os.path.join(params.prev_level_path, params.filename)
-if not os.path.isfile(L0_filename):
-    logging.error(f"Could not find data input file: {L0_filename}")
-    sys.exit(1)
-
-# DO THE DATA PROCESSING ------------------------------------------------------
-data_model = params.data_model
-dataset = params.dataset
-io_dict = {}
-
-# 1. Read input file to dataframe
-logging.info("Reading dataset data")
-chunksize = chunksizes[params.dataset]
-read_kwargs = {
-    "imodel": data_model,
-    "sections": params.read_sections,
-    "chunksize": chunksize,
-}
-
-data_in = read_mdf(L0_filename, **read_kwargs)
-
-io_dict["read"] = {"total": len(data_in)}
-
-# 2. PT fixing, filtering and invalid rejectionselect_true
-# 2.1. Fix platform type
-
-# dataset = ICOADS_R3.0.0T is not "registered" in metmetpy, but icoads_r3000
-# Modify metmetpy so that it maps ICOADS_R3.0.0T to its own alliaeses
-# we now do the dirty trick here: dataset_metmetpy = icoads_r3000
-logging.info("Applying platform type fixtures")
-data_in.correct_pt(inplace=True)
-
-# 2.2. Apply record selection (filter by) criteria: PT types.....
-if params.filter_reports_by:
-    logging.info("Applying selection filters")
-    io_dict["not_selected"] = {}
-    data_excluded = {}
-    data_excluded["data"] = {}
-    # 3.1. Select by report_filters options
-    for k, v in params.filter_reports_by.items():
-        io_dict["not_selected"][k] = {}
-        logging.info("Selecting {} values: {}".format(k, ",".join(v)))
-        filter_location = tuple(k.split("."))
-        col = filter_location[0] if len(filter_location) == 1 else filter_location
-        values = v
-        selection = {col: values}
-        data_in, data_excl = data_in.split_by_column_entries(selection)
-        data_excluded["data"][k] = data_excl.data
-        io_dict["not_selected"][k]["total"] = len(data_excl)
-        if io_dict["not_selected"][k]["total"] > 0:
-            if data_in.dtype.get(col, {}) in ["str", "object", "key"]:
-                io_dict["not_selected"][k].update(data_excl.unique(columns=col))
-    io_dict["not_selected"]["total"] = sum(
-        [v.get("total") for k, v in io_dict["not_selected"].items()]
+def record_memory(data, mask, map_processes=None):
+    """Get the peak memory taken by a record of the data and its validation mask in bytes.
+
+    Besides the chunk being processed, up to two chunks per mapping process are held,
+    each with the pickled copy of its data sent to the mapping processes.
+    """
+    nbytes = data.memory_usage(deep=True).sum() + mask.memory_usage(deep=True).sum()
+    nbytes *= processing_factor * (1 + 2 * (map_processes or 0))
+    if map_processes:
+        pickled = len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        nbytes += 2 * map_processes * pickled
+    return nbytes / max(len(data), 1)
+
+
+def get_chunksize(params, bytes_per_record, n_records):
+    """Get the number of records per chunk, None if all records fit in one chunk."""
+    if not params.job_memo_mb:
+        logging.warning("No job_memo_mb to size the chunks, processing the whole file")
+        return None
+    chunksize = int(float(params.job_memo_mb) * 2**20 / bytes_per_record)
+    if n_records <= chunksize:
+        return None
+    return max(chunksize, probe_records)
+
+
+def probe_chunksize(params, L0_filename, read_kwargs):
+    """Get the number of records per chunk from the first records of the input file.
+
+    The number of records in the file is estimated from the size of the lines of the
+    first records, None is returned for data models not in line_models.
+    """
+    if not params.data_model.startswith(line_models):
+        return None
+    probe = read_mdf(L0_filename, pd_kwargs={"nrows": probe_records}, **read_kwargs)
+    if len(probe.data) == 0:
+        return None
+    # Estimate the number of records in the file from the size of the first ones
+    with open(L0_filename, "rb") as fh:
+        probe_size = sum(len(fh.readline()) for _ in range(len(probe.data)))
+    n_records = os.path.getsize(L0_filename) * len(probe.data) / probe_size
+    bytes_per_record = record_memory(probe.data, probe.mask, params.map_processes)
+    return get_chunksize(params, bytes_per_record, int(n_records))
+
+
+def read_input(params, L0_filename):
+    """Read the input file and get the number of records per chunk to process it."""
+    read_kwargs = {
+        "imodel": params.data_model,
+        "sections": params.read_sections,
+    }
+    chunksize = params.chunksize
+    if not chunksize and open_file.get(params.data_model) != "netcdf":
+        chunksize = probe_chunksize(params, L0_filename, read_kwargs)
+
+    data_in = read_mdf(L0_filename, chunksize=chunksize, **read_kwargs)
+
+    if not chunksize and isinstance(data_in.data, pd.DataFrame):
+        # The whole file was read (netCDF files always are), process it in chunks
+        bytes_per_record = record_memory(
+            data_in.data, data_in.mask, params.map_processes
+        )
+        chunksize = get_chunksize(params, bytes_per_record, len(data_in.data))
+    if chunksize:
+        logging.info(f"Processing chunks of {chunksize} records")
+    return data_in, chunksize
+
+
+def iter_chunks(data_in, chunksize):
+    """Iterate over the chunks of the data and validation mask."""
+    if not isinstance(data_in.data, pd.DataFrame):
+        yield from zip(data_in.data, data_in.mask)
+        return
+    if not chunksize:
+        yield data_in.data, data_in.mask
+        return
+    for i in range(0, len(data_in.data), chunksize):
+        yield (
+            data_in.data.iloc[i : i + chunksize].copy(),
+            data_in.mask.iloc[i : i + chunksize].copy(),
+        )
+
+
+def process_chunk(data, mask, data_in, params, stats):
+    """Fix, select and validate a chunk of the input data, return its valid reports."""
+    chunk = DataBundle(
+        data=data,
+        columns=data_in.columns,
+        dtypes=data_in.dtypes,
+        parse_dates=data_in.parse_dates,
+        encoding=data_in.encoding,
+        mask=mask,
+        imodel=params.data_model,
     )
+    stats.totals["read"] += len(chunk)
+
+    # 2.1. Fix platform type
+    chunk.correct_pt(inplace=True)
+
+    # 2.2. Apply record selection (filter by) criteria: PT types.....
+    if params.filter_reports_by:
+        for k, v in params.filter_reports_by.items():
+            filter_location = tuple(k.split("."))
+            col = filter_location[0] if len(filter_location) == 1 else filter_location
+            selection = {col: v}
+            chunk, chunk_excl = chunk.split_by_column_entries(selection)
+            if len(chunk_excl) == 0:
+                continue
+            stats.not_selected[k]["total"] += len(chunk_excl)
+            if data_in.dtypes.get(col, {}) in ["str", "object", "key"]:
+                values = chunk_excl.data[col].value_counts(dropna=False)
+                for value, count in values.items():
+                    value = "nan" if pd.isna(value) else value
+                    stats.not_selected[k]["values"][value] += int(count)
+            excluded_filename = os.path.join(
+                params.level_excluded_path,
+                params.fileID + FFS + "_".join(k.split(".")) + ".psv",
+            )
+            write_out_junk(chunk_excl.data, excluded_filename, stats.written_files)
 
-io_dict["pre_selected"] = {"total": len(data_in)}
-# 2.3. Keep track of invalid data
-# First create a global mask and count failure occurrences
-newmask_buffer = StringIO()
-logging.info("Removing invalid data")
-if chunksize:
-    zipped = zip(data_in.data, data_in.mask)
-else:
-    zipped = zip([data_in.data], [data_in.mask])
-for data, mask in zipped:
+    stats.totals["pre_selected"] += len(chunk)
+
+    # 2.3. Keep track of invalid data
+    # First create a global mask and count failure occurrences
+    mask = chunk.mask
     mask["global_mask"] = mask.all(axis=1)
-    mask.to_csv(newmask_buffer, header=False, mode="a", encoding="utf-8", index=False)
 
     # 2.3.2. Invalid reports counts and values
-    # Initialize counters if first chunk
+    count_invalid(chunk.data, mask, data_in.dtypes, stats)
+
+    # 2.4. Discard invalid data.
+    chunk, chunk_false = chunk.split_by_boolean_true()
+    stats.totals["invalid"] += len(chunk_false)
+    if len(chunk_false) > 0:
+        invalid_filename = os.path.join(params.level_invalid_path, params.fileID + FFS)
+        write_out_junk(
+            chunk_false.data, invalid_filename + "data.psv", stats.written_files
+        )
+        write_out_junk(
+            chunk_false.mask, invalid_filename + "mask.psv", stats.written_files
+        )
+
+    stats.totals["processed"] += len(chunk)
+    return chunk
+
+
+def count_invalid(data, mask, dtypes, stats):
+    """Count the invalid reports and values of each column of a chunk.
+
+    The values of object columns are counted in a Counter, those of numeric columns in
+    a ValueHistogram, the values of other columns are listed as they are.
+    """
     masked_columns = [x for x in mask if not all(mask[x].isna()) and x != "global_mask"]
-    if not io_dict.get("invalid"):
-        io_dict["invalid"] = {
-            ".".join(k): {"total": 0, "values": []} for k in masked_columns
-        }
-
     for col in masked_columns:
         k = ".".join(col)
-        io_dict["invalid"][k]["total"] += len(mask[col].loc[~mask[col]])
-        if col in data:  # cause some masks are not in data (datetime....)
-            io_dict["invalid"][k]["values"].extend(data[col].loc[~mask[col]].values)
-
-newmask_buffer.seek(0)
-if chunksize:
-    data_in.mask = pd.read_csv(
-        newmask_buffer, names=[x for x in mask], chunksize=chunksize
-    )
-    data_in.data = pandas_TextParser_hdlr.restore(data_in.data)
-
-# Now see what fails
-for col in masked_columns:
-    k = ".".join(col)
-    if io_dict["invalid"][k]["total"] > 0:
-        if data_in.dtypes.get(col, {}) in properties.object_types:
-            ivalues = list(set(io_dict["invalid"][k]["values"]))
-            # This is because sorting fails on strings if nan
-            if np.nan in ivalues:
-                ivalues.remove(np.nan)
-                ivalues.sort()
-                ivalues.append(str(np.nan))
-            elif pd.NaT in ivalues:
-                ivalues.remove(pd.NaT)
-                ivalues.sort()
-                ivalues.append(str(pd.NaT))
+        if k not in stats.invalid:
+            stats.invalid[k] = {"total": 0}
+            stats.invalid_columns[k] = col
+            if dtypes.get(col, {}) in properties.object_types:
+                stats.invalid_values[k] = Counter()
+            elif dtypes.get(col, {}) in properties.numeric_types:
+                stats.invalid_values[k] = ValueHistogram()
             else:
-                ivalues.sort()
-            io_dict["invalid"][k].update(
-                {i: io_dict["invalid"][k]["values"].count(i) for i in ivalues}
-            )
-            sush = io_dict["invalid"][k].pop("values", None)
-        elif data_in.dtypes.get(col, {}) in properties.numeric_types:
-            values = io_dict["invalid"][k]["values"]
-            values = np.array(values)[~pd.isnull(values)]
-            if len(values > 0):
-                [counts, edges] = np.histogram(values)
-                # Following binning approach only if at most 1 sign digit!
-                bins = [
-                    "-".join([f"{edges[i]:.1f}", f"{edges[i + 1]:.1f}"])
-                    for i in range(0, len(edges) - 1)
-                ]
-                io_dict["invalid"][k].update(
-                    {b: counts for b, counts in zip(bins, counts)}
-                )
+                stats.invalid_values[k] = []
+        stats.invalid[k]["total"] += len(mask[col].loc[~mask[col]])
+        # cause some masks are not in data (datetime....)
+        if col not in data:
+            continue
+        values = data[col].loc[~mask[col]]
+        if isinstance(stats.invalid_values[k], ValueHistogram):
+            stats.invalid_values[k].add(values)
+            continue
+        if isinstance(stats.invalid_values[k], list):
+            stats.invalid_values[k].extend(values.values)
+            continue
+        for value, count in values.value_counts(dropna=False).items():
+            value = np.nan if pd.isna(value) else value
+            stats.invalid_values[k][value] += int(count)
+
+
+def map_chunk(data, imodel):
+    """Map a chunk of the valid input data to the CDM tables."""
+    return map_model(data, imodel, log_level="INFO")
+
+
+def add_missing_tables(cdm_tables):
+    """Add the CDM tables missing from the mapped tables as empty columns."""
+    columns = [
+        (table, column)
+        for table in properties.cdm_tables
+        if table not in cdm_tables
+        for column in get_cdm_atts(table)[table]
+    ]
+    if not columns:
+        return cdm_tables
+    missing = pd.DataFrame(
+        index=cdm_tables.index, columns=pd.MultiIndex.from_tuples(columns)
+    )
+    return pd.concat([cdm_tables, missing], axis=1)
+
+
+def write_out_tables(cdm_tables, params, stats):
+    """Write the CDM tables of a chunk to the table files.
+
+    The tables of the first chunk are written by cdm_mapper, with the tables missing
+    from it as empty tables so that their files have a header, later chunks are
+    appended to them.
+    """
+    filenames = {
+        table: get_filename([table, params.fileID], path=params.level_path)
+        for table in properties.cdm_tables
+    }
+    first_chunk = not stats.written_files.issuperset(filenames.values())
+    if first_chunk:
+        write_tables(add_missing_tables(cdm_tables), filename=filenames)
+        stats.written_files.update(filenames.values())
+    for table in properties.cdm_tables:
+        if table in cdm_tables:
+            if not first_chunk:
+                append_table(cdm_tables[table], filenames[table])
+            stats.totals[table] += len(cdm_tables[table])
+
+
+def invalid_quicklook(data_in, stats):
+    """Summarize the counts of the invalid values for the quicklook."""
+    # Now see what fails
+    # Invalid values are counted as they come, see count_invalid
+    invalid = stats.invalid
+    for k, col in stats.invalid_columns.items():
+        if invalid[k]["total"] > 0:
+            if data_in.dtypes.get(col, {}) in properties.object_types:
+                values = stats.invalid_values[k].copy()
+                nulls = values.pop(np.nan, 0)
+                # nan is counted apart because sorting fails on strings if nan
+                ivalues = sorted(values)
+                invalid[k].update({i: values[i] for i in ivalues})
+                if nulls > 0:
+                    invalid[k].update({str(np.nan): nulls})
+            elif data_in.dtypes.get(col, {}) in properties.numeric_types:
+                values = stats.invalid_values[k]
+                if values.total > 0:
+                    [counts, edges] = values.histogram()
+                    # Following binning approach only if at most 1 sign digit!
+                    bins = [
+                        "-".join([f"{edges[i]:.1f}", f"{edges[i + 1]:.1f}"])
+                        for i in range(0, len(edges) - 1)
+                    ]
+                    invalid[k].update({b: int(count) for b, count in zip(bins, counts)})
+                else:
+                    invalid[k].update({"nan?": values.nulls})
             else:
-                io_dict["invalid"][k].update(
-                    {"nan?": len(io_dict["invalid"][k]["values"])}
-                )
-            sush = io_dict["invalid"][k].pop("values", None)
-    else:
-        sush = io_dict["invalid"].pop(k, None)
-
-# 2.4. Discard invalid data.
-data_invalid = {}
-data_in, data_false = data_in.split_by_boolean_true()
-data_invalid["data"] = data_false.data
-data_invalid["valid_mask"] = data_false.mask
-io_dict["invalid"]["total"] = len(data_false)
-io_dict["processed"] = {"total": len(data_in)}
-
-process = True
-if io_dict["processed"]["total"] == 0:
-    process = False
-    logging.warning("No data to map to CDM after selection and cleaning")
-
-# 3. Map to common data model and output files
-if process:
-    logging.info("Mapping to CDM")
+                invalid[k]["values"] = stats.invalid_values[k]
+        else:
+            invalid.pop(k, None)
+    return invalid
+
+
+def process_file(params, L0_filename):
+    """Map a source-deck monthly file to the CDM chunk by chunk and save its quicklook."""
+    io_dict = {}
+    stats = SimpleNamespace(
+        totals=Counter(),
+        not_selected={},
+        invalid={},
+        invalid_values={},
+        invalid_columns={},
+        written_files=set(),
+    )
     tables = properties.cdm_tables
-    io_dict.update({table: {} for table in tables})
-    logging.debug(f"Mapping attributes: {data_in.dtypes}")
-    data_in.map_model(log_level="INFO", inplace=True)
-
-    logging.info("Printing tables to psv files")
-    data_in.write(
-        out_dir=params.level_path,
-        suffix=params.fileID,
+
+    # 1. Read input file to dataframe
+    logging.info("Reading dataset data")
+    data_in, chunksize = read_input(params, L0_filename)
+
+    # 2. PT fixing, filtering and invalid rejection, then mapping to the common data
+    # model and output, all done a chunk at a time
+    # dataset = ICOADS_R3.0.0T is not "registered" in metmetpy, but icoads_r3000
+    # Modify metmetpy so that it maps ICOADS_R3.0.0T to its own alliaeses
+    # we now do the dirty trick here: dataset_metmetpy = icoads_r3000
+    logging.info("Applying platform type fixtures")
+    if params.filter_reports_by:
+        logging.info("Applying selection filters")
+        for k, v in params.filter_reports_by.items():
+            logging.info("Selecting {} values: {}".format(k, ",".join(v)))
+            stats.not_selected[k] = {"total": 0, "values": Counter()}
+    logging.info("Removing invalid data")
+    logging.info("Mapping to CDM and printing tables to psv files")
+
+    # 3. Map to common data model and output files
+    # Optionally, chunks are mapped in a pool of processes while the next ones are
+    # validated, their tables are still written here in the order of the chunks
+    if params.map_processes:
+        executor = ProcessPoolExecutor(max_workers=params.map_processes)
+    else:
+        executor = None
+    mapping = deque()
+    for data, mask in iter_chunks(data_in, chunksize):
+        chunk = process_chunk(data, mask, data_in, params, stats)
+        if len(chunk) == 0:
+            continue
+        logging.debug(f"Mapping attributes: {chunk.dtypes}")
+        if executor is None:
+            write_out_tables(map_chunk(chunk.data, chunk.imodel), params, stats)
+            continue
+        mapping.append(executor.submit(map_chunk, chunk.data, chunk.imodel))
+        # Keep at most two chunks per process in memory
+        if len(mapping) >= 2 * params.map_processes:
+            write_out_tables(mapping.popleft().result(), params, stats)
+    while mapping:
+        write_out_tables(mapping.popleft().result(), params, stats)
+    if executor is not None:
+        executor.shutdown()
+
+    io_dict["read"] = {"total": stats.totals["read"]}
+
+    if params.filter_reports_by:
+        io_dict["not_selected"] = {}
+        for k, v in stats.not_selected.items():
+            io_dict["not_selected"][k] = {"total": v["total"]}
+            io_dict["not_selected"][k].update(v["values"].most_common())
+        io_dict["not_selected"]["total"] = sum(
+            [v.get("total") for k, v in io_dict["not_selected"].items()]
+        )
+
+    io_dict["pre_selected"] = {"total": stats.totals["pre_selected"]}
+    io_dict["invalid"] = invalid_quicklook(data_in, stats)
+    io_dict["invalid"]["total"] = stats.totals["invalid"]
+    io_dict["processed"] = {"total": stats.totals["processed"]}
+
+    if io_dict["processed"]["total"] == 0:
+        logging.warning("No data to map to CDM after selection and cleaning")
+    else:
+        io_dict.update({table: {"total": stats.totals[table]} for table in tables})
+
+    logging.info("Saving json quicklook")
+    save_quicklook(params, io_dict, date_handler)
+
+
+def main(argv):
+    """Run level1a on the source-deck monthly file given by the configuration file."""
+    # PROCESS INPUT AND MAKE SOME CHECKS --------------------------------------
+    logging.basicConfig(
+        format="%(levelname)s\t[%(asctime)s](%(filename)s)\t%(message)s",
+        level=logging.INFO,
+        datefmt="%Y%m%d %H:%M:%S",
+        filename=None,
     )
 
-    for table in tables:
-        io_dict[table]["total"] = inspect.get_length(data_in.data[table])
+    process_options = [
+        "data_model",
+        "read_sections",
+        "filter_reports_by",
+        "map_processes",
+        "job_memo_mb",
+        "chunksize",
+    ]
+    params = script_setup(process_options, argv)
 
-logging.info("Saving json quicklook")
-save_quicklook(params, io_dict, date_handler)
+    L0_filename = os.path.join(params.prev_level_path, params.filename)
+    if not os.path.isfile(L0_filename):
+        logging.error(f"Could not find data input file: {L0_filename}")
+        sys.exit(1)
 
+    # DO THE DATA PROCESSING --------------------------------------------------
+    process_file(params, L0_filename)
 
-# Output excluded and invalid ---------------------------------------------
-if params.filter_reports_by:
-    for k, v in data_excluded["data"].items():
-        if inspect.get_length(data_excluded["data"][k]) > 0:
-            excluded_filename = os.path.join(
-                params.level_excluded_path,
-                params.fileID + FFS + "_".join(k.split(".")) + ".psv",
-            )
-            logging.info(f"Writing {k} excluded data to file {excluded_filename}")
-            write_out_junk(v, excluded_filename)
+    logging.info("End")
 
-if inspect.get_length(data_invalid["data"]) > 0:
-    invalid_data_filename = os.path.join(
-        params.level_invalid_path, params.fileID + FFS + "data.psv"
-    )
-    invalid_mask_filename = os.path.join(
-        params.level_invalid_path, params.fileID + FFS + "mask.psv"
-    )
-    logging.info(f"Writing invalid data to file {invalid_data_filename}")
-    write_out_junk(data_invalid["data"], invalid_data_filename)
-    logging.info(f"Writing invalid data mask to file {invalid_mask_filename}")
-    write_out_junk(data_invalid["valid_mask"], invalid_mask_filename)
 
-logging.info("End")
+# MAIN ------------------------------------------------------------------------
+if __name__ == "__main__":
+    main(sys.argv)
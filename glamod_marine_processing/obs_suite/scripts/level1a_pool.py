@@ -0,0 +1,189 @@
+"""Run the tasks of a level1a task list in a pool of worker processes.
+
+Each line of the task list (the <sid-dck>.tasks file written by level_slurm.py)
+runs level1a.py on the <sid-dck>_<yyyy>-<mm>.input configuration file of a
+source-deck monthly file. Here, the configuration files are taken from the task
+list and handed to a pool of worker processes instead, each of which starts the
+interpreter and imports cdm_reader_mapper only once and then runs level1a on one
+month after another.
+
+As with the task list, the log of each month is written to
+<sid-dck>_<yyyy>-<mm>.out and <sid-dck>_<yyyy>-<mm>.success or
+<sid-dck>_<yyyy>-<mm>.failure is touched when it is done.
+
+If a worker dies (e.g. killed for running out of memory), the pool breaks and
+its pending tasks are run again in a new pool. Only the tasks that were running
+when a pool broke count as attempted, and they are marked as failed once they
+were running in max_attempts broken pools.
+
+Inargs:
+-------
+tasks: task list file
+-processes: maximum number of worker processes, at most one per CPU the process
+may run on (e.g. as granted by SLURM)
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from multiprocessing import Manager
+
+import level1a
+
+max_attempts = 2
+
+
+# FUNCTIONS -------------------------------------------------------------------
+def read_task_list(tasks_file):
+    """Get the configuration files of the tasks in a task list."""
+    with open(tasks_file) as fh:
+        lines = fh.readlines()
+    config_files = []
+    for line in lines:
+        config_file = re.search(r"\S+\.input", line)
+        if config_file:
+            config_files.append(config_file.group())
+    return config_files
+
+
+def touch(filename):
+    """Create empty file."""
+    with open(filename, "w"):
+        pass
+
+
+def run_task(config_file, running):
+    """Run level1a on a task, logging to its .out file and touching .success or .failure.
+
+    The task is in the shared dictionary running while level1a runs on it.
+    """
+    task = os.path.splitext(config_file)[0]
+    running[config_file] = os.getpid()
+    with open(f"{task}.out", "w") as fh, redirect_stdout(fh), redirect_stderr(fh):
+        # level1a sets up the logging again, to the redirected stderr
+        for handler in logging.root.handlers[:]:
+            logging.root.removeHandler(handler)
+        try:
+            level1a.main([level1a.__file__, config_file])
+            success = True
+        except SystemExit as e:
+            success = e.code in [None, 0]
+        except Exception:
+            logging.error(f"Running task {config_file}", exc_info=True)
+            success = False
+        for handler in logging.root.handlers[:]:
+            logging.root.removeHandler(handler)
+    if success:
+        touch(f"{task}.success")
+    else:
+        touch(f"{task}.failure")
+    running.pop(config_file, None)
+    return success
+
+
+def available_cpus():
+    """Get the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
+
+def run_pool(config_files, processes, running):
+    """Run tasks in a pool until they are done or the pool breaks.
+
+    Returns the number of failed tasks and the tasks left when the pool broke.
+    """
+    failed = 0
+    broken = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            executor.submit(run_task, config_file, running): config_file
+            for config_file in config_files
+        }
+        for future in as_completed(futures):
+            config_file = futures[future]
+            try:
+                success = future.result()
+            except BrokenProcessPool:
+                # A worker died, whether or not this task has run
+                broken.append(config_file)
+                continue
+            except Exception:
+                logging.error(f"Running task {config_file}", exc_info=True)
+                touch(f"{os.path.splitext(config_file)[0]}.failure")
+                success = False
+            if success:
+                logging.info(f"Task {config_file} was successful")
+            else:
+                logging.warning(f"Task {config_file} failed")
+                failed += 1
+    if broken:
+        logging.error(f"Pool broke with {len(broken)} tasks left")
+    return failed, broken
+
+
+def main(argv):
+    """Run the tasks of a level1a task list in a pool of worker processes."""
+    logging.basicConfig(
+        format="%(levelname)s\t[%(asctime)s](%(filename)s)\t%(message)s",
+        level=logging.INFO,
+        datefmt="%Y%m%d %H:%M:%S",
+        filename=None,
+    )
+
+    parser = argparse.ArgumentParser(description="Run level1a tasks in a pool")
+    parser.add_argument("tasks", type=str, help="task list file")
+    parser.add_argument(
+        "-processes", type=int, default=1, help="maximum number of worker processes"
+    )
+    args = parser.parse_args(argv)
+
+    config_files = read_task_list(args.tasks)
+    n_tasks = len(config_files)
+    processes = min(args.processes, available_cpus())
+    if processes < args.processes:
+        logging.warning(
+            f"Only {processes} CPUs available for {args.processes} processes"
+        )
+    logging.info(f"Running {n_tasks} tasks in {processes} processes")
+
+    failed = 0
+    attempts = Counter()
+    with Manager() as manager:
+        running = manager.dict()
+        while config_files:
+            failed_pool, broken = run_pool(config_files, processes, running)
+            failed += failed_pool
+            # Only the tasks running when the pool broke have been attempted,
+            # unless none was and there is nothing to tell them apart
+            attempted = [c for c in broken if c in running] or broken
+            attempts.update(attempted)
+            config_files = []
+            for config_file in broken:
+                if attempts[config_file] < max_attempts:
+                    config_files.append(config_file)
+                else:
+                    logging.warning(f"Task {config_file} failed")
+                    touch(f"{os.path.splitext(config_file)[0]}.failure")
+                    failed += 1
+            running.clear()
+            if config_files:
+                logging.warning(
+                    f"Running {len(config_files)} tasks again in a new pool"
+                )
+
+    logging.info(f"{n_tasks - failed} tasks successful, {failed} failed")
+    if failed > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -128,7 +128,7 @@ from importlib import reload
 
 import numpy as np
 import pandas as pd
-from _qc import wind_qc
+from _qc import read_qc_dataset, read_qc_index, wind_qc
 from _utilities import (
     date_handler,
     paths_exist,
@@ -145,25 +145,63 @@ reload(logging)  # This is to override potential previous config of logging
 
 # Functions--------------------------------------------------------------------
 # This is to get the unique flag per parameter
-def get_qc_flags(qc, qc_df_full):
-    """Get QC flag."""
-    qc_avail = True
-    bad_flag = "1" if qc != "POS" else "2"
-    good_flag = "0"
+def get_qc_filename(qc):
+    """
+    Get QC file name. The monthly index of the QC flags by UID is used if there is one,
+    then the partition of the monthly Parquet dataset, otherwise the csv file, or the
+    gzipped file if there is no plain one.
+    """
+    qc_index = os.path.join(
+        qc_path,
+        params.year,
+        params.month,
+        "_".join(["qc", params.year + params.month, "CCIrun.index"]),
+    )
+    if os.path.isdir(qc_index):
+        return qc_index
+    qc_dataset = os.path.join(
+        qc_path,
+        params.year,
+        params.month,
+        "_".join(["qc", params.year + params.month, "CCIrun.parquet"]),
+        "qc=" + qc,
+    )
+    if os.path.isdir(qc_dataset):
+        return qc_dataset
     qc_filename = os.path.join(
         qc_path,
         params.year,
         params.month,
         "_".join([qc, "qc", params.year + params.month, "CCIrun.csv"]),
     )
+    if not os.path.isfile(qc_filename) and os.path.isfile(qc_filename + ".gz"):
+        return qc_filename + ".gz"
+    return qc_filename
+
+
+def get_qc_flags(qc, qc_df_full):
+    """Get QC flag."""
+    qc_avail = True
+    bad_flag = "1" if qc != "POS" else "2"
+    good_flag = "0"
+    qc_filename = get_qc_filename(qc)
     logging.info(f"Reading {qc} qc file: {qc_filename}")
-    qc_df = pd.read_csv(
-        qc_filename,
-        dtype=qc_dtype,
-        usecols=qc_columns.get(qc),
-        delimiter=qc_delimiter,
-        on_bad_lines="skip",
-    )
+    if os.path.isfile(os.path.join(qc_filename, "UID.npy")):
+        qc_df = read_qc_index(
+            qc_filename, qc, qc_columns.get(qc), header_db.index.dropna()
+        )
+    elif os.path.isdir(qc_filename):
+        qc_df = read_qc_dataset(
+            qc_filename, qc_columns.get(qc), header_db.index.dropna()
+        )
+    else:
+        qc_df = pd.read_csv(
+            qc_filename,
+            dtype=qc_dtype,
+            usecols=qc_columns.get(qc),
+            delimiter=qc_delimiter,
+            on_bad_lines="skip",
+        )
     # Map UID to CDM (hardcoded source ICOADS_R3.0.0T here!!!!!)
     # and keep only reports from current monthly table
     # qc_df['UID'] = 'ICOADS-30-' + qc_df['UID']
@@ -394,14 +432,9 @@ paths_exist(qc_path)
 
 # Check we have QC files!
 logging.info(f"Using qc files in {qc_path}")
-qc_pos_filename = os.path.join(
-    qc_path,
-    params.year,
-    params.month,
-    "_".join(["POS", "qc", params.year + params.month, "CCIrun.csv"]),
-)
+qc_pos_filename = get_qc_filename("POS")
 qc_avail = True
-if not os.path.isfile(qc_pos_filename):
+if not os.path.exists(qc_pos_filename):
     file_date = datetime.datetime.strptime(
         str(params.year) + "-" + str(params.month), "%Y-%m"
     )
@@ -46,6 +46,7 @@ JOBSFN = "jobs2.json"
 NODES = slurm_preferences.nodesi[mode]
 TI = slurm_preferences.ti[mode]
 TasksPN = slurm_preferences.TaskPNi[mode]
+CPUsPT = slurm_preferences.cpus_per_taski[mode]
 
 # %%------------------------------------------------------------------------------
 
@@ -90,6 +91,11 @@ for job_id in job_ids:
     else:
         jobs_torun.append(job_id)
 
+# marine_qc.py runs the track checks on the CPUs of its task
+options = "-tracking"
+if mode == "qc":
+    options += f" -processes {CPUsPT}"
+
 calc_tasks = False
 with open(taskfile, "w") as fn:
     for job_id in jobs_torun:
@@ -108,9 +114,9 @@ with open(taskfile, "w") as fn:
             os.remove(os.path.join(logdir, f"{job_id}.success"))
         calc_tasks = True
         fn.writelines(
-            "python {0} -jobs {1} -job_index {2} -config {3} -tracking > {4}/{2}.out 2> {4}/{2}.err;"
+            "python {0} -jobs {1} -job_index {2} -config {3} {5} > {4}/{2}.out 2> {4}/{2}.err;"
             " if [ $? -eq 0 ]; then touch {4}/{2}.success; else touch {4}/{2}.failure; fi \n".format(
-                pyscript, jobsfile, job_id, configfile, logdir
+                pyscript, jobsfile, job_id, configfile, logdir, options
             )
         )
 
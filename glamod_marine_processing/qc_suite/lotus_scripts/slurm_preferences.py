@@ -10,11 +10,21 @@ nodesi = {
     "qc_hr": 1,
 }
 
+# Tasks per node. A qc task holds about 1.8 kB per report of its three months once the
+# Deck is built and three days of OSTIA fields (about 0.8 GB). Its buddy check grids
+# peak at about 80 MB (150 MB when they held all 73 pentads), too small a part of
+# that to run more tasks per node.
 TaskPNi = {
     "qc": 3,
     "qc_hr": 1,
 }
 
+# CPUs for each task, marine_qc.py runs the track checks in a pool of this many processes
+cpus_per_taski = {
+    "qc": 8,
+    "qc_hr": 1,
+}
+
 ti = {"qc": "06:00:00", "qc_hr": "09:00:00"}
 
 logdir = {
@@ -6,6 +6,11 @@ changed in moving from one system to another.
 from __future__ import annotations
 
 import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from . import Climatology as clim
 
 
 def process_bad_id_file(bad_id_file):
@@ -233,3 +238,125 @@ def get_background_filename(dirstubs, filenamestubs, year, month, day):
     outfile = chosen_orig
 
     return outfile
+
+
+class BackgroundFieldCache:
+    """
+    Class for reading daily OSTIA background fields. Fields are read on a background thread, the field for the
+    day after the one requested is read in advance, and the most recently used fields are kept in memory.
+    Close the cache, or use it as a context manager, to stop the reading thread.
+    """
+
+    def __init__(
+        self,
+        dirstubs,
+        filenamestubs,
+        variables=("analysed_sst", "sea_ice_fraction"),
+        maxsize=3,
+    ):
+        """
+        Set up a cache of daily background fields
+
+        :param dirstubs: list of directory name stubs
+        :param filenamestubs: list of filename stubs
+        :param variables: the variable names to be extracted from each background file
+        :param maxsize: number of days of fields to keep in memory
+        :type dirstubs: list of strings
+        :type filenamestubs: list of strings
+        :type variables: sequence of strings
+        :type maxsize: integer
+        """
+        assert maxsize >= 2, "cache must hold the current and next day"
+        self.dirstubs = dirstubs
+        self.filenamestubs = filenamestubs
+        self.variables = list(variables)
+        self.maxsize = maxsize
+        self.fields = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def __enter__(self):
+        """Use the cache as a context manager, which closes it on exit"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the cache"""
+        self.close()
+
+    def close(self):
+        """Stop the reading thread, dropping fields that have not started to be read, and empty the cache"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.fields.clear()
+
+    def read(self, year, month, day):
+        """
+        Read the background fields for the specified day. The whole global field is read, as the reports
+        for a day may be anywhere on the globe.
+
+        :param year: year of the background field
+        :param month: month of the background field
+        :param day: day of the background field
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :return: dictionary of climatologies keyed by variable name
+        :rtype: dict of Climatology
+        """
+        filename = get_background_filename(
+            self.dirstubs, self.filenamestubs, year, month, day
+        )
+        climatologies = clim.Climatology.from_filename_variables(
+            filename, self.variables
+        )
+        return dict(zip(self.variables, climatologies))
+
+    def request(self, year, month, day):
+        """
+        Start reading the background fields for the specified day, if they are not already in the cache,
+        and mark them as the most recently used.
+
+        :param year: year of the background field
+        :param month: month of the background field
+        :param day: day of the background field
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :return: future holding the dictionary of climatologies keyed by variable name
+        :rtype: concurrent.futures.Future
+        """
+        key = (year, month, day)
+        if key in self.fields:
+            self.fields.move_to_end(key)
+        else:
+            self.fields[key] = self.executor.submit(self.read, year, month, day)
+            while len(self.fields) > self.maxsize:
+                self.fields.popitem(last=False)
+        return self.fields[key]
+
+    def get_fields(self, year, month, day):
+        """
+        Get the background fields for the specified day and start reading the fields for the following day
+
+        :param year: year of the background field
+        :param month: month of the background field
+        :param day: day of the background field
+        :type year: integer
+        :type month: integer
+        :type day: integer
+        :return: dictionary of climatologies keyed by variable name
+        :rtype: dict of Climatology
+        """
+        if year is None or month is None or day is None:
+            return dict(
+                zip(
+                    self.variables,
+                    clim.Climatology.from_filename_variables(None, self.variables),
+                )
+            )
+
+        future = self.request(year, month, day)
+
+        tomorrow = date(year, month, day) + timedelta(1)
+        self.request(tomorrow.year, tomorrow.month, tomorrow.day)
+        self.fields.move_to_end((year, month, day))
+
+        return future.result()
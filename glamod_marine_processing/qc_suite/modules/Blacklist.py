@@ -0,0 +1,226 @@
+"""
+Blacklist module. The rules used to blacklist reports are read from a json file (by default
+configuration_files/blacklist.json) and each rule is evaluated on whole columns of reports.
+
+The file holds a dictionary of named "regions", each of which is a box [western longitude,
+southern latitude, eastern longitude, northern latitude], and a list of "rules". A report
+is blacklisted if it matches all the conditions of any one rule. The conditions of a rule
+are given by the keys:
+
+* "ID", "DCK", "PT", "YR", "MO": lists of IDs, decks, platform types, years or months
+* "YRMO": list of [year, month] pairs
+* "regions": list of region names or boxes. The report must lie in one of the regions.
+
+Rules can be added without changing the file by listing them under "blacklist_rules" in
+the base QC parameters, see func:`get_blacklist`.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BLACKLIST_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "configuration_files",
+    "blacklist.json",
+)
+
+RULE_KEYS = ["name", "ID", "DCK", "PT", "YR", "MO", "YRMO", "regions"]
+
+
+def _isin(column, values):
+    """
+    Test which elements of a column are in values
+
+    :param column: column of report values
+    :param values: values to look for
+    :type column: numpy array
+    :type values: tuple
+    :return: True where the element is in values
+    :rtype: numpy array of booleans
+    """
+    if column.dtype == object:
+        return pd.Series(column, dtype=object).isin(values).to_numpy()
+    return np.isin(column, values)
+
+
+class Blacklist:
+    """Class holding a set of blacklist rules which can be applied to columns of reports."""
+
+    def __init__(self, rules, regions=None):
+        """
+        Compile the blacklist rules
+
+        :param rules: list of rules, each of which is a dictionary of conditions
+        :param regions: dictionary of named regions which can be referred to in the rules
+        :type rules: list of dictionaries
+        :type regions: dictionary
+        """
+        if regions is None:
+            regions = {}
+        self.regions = regions
+        self.rules = [self._compile(rule) for rule in rules]
+
+    @classmethod
+    def from_filename(cls, filename):
+        """
+        Read the blacklist rules from a json file
+
+        :param filename: name of the json file holding the regions and rules
+        :type filename: string
+        :return: blacklist
+        :rtype: class`.Blacklist`
+        """
+        with open(filename) as f:
+            contents = json.load(f)
+        return cls(contents["rules"], contents.get("regions"))
+
+    def _compile(self, rule):
+        """
+        Turn a rule into a list of (column, values) conditions and an array of region boxes
+
+        :param rule: dictionary of conditions
+        :type rule: dictionary
+        :return: conditions and region boxes (or None if the rule has no regions)
+        :rtype: tuple
+        """
+        for key in rule:
+            assert key in RULE_KEYS, f"unknown key {key} in blacklist rule"
+
+        conditions = []
+        for key in ["ID", "DCK", "PT", "YR", "MO"]:
+            if key in rule:
+                conditions.append((key, tuple(rule[key])))
+        if "YRMO" in rule:
+            conditions.append(
+                ("YRMO", tuple(year * 12 + month for year, month in rule["YRMO"]))
+            )
+
+        boxes = None
+        if "regions" in rule:
+            boxes = np.array(
+                [
+                    self.regions[region] if isinstance(region, str) else region
+                    for region in rule["regions"]
+                ],
+                dtype=float,
+            )
+            assert boxes.ndim == 2 and boxes.shape[1] == 4, "regions are awry"
+
+        assert len(conditions) > 0 or boxes is not None, "empty blacklist rule"
+
+        return conditions, boxes
+
+    def extended(self, rules):
+        """
+        Get a new blacklist holding these rules as well as the rules of this one
+
+        :param rules: list of extra rules, which can refer to the regions of this blacklist
+        :type rules: list of dictionaries
+        :return: blacklist
+        :rtype: class`.Blacklist`
+        """
+        blacklist = Blacklist([], self.regions)
+        blacklist.rules = self.rules + [blacklist._compile(rule) for rule in rules]
+        return blacklist
+
+    def test(self, inid, indeck, inyear, inmonth, inlat, inlon, inpt):
+        """
+        Find the reports matched by any of the rules
+
+        :param inid: IDs of the reports
+        :param indeck: Decks of the reports
+        :param inyear: years of the reports
+        :param inmonth: months of the reports
+        :param inlat: latitudes of the reports
+        :param inlon: longitudes of the reports, between -180 and 180
+        :param inpt: platform types of the reports
+        :type inid: numpy array
+        :type indeck: numpy array
+        :type inyear: numpy array
+        :type inmonth: numpy array
+        :type inlat: numpy array
+        :type inlon: numpy array
+        :type inpt: numpy array
+        :return: True where the report is blacklisted
+        :rtype: numpy array of booleans
+        """
+        columns = {
+            "ID": np.asarray(inid, dtype=object),
+            "DCK": indeck,
+            "PT": inpt,
+            "YR": inyear,
+            "MO": inmonth,
+            "YRMO": inyear * 12 + inmonth,
+        }
+
+        # The first condition of a rule is tested on the whole column and is often shared
+        # by several rules (e.g. Deck 732), later conditions only on the reports still selected
+        first_selections = {}
+
+        result = np.zeros(len(inlat), dtype=bool)
+        for conditions, boxes in self.rules:
+            ind = None
+            for key, values in conditions:
+                if ind is None:
+                    if (key, values) not in first_selections:
+                        first_selections[(key, values)] = np.flatnonzero(
+                            _isin(columns[key], values)
+                        )
+                    ind = first_selections[(key, values)]
+                else:
+                    ind = ind[_isin(columns[key][ind], values)]
+            if ind is None:
+                ind = np.arange(len(inlat))
+
+            if boxes is not None:
+                lat = inlat[ind, np.newaxis]
+                lon = inlon[ind, np.newaxis]
+                ind = ind[
+                    np.any(
+                        (boxes[:, 0] <= lon)
+                        & (lon <= boxes[:, 2])
+                        & (boxes[:, 1] <= lat)
+                        & (lat <= boxes[:, 3]),
+                        axis=1,
+                    )
+                ]
+
+            result[ind] = True
+
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def read_blacklist(filename=DEFAULT_BLACKLIST_FILE):
+    """
+    Read the blacklist rules from a json file. Each file is only read once.
+
+    :param filename: name of the json file holding the regions and rules
+    :type filename: string
+    :return: blacklist
+    :rtype: class`.Blacklist`
+    """
+    return Blacklist.from_filename(filename)
+
+
+def get_blacklist(parameters):
+    """
+    Get the blacklist specified by the base QC parameters. The rules are read from the file
+    "blacklist_file" (default DEFAULT_BLACKLIST_FILE) and any rules listed in
+    "blacklist_rules" are added to them.
+
+    :param parameters: base QC parameters
+    :type parameters: dict
+    :return: blacklist
+    :rtype: class`.Blacklist`
+    """
+    blacklist = read_blacklist(parameters.get("blacklist_file", DEFAULT_BLACKLIST_FILE))
+    if "blacklist_rules" in parameters:
+        blacklist = blacklist.extended(parameters["blacklist_rules"])
+    return blacklist
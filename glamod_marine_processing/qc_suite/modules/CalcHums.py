@@ -1,6 +1,8 @@
 """
 The CalcHums module contains a set of functions for calculating humidity
-variables. At present it can only cope with scalars, not arrays.
+variables. At present they can only cope with scalars, not arrays, but there
+are array versions of the functions that calculate humidity variables from
+dew point temperature, temperature and pressure, named <function>_array.
 
 There are routines for:
 specific humidity from dew point temperature and temperature and pressure
@@ -105,6 +107,70 @@ def vap(td, t, p, roundit=True):
     return e
 
 
+def _vap_array(td, t, p):
+    """
+    Calculate unrounded vapour pressures from arrays of dew point temperature, dry bulb
+    temperature and pressure, with respect to ice where the pseudo-wet bulb temperature
+    is at or below 0 deg C. These are the vapour pressures calculated by func:`vap`.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param p: pressure at observation level in hPa
+    :type td: numpy array
+    :type t: numpy array
+    :type p: numpy array
+    :return: vapour pressure in hPa
+    :rtype: numpy array
+    """
+    # Calculate pseudo-e assuming wet bulb to calculate a
+    # pseudo-wet bulb (see wb below)
+    f = 1 + (7.0 * (10 ** (-4.0))) + ((3.46 * (10 ** (-6.0))) * p)
+    e = 6.1121 * f * np.exp(((18.729 - (td / 227.3)) * td) / (257.87 + td))
+
+    a = 0.000066 * p
+    b = (409.8 * e) / ((td + 237.3) ** 2)
+    w = ((a * t) + (b * td)) / (a + b)
+
+    # Now test for whether pseudo-wetbulb is above or below/equal to zero
+    # to establish whether to calculate e with respect to ice or water
+    # recalc if ice
+    ice = w <= 0.0
+    f = 1 + (3.0 * (10 ** (-4.0))) + ((4.18 * (10 ** (-6.0))) * p[ice])
+    e[ice] = (
+        6.1115
+        * f
+        * np.exp(((23.036 - (td[ice] / 333.7)) * td[ice]) / (279.82 + td[ice]))
+    )
+
+    return e
+
+
+def _round_array(x, roundit):
+    """Round an array to one decimal place in the same way as the scalar functions if roundit is True."""
+    if roundit:
+        return np.round(x * 10.0) / 10.0
+    return x
+
+
+def vap_array(td, t, p, roundit=True):
+    """
+    Calculate vapour pressures from arrays of dew point temperature, dry bulb temperature
+    and pressure. Array version of func:`vap`, the arrays must not contain missing data.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param p: pressure at observation level in hPa
+    :param roundit: flag to tell function to round to one decimal place, default TRUE
+    :type td: numpy array
+    :type t: numpy array
+    :type p: numpy array
+    :type roundit: boolean
+    :return: vapour pressure in hPa
+    :rtype: numpy array
+    """
+    return _round_array(_vap_array(td, t, p), roundit)
+
+
 def vap_from_sh(sh, p, roundit=True):
     """
     Calculate a vapour pressure scalar or array
@@ -212,6 +278,27 @@ def sh(td, t, p, roundit=True):
     return q
 
 
+def sh_array(td, t, p, roundit=True):
+    """
+    Calculate specific humidities from arrays of dew point temperature, dry bulb temperature
+    and pressure. Array version of func:`sh`, the arrays must not contain missing data.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param p: pressure at observation level in hPa
+    :param roundit: flag to tell function to round to one decimal place, default TRUE
+    :type td: numpy array
+    :type t: numpy array
+    :type p: numpy array
+    :type roundit: boolean
+    :return: specific humidity in g/kg
+    :rtype: numpy array
+    """
+    e = _vap_array(td, t, p)
+    q = 1000.0 * ((0.622 * e) / (p - ((1 - 0.622) * e)))
+    return _round_array(q, roundit)
+
+
 def sh_from_vap(e, p, roundit=True):
     """
     Calculate a specific humidity scalar or array
@@ -343,6 +430,30 @@ def rh(td, t, p, roundit=True):
     return r
 
 
+def rh_array(td, t, p, roundit=True):
+    """
+    Calculate relative humidities from arrays of dew point temperature, dry bulb temperature
+    and pressure. Array version of func:`rh`, the arrays must not contain missing data.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param p: pressure at observation level in hPa
+    :param roundit: flag to tell function to round to one decimal place, default TRUE
+    :type td: numpy array
+    :type t: numpy array
+    :type p: numpy array
+    :type roundit: boolean
+    :return: relative humidity in %rh
+    :rtype: numpy array
+    """
+    e = _vap_array(td, t, p)
+    # USING t INSTEAD OF td FOR SATURATED VAPOUR PRESSURE
+    # (WET BULB T = T AT SATURATION)
+    es = _vap_array(t, t, p)
+    r = (e / es) * 100.0
+    return _round_array(r, roundit)
+
+
 def wb(td, t, p, roundit=True):
     """
     Calculate a wet bulb temperature scalar or array
@@ -416,6 +527,32 @@ def wb(td, t, p, roundit=True):
     return w
 
 
+def wb_array(td, t, p, roundit=True):
+    """
+    Calculate wet bulb temperatures from arrays of dew point temperature, dry bulb temperature
+    and pressure. Array version of func:`wb`, the arrays must not contain missing data.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param p: pressure at observation level in hPa
+    :param roundit: flag to tell function to round to one decimal place, default TRUE
+    :type td: numpy array
+    :type t: numpy array
+    :type p: numpy array
+    :type roundit: boolean
+    :return: wet bulb temperature in degrees C
+    :rtype: numpy array
+    """
+    e = _vap_array(td, t, p)
+
+    # Now calculate a slightly better w
+    a = 0.000066 * p
+    b = (409.8 * e) / ((td + 237.3) ** 2)
+
+    w = ((a * t) + (b * td)) / (a + b)
+    return _round_array(w, roundit)
+
+
 def dpd(td, t, roundit=True):
     """
     Calculate a dew point depression scalar or array
@@ -455,6 +592,23 @@ def dpd(td, t, roundit=True):
     return dp
 
 
+def dpd_array(td, t, roundit=True):
+    """
+    Calculate dew point depressions from arrays of dew point temperature and dry bulb
+    temperature. Array version of func:`dpd`, the arrays must not contain missing data.
+
+    :param td: dew point temperature in degrees C
+    :param t: dry bulb temperature in degrees C
+    :param roundit: flag to tell function to round to one decimal place, default TRUE
+    :type td: numpy array
+    :type t: numpy array
+    :type roundit: boolean
+    :return: dew point depression in degrees C
+    :rtype: numpy array
+    """
+    return _round_array(t - td, roundit)
+
+
 def td_from_vap(e, p, t, roundit=True):
     """
     Calculate a dew point depression scalar or array
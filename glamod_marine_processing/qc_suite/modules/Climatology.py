@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import os
+import threading
+
 import numpy as np
 from netCDF4 import Dataset
 
 from . import qc
 
+netcdf_lock = threading.Lock()
+
 
 class Climatology:
     """
@@ -27,20 +34,58 @@ class Climatology:
         self.res = 180.0 / self.field.shape[1]
 
     @classmethod
-    def from_filename(cls, infile, var):
+    def from_filename(cls, infile, var, cache_dir=None):
         """
         Read in the climatology for variable var from infile
 
         :param infile: filename of a netcdf file
         :param var: the variable name to be extracted from the netcdf file
+        :param cache_dir: directory in which to cache the climatology, if None the cache is not used
         :type infile: string
         :type var: string
+        :type cache_dir: string
+
+        If a cache directory is given, the field is saved there as a .npy file the first time
+        it is read and later reads of the same file and variable open the cached copy as a
+        read-only memory map, so that processes on the same node share one copy of the field.
+        Cached copies of earlier versions of the file are removed when a new one is saved.
+        """
+        if cache_dir is not None and infile is not None:
+            cache_file = cls.cache_filename(infile, var, cache_dir)
+            field = cls.read_cache(cache_file)
+            if field is None:
+                field = cls.from_filename(infile, var).field
+                cls.write_cache(cache_file, field)
+                cls.prune_cache(cache_file)
+            return cls(field)
+
+        return cls.from_filename_variables(infile, [var])[0]
+
+    @classmethod
+    def from_filename_variables(cls, infile, variables):
+        """
+        Read in climatologies for several variables from infile, opening the file once
+
+        :param infile: filename of a netcdf file
+        :param variables: the variable names to be extracted from the netcdf file
+        :type infile: string
+        :type variables: list of strings
+        :return: a climatology for each variable
+        :rtype: list of Climatology
         """
+        if infile is None:
+            return [
+                cls(np.ma.array(np.zeros((1, 180 * 20, 360 * 20)), mask=True))
+                for _ in variables
+            ]
+
         latitudes = None
         longitudes = None
-        if infile is not None:
+
+        # the netCDF library is not thread safe, so files are read one at a time
+        with netcdf_lock:
             climatology = Dataset(infile)
-            field = climatology.variables[var][:]
+            fields = [climatology.variables[var][:] for var in variables]
 
             lat_synonyms = ["lat", "lats", "latitude", "latitudes"]
             found_lat = False
@@ -64,6 +109,8 @@ class Climatology:
 
             climatology.close()
 
+        climatologies = []
+        for field in fields:
             # transpose the fields if the second axis is longitude
             if field.shape[0] == 1 and field.shape[1] == 360 and field.shape[2] == 180:
                 field = field.transpose(0, 2, 1)
@@ -81,10 +128,104 @@ class Climatology:
             if field.ndim == 4:
                 field = field[:, 0, :, :]
 
-        else:
-            field = np.ma.array(np.zeros((1, 180 * 20, 360 * 20)), mask=True)
+            climatologies.append(cls(field))
+
+        return climatologies
+
+    @staticmethod
+    def cache_filename(infile, var, cache_dir):
+        """
+        Get the name of the cache file for variable var from infile. The name is made of the
+        stem of infile, var, a digest of the path of infile and its modification time, so a
+        changed file gets a new cache file.
+
+        :param infile: filename of a netcdf file
+        :param var: the variable name to be extracted from the netcdf file
+        :param cache_dir: directory in which the climatology is cached
+        :type infile: string
+        :type var: string
+        :type cache_dir: string
+        :return: path of the cache file without extension
+        :rtype: string
+        """
+        infile = os.path.abspath(infile)
+        digest = hashlib.sha256(f"{infile}:{var}".encode()).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(infile))[0]
+        mtime = os.stat(infile).st_mtime_ns
+        return os.path.join(cache_dir, f"{stem}_{var}_{digest}_{mtime}")
+
+    @staticmethod
+    def read_cache(cache_file):
+        """
+        Open a cached climatology as a read-only memory map
+
+        :param cache_file: path of the cache file without extension
+        :type cache_file: string
+        :return: the field, or None if it is not in the cache
+        :rtype: numpy array or numpy masked array
+        """
+        if not os.path.exists(cache_file + ".npy"):
+            return None
 
-        return cls(field)
+        field = np.load(cache_file + ".npy", mmap_mode="r")
+        if os.path.exists(cache_file + ".mask.npy"):
+            mask = np.load(cache_file + ".mask.npy", mmap_mode="r")
+            field = np.ma.MaskedArray(field, mask=mask, copy=False)
+
+        return field
+
+    @staticmethod
+    def write_cache(cache_file, field):
+        """
+        Save a climatology to the cache. Files are written under a temporary name and then
+        renamed so that other processes never see a partly written file.
+
+        :param cache_file: path of the cache file without extension
+        :param field: the climatology field
+        :type cache_file: string
+        :type field: numpy array or numpy masked array
+        """
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+        # the mask goes first so that a data file is never found without its mask
+        mask = np.ma.getmask(field)
+        arrays = [(".npy", np.ma.getdata(field))]
+        if mask is not np.ma.nomask:
+            arrays.insert(0, (".mask.npy", mask))
+
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            for extension, array in arrays:
+                with open(tmp_file, "wb") as fp:
+                    np.save(fp, array)
+                os.replace(tmp_file, cache_file + extension)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    @staticmethod
+    def prune_cache(cache_file):
+        """
+        Remove the cache files of the same stem, variable and file as cache_file which were
+        saved from earlier versions of the file
+
+        :param cache_file: path of the cache file without extension
+        :type cache_file: string
+        """
+        cache_dir, name = os.path.split(cache_file)
+        prefix = name.rsplit("_", 1)[0] + "_"
+        for filename in os.listdir(cache_dir):
+            for extension in (".mask.npy", ".npy"):
+                if filename.endswith(extension):
+                    stale = filename[: -len(extension)]
+                    break
+            else:
+                continue
+            if stale.startswith(prefix) and stale[len(prefix) :].isdigit():
+                if stale != name:
+                    # another process may have removed it already
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(cache_dir, filename))
 
     def get_tindex(self, month, day):
         """Get the time index of the input month and day.
@@ -107,6 +248,150 @@ class Climatology:
 
         return tindex
 
+    def get_tindex_array(self, month, day):
+        """Get the time indices of the input months and days. Array version of func:`get_tindex`.
+
+        :param month: months for which the time index is required
+        :param day: days for which the time index is required
+        :type month: numpy array of integers
+        :type day: numpy array of integers
+        :return: time indices for specified months and days.
+        :rtype: numpy array of integers
+        """
+        if self.n == 73:
+            return qc.which_pentad_array(month, day) - 1
+        if self.n == 365:
+            return qc.day_in_year_array(month, day) - 1
+        return np.zeros(len(month), dtype=int)
+
+    def _get_values_at_indices(self, valid, tindex, yindex, xindex):
+        """
+        Extract values from the climatology at the given indices
+
+        :param valid: set to True where the indices are to be used
+        :param tindex: time indices of the valid points
+        :param yindex: y indices of the valid points
+        :param xindex: x indices of the valid points
+        :type valid: numpy array of bools
+        :type tindex: numpy array of integers
+        :type yindex: numpy array of integers
+        :type xindex: numpy array of integers
+        :return: climatology values, NaN where the point is not valid or the climatology is masked
+        :rtype: numpy array of floats
+        """
+        result = np.full(len(valid), np.nan)
+
+        values = self.field[tindex, yindex, xindex]
+        mask = np.ma.getmaskarray(values)
+        values = np.ma.getdata(values).astype(float)
+        values[mask] = np.nan
+
+        result[valid] = values
+
+        return result
+
+    def _valid_dates(self, lat, lon, month, day):
+        """
+        Find which points have a position and a valid month and day
+
+        :param lat: latitudes of locations
+        :param lon: longitudes of locations
+        :param month: months, NaN if missing
+        :param day: days, NaN if missing
+        :type lat: numpy array of floats
+        :type lon: numpy array of floats
+        :type month: numpy array of floats
+        :type day: numpy array of floats
+        :return: True for points with a valid date and position
+        :rtype: numpy array of bools
+        """
+        valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(month) | np.isnan(day))
+        valid[valid] = (month[valid] >= 1) & (month[valid] <= 12)
+        valid[valid] = (day[valid] >= 1) & (
+            day[valid] <= qc.leap_year_month_lengths[month[valid].astype(int) - 1]
+        )
+        return valid
+
+    def get_values_ostia(self, lat, lon):
+        """
+        Get values from the OSTIA field at many locations. Array version of func:`get_value_ostia`.
+
+        :param lat: latitudes of locations to extract values from in degrees of arc
+        :param lon: longitudes of locations to extract values from in degrees of arc
+        :return: SSTs at those locations, NaN where there is no value
+        :type lat: numpy array of floats
+        :type lon: numpy array of floats
+        :rtype: numpy array of floats
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+
+        yindex = qc.mds_lat_to_yindex_array(lat[valid], res=0.05)
+        xindex = qc.mds_lon_to_xindex_array(lon[valid], res=0.05)
+        tindex = np.zeros(len(yindex), dtype=int)
+
+        return self._get_values_at_indices(valid, tindex, yindex, xindex)
+
+    def get_values_mds_style(self, lat, lon, month, day):
+        """
+        Get values from the climatology at many positions and times using the MDS method
+        for deciding which grid cell borderline cases fall into. Array version of
+        func:`get_value_mds_style`.
+
+        :param lat: latitudes of locations to extract values from in degrees
+        :param lon: longitudes of locations to extract values from in degrees
+        :param month: months for which the values are required, NaN if missing
+        :param day: days for which the values are required, NaN if missing
+        :type lat: numpy array of floats
+        :type lon: numpy array of floats
+        :type month: numpy array of floats
+        :type day: numpy array of floats
+        :return: climatology values at specified locations and times, NaN where there is no value
+        :rtype: numpy array of floats
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        month = np.asarray(month, dtype=float)
+        day = np.asarray(day, dtype=float)
+
+        valid = self._valid_dates(lat, lon, month, day)
+
+        yindex = qc.mds_lat_to_yindex_array(lat[valid])
+        xindex = qc.mds_lon_to_xindex_array(lon[valid])
+        tindex = self.get_tindex_array(month[valid], day[valid])
+
+        return self._get_values_at_indices(valid, tindex, yindex, xindex)
+
+    def get_values(self, lat, lon, month, day):
+        """
+        Get values from the climatology at many positions and times. Array version of func:`get_value`.
+
+        :param lat: latitudes of locations to extract values from in degrees
+        :param lon: longitudes of locations to extract values from in degrees
+        :param month: months for which the values are required, NaN if missing
+        :param day: days for which the values are required, NaN if missing
+        :type lat: numpy array of floats
+        :type lon: numpy array of floats
+        :type month: numpy array of floats
+        :type day: numpy array of floats
+        :return: climatology values at specified locations and times, NaN where there is no value
+        :rtype: numpy array of floats
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        month = np.asarray(month, dtype=float)
+        day = np.asarray(day, dtype=float)
+
+        valid = self._valid_dates(lat, lon, month, day)
+
+        yindex = qc.lat_to_yindex_array(lat[valid], self.res)
+        xindex = qc.lon_to_xindex_array(lon[valid], self.res)
+        tindex = self.get_tindex_array(month[valid], day[valid])
+
+        return self._get_values_at_indices(valid, tindex, yindex, xindex)
+
     def get_value_ostia(self, lat, lon):
         """
         :param lat: latitude of location to extract value from in degrees of arc
@@ -155,8 +440,7 @@ class Climatology:
             return
         if month < 1 or month > 12:
             return
-        ml = qc.get_month_lengths(2004)
-        if day < 1 or day > ml[month - 1]:
+        if day < 1 or day > qc.leap_year_month_lengths[month - 1]:
             return
 
         yindex = qc.mds_lat_to_yindex(lat)
@@ -196,8 +480,7 @@ class Climatology:
             return
         if month < 1 or month > 12:
             return None
-        ml = qc.get_month_lengths(2004)
-        if day < 1 or day > ml[month - 1]:
+        if day < 1 or day > qc.leap_year_month_lengths[month - 1]:
             return None
 
         yindex = qc.lat_to_yindex(lat, self.res)
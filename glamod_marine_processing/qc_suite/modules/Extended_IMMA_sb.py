@@ -10,10 +10,15 @@ Improvement on single reports and collections of reports.
 
 from __future__ import annotations
 
+import gzip
+import json
 import math
+import multiprocessing
+import os
 from datetime import datetime
 
 import numpy as np
+import pandas as pd
 
 from . import CalcHums, qc
 from . import spherical_geometry as sph
@@ -52,6 +57,143 @@ VARLIST = [
 # VARLIST = ['YR', 'MO', 'DY', 'HR', 'LAT', 'LON', 'DS', 'VS', 'ID', 'AT', 'SST',
 #            'DPT',  'DCK', 'SLP',  'SID', 'PT', 'UID', 'W', 'D',  'IRF']
 
+# climate variables held alongside the data of a class`.MarineReport`
+CLIMLIST = [
+    "SST",
+    "AT",
+    "AT2",
+    "DAT",
+    "DPT",
+    "SLP",
+    "SLP2",
+    "SHU",
+    "VAP",
+    "CRH",
+    "CWB",
+    "DPD",
+]
+
+# extended data calculated along a class`.Voyage` and held alongside the data
+TRACKLIST = [
+    "dsi",
+    "vsi",
+    "speed",
+    "distance",
+    "course",
+    "time_diff",
+    "alt_speed",
+    "alt_distance",
+    "alt_course",
+    "alt_time_diff",
+]
+
+# QC flags packed four bits to a flag into one integer for each QC type
+QC_FLAGS = {
+    "POS": [
+        "isbuoy",
+        "isdrifter",
+        "isship",
+        "is780",
+        "pos",
+        "date",
+        "time",
+        "blklst",
+        "day",
+        "land",
+        "trk",
+        "few",
+        "ntrk",
+        "dup",
+        "iquam_track",
+        "bad_track",
+        "fewsome_check",
+        "drf_agr",
+        "drf_spd",
+        "month_match",
+    ],
+    "SST": [
+        "noval",
+        "freez",
+        "clim",
+        "nonorm",
+        "hardlimit",
+        "bud",
+        "nbud",
+        "bbud",
+        "rep",
+        "spike",
+        "drf_tail1",
+        "drf_tail2",
+        "drf_bias",
+        "drf_noise",
+        "drf_short",
+    ],
+    "AT": [
+        "noval",
+        "clim",
+        "nonorm",
+        "hardlimit",
+        "mat_blacklist",
+        "bud",
+        "nbud",
+        "bbud",
+        "rep",
+    ],
+    "AT2": ["noval", "clim", "nonorm", "hardlimit"],
+    "DPT": [
+        "noval",
+        "clim",
+        "nonorm",
+        "ssat",
+        "hardlimit",
+        "hum_blacklist",
+        "bud",
+        "nbud",
+        "bbud",
+        "rep",
+        "round",
+        "repsat",
+    ],
+    "SLP": ["noval", "clim", "nonorm", "bud", "nbud", "bbud", "rep"],
+    "W": ["noval", "hardlimit", "consistency", "wind_blacklist"],
+    "D": ["noval"],
+}
+
+_VAR_INDEX = {varname: i for i, varname in enumerate(VARLIST)}
+_CLIM_INDEX = {varname: len(VARLIST) + 2 * i for i, varname in enumerate(CLIMLIST)}
+_TRACK_INDEX = {
+    varname: (len(VARLIST) + 2 * len(CLIMLIST) + i, 1 << i)
+    for i, varname in enumerate(TRACKLIST)
+}
+_NDATA = len(VARLIST) + 2 * len(CLIMLIST) + len(TRACKLIST)
+
+# field and bit offset of each packed QC flag, a flag that is not set is 15. The flags of a QC
+# type are packed 16 to a field so that each field fits in 64 bits, e.g. the 20 POS flags are
+# split between _qc_POS and _qc_POS1
+_QC_BITS = {
+    qc_type + flag: ("_qc_" + qc_type + (str(i // 16) if i >= 16 else ""), 4 * (i % 16))
+    for qc_type, flags in QC_FLAGS.items()
+    for i, flag in enumerate(flags)
+}
+_QC_UNSET = {
+    field: sum(15 << shift for other, shift in _QC_BITS.values() if other == field)
+    for field, _ in _QC_BITS.values()
+}
+
+
+def _pack_flags(packed, shift, values):
+    """Set the flags at a bit offset of an array of packed QC flags to an array of values."""
+    shift = np.uint64(shift)
+    cleared = packed & ~(np.uint64(15) << shift)
+    return cleared | np.asarray(values).astype(np.uint64) << shift
+
+
+def _unpack_flags(packed, shift):
+    """Get the flags at a bit offset of an array of packed QC flags, 9 where they are not set."""
+    flags = (packed >> np.uint64(shift) & np.uint64(15)).astype(int)
+    flags[flags == 15] = 9
+    return flags
+
 
 def safe_filename(infilename):
     """
@@ -127,6 +269,132 @@ def pvar(var, mdi, scale):
     return ret
 
 
+def open_output(filename, mode="w", compress=False):
+    """
+    Open an output file, gzipped if compress is True
+
+    :param filename: name of the file, .gz is added to it if compress is True
+    :param mode: mode in which to open the file
+    :param compress: set True to gzip the file
+    :type filename: string
+    :type mode: string
+    :type compress: boolean
+    :return: the open file
+    :rtype: file
+    """
+    if compress:
+        if "b" not in mode:
+            mode += "t"
+        return gzip.open(filename + ".gz", mode)
+    return open(filename, mode)
+
+
+def write_qc_file(filename, uids, varnames, flags, compress=False):
+    """
+    Write a block of QC flags to file in the same format as a header from
+    func:`MarineReport.print_qc_block` followed by a line for each report.
+    The lines are made from the array of flags in one go.
+
+    :param filename: name of the file to be written
+    :param uids: UIDs of the reports
+    :param varnames: names of the QC flags
+    :param flags: array of QC flags with a row for each report and a column for each flag
+    :param compress: set True to gzip the file
+    :type filename: string
+    :type uids: list of strings
+    :type varnames: list of strings
+    :type flags: numpy array of integers in 0-9
+    :type compress: boolean
+    """
+    assert flags.shape == (len(uids), len(varnames)), "wrong shape of flags"
+    assert np.all((flags >= 0) & (flags <= 9)), "flag not in 0-9"
+
+    # each line after the UID is a comma and a digit for each flag and a newline
+    width = 2 * len(varnames) + 1
+    lines = np.full((len(uids), width), ord(","), dtype=np.uint8)
+    lines[:, 1:-1:2] = flags + ord("0")
+    lines[:, -1] = ord("\n")
+    lines = lines.view(f"S{width}").ravel()
+
+    with open_output(filename, "wb", compress) as outfile:
+        outfile.write(("UID," + ",".join(varnames) + "\n").encode())
+        outfile.write(b"".join(uid.encode() + line for uid, line in zip(uids, lines)))
+
+
+def write_qc_parquet(dirname, uids, varnames, flags, row_group_size=100000):
+    """
+    Write a block of QC flags to a Parquet file in a directory, which is one
+    partition of a Parquet dataset. The reports are sorted by UID so that the
+    statistics of each row group let readers skip the row groups without the
+    UIDs they need.
+
+    :param dirname: name of the directory to write the file to
+    :param uids: UIDs of the reports
+    :param varnames: names of the QC flags
+    :param flags: array of QC flags with a row for each report and a column for each flag
+    :param row_group_size: number of reports in each row group
+    :type dirname: string
+    :type uids: list of strings
+    :type varnames: list of strings
+    :type flags: numpy array of integers in 0-9
+    :type row_group_size: integer
+    """
+    assert flags.shape == (len(uids), len(varnames)), "wrong shape of flags"
+    assert np.all((flags >= 0) & (flags <= 9)), "flag not in 0-9"
+
+    uids = np.array(uids, dtype=object)
+    order = np.argsort(uids, kind="stable")
+
+    frame = pd.DataFrame(flags[order].astype(np.int8), columns=varnames)
+    frame.insert(0, "UID", uids[order])
+
+    os.makedirs(dirname, exist_ok=True)
+    frame.to_parquet(
+        os.path.join(dirname, "part-0.parquet"),
+        engine="pyarrow",
+        index=False,
+        row_group_size=row_group_size,
+    )
+
+
+def write_qc_index(dirname, uids, allvarnames, flags):
+    """
+    Write an index of QC flags for looking up the flags of reports by UID. The index is a
+    directory holding UID.npy, the sorted UIDs as fixed-width bytes, flags.npy, a matrix of
+    the QC flags as unsigned bytes with a row for each UID and a column for each flag, and
+    columns.json, which gives the column of each flag keyed by QC type and flag name. The
+    arrays can be memory-mapped and the flags of a set of UIDs found with a searchsorted.
+
+    :param dirname: name of the directory to write the index to
+    :param uids: UIDs of the reports
+    :param allvarnames: names of the QC flags keyed by QC type
+    :param flags: array of QC flags with a row for each report and a column for each flag
+        in the order of allvarnames
+    :type dirname: string
+    :type uids: list of strings
+    :type allvarnames: dictionary of lists of strings
+    :type flags: numpy array of integers in 0-9
+    """
+    columns = {}
+    ncolumns = 0
+    for var in allvarnames:
+        columns[var] = {}
+        for flag in allvarnames[var]:
+            columns[var][flag] = ncolumns
+            ncolumns += 1
+    assert flags.shape == (len(uids), ncolumns), "wrong shape of flags"
+    assert np.all((flags >= 0) & (flags <= 9)), "flag not in 0-9"
+
+    uids = np.array(uids, dtype=object).astype("S")
+    order = np.argsort(uids, kind="stable")
+
+    os.makedirs(dirname, exist_ok=True)
+    np.save(os.path.join(dirname, "UID.npy"), uids[order])
+    np.save(os.path.join(dirname, "flags.npy"), flags[order].astype(np.uint8))
+    with open(os.path.join(dirname, "columns.json"), "w") as f:
+        json.dump(columns, f)
+
+
 def get_threshold_multiplier(total_nobs, nob_limits, multiplier_values):
     """
     Find the highest value of i such that total_nobs is greater
@@ -282,6 +550,21 @@ class QC_filter:
                 result = 1  # fail
         return result
 
+    def test_reports(self, reps):
+        """
+        Find out which of the MarineReports in a class`.Deck` pass the QC filter. Array version of
+        func:`test_report`, which tests one flag column of the class`.Deck` at a time.
+
+        :param reps: the class`.Deck` of MarineReports to be tested
+        :type reps: Deck
+        :return: True for pass False for fail
+        :rtype: numpy array of booleans
+        """
+        result = np.ones(len(reps), dtype=bool)  # pass
+        for filt in self.filter:
+            result &= reps.get_qc(filt[0], filt[1]) == filt[2]
+        return result
+
     def split_reports(self, reps):
         """
         Split a list of MarineReports into those that pass and those that fail
@@ -371,12 +654,36 @@ class MarineReport:
     A class for holding and working with marine reports. The core of the report is a set of data
     which are taken from an IMMA record used to initialise the class. The report also has an extendible
     set of QC flags, climate variables and a dictionary for adding new variables that might be needed.
+
+    There can be millions of reports in memory at once, so the report has no instance dictionary. The
+    data, the climate variables in CLIMLIST and the extended data in TRACKLIST are held in one array
+    and the QC flags in QC_FLAGS are packed four bits each into 64-bit integers. Any other flags,
+    climate variables or extended data are kept in dictionaries made when they are first needed.
     """
 
+    __slots__ = (
+        "data",
+        "id",
+        "uid",
+        "dt",
+        "_track_set",
+        "_ext_extra",
+        "_clim_extra",
+        "_qc_extra",
+        *_QC_UNSET,
+    )
+
+    special_qc_types = ["POS", "SST", "AT", "DPT", "SLP", "W", "D"]
+
     def __init__(self, imma_rec):
         # ['YR','MO','DY','HR','LAT','LON','DS','VS','SLP','AT','SST','DCK','PT','SID','DPT']
-        self.data = np.zeros(len(VARLIST))
-        self.data += np.nan
+        self.data = np.full(_NDATA, np.nan)
+        self._track_set = 0
+        self._ext_extra = None
+        self._clim_extra = None
+        self._qc_extra = None
+        for field, unset in _QC_UNSET.items():
+            setattr(self, field, unset)
         if "ID" in imma_rec.data:
             self.id = imma_rec.data["ID"]
             if self.id is None:
@@ -392,14 +699,95 @@ class MarineReport:
             if imma_rec.data[k] is not None and k in VARLIST:
                 self.setvar(k, imma_rec.data[k])
 
-        self.qc = {}
-        self.climate_variables = {}
-        self.ext = {}
-
         self.calculate_dt()
         self.calculate_dsi_vsi()
 
-        self.special_qc_types = ["POS", "SST", "AT", "DPT", "SLP", "W", "D"]
+    @classmethod
+    def from_row(cls, data, rep_id="", uid=None, track_set=0):
+        """
+        Make a report from a row of data which is already laid out as the data of a report, such as
+        a row of the table of a class`.Deck`. The data are not copied, so the report holds a view of
+        the row.
+
+        :param data: the data, climate variables and extended data of the report
+        :param rep_id: the ID of the report
+        :param uid: the UID of the report
+        :param track_set: bits of the extended data in TRACKLIST which are set
+        :type data: numpy array
+        :type rep_id: string
+        :type uid: string
+        :type track_set: integer
+        :return: the report, with no QC flags set
+        :rtype: class`.MarineReport`
+        """
+        rep = cls.__new__(cls)
+        rep.data = data
+        rep.id = rep_id
+        rep.uid = uid
+        rep._track_set = track_set
+        rep._ext_extra = None
+        rep._clim_extra = None
+        rep._qc_extra = None
+        for field, unset in _QC_UNSET.items():
+            setattr(rep, field, unset)
+        rep.calculate_dt()
+        return rep
+
+    @property
+    def qc(self):
+        """
+        Dictionary of the QC flags that have been set, keyed by QC type followed by the flag
+        name e.g. POSdate. Setting it replaces all the QC flags.
+        """
+        flags = {}
+        for key, (field, shift) in _QC_BITS.items():
+            value = getattr(self, field) >> shift & 15
+            if value != 15:
+                flags[key] = value
+        if self._qc_extra is not None:
+            flags.update(self._qc_extra)
+        return flags
+
+    @qc.setter
+    def qc(self, flags):
+        for field, unset in _QC_UNSET.items():
+            setattr(self, field, unset)
+        self._qc_extra = None
+        for key, value in flags.items():
+            self._set_flag(key, value)
+
+    @property
+    def climate_variables(self):
+        """Dictionary of the class`.ClimVariable` of the report, keyed by name."""
+        climate_variables = {}
+        for varname, i in _CLIM_INDEX.items():
+            if not (np.isnan(self.data[i]) and np.isnan(self.data[i + 1])):
+                climate_variables[varname] = ClimVariable(
+                    self.getnorm(varname), self.getnorm(varname, "stdev")
+                )
+        if self._clim_extra is not None:
+            climate_variables.update(self._clim_extra)
+        return climate_variables
+
+    @property
+    def ext(self):
+        """Dictionary of the extended data of the report. Setting it replaces all the extended data."""
+        ext = {}
+        for varname in _TRACK_INDEX:
+            if self._has_ext(varname):
+                ext[varname] = self.getext(varname)
+        if self._ext_extra is not None:
+            ext.update(self._ext_extra)
+        return ext
+
+    @ext.setter
+    def ext(self, ext):
+        for i, _ in _TRACK_INDEX.values():
+            self.data[i] = np.nan
+        self._track_set = 0
+        self._ext_extra = None
+        for varname, varvalue in ext.items():
+            self.setext(varname, varvalue)
 
     def lat(self):
         """Return latitude in range [-90,90]."""
@@ -414,20 +802,20 @@ class MarineReport:
 
     def calculate_dsi_vsi(self):
         """Convert ICOADS DS and VS to meaningful units, in this case degrees and knots."""
-        self.ext["dsi"] = None
+        self.setext("dsi", None)
         if self.getvar("DS") is not None:
             # print(self.getvar('DS'))
-            # self.ext['dsi'] = ds_convert[self.getvar('DS')]
-            self.ext["dsi"] = self.getvar("DS")
+            # self.setext('dsi', ds_convert[self.getvar('DS')])
+            self.setext("dsi", self.getvar("DS"))
 
-        self.ext["vsi"] = None
+        self.setext("vsi", None)
         if self.getvar("VS") is not None:
             if self.getvar("YR") >= 1968:
-                self.ext["vsi"] = self.getvar("VS") * 5.0 - 2.0
+                self.setext("vsi", self.getvar("VS") * 5.0 - 2.0)
             else:
-                self.ext["vsi"] = self.getvar("VS") * 3.0 - 1.0
+                self.setext("vsi", self.getvar("VS") * 3.0 - 1.0)
             if self.getvar("VS") == 0:
-                self.ext["vsi"] = 0.0
+                self.setext("vsi", 0.0)
 
     def calculate_humidity_variables(self, hum_vars):
         """
@@ -447,7 +835,7 @@ class MarineReport:
         ), "Not all hum vars are present: SHU,VAP,CRH,CWB,DPD"
 
         # Need climatological SLP for calculations
-        slpclim = self.climate_variables["SLP"].getclim()
+        slpclim = self.getnorm("SLP")
         if slpclim is None:
             for var in hum_vars:
                 self.setvar(var, None)
@@ -600,7 +988,14 @@ class MarineReport:
         :type clim: float
         :type stdev: float
         """
-        self.climate_variables[name] = ClimVariable(clim, stdev)
+        if name in _CLIM_INDEX:
+            i = _CLIM_INDEX[name]
+            self.data[i] = np.nan if clim is None else float(clim)
+            self.data[i + 1] = np.nan if stdev is None else float(stdev)
+        else:
+            if self._clim_extra is None:
+                self._clim_extra = {}
+            self._clim_extra[name] = ClimVariable(clim, stdev)
 
     def getnorm(self, varname, intype="clim"):
         """
@@ -614,8 +1009,14 @@ class MarineReport:
         :return: the climatological average (if the climate variable exists), None otherwise.
         :rtype: float
         """
-        if varname in self.climate_variables:
-            return self.climate_variables[varname].getclim(intype)
+        if varname in _CLIM_INDEX:
+            assert intype in ["clim", "stdev"], "unknown type " + str(intype)
+            value = self.data[_CLIM_INDEX[varname] + (intype == "stdev")]
+            if np.isnan(value):
+                return None
+            return float(value)
+        elif self._clim_extra is not None and varname in self._clim_extra:
+            return self._clim_extra[varname].getclim(intype)
         else:
             return None
 
@@ -628,12 +1029,9 @@ class MarineReport:
         :return: the anomaly (if the climate variable exists), None otherwise.
         :rtype: float
         """
-        if varname in self.climate_variables:
-            clim = self.climate_variables[varname].getclim()
-            if self.getvar(varname) is not None and clim is not None:
-                return self.getvar(varname) - clim
-            else:
-                return None
+        clim = self.getnorm(varname)
+        if self.getvar(varname) is not None and clim is not None:
+            return self.getvar(varname) - clim
         else:
             return None
 
@@ -646,20 +1044,19 @@ class MarineReport:
         :return: the anomaly (if the climate variable exists) standardised by the standard deviation, None otherwise.
         :rtype: float
         """
-        if varname in self.climate_variables:
-            clim = self.climate_variables[varname].getclim()
-            stdev = self.climate_variables[varname].getclim("stdev")
-            if (
-                self.getvar(varname) is not None
-                and clim is not None
-                and stdev is not None
-            ):
-                return (self.getvar(varname) - clim) / stdev
-            else:
-                return None
+        clim = self.getnorm(varname)
+        stdev = self.getnorm(varname, "stdev")
+        if self.getvar(varname) is not None and clim is not None and stdev is not None:
+            return (self.getvar(varname) - clim) / stdev
         else:
             return None
 
+    def _has_ext(self, varname):
+        """Return True if the named variable is in the extended data."""
+        if varname in _TRACK_INDEX:
+            return bool(self._track_set & _TRACK_INDEX[varname][1])
+        return self._ext_extra is not None and varname in self._ext_extra
+
     def getext(self, varname):
         """
         Function to get a particular variable from the extended data
@@ -669,8 +1066,13 @@ class MarineReport:
         :return: the named variable
         :rtype: depends on the variable
         """
-        assert varname in self.ext, "unknown extended variable name " + varname
-        return self.ext[varname]
+        assert self._has_ext(varname), "unknown extended variable name " + varname
+        if varname in _TRACK_INDEX:
+            value = self.data[_TRACK_INDEX[varname][0]]
+            if np.isnan(value):
+                return None
+            return value
+        return self._ext_extra[varname]
 
     def setext(self, varname, varvalue):
         """
@@ -681,7 +1083,14 @@ class MarineReport:
         :type varvalue: float
         :type varname: string
         """
-        self.ext[varname] = varvalue
+        if varname in _TRACK_INDEX:
+            i, bit = _TRACK_INDEX[varname]
+            self.data[i] = np.nan if varvalue is None else varvalue
+            self._track_set |= bit
+        else:
+            if self._ext_extra is None:
+                self._ext_extra = {}
+            self._ext_extra[varname] = varvalue
 
     def setvar(self, varname, varvalue):
         """
@@ -697,8 +1106,7 @@ class MarineReport:
         elif varname == "UID":
             self.uid = varvalue
         else:
-            i = VARLIST.index(varname)
-            self.data[i] = varvalue
+            self.data[_VAR_INDEX[varname]] = varvalue
 
         if varname in ["YR", "DY", "HR"]:
             self.calculate_dt()
@@ -717,18 +1125,18 @@ class MarineReport:
             return self.id
         if varname == "UID":
             return self.uid
-        if not (varname in VARLIST or varname in self.ext):
-            return None
-        if varname in VARLIST:
-            i = VARLIST.index(varname)
+        if varname in _VAR_INDEX:
+            i = _VAR_INDEX[varname]
             if np.isnan(self.data[i]):
                 return None
             if varname in ["YR", "MO", "DY", "DS", "VS", "DCK", "PT", "SID"]:
                 return int(self.data[i])  # these are integer data types
             else:
                 return self.data[i]
+        elif self._has_ext(varname):
+            return self.getext(varname)
         else:
-            return self.ext[varname]
+            return None
 
     def set_qc(self, qc_type, specific_flag, set_value):
         """
@@ -751,7 +1159,18 @@ class MarineReport:
             "unknown data type " + qc_type
         )
 
-        self.qc[qc_type + specific_flag] = set_value
+        self._set_flag(qc_type + specific_flag, set_value)
+
+    def _set_flag(self, key, set_value):
+        """Set the QC flag named by QC type followed by flag name."""
+        if key in _QC_BITS:
+            field, shift = _QC_BITS[key]
+            packed = getattr(self, field) & ~(15 << shift)
+            setattr(self, field, packed | int(set_value) << shift)
+        else:
+            if self._qc_extra is None:
+                self._qc_extra = {}
+            self._qc_extra[key] = set_value
 
     def get_qc(self, qc_type, specific_flag):
         """
@@ -766,8 +1185,13 @@ class MarineReport:
 
         Returns the value of a specific_flag or 9 if the specific_flag is not set.
         """
-        if qc_type + specific_flag in self.qc:
-            return self.qc[qc_type + specific_flag]
+        key = qc_type + specific_flag
+        if key in _QC_BITS:
+            field, shift = _QC_BITS[key]
+            value = getattr(self, field) >> shift & 15
+            return 9 if value == 15 else value
+        elif self._qc_extra is not None and key in self._qc_extra:
+            return self._qc_extra[key]
         else:
             return 9
 
@@ -1133,6 +1557,8 @@ class MarineReportQC(MarineReport):
     and QI (Quality Improvement) to the reports.
     """
 
+    __slots__ = ()
+
     def perform_base_qc(self, parameters):
         """Run all the base QC checks defined in the Class."""
         self.do_fix_missing_hour()
@@ -1674,17 +2100,47 @@ class Voyage:
             self.reps[0].setext("distance", None)
             self.reps[0].setext("time_diff", None)
 
+    def add_reports(self, reps):
+        """
+        Add MarineReports to the Voyage. This is equivalent to calling func:`add_report` for
+        each of them in turn, but the speeds, courses, distances and time differences are all
+        calculated at once.
+
+        :param reps: MarineReports to be added to the end of the Voyage
+        :type reps: list of MarineReport
+        """
+        start = len(self.reps)
+        self.reps.extend(reps)
+        self.set_track_speeds(start)
+
+    def set_track_speeds(self, start=0, step=1):
+        """
+        Calculate the speeds, courses, distances and time differences between reports and store them
+        in the extended data of the reports. Reports with nothing to compare to get None.
+
+        :param start: position of the first report to be updated
+        :param step: 1 to compare each report to the one before it and store speed, course, distance
+            and time_diff, 2 to compare the reports either side of it and store alt_speed,
+            alt_course, alt_distance and alt_time_diff
+        :type start: integer
+        :type step: integer
+        """
+        arrays = tc.voyage_arrays(self)
+        values = tc.track_speeds(arrays["lat"], arrays["lon"], arrays["time"], step)
+
+        prefix = "" if step == 1 else "alt_"
+        names = [prefix + name for name in ["speed", "distance", "course", "time_diff"]]
+
+        for i in range(start, len(self.reps)):
+            for name, value in zip(names, values):
+                self.reps[i].setext(name, None if np.isnan(value[i]) else value[i])
+
     def sort(self):
         """Sorts the reports into time order."""
         self.reps.sort()
         # then recalculate times, speeds etc.
         if len(self.reps) > 1:
-            for i in range(1, len(self.reps)):
-                shpspd, shpdis, shpdir, tdiff = self.reps[i] - self.reps[i - 1]
-                self.reps[i].setext("speed", shpspd)
-                self.reps[i].setext("course", shpdir)
-                self.reps[i].setext("distance", shpdis)
-                self.reps[i].setext("time_diff", tdiff)
+            self.set_track_speeds(1)
 
     def get_speed(self):
         """
@@ -1719,19 +2175,7 @@ class Voyage:
 
     def calc_alternate_speeds(self):
         """The speeds and courses can also be calculated using alternating reports."""
-        for i in range(0, len(self.reps)):
-            self.reps[i].setext("alt_speed", None)
-            self.reps[i].setext("alt_course", None)
-            self.reps[i].setext("alt_distance", None)
-            self.reps[i].setext("alt_time_diff", None)
-
-        if len(self.reps) > 2:
-            for i in range(1, len(self.reps) - 1):
-                shpspd, shpdis, shpdir, tdiff = self.reps[i + 1] - self.reps[i - 1]
-                self.reps[i].setext("alt_speed", shpspd)
-                self.reps[i].setext("alt_course", shpdir)
-                self.reps[i].setext("alt_distance", shpdis)
-                self.reps[i].setext("alt_time_diff", tdiff)
+        self.set_track_speeds(0, step=2)
 
     def find_saturated_runs(self, parameters):
         """
@@ -1922,52 +2366,7 @@ class Voyage:
         direction for the next report, to which the projected location
         is then compared. The distances between the projected and actual locations is returned
         """
-        km_to_nm = 0.539957
-
-        nobs = len(self)
-
-        distance_from_est_location = [None]
-
-        for i in range(1, nobs):
-            if (
-                self.getvar(i, "vsi") is not None
-                and self.getvar(i - 1, "vsi") is not None
-                and self.getvar(i, "dsi") is not None
-                and self.getvar(i - 1, "dsi") is not None
-                and self.getvar(i, "time_diff") is not None
-            ):
-                # get increment from initial position
-                lat1, lon1 = tc.increment_position(
-                    self.getvar(i - 1, "LAT"),
-                    self.getvar(i - 1, "LON"),
-                    self.getvar(i - 1, "vsi") / km_to_nm,
-                    self.getvar(i - 1, "dsi"),
-                    self.getvar(i, "time_diff"),
-                )
-
-                lat2, lon2 = tc.increment_position(
-                    self.getvar(i, "LAT"),
-                    self.getvar(i, "LON"),
-                    self.getvar(i, "vsi") / km_to_nm,
-                    self.getvar(i, "dsi"),
-                    self.getvar(i, "time_diff"),
-                )
-                # apply increments to the lat and lon at i-1
-                alatx = self.getvar(i - 1, "LAT") + lat1 + lat2
-                alonx = self.getvar(i - 1, "LON") + lon1 + lon2
-
-                # calculate distance between calculated position and the second reported position
-                discrepancy = sph.sphere_distance(
-                    self.getvar(i, "LAT"), self.getvar(i, "LON"), alatx, alonx
-                )
-
-                distance_from_est_location.append(discrepancy)
-
-            else:
-                # in the absence of reported speed and direction set to None
-                distance_from_est_location.append(None)
-
-        return distance_from_est_location
+        return tc.distr1(self)
 
     def distr2(self):
         """
@@ -1985,54 +2384,7 @@ class Voyage:
         projects it forwards another half time step using the speed and direction for the next report, to which the
         projected location is then compared. The distances between the projected and actual locations is returned
         """
-        km_to_nm = 0.539957
-
-        nobs = len(self)
-
-        distance_from_est_location = [None]
-
-        for i in range(nobs - 1, 0, -1):
-            if (
-                self.getvar(i, "vsi") is not None
-                and self.getvar(i - 1, "vsi") is not None
-                and self.getvar(i, "dsi") is not None
-                and self.getvar(i - 1, "dsi") is not None
-                and self.getvar(i, "time_diff") is not None
-            ):
-                # get increment from initial position - backwards in time
-                # means reversing the direction by 180 degrees
-                lat1, lon1 = tc.increment_position(
-                    self.getvar(i, "LAT"),
-                    self.getvar(i, "LON"),
-                    self.getvar(i, "vsi") / km_to_nm,
-                    self.getvar(i, "dsi") - 180.0,
-                    self.getvar(i, "time_diff"),
-                )
-
-                lat2, lon2 = tc.increment_position(
-                    self.getvar(i - 1, "LAT"),
-                    self.getvar(i - 1, "LON"),
-                    self.getvar(i - 1, "vsi") / km_to_nm,
-                    self.getvar(i - 1, "dsi") - 180.0,
-                    self.getvar(i, "time_diff"),
-                )
-
-                # apply increments to the lat and lon at i-1
-                alatx = self.getvar(i, "LAT") + lat1 + lat2
-                alonx = self.getvar(i, "LON") + lon1 + lon2
-
-                # calculate distance between calculated position and the second reported position
-                discrepancy = sph.sphere_distance(
-                    self.getvar(i - 1, "LAT"), self.getvar(i - 1, "LON"), alatx, alonx
-                )
-                distance_from_est_location.append(discrepancy)
-
-            else:
-                # in the absence of reported speed and direction set to None
-                distance_from_est_location.append(None)
-
-        # that fancy bit at the end reverses the array
-        return distance_from_est_location[::-1]
+        return tc.distr2(self)
 
     def midpt(self):
         """
@@ -2048,45 +2400,7 @@ class Voyage:
         The calculation linearly interpolates the latitudes and longitudes (allowing for
         wrapping around the dateline and so on).
         """
-        nobs = len(self)
-
-        midpoint_discrepancies = [None]
-
-        for i in range(1, nobs - 1):
-            t0 = self.getvar(i, "time_diff")
-            t1 = self.getvar(i + 1, "time_diff")
-
-            if t0 is not None and t1 is not None:
-                if t0 + t1 != 0:
-                    fraction_of_time_diff = t0 / (t0 + t1)
-                else:
-                    fraction_of_time_diff = 0.0
-            else:
-                fraction_of_time_diff = 0.0
-
-            if fraction_of_time_diff > 1.0:
-                print(fraction_of_time_diff, t0, t1)
-
-            estimated_lat_at_midpt, estimated_lon_at_midpt = sph.intermediate_point(
-                self.getvar(i - 1, "LAT"),
-                self.getvar(i - 1, "LON"),
-                self.getvar(i + 1, "LAT"),
-                self.getvar(i + 1, "LON"),
-                fraction_of_time_diff,
-            )
-
-            discrepancy = sph.sphere_distance(
-                self.getvar(i, "LAT"),
-                self.getvar(i, "LON"),
-                estimated_lat_at_midpt,
-                estimated_lon_at_midpt,
-            )
-
-            midpoint_discrepancies.append(discrepancy)
-
-        midpoint_discrepancies.append(None)
-
-        return midpoint_discrepancies
+        return tc.midpt(self)
 
     def iquam_track_check(self, parameters):
         """
@@ -2121,46 +2435,19 @@ class Voyage:
         else:
             speed_limit = ship_speed_limit
 
-        speed_violations = []
-        count_speed_violations = []
-
-        for t1 in range(0, numobs):
-            self.set_qc(t1, "POS", "iquam_track", 0)
-
-            violations_for_this_report = []
-            count_violations_this_report = 0.0
-
-            lo = max(0, t1 - n_neighbours)
-            hi = min(numobs, t1 + n_neighbours + 1)
-
-            for t2 in range(lo, hi):
-                speed, distance, direction, time_diff = self.reps[t2] - self.reps[t1]
-                del speed
-                del direction
-
-                iquam_condition = max([abs(distance) - delta_d, 0.0]) / (
-                    abs(time_diff) + delta_t
-                )
-
-                if iquam_condition > speed_limit:
-                    violations_for_this_report.append(t2)
-                    count_violations_this_report += 1.0
-
-            speed_violations.append(violations_for_this_report)
-            count_speed_violations.append(count_violations_this_report)
-
-        count = 0
-        while np.sum(count_speed_violations) > 0.0:
-            most_fails = np.argmax(count_speed_violations)
-            self.set_qc(most_fails, "POS", "iquam_track", 1)
-
-            for index in speed_violations[most_fails]:
-                if most_fails in speed_violations[index]:
-                    speed_violations[index].remove(most_fails)
-                    count_speed_violations[index] -= 1.0
+        arrays = tc.voyage_arrays(self)
+        qcs = tc.iquam_track_check_array(
+            arrays["lat"],
+            arrays["lon"],
+            arrays["time"],
+            speed_limit,
+            delta_d,
+            delta_t,
+            n_neighbours,
+        )
 
-            count_speed_violations[most_fails] = 0
-            count += 1
+        for i, flag in enumerate(qcs):
+            self.set_qc(i, "POS", "iquam_track", int(flag))
 
         return
 
@@ -2178,7 +2465,6 @@ class Voyage:
         max_absolute_speed = parameters["max_absolute_speed"]
         max_midpoint_discrepancy = parameters["max_midpoint_discrepancy"]
 
-        km_to_nm = 0.539957
         nobs = len(self)
 
         # no obs in, no qc outcomes out
@@ -2214,97 +2500,24 @@ class Voyage:
                     self.set_qc(i, "POS", "few", 1)
                 return
 
-        # work out speeds and distances between alternating points
-        self.calc_alternate_speeds()
-        # what are the mean and mode speeds?
-        modal_speed = tc.modesp(self.get_speed())
-        # set speed limits based on modal speed
-        amax, amaxx, amin = tc.set_speed_limits(modal_speed)
-        del amaxx
-        del amin
-
-        # compare reported speeds and positions if we have them
-        forward_diff_from_estimated = self.distr1()
-        reverse_diff_from_estimated = self.distr2()
-        try:
-            midpoint_diff_from_estimated = self.midpt()
-        except Exception:
-            print(self.getvar(0, "ID"))
-            assert False
-
-        # do QC
-        self.set_qc(0, "POS", "trk", 0)
-        self.set_qc(0, "POS", "few", 0)
-
-        for i in range(1, nobs - 1):
-            thisqc_a = 0
-            thisqc_b = 0
+        # work out speeds and distances between consecutive and alternating points
+        arrays = tc.add_track_speeds(tc.voyage_arrays(self))
 
-            # together these cover the speeds calculate from point i
-            if (
-                self.getvar(i, "speed") is not None
-                and self.getvar(i, "speed") > amax
-                and self.getvar(i - 1, "alt_speed") is not None
-                and self.getvar(i - 1, "alt_speed") > amax
-            ):
-                thisqc_a += 1.00
-            elif (
-                self.getvar(i + 1, "speed") is not None
-                and self.getvar(i + 1, "speed") > amax
-                and self.getvar(i + 1, "alt_speed") is not None
-                and self.getvar(i + 1, "alt_speed") > amax
-            ):
-                thisqc_a += 2.00
-            elif (
-                self.getvar(i, "speed") is not None
-                and self.getvar(i, "speed") > amax
-                and self.getvar(i + 1, "speed") is not None
-                and self.getvar(i + 1, "speed") > amax
-            ):
-                thisqc_a += 3.00
-
-                # Quality-control by examining the distance
-            # between the calculated and reported second position.
-            thisqc_b += tc.check_distance_from_estimate(
-                self.getvar(i, "vsi"),
-                self.getvar(i - 1, "vsi"),
-                self.getvar(i, "time_diff"),
-                forward_diff_from_estimated[i],
-                reverse_diff_from_estimated[i],
-            )
-            # Check for continuity of direction
-            thisqc_b += tc.direction_continuity(
-                self.getvar(i, "dsi"),
-                self.getvar(i - 1, "dsi"),
-                self.getvar(i, "course"),
+        try:
+            qcs = tc.mds_track_check_array(
+                arrays,
                 max_direction_change,
-            )
-            # Check for continuity of speed.
-            thisqc_b += tc.speed_continuity(
-                self.getvar(i, "vsi"),
-                self.getvar(i - 1, "vsi"),
-                self.getvar(i, "speed"),
                 max_speed_change,
+                max_absolute_speed,
+                max_midpoint_discrepancy,
             )
+        except Exception:
+            print(self.getvar(0, "ID"))
+            assert False
 
-            # check for speeds in excess of 40.00 knots
-            if self.getvar(i, "speed") > max_absolute_speed / km_to_nm:
-                thisqc_b += 10.0
-
-            # make the final decision
-            if (
-                midpoint_diff_from_estimated[i] > max_midpoint_discrepancy / km_to_nm
-                and thisqc_a > 0
-                and thisqc_b > 0
-            ):
-                self.set_qc(i, "POS", "trk", 1)
-                self.set_qc(i, "POS", "few", 0)
-            else:
-                self.set_qc(i, "POS", "trk", 0)
-                self.set_qc(i, "POS", "few", 0)
-
-        self.set_qc(nobs - 1, "POS", "trk", 0)
-        self.set_qc(nobs - 1, "POS", "few", 0)
+        for i, flag in enumerate(qcs):
+            self.set_qc(i, "POS", "trk", int(flag))
+            self.set_qc(i, "POS", "few", 0)
 
     def spike_check(self, parameters, intype="SST"):
         """
@@ -2334,57 +2547,21 @@ class Voyage:
         else:
             delta_t = ship_delta_t
 
-        gradient_violations = []
-        count_gradient_violations = []
-
-        for t1 in range(0, numobs):
-            self.set_qc(t1, intype, "spike", 0)
-
-            violations_for_this_report = []
-            count_violations_this_report = 0.0
-
-            lo = max(0, t1 - n_neighbours)
-            hi = min(numobs, t1 + n_neighbours + 1)
-
-            for t2 in range(lo, hi):
-                if (
-                    self.getvar(t2, intype) is not None
-                    and self.getvar(t1, intype) is not None
-                ):
-                    speed, distance, direction, time_diff = (
-                        self.reps[t2] - self.reps[t1]
-                    )
-                    del speed
-                    del direction
-                    val_change = abs(self.getvar(t2, intype) - self.getvar(t1, intype))
-
-                    iquam_condition = max(
-                        [
-                            delta_t,
-                            abs(distance) * max_gradient_space,
-                            abs(time_diff) * max_gradient_time,
-                        ]
-                    )
-
-                    if val_change > iquam_condition:
-                        violations_for_this_report.append(t2)
-                        count_violations_this_report += 1.0
-
-            gradient_violations.append(violations_for_this_report)
-            count_gradient_violations.append(count_violations_this_report)
-
-        count = 0
-        while np.sum(count_gradient_violations) > 0.0:
-            most_fails = np.argmax(count_gradient_violations)
-            self.set_qc(most_fails, intype, "spike", 1)
-
-            for index in gradient_violations[most_fails]:
-                if most_fails in gradient_violations[index]:
-                    gradient_violations[index].remove(most_fails)
-                    count_gradient_violations[index] -= 1.0
+        arrays = tc.voyage_arrays(self)
+        values = np.array([self.getvar(i, intype) for i in range(numobs)], dtype=float)
+        qcs = tc.spike_check_array(
+            arrays["lat"],
+            arrays["lon"],
+            arrays["time"],
+            values,
+            delta_t,
+            max_gradient_space,
+            max_gradient_time,
+            n_neighbours,
+        )
 
-            count_gradient_violations[most_fails] = 0
-            count += 1
+        for i, flag in enumerate(qcs):
+            self.set_qc(i, intype, "spike", int(flag))
 
         return
 
@@ -2791,14 +2968,152 @@ class Voyage:
         return
 
 
+# the extended data set for the reports from each platform by func:`Deck.check_platforms`
+_PLATFORM_TRACK = ["speed", "distance", "course", "time_diff"]
+
+
+def available_cpus():
+    """Get the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
+
+def _check_platform(payload):
+    """
+    Run a check on the reports from one platform for func:`Deck.check_platforms`, which may be
+    in a worker process.
+
+    :param payload: the check, the ID of the platform, the rows of the table of the class`.Deck`
+        for its reports and further arguments for the check
+    :type payload: tuple
+    :return: the QC flags from the check and the speed, distance, course and time_diff of each
+        report
+    :rtype: tuple of dict
+    """
+    check, platform_id, table, args = payload
+    columns = {varname: table[:, i] for varname, i in _VAR_INDEX.items()}
+    for varname in ["dsi", "vsi"]:
+        columns[varname] = table[:, _TRACK_INDEX[varname][0]]
+    columns.update(tc.add_track_speeds(tc.track_arrays(columns)))
+    flags = check(platform_id, columns, *args)
+    return flags, {name: columns[name] for name in _PLATFORM_TRACK}
+
+
+def get_gridcell_stdevs(getter, nonmiss, month, day):
+    """
+    Get standard deviations from a climatology at the centres of 1x1 degree gridcells for a
+    single pentad. Missing and negative standard deviations are set to 1.0
+
+    :param getter: bound get_values or get_values_mds_style method of a Climatology
+    :param nonmiss: x and y indices of the gridcells
+    :param month: month of the pentad
+    :param day: day of the pentad
+    :type getter: method
+    :type nonmiss: tuple of numpy arrays
+    :type month: integer
+    :type day: integer
+    :return: standard deviations for each gridcell
+    :rtype: numpy array
+    """
+    xindex, yindex = nonmiss
+    stdev = getter(
+        89.5 - yindex,
+        -179.5 + xindex,
+        np.full(len(xindex), month),
+        np.full(len(xindex), day),
+    )
+    return np.where(np.isnan(stdev) | (stdev < 0.0), 1.0, stdev)
+
+
+def _circular_cumsum(field, axis):
+    """
+    Cumulative sum along one axis of a field repeated twice along that axis, with a
+    leading zero, so that sums over windows which wrap around the end of the axis
+    can be calculated as the difference of two elements.
+
+    :param field: the field to be summed
+    :param axis: the axis along which to sum
+    :type field: numpy array
+    :type axis: integer
+    :return: the cumulative sum, with length 2n+1 along the summed axis
+    :rtype: numpy array
+    """
+    cumulative = np.cumsum(np.concatenate([field, field], axis=axis), axis=axis)
+    zeros = np.zeros_like(np.take(cumulative, [0], axis=axis))
+    return np.concatenate([zeros, cumulative], axis=axis)
+
+
+def _circular_window_sum(field, span, axis):
+    """
+    Moving sum of 2*span+1 elements centred on each element of a field along one axis,
+    wrapping around at the ends of the axis. If the window is longer than the axis,
+    elements are counted once for each time they fall in the window.
+
+    :param field: the field to be summed
+    :param span: number of elements either side of the centre to include
+    :param axis: the axis along which to sum
+    :type field: numpy array
+    :type span: integer
+    :type axis: integer
+    :return: the moving sum, same shape as field
+    :rtype: numpy array
+    """
+    length = field.shape[axis]
+    full_wraps, remainder = divmod(2 * span + 1, length)
+
+    cumulative = _circular_cumsum(field, axis)
+
+    start = (np.arange(length) - span) % length
+    result = np.take(cumulative, start + remainder, axis=axis) - np.take(
+        cumulative, start, axis=axis
+    )
+    if full_wraps > 0:
+        result += full_wraps * np.sum(field, axis=axis, keepdims=True)
+
+    return result
+
+
+def _longitude_window_sum(field, full_xspan):
+    """
+    Moving sum along the first (longitude) axis of a 360 x 180 field where the number of
+    elements either side of the centre to include is different for each latitude row.
+
+    :param field: the field to be summed
+    :param full_xspan: number of elements either side of the centre to include for each row
+    :type field: numpy array
+    :type full_xspan: list of integers
+    :return: the moving sum, same shape as field
+    :rtype: numpy array
+    """
+    nx = field.shape[0]
+    cumulative = _circular_cumsum(field, 0)
+
+    result = np.zeros(field.shape)
+    for xspan in set(full_xspan):
+        rows = [y for y, span in enumerate(full_xspan) if span == xspan]
+        full_wraps, remainder = divmod(2 * xspan + 1, nx)
+        start = (np.arange(nx) - xspan) % nx
+        result[:, rows] = (
+            cumulative[np.ix_(start + remainder, rows)]
+            - cumulative[np.ix_(start, rows)]
+            + full_wraps * np.sum(field[:, rows], axis=0)
+        )
+
+    return result
+
+
 class Np_Super_Ob:
-    """Class for gridding data in buddy check, based on numpy arrays."""
+    """
+    Class for gridding data in buddy check, based on numpy arrays. The grid is 360 x 180 x 73 (1x1xpentad),
+    but only the pentads which contain observations are held in memory, each as a 360 x 180 array.
+    """
 
     def __init__(self):
-        self.grid = np.zeros((360, 180, 73))
-        self.buddy_mean = np.zeros((360, 180, 73))
-        self.buddy_stdev = np.zeros((360, 180, 73))
-        self.nobs = np.zeros((360, 180, 73))
+        self.grid = {}
+        self.buddy_mean = {}
+        self.buddy_stdev = {}
+        self.nobs = {}
 
     def add_rep(self, lat, lon, year, month, day, anom):
         """Add an anomaly to the grid from specified lat lon and date."""
@@ -2811,13 +3126,87 @@ class Np_Super_Ob:
         assert 0 <= pindex < 73, "bad pentad" + str(month) + str(day)
 
         if anom is not None:
-            self.grid[xindex][yindex][pindex] += anom
-            self.nobs[xindex][yindex][pindex] += 1
+            if pindex not in self.nobs:
+                self.grid[pindex] = np.zeros((360, 180))
+                self.nobs[pindex] = np.zeros((360, 180))
+            self.grid[pindex][xindex][yindex] += anom
+            self.nobs[pindex][xindex][yindex] += 1
+
+    def add_reps(self, lat, lon, month, day, anom):
+        """
+        Add anomalies to the grid from specified lats, lons and dates. Array version of func:`add_rep`,
+        missing anomalies are NaN.
+        """
+        xindex = qc.mds_lon_to_xindex_array(lon)
+        yindex = qc.mds_lat_to_yindex_array(lat)
+        pindex = qc.which_pentad_array(month, day) - 1
+
+        assert np.all((0 <= xindex) & (xindex < 360)), "bad lon"
+        assert np.all((0 <= yindex) & (yindex < 180)), "bad lat"
+        assert np.all((0 <= pindex) & (pindex < 73)), "bad pentad"
+
+        nonmiss = ~np.isnan(anom)
+        for p in np.unique(pindex[nonmiss]):
+            inpentad = nonmiss & (pindex == p)
+            if p not in self.nobs:
+                self.grid[p] = np.zeros((360, 180))
+                self.nobs[p] = np.zeros((360, 180))
+            # unbuffered so that the anomalies are summed in the same order as by add_rep
+            np.add.at(
+                self.grid[p], (xindex[inpentad], yindex[inpentad]), anom[inpentad]
+            )
+            np.add.at(self.nobs[p], (xindex[inpentad], yindex[inpentad]), 1)
 
     def take_average(self):
         """Take the average of a grid."""
-        nonmiss = np.nonzero(self.nobs)
-        self.grid[nonmiss] = self.grid[nonmiss] / self.nobs[nonmiss]
+        for pindex in self.nobs:
+            nonmiss = np.nonzero(self.nobs[pindex])
+            self.grid[pindex][nonmiss] = (
+                self.grid[pindex][nonmiss] / self.nobs[pindex][nonmiss]
+            )
+
+    def get_pentad_value(self, field, xindex, yindex, pindex):
+        """
+        Get the value of one of the gridded fields at a gridcell, pentads which are not held
+        in memory are all zero.
+
+        :param field: one of grid, nobs, buddy_mean or buddy_stdev
+        :param xindex: the xindex of the gridcell
+        :param yindex: the yindex of the gridcell
+        :param pindex: the pindex of the gridcell
+        :type field: dict
+        :type xindex: integer
+        :type yindex: integer
+        :type pindex: integer
+        :return: value at the gridcell
+        :rtype: float
+        """
+        if pindex in field:
+            return field[pindex][xindex][yindex]
+        return 0.0
+
+    def get_pentad_values(self, field, xindex, yindex, pindex):
+        """
+        Get the values of one of the gridded fields at a set of gridcells. Array version of
+        func:`get_pentad_value`.
+
+        :param field: one of grid, nobs, buddy_mean or buddy_stdev
+        :param xindex: the xindices of the gridcells
+        :param yindex: the yindices of the gridcells
+        :param pindex: the pindices of the gridcells
+        :type field: dict
+        :type xindex: numpy array of integers
+        :type yindex: numpy array of integers
+        :type pindex: numpy array of integers
+        :return: values at the gridcells
+        :rtype: numpy array of floats
+        """
+        values = np.zeros(len(pindex))
+        for p in np.unique(pindex):
+            if p in field:
+                inpentad = pindex == p
+                values[inpentad] = field[p][xindex[inpentad], yindex[inpentad]]
+        return values
 
     def get_neighbour_anomalies(self, search_radius, xindex, yindex, pindex):
         """
@@ -2855,153 +3244,150 @@ class Np_Super_Ob:
                     thisyy = (yindex + ypt) % 180
                     thispp = (pindex + ppt) % 73
 
-                    if self.nobs[thisxx][thisyy][thispp] != 0:
-                        temp_anom.append(self.grid[thisxx][thisyy][thispp])
-                        temp_nobs.append(self.nobs[thisxx][thisyy][thispp])
+                    nobs = self.get_pentad_value(self.nobs, thisxx, thisyy, thispp)
+                    if nobs != 0:
+                        temp_anom.append(
+                            self.get_pentad_value(self.grid, thisxx, thisyy, thispp)
+                        )
+                        temp_nobs.append(nobs)
 
         return temp_anom, temp_nobs
 
-    def get_buddy_limits_with_parameters(
-        self, pentad_stdev, limits, number_of_obs_thresholds, multipliers
-    ):
-        """Get buddy limits with parameters."""
-        nonmiss = np.nonzero(self.nobs)
-        for i in range(len(nonmiss[0])):
-            xindex = nonmiss[0][i]
-            yindex = nonmiss[1][i]
-            pindex = nonmiss[2][i]
-            m, d = qc.pentad_to_month_day(pindex + 1)
+    def get_neighbour_sums(self, search_radius, pentads=None):
+        """
+        Calculate, for every gridcell in the pentads held in memory, the sums over the neighbours
+        that func:`get_neighbour_anomalies` would return for that gridcell.
 
-            stdev = pentad_stdev.get_value_mds_style(
-                89.5 - yindex, -179.5 + xindex, m, d
-            )
+        :param search_radius: three element array search radius in which to look lon, lat, time
+        :param pentads: the pentads for which to calculate the sums, all pentads held in memory if None
+        :return: dictionaries, keyed by pentad, of the number of non-empty neighbours, sum of their
+            anomalies, sum of their numbers of observations and sum of the reciprocals of their
+            numbers of observations
+        :rtype: dict of numpy arrays
+
+        The neighbourhood of a gridcell is a box of 2*full_xspan+1 by 2*yspan+1 by 2*pspan+1
+        gridcells centred on it, where full_xspan is widened with latitude. The box wraps
+        around in longitude, latitude and pentad and any gridcell which is included more
+        than once in the box (which happens at high latitudes) is counted more than once,
+        as it is in func:`get_neighbour_anomalies`. The central gridcell is excluded.
+        """
+        assert len(search_radius) == 3, str(len(search_radius))
 
-            if stdev is None or stdev < 0.0:
-                stdev = 1.0
+        if pentads is None:
+            pentads = list(self.nobs)
 
-            match_not_found = True
+        radcon = 3.1415928 / 180.0
 
-            for j, limit in enumerate(limits):
-                temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                    limits[j], xindex, yindex, pindex
-                )
+        # latitude-dependent half-width in longitude for each row
+        latitude_approx = 89.5 - np.arange(180)
+        full_xspan = [
+            int(search_radius[0] / math.cos(lat * radcon)) for lat in latitude_approx
+        ]
 
-                if len(temp_anom) > 0 and match_not_found:
-                    self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-                    total_nobs = np.sum(temp_nobs)
+        fields = {}
+        for pindex in self.nobs:
+            occupied = self.nobs[pindex] != 0
+            inverse_nobs = np.zeros((360, 180))
+            inverse_nobs[occupied] = 1.0 / self.nobs[pindex][occupied]
+            fields[pindex] = [
+                occupied.astype(float),
+                self.grid[pindex],
+                self.nobs[pindex],
+                inverse_nobs,
+            ]
+
+        sums = [{}, {}, {}, {}]
+        for pindex in pentads:
+            for i in range(4):
+                # pentads which are not held in memory are empty
+                total = np.zeros((360, 180))
+                for ppt in range(-1 * search_radius[2], search_radius[2] + 1):
+                    thispp = (pindex + ppt) % 73
+                    if thispp in fields:
+                        total += fields[thispp][i]
 
-                    self.buddy_stdev[xindex][yindex][pindex] = (
-                        get_threshold_multiplier(
-                            total_nobs, number_of_obs_thresholds[j], multipliers[j]
-                        )
-                        * stdev
-                    )
+                total = _circular_window_sum(total, search_radius[1], 1)
+                total = _longitude_window_sum(total, full_xspan)
 
-                    match_not_found = False
+                sums[i][pindex] = total - fields[pindex][i]
 
-            if match_not_found:
-                self.buddy_mean[xindex][yindex][pindex] = 0.0
-                self.buddy_stdev[xindex][yindex][pindex] = 500.0
+        return sums[0], sums[1], sums[2], sums[3]
 
-        return
+    def get_buddy_limits_with_parameters(
+        self, pentad_stdev, limits, number_of_obs_thresholds, multipliers
+    ):
+        """
+        Get buddy limits with parameters. The neighbourhoods are tried in the order given and
+        each gridcell takes its limits from the first one in which it has neighbours. The sums
+        over each neighbourhood are calculated in turn, only for the pentads which still have
+        gridcells without neighbours.
+        """
+        nonmiss = {}
+        stdev = {}
+        buddy_mean = {}
+        buddy_stdev = {}
+        match_not_found = {}
+        for pindex in self.nobs:
+            nonmiss[pindex] = np.nonzero(self.nobs[pindex])
+            m, d = qc.pentad_to_month_day(pindex + 1)
 
-    def get_buddy_limits(self, pentad_stdev):
-        """Get buddy limits for old style buddy check."""
-        nonmiss = np.nonzero(self.nobs)
-        for i in range(len(nonmiss[0])):
-            xindex = nonmiss[0][i]
-            yindex = nonmiss[1][i]
-            pindex = nonmiss[2][i]
-            month, day = qc.pentad_to_month_day(pindex + 1)
-
-            # bug noted here single field getsst but multiple fields passed
-            stdev = pentad_stdev.get_value_mds_style(
-                89.5 - yindex, -179.5 + xindex, month, day
+            stdev[pindex] = get_gridcell_stdevs(
+                pentad_stdev.get_values_mds_style, nonmiss[pindex], m, d
             )
 
-            if stdev is None or stdev < 0.0:
-                stdev = 1.0
-
-            match_not_found = True
-
-            # if there is neighbour in that range then calculate a mean
-            if match_not_found:
-                temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                    [1, 1, 2], xindex, yindex, pindex
-                )
-
-                if len(temp_anom) > 0:
-                    self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-                    total_nobs = np.sum(temp_nobs)
-
-                    self.buddy_stdev[xindex][yindex][pindex] = (
-                        get_threshold_multiplier(
-                            total_nobs, [0, 5, 15, 100], [4.0, 3.5, 3.0, 2.5]
-                        )
-                        * stdev
-                    )
+            buddy_mean[pindex] = np.zeros(len(nonmiss[pindex][0]))
+            buddy_stdev[pindex] = np.zeros(len(nonmiss[pindex][0])) + 500.0
 
-                    match_not_found = False
-                    assert total_nobs != 0, "total number of obs is zero"
+            match_not_found[pindex] = np.ones(len(nonmiss[pindex][0]), dtype=bool)
 
-            # otherwise move out further in space and time to 2 degrees and 2 pentads
-            if match_not_found:
-                temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                    [2, 2, 2], xindex, yindex, pindex
-                )
+        for j, limit in enumerate(limits):
+            pentads = [p for p in self.nobs if match_not_found[p].any()]
+            if len(pentads) == 0:
+                break
 
-                if len(temp_anom) > 0:
-                    self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-                    total_nobs = np.sum(temp_nobs)
+            count, anomaly_sum, nobs_sum, _ = self.get_neighbour_sums(limit, pentads)
 
-                    self.buddy_stdev[xindex][yindex][pindex] = (
-                        get_threshold_multiplier(total_nobs, [0], [4.0]) * stdev
-                    )
+            for pindex in pentads:
+                pentad_count = count[pindex][nonmiss[pindex]]
+                match = match_not_found[pindex] & (pentad_count > 0)
 
-                    match_not_found = False
-                    assert total_nobs != 0, "total number of obs is zero"
-
-            # otherwise move out further in space and time to 2 degrees and 2 pentads
-            if match_not_found:
-                temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                    [1, 1, 4], xindex, yindex, pindex
+                buddy_mean[pindex][match] = (
+                    anomaly_sum[pindex][nonmiss[pindex]][match] / pentad_count[match]
                 )
 
-                if len(temp_anom) > 0:
-                    self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-                    total_nobs = np.sum(temp_nobs)
-
-                    self.buddy_stdev[xindex][yindex][pindex] = (
-                        get_threshold_multiplier(
-                            total_nobs, [0, 5, 15, 100], [4.0, 3.5, 3.0, 2.5]
-                        )
-                        * stdev
+                total_nobs = nobs_sum[pindex][nonmiss[pindex]][match]
+                multiplier = np.zeros(len(total_nobs))
+                for nobs in np.unique(total_nobs):
+                    multiplier[total_nobs == nobs] = get_threshold_multiplier(
+                        nobs, number_of_obs_thresholds[j], multipliers[j]
                     )
+                buddy_stdev[pindex][match] = multiplier * stdev[pindex][match]
 
-                    match_not_found = False
-                    assert total_nobs != 0, "total number of obs is zero"
+                match_not_found[pindex][match] = False
 
-            # final step out is to 2 degrees and 4 pentads
-            if match_not_found:
-                temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                    [2, 2, 4], xindex, yindex, pindex
-                )
-
-                if len(temp_anom) > 0:
-                    self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-                    total_nobs = np.sum(temp_nobs)
+            del count, anomaly_sum, nobs_sum
 
-                    self.buddy_stdev[xindex][yindex][pindex] = (
-                        get_threshold_multiplier(total_nobs, [0], [4.0]) * stdev
-                    )
+        for pindex in self.nobs:
+            self.buddy_mean[pindex] = np.zeros((360, 180))
+            self.buddy_stdev[pindex] = np.zeros((360, 180))
+            self.buddy_mean[pindex][nonmiss[pindex]] = buddy_mean[pindex]
+            self.buddy_stdev[pindex][nonmiss[pindex]] = buddy_stdev[pindex]
 
-                    match_not_found = False
-                    assert total_nobs != 0, "total number of obs is zero"
+        return
 
-            # if there are no neighbours then any observation will get a pass
-            if match_not_found:
-                self.buddy_mean[xindex][yindex][pindex] = 0.0
-                self.buddy_stdev[xindex][yindex][pindex] = 500.0
+    def get_buddy_limits(self, pentad_stdev):
+        """
+        Get buddy limits for old style buddy check. The neighbourhood is widened in steps
+        from 1 degree and 2 pentads, to 2 degrees and 2 pentads, to 1 degree and 4 pentads
+        and finally to 2 degrees and 4 pentads until some neighbours are found. If there are
+        no neighbours then any observation will get a pass.
+        """
+        self.get_buddy_limits_with_parameters(
+            pentad_stdev,
+            [[1, 1, 2], [2, 2, 2], [1, 1, 4], [2, 2, 4]],
+            [[0, 5, 15, 100], [0], [0, 5, 15, 100], [0]],
+            [[4.0, 3.5, 3.0, 2.5], [4.0], [4.0, 3.5, 3.0, 2.5], [4.0]],
+        )
 
         return
 
@@ -3026,57 +3412,48 @@ class Np_Super_Ob:
         :type limits: list of floats
         :type sigma_m: float
         """
-        nonmiss = np.nonzero(self.nobs)
-
-        for i in range(len(nonmiss[0])):
-            xindex = nonmiss[0][i]
-            yindex = nonmiss[1][i]
-            pindex = nonmiss[2][i]
+        # if there is neighbour in that range then calculate a mean
+        count, anomaly_sum, _, inverse_nobs_sum = self.get_neighbour_sums(limits)
 
+        for pindex in self.nobs:
+            nonmiss = np.nonzero(self.nobs[pindex])
             m, d = qc.pentad_to_month_day(pindex + 1)
 
-            stdev1_ex = stdev1.get_value(89.5 - yindex, -179.5 + xindex, m, d)
-            stdev2_ex = stdev2.get_value(89.5 - yindex, -179.5 + xindex, m, d)
-            stdev3_ex = stdev3.get_value(89.5 - yindex, -179.5 + xindex, m, d)
+            stdev1_ex = get_gridcell_stdevs(stdev1.get_values, nonmiss, m, d)
+            stdev2_ex = get_gridcell_stdevs(stdev2.get_values, nonmiss, m, d)
+            stdev3_ex = get_gridcell_stdevs(stdev3.get_values, nonmiss, m, d)
+
+            pentad_count = count[pindex][nonmiss]
+            match = pentad_count > 0
 
-            if stdev1_ex is None or stdev1_ex < 0.0:
-                stdev1_ex = 1.0
-            if stdev2_ex is None or stdev2_ex < 0.0:
-                stdev2_ex = 1.0
-            if stdev3_ex is None or stdev3_ex < 0.0:
-                stdev3_ex = 1.0
+            buddy_mean = np.zeros(len(nonmiss[0]))
+            buddy_stdev = np.zeros(len(nonmiss[0])) + 500.0
 
-            # if there is neighbour in that range then calculate a mean
-            temp_anom, temp_nobs = self.get_neighbour_anomalies(
-                limits, xindex, yindex, pindex
+            buddy_mean[match] = (
+                anomaly_sum[pindex][nonmiss][match] / pentad_count[match]
             )
 
-            if len(temp_anom) > 0:
-                self.buddy_mean[xindex][yindex][pindex] = np.mean(temp_anom)
-
-                tot = 0.0
-                ntot = 0.0
-                for n_obs in temp_nobs:
-                    # measurement error for each 1x1x5day cell
-                    tot += sigma_m**2.0 / n_obs
-                    # sampling error for each 1x1x5day cell
-                    # multiply by three to match observed stdev
-                    tot += noise_scaling * (stdev2_ex**2.0 / n_obs)
-                    ntot += 1.0
-
-                sigma_buddy = tot / (ntot**2.0)
-                sigma_buddy += stdev3_ex**2.0 / ntot
-
-                self.buddy_stdev[xindex][yindex][pindex] = math.sqrt(
-                    sigma_m**2.0
-                    + stdev1_ex**2.0
-                    + noise_scaling * stdev2_ex**2.0
-                    + sigma_buddy
-                )
+            # measurement error and sampling error for each 1x1x5day cell
+            # multiply sampling error by three to match observed stdev
+            tot = (sigma_m**2.0 + noise_scaling * stdev2_ex[match] ** 2.0) * (
+                inverse_nobs_sum[pindex][nonmiss][match]
+            )
+            ntot = pentad_count[match]
 
-            else:
-                self.buddy_mean[xindex][yindex][pindex] = 0.0
-                self.buddy_stdev[xindex][yindex][pindex] = 500.0
+            sigma_buddy = tot / (ntot**2.0)
+            sigma_buddy += stdev3_ex[match] ** 2.0 / ntot
+
+            buddy_stdev[match] = np.sqrt(
+                sigma_m**2.0
+                + stdev1_ex[match] ** 2.0
+                + noise_scaling * stdev2_ex[match] ** 2.0
+                + sigma_buddy
+            )
+
+            self.buddy_mean[pindex] = np.zeros((360, 180))
+            self.buddy_stdev[pindex] = np.zeros((360, 180))
+            self.buddy_mean[pindex][nonmiss] = buddy_mean
+            self.buddy_stdev[pindex][nonmiss] = buddy_stdev
 
         return
 
@@ -3096,7 +3473,7 @@ class Np_Super_Ob:
         xindex = qc.mds_lon_to_xindex(lon)
         yindex = qc.mds_lat_to_yindex(lat)
         pindex = qc.which_pentad(month, day) - 1
-        return self.buddy_mean[xindex][yindex][pindex]
+        return self.get_pentad_value(self.buddy_mean, xindex, yindex, pindex)
 
     def get_buddy_stdev(self, lat, lon, month, day):
         """
@@ -3114,7 +3491,72 @@ class Np_Super_Ob:
         xindex = qc.mds_lon_to_xindex(lon)
         yindex = qc.mds_lat_to_yindex(lat)
         pindex = qc.which_pentad(month, day) - 1
-        return self.buddy_stdev[xindex][yindex][pindex]
+        return self.get_pentad_value(self.buddy_stdev, xindex, yindex, pindex)
+
+    def get_buddy_means(self, lat, lon, month, day):
+        """
+        Get the buddy means from the grid for specified times and places. Array version of
+        func:`get_buddy_mean`.
+        """
+        xindex = qc.mds_lon_to_xindex_array(lon)
+        yindex = qc.mds_lat_to_yindex_array(lat)
+        pindex = qc.which_pentad_array(month, day) - 1
+        return self.get_pentad_values(self.buddy_mean, xindex, yindex, pindex)
+
+    def get_buddy_stdevs(self, lat, lon, month, day):
+        """
+        Get the buddy standard deviations from the grid for specified times and places. Array
+        version of func:`get_buddy_stdev`.
+        """
+        xindex = qc.mds_lon_to_xindex_array(lon)
+        yindex = qc.mds_lat_to_yindex_array(lat)
+        pindex = qc.which_pentad_array(month, day) - 1
+        return self.get_pentad_values(self.buddy_stdev, xindex, yindex, pindex)
+
+
+class _DeckRows:
+    """
+    The parts of the reports of a class`.Deck` made by func:`Deck.from_table` which are not in its
+    table: IDs, UIDs, QC flag columns and any other extended data and climate variables. The QC flags
+    of the reports that have not been made are kept here, packed in the same way as in a
+    class`.MarineReport`, and those of the reports that have been made are kept in the reports.
+    Which of the extended data in TRACKLIST are set in the table is also kept for each report.
+    """
+
+    def __init__(self, report_class, ids, uids, qc, qc_extra, ext, clim_extra):
+        self.report_class = report_class
+        self.ids = ids
+        self.uids = uids
+        self.qc = qc
+        self.qc_extra = qc_extra
+        self.ext = ext
+        self.clim_extra = clim_extra
+        self.track_set = np.full(
+            len(ids), _TRACK_INDEX["dsi"][1] | _TRACK_INDEX["vsi"][1]
+        )
+        self.made = []
+
+    def make(self, i, data):
+        """Make the report in row i, whose data are the row data of the table."""
+        rep = self.report_class.from_row(
+            data, self.ids[i], self.uids[i], int(self.track_set[i])
+        )
+        for field, packed in self.qc.items():
+            setattr(rep, field, int(packed[i]))
+        for key, values in self.qc_extra.items():
+            if values[i] >= 0:
+                rep._set_flag(key, int(values[i]))
+        for name, (clim, stdev) in self.clim_extra.items():
+            rep.add_climate_variable(
+                name,
+                None if np.isnan(clim[i]) else clim[i],
+                None if np.isnan(stdev[i]) else stdev[i],
+            )
+        if self.ext is not None:
+            for varname, varvalue in self.ext[i].items():
+                rep.setext(varname, varvalue)
+        self.made.append(i)
+        return rep
 
 
 class Deck:
@@ -3129,18 +3571,258 @@ class Deck:
     class`.Deck` which will then be used to decide which observations will be affected by
     subsequent Deck-level quality-control checks or methods.
 
+    The data of the reports are gathered into one table with a row for each report, and the
+    data of each report become a view of its row, so the Deck-level checks work on whole
+    columns of the table. The QC flags of the reports are gathered into columns as needed.
+
+    A class`.Deck` made from a table of reports by func:`from_table` starts from the table and
+    the QC flag columns instead, and each class`.MarineReport` is only made when it is first
+    needed, e.g. for a class`.Voyage` or to be written out.
+
     It's called a class`.Deck` because that is the terminology used by ICOADS - literally a
     'deck' of punched cards each containing one or more reports.
     """
 
     def __init__(self):
-        self.reps = []
+        self._reps = []
+        self._rows = None
         self.idtracker = {}
         self.filter = QC_filter()
+        self.mask = None
+        self.data = None
+
+    @classmethod
+    def from_table(cls, frame, flags=None, ext=None, report_class=MarineReport):
+        """
+        Make a class`.Deck` from a table of reports, without making the reports themselves.
+
+        :param frame: DataFrame with a row for each report holding its ID, UID, variables in VARLIST
+            and climate variables as clim_<name> and stdev_<name>, missing values are NaN
+        :param flags: DataFrame of QC flags named <QC type>_<flag>, as returned by
+            base_qc.perform_base_qc
+        :param ext: list holding a dictionary of extended data for each report
+        :param report_class: class of the reports, e.g. class`.MarineReportQC`
+        :type frame: pandas.DataFrame
+        :type flags: pandas.DataFrame
+        :type ext: list of dict
+        :type report_class: type
+        :return: the class`.Deck`
+        :rtype: class`.Deck`
+        """
+        nrep = len(frame)
+        deck = cls()
+
+        data = np.full((nrep, _NDATA), np.nan)
+        for varname, i in _VAR_INDEX.items():
+            if varname in frame:
+                data[:, i] = frame[varname].to_numpy(dtype=float)
+        clim_extra = {}
+        for name in frame.columns:
+            if not name.startswith("clim_"):
+                continue
+            varname = name[5:]
+            clim = frame[name].to_numpy(dtype=float)
+            stdev = np.full(nrep, np.nan)
+            if "stdev_" + varname in frame:
+                stdev = frame["stdev_" + varname].to_numpy(dtype=float)
+            if varname in _CLIM_INDEX:
+                data[:, _CLIM_INDEX[varname]] = clim
+                data[:, _CLIM_INDEX[varname] + 1] = stdev
+            else:
+                clim_extra[varname] = (clim, stdev)
+
+        # dsi and vsi as set by MarineReport.calculate_dsi_vsi
+        data[:, _TRACK_INDEX["dsi"][0]] = data[:, _VAR_INDEX["DS"]]
+        vs = data[:, _VAR_INDEX["VS"]]
+        vsi = np.where(
+            data[:, _VAR_INDEX["YR"]] >= 1968, vs * 5.0 - 2.0, vs * 3.0 - 1.0
+        )
+        data[:, _TRACK_INDEX["vsi"][0]] = np.where(vs == 0, 0.0, vsi)
+
+        qc_packed = {}
+        qc_extra = {}
+        if flags is not None:
+            for name in flags.columns:
+                key = name.replace("_", "", 1)
+                values = flags[name].to_numpy(dtype=int)
+                if key not in _QC_BITS:
+                    qc_extra[key] = values
+                    continue
+                field, shift = _QC_BITS[key]
+                packed = qc_packed.get(field)
+                if packed is None:
+                    packed = np.full(nrep, _QC_UNSET[field], dtype=np.uint64)
+                qc_packed[field] = _pack_flags(packed, shift, values)
+
+        ids = np.full(nrep, "", dtype=object)
+        if "ID" in frame:
+            ids = frame["ID"].to_numpy(dtype=object)
+        uids = np.full(nrep, None, dtype=object)
+        if "UID" in frame:
+            uids = frame["UID"].to_numpy(dtype=object)
+
+        deck.data = data
+        deck._reps = [None] * nrep
+        deck._rows = _DeckRows(
+            report_class, ids, uids, qc_packed, qc_extra, ext, clim_extra
+        )
+
+        # index the reports by ID in order of first appearance, as func:`append` does
+        codes, uniques = pd.factorize(ids, use_na_sentinel=False)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        for one_id, rows in zip(uniques, np.split(order, bounds)):
+            deck.idtracker[one_id] = rows.tolist()
+
+        return deck
 
     def __len__(self):
         """Get length."""
-        return len(self.reps)
+        return len(self._reps)
+
+    @property
+    def reps(self):
+        """List of the MarineReports in the class`.Deck`, making any that have not been made yet."""
+        if self._rows is not None:
+            for i in range(len(self._reps)):
+                self.rep(i)
+            self._rows = None
+        return self._reps
+
+    def rep(self, i):
+        """
+        Get one of the MarineReports in the class`.Deck`, making it if it has not been made yet.
+
+        :param i: position of the report in the class`.Deck`
+        :type i: integer
+        :return: the report
+        :rtype: class`.MarineReport`
+        """
+        rep = self._reps[i]
+        if rep is None:
+            rep = self._rows.make(i, self.data[i])
+            self._reps[i] = rep
+        return rep
+
+    def reset(self):
+        """Drop the table and the filter mask after the MarineReports in the class`.Deck` change."""
+        self.mask = None
+        if self._rows is None:
+            self.data = None
+
+    def table(self):
+        """
+        Get the table of the data of the MarineReports in the class`.Deck`, with one row for each
+        report. The table is made when it is first needed and the data of each report are replaced
+        by a view of its row, so that the reports and the table stay in step.
+
+        :return: table of the data, climate variables and extended data of the reports
+        :rtype: numpy array
+        """
+        if self.data is None:
+            self.data = np.empty((len(self.reps), _NDATA))
+            for row, rep in zip(self.data, self.reps):
+                row[:] = rep.data
+                rep.data = row
+        return self.data
+
+    def column(self, varname):
+        """
+        Get one of the data variables of all the MarineReports in the class`.Deck`. Missing
+        values are NaN.
+
+        :param varname: name of the variable
+        :type varname: string
+        :return: a view of the column of the table
+        :rtype: numpy array
+        """
+        return self.table()[:, _VAR_INDEX[varname]]
+
+    def getnorm(self, varname, intype="clim"):
+        """
+        Get the climatological average or standard deviation of a climate variable for all the
+        MarineReports in the class`.Deck`. Missing values are NaN.
+
+        :param varname: the name of the climate variable
+        :param intype: 'clim' for climatological average and 'stdev' for standard deviation
+        :type varname: string
+        :type intype: string
+        :return: a view of the column of the table
+        :rtype: numpy array
+        """
+        assert intype in ["clim", "stdev"], "unknown type " + str(intype)
+        return self.table()[:, _CLIM_INDEX[varname] + (intype == "stdev")]
+
+    def getanom(self, varname):
+        """
+        Get the anomalies of a climate variable for all the MarineReports in the class`.Deck`.
+        Missing anomalies are NaN.
+
+        :param varname: the name of the climate variable
+        :type varname: string
+        :return: anomalies
+        :rtype: numpy array
+        """
+        return self.column(varname) - self.getnorm(varname)
+
+    def lat(self):
+        """Return latitudes in range [-90,90]."""
+        return self.column("LAT")
+
+    def lon(self):
+        """Return longitudes in range [-180,180]."""
+        outlon = self.column("LON")
+        return np.where(outlon > 180, outlon - 360.0, outlon)
+
+    def get_qc(self, qc_type, specific_flag):
+        """
+        Get the value of a particular QC flag for all the MarineReports in the class`.Deck`
+
+        :param qc_type: the general QC area e.g. SST, MAT..
+        :param specific_flag: the name of the flag whose value is to be returned e.g. buddy_check, repeated_value
+        :type qc_type: string
+        :type specific_flag: string
+        :return: the values of the flag, 9 where the flag is not set.
+        :rtype: numpy array of integers
+        """
+        key = qc_type + specific_flag
+        if self._rows is not None:
+            made = self._rows.made
+        if key not in _QC_BITS:
+            if self._rows is None:
+                return np.array(
+                    [rep.get_qc(qc_type, specific_flag) for rep in self._reps],
+                    dtype=int,
+                )
+            flags = self._rows.qc_extra.get(key, np.full(len(self), 9)).copy()
+            flags[made] = [self._reps[i].get_qc(qc_type, specific_flag) for i in made]
+            flags[flags < 0] = 9
+            return flags
+        field, shift = _QC_BITS[key]
+        if self._rows is None:
+            packed = np.array(
+                [getattr(rep, field) for rep in self._reps], dtype=np.uint64
+            )
+        else:
+            packed = self._rows.qc.get(field)
+            if packed is None:
+                packed = np.full(len(self), _QC_UNSET[field], dtype=np.uint64)
+            else:
+                packed = packed.copy()
+            packed[made] = [getattr(self._reps[i], field) for i in made]
+        return _unpack_flags(packed, shift)
+
+    def passes(self):
+        """
+        Get the filter mask of the class`.Deck`, which is True for the MarineReports that pass
+        the QC_filter of the Deck.
+
+        :return: filter mask
+        :rtype: numpy array of booleans
+        """
+        if self.mask is None:
+            self.mask = self.filter.test_reports(self)
+        return self.mask
 
     def append(self, rep):
         """
@@ -3153,6 +3835,7 @@ class Deck:
         internal index of ships.
         """
         self.reps.append(rep)
+        self.reset()
         i = len(self) - 1
         if rep.getvar("ID") in self.idtracker:
             self.idtracker[rep.getvar("ID")].append(i)
@@ -3165,6 +3848,7 @@ class Deck:
         for large numbers of observations.
         """
         self.reps.sort()
+        self.reset()
         self.index_by_id()
 
     def index_by_id(self):
@@ -3186,7 +3870,9 @@ class Deck:
         :param pos: position in the deck of the observation to be popped.
         :type pos: integer
         """
-        return self.reps.pop(pos)
+        rep = self.reps.pop(pos)
+        self.reset()
+        return rep
 
     def set_qc(self, qc_type, specific_flag, set_value):
         """
@@ -3202,19 +3888,78 @@ class Deck:
         The specified flag in the general QC area of qc_type is set to the given value. This
         should be a reasonably flexible system to which new QC flags can be easily added.
         """
-        for rep in self.reps:
+        if self._rows is not None:
+            self.set_qc_array(qc_type, specific_flag, np.full(len(self), set_value))
+            return
+        for rep in self._reps:
             rep.set_qc(qc_type, specific_flag, set_value)
         return
 
+    def set_qc_array(self, qc_type, specific_flag, set_values, rows=None):
+        """
+        Set the QC state of each MarineReport in the class`.Deck` to its own value. Array
+        version of func:`set_qc`.
+
+        :param qc_type: the general QC area e.g. SST, MAT...
+        :param specific_flag: the name of the flag to be set e.g. buddy_check, repeated_value
+        :param set_values: the value which is to be given to the flag of each report
+        :param rows: positions of the reports to be set, one for each value, if None then set
+            all the reports
+        :type qc_type: string
+        :type specific_flag: string
+        :type set_values: numpy array of integers in 0-9
+        :type rows: numpy array of integers
+        """
+        if rows is None:
+            rows = np.arange(len(self))
+        assert len(set_values) == len(rows), "wrong number of values"
+        if self._rows is None:
+            for i, set_value in zip(rows.tolist(), np.asarray(set_values).tolist()):
+                self._reps[i].set_qc(qc_type, specific_flag, set_value)
+            return
+        set_values = np.asarray(set_values, dtype=int)
+        assert np.all((set_values >= 0) & (set_values <= 9)), "value not in 0-9"
+        assert (qc_type in MarineReport.special_qc_types) or (qc_type in VARLIST), (
+            "unknown data type " + qc_type
+        )
+        key = qc_type + specific_flag
+        if key in _QC_BITS:
+            field, shift = _QC_BITS[key]
+            packed = self._rows.qc.get(field)
+            if packed is None:
+                packed = np.full(len(self), _QC_UNSET[field], dtype=np.uint64)
+            else:
+                packed = packed.copy()
+            packed[rows] = _pack_flags(packed[rows], shift, set_values)
+            self._rows.qc[field] = packed
+        else:
+            flags = self._rows.qc_extra.get(key)
+            if flags is None:
+                # -1 for the reports whose flag is not set
+                flags = np.full(len(self), -1)
+            else:
+                flags = flags.copy()
+            flags[rows] = set_values
+            self._rows.qc_extra[key] = flags
+        made = np.zeros(len(self), dtype=bool)
+        made[self._rows.made] = True
+        for j in np.flatnonzero(made[rows]):
+            self._reps[rows[j]].set_qc(qc_type, specific_flag, int(set_values[j]))
+        return
+
     def add_filter(self, infilter):
         """
         Add a QC_filter to the Deck. This will be used to decide which observations will
         be affected by subsequent checks, such as the buddy check.
 
+        The filter mask is calculated once, when the filter is added, so flags set after
+        that do not change which observations pass. Add the filter again to update it.
+
         :param infilter: class`.QC_filter` to be added to the Deck
         :type infilter: class`.QC_filter`
         """
         self.filter = infilter
+        self.mask = infilter.test_reports(self)
 
     def mds_buddy_check(self, intype, pentad_stdev, parameters):
         """
@@ -3233,45 +3978,30 @@ class Deck:
         number_of_obs_thresholds = parameters["number_of_obs_thresholds"]
         multipliers = parameters["multipliers"]
 
+        passes = self.passes()
+        lat = self.lat()[passes]
+        lon = self.lon()[passes]
+        mon = self.column("MO")[passes]
+        day = self.column("DY")[passes]
+        x = self.getanom(intype)[passes]
+
         # calculate superob averages and numbers of observations
         grid = Np_Super_Ob()
-        for rep in self.reps:
-            if self.filter.test_report(rep) == 0:
-                grid.add_rep(
-                    rep.lat(),
-                    rep.lon(),
-                    rep.getvar("YR"),
-                    rep.getvar("MO"),
-                    rep.getvar("DY"),
-                    rep.getanom(intype),
-                )
+        grid.add_reps(lat, lon, mon, day, x)
 
         grid.take_average()
         grid.get_buddy_limits_with_parameters(
             pentad_stdev, limits, number_of_obs_thresholds, multipliers
         )
 
-        # finally loop over all reports and update buddy QC
-        for this_report in self.reps:
-            if self.filter.test_report(this_report) == 0:
-                lat = this_report.lat()
-                lon = this_report.lon()
-                mon = this_report.getvar("MO")
-                day = this_report.getvar("DY")
-
-                # if the SST anomaly differs from the neighbour average
-                # by more than the calculated range then reject
-                x = this_report.getanom(intype)
-                bm = grid.get_buddy_mean(lat, lon, mon, day)
-                bsd = grid.get_buddy_stdev(lat, lon, mon, day)
-
-                if abs(x - bm) >= bsd:
-                    this_report.set_qc(intype, "bud", 1)
-                else:
-                    this_report.set_qc(intype, "bud", 0)
+        # finally update buddy QC of all reports, if the SST anomaly differs from
+        # the neighbour average by more than the calculated range then reject
+        bm = grid.get_buddy_means(lat, lon, mon, day)
+        bsd = grid.get_buddy_stdevs(lat, lon, mon, day)
 
-            else:
-                this_report.set_qc(intype, "bud", 0)
+        flags = np.zeros(len(self), dtype=int)
+        flags[passes] = np.abs(x - bm) >= bsd
+        self.set_qc_array(intype, "bud", flags)
 
         del grid
 
@@ -3309,57 +4039,53 @@ class Deck:
         limits = parameters["bayesian_buddy_check"]["limits"]
         noise_scaling = parameters["bayesian_buddy_check"]["noise_scaling"]
 
+        passes = self.passes()
+        lat = self.lat()[passes]
+        lon = self.lon()[passes]
+        mon = self.column("MO")[passes]
+        day = self.column("DY")[passes]
+        x = self.getanom(intype)[passes]
+
         grid = Np_Super_Ob()
-        for rep in self.reps:
-            if self.filter.test_report(rep) == 0:
-                grid.add_rep(
-                    rep.lat(),
-                    rep.lon(),
-                    rep.getvar("YR"),
-                    rep.getvar("MO"),
-                    rep.getvar("DY"),
-                    rep.getanom(intype),
-                )
+        grid.add_reps(lat, lon, mon, day, x)
         grid.take_average()
         grid.get_new_buddy_limits(
             stdev1, stdev2, stdev3, limits, sigma_m, noise_scaling
         )
 
-        for this_report in self.reps:
-            if self.filter.test_report(this_report) == 0:
-                lat = this_report.lat()
-                lon = this_report.lon()
-                mon = this_report.getvar("MO")
-                day = this_report.getvar("DY")
-
-                # if the SST anomaly differs from the neighbour average
-                # by more than the calculated range then reject
-
-                ppp = qc.p_gross(
-                    p0,
-                    q,
-                    r_hi,
-                    r_lo,
-                    this_report.getanom(intype),
-                    grid.get_buddy_mean(lat, lon, mon, day),
-                    grid.get_buddy_stdev(lat, lon, mon, day),
-                )
+        bm = grid.get_buddy_means(lat, lon, mon, day)
+        bsd = grid.get_buddy_stdevs(lat, lon, mon, day)
 
-                if ppp > 0:
-                    flag = int(math.floor(ppp * 10))
-                    if flag > 9:
-                        flag = 9
-                    this_report.set_qc(intype, "bbud", flag)
-                else:
-                    this_report.set_qc(intype, "bbud", int(0))
+        # if the SST anomaly differs from the neighbour average
+        # by more than the calculated range then reject
+        passflags = np.zeros(len(x), dtype=int)
+        for i in range(len(x)):
+            ppp = qc.p_gross(p0, q, r_hi, r_lo, x[i], bm[i], bsd[i])
+            if ppp > 0:
+                passflags[i] = min(int(math.floor(ppp * 10)), 9)
 
-            else:
-                this_report.set_qc(intype, "bbud", 0)
+        flags = np.zeros(len(self), dtype=int)
+        flags[passes] = passflags
+        self.set_qc_array(intype, "bbud", flags)
 
         del grid
 
         return
 
+    def platform_rows(self):
+        """
+        Generator which yields the ID of each platform in the class`.Deck` and the positions of
+        its reports in the Deck, in the order of func:`get_one_platform_at_a_time`. Only reports
+        that pass the QC_filter of the Deck are included.
+
+        :return: Yields the ID and the positions of the reports from a single platform.
+        :rtype: tuple
+        """
+        passes = self.passes()
+        for one_id, rows in self.idtracker.items():
+            rows = np.asarray(rows, dtype=int)
+            yield one_id, rows[passes[rows]]
+
     def get_one_platform_at_a_time(self):
         """
         Generator which yields one Voyage at a time for each unique ID in the Deck.
@@ -3369,50 +4095,202 @@ class Deck:
         :return: Yields a class`.Voyage` made of all ships with a single ID.
         :rtype: class`.Voyage`
         """
-        for one_id in self.idtracker:
+        for _, rows in self.platform_rows():
             out_voyage = Voyage()
-            for i in self.idtracker[one_id]:
-                if self.filter.test_report(self.reps[i]) == 0:
-                    out_voyage.add_report(self.reps[i])
+            out_voyage.add_reports([self.rep(i) for i in rows])
 
             yield out_voyage
 
-    def write_qc(self, runid, icoads_dir, year, month, allvarnames, test=False):
+    def check_platforms(self, check, args=(), processes=None):
+        """
+        Run a check on the reports from each platform given by func:`platform_rows`, without making
+        the reports. The check is given the ID of the platform and a dictionary of the columns of
+        the table for its reports, named as in VARLIST, together with the arrays from
+        func:`track_check.track_arrays` and func:`track_check.add_track_speeds`. It returns a
+        dictionary of QC flag arrays named <QC type>_<flag>, as the column-wise checks in
+        module`base_qc` do, and the flags are set in the class`.Deck` afterwards. The speed,
+        distance, course and time_diff between consecutive reports are set in the extended data
+        of the reports, as func:`get_one_platform_at_a_time` does.
+
+        The platforms are independent, so they are checked in a pool of processes, to which only
+        the rows of the table for each platform are sent.
+
+        :param check: function taking the ID and the columns of a platform as its first arguments,
+            which must be defined at the top level of a module so that it can be sent to the pool
+        :param args: further arguments for check
+        :param processes: number of processes to use, if None then use all the CPUs this process
+            may run on, if 1 then check the platforms one at a time in this process
+        :type check: function
+        :type args: tuple
+        :type processes: integer
+        :return: the number of platforms checked
+        :rtype: integer
+        """
+        table = self.table()
+        platforms = list(self.platform_rows())
+        payloads = ((check, one_id, table[rows], args) for one_id, rows in platforms)
+
+        if processes == 1:
+            self._set_platform_results(platforms, map(_check_platform, payloads))
+            return len(platforms)
+
+        if processes is None:
+            processes = available_cpus()
+
+        with multiprocessing.Pool(processes) as pool:
+            chunksize = max(1, len(platforms) // (4 * processes))
+            results = pool.imap(_check_platform, payloads, chunksize)
+            self._set_platform_results(platforms, results)
+
+        return len(platforms)
+
+    def _set_platform_results(self, platforms, results):
+        """
+        Set the QC flags and track speeds returned by func:`_check_platform` for each platform
+        in the class`.Deck`.
+        """
+        table = self.table()
+        track_bits = 0
+        for name in _PLATFORM_TRACK:
+            track_bits |= _TRACK_INDEX[name][1]
+
+        flags = {}
+        for (_, rows), (platform_flags, track) in zip(platforms, results):
+            for name, values in track.items():
+                table[rows, _TRACK_INDEX[name][0]] = values
+            for key, values in platform_flags.items():
+                if key not in flags:
+                    flags[key] = np.full(len(self), -1)
+                flags[key][rows] = values
+
+        for key, values in flags.items():
+            qc_type, specific_flag = key.split("_", 1)
+            rows = np.flatnonzero(values >= 0)
+            self.set_qc_array(qc_type, specific_flag, values[rows], rows)
+
+        checked = np.zeros(len(self), dtype=bool)
+        for _, rows in platforms:
+            checked[rows] = True
+        if self._rows is None:
+            made = np.flatnonzero(checked)
+        else:
+            self._rows.track_set[checked] |= track_bits
+            made = [i for i in self._rows.made if checked[i]]
+        for i in made:
+            self._reps[i]._track_set |= track_bits
+
+    def in_month(self, year, month):
+        """
+        Get the mask of the MarineReports in the class`.Deck` which are from the given month.
+
+        :param year: year of the month
+        :param month: month
+        :type year: integer
+        :type month: integer
+        :return: True for the reports in the month
+        :rtype: numpy array of booleans
+        """
+        return (self.column("YR") == year) & (self.column("MO") == month)
+
+    def write_qc(
+        self,
+        runid,
+        icoads_dir,
+        year,
+        month,
+        allvarnames,
+        test=False,
+        compress=False,
+        parquet=False,
+        index=False,
+    ):
         """
         Write out QC flags for specified variable names from
-        the contents of the class`.Deck`.
+        the contents of the class`.Deck`. Each file is written in one go
+        from the flag columns of the Deck by func:`write_qc_file`, and is
+        gzipped if compress is True.
+
+        If parquet is True, the flags are written instead to one Parquet dataset
+        for the month, qc_YYYYMM_runid.parquet, with a partition for each variable
+        name, qc=VAR, written by func:`write_qc_parquet`.
+
+        If index is True, an index of all the flags of the month by UID,
+        qc_YYYYMM_runid.index, is written as well by func:`write_qc_index`.
         """
         count_write = 0
         syr = str(year)
         smn = f"{month:02}"
 
-        if len(self.reps) == 0:
+        if len(self) == 0:
             print("wrote no output")
             return
 
+        in_month = np.flatnonzero(self.in_month(year, month))
+        uids = [
+            self._rows.uids[i] if self._reps[i] is None else self._reps[i].getvar("UID")
+            for i in in_month
+        ]
+        allflags = []
+
         for var in allvarnames:
             outfilename = var + "_qc_" + syr + smn + "_" + runid + ".csv"
             if test:
                 outfilename = "Test_" + outfilename
 
-            outfile = open(icoads_dir + "/" + outfilename, "w")
+            flags = np.zeros((len(in_month), len(allvarnames[var])), dtype=int)
+            for j, flag in enumerate(allvarnames[var]):
+                flags[:, j] = self.get_qc(var, flag)[in_month]
+            allflags.append(flags)
+
+            if parquet:
+                datasetname = "qc_" + syr + smn + "_" + runid + ".parquet"
+                if test:
+                    datasetname = "Test_" + datasetname
+                write_qc_parquet(
+                    os.path.join(icoads_dir, datasetname, "qc=" + var),
+                    uids,
+                    allvarnames[var],
+                    flags,
+                )
+            else:
+                write_qc_file(
+                    icoads_dir + "/" + outfilename,
+                    uids,
+                    allvarnames[var],
+                    flags,
+                    compress,
+                )
+            count_write += len(in_month)
 
-            outfile.write(
-                self.reps[0].print_qc_block(var, allvarnames[var], header=True)
+        if index:
+            indexname = "qc_" + syr + smn + "_" + runid + ".index"
+            if test:
+                indexname = "Test_" + indexname
+            write_qc_index(
+                os.path.join(icoads_dir, indexname),
+                uids,
+                allvarnames,
+                np.hstack(allflags),
             )
-            for rep in self.reps:
-                if rep.getvar("YR") == year and rep.getvar("MO") == month:
-                    outfile.write(
-                        rep.print_qc_block(var, allvarnames[var], header=False)
-                    )
-                    count_write += 1
-
-            outfile.close()
 
         print(f"wrote out {count_write} obs")
 
-    def write_output(self, runid, icoads_dir, year, month, test=False):
-        """Write out the contents of the class`.Deck`."""
+    def write_output(
+        self,
+        runid,
+        icoads_dir,
+        year,
+        month,
+        test=False,
+        compress=False,
+        parquet=False,
+        index=False,
+    ):
+        """
+        Write out the contents of the class`.Deck`, gzipped if compress is True.
+        The QC flags are written to a Parquet dataset if parquet is True and
+        indexed by UID if index is True, see func:`write_qc`.
+        """
         count_write = 0
         syr = str(year)
         smn = f"{month:02}"
@@ -3421,7 +4299,7 @@ class Deck:
         if test:
             outfilename = "Test_" + outfilename
 
-        outfile = open(icoads_dir + "/" + outfilename, "w")
+        outfile = open_output(icoads_dir + "/" + outfilename, compress=compress)
 
         varnames = [
             ["ID"],
@@ -3443,13 +4321,12 @@ class Deck:
             ["W"],
             ["D"],
         ]
-        if len(self.reps) == 0:
+        if len(self) == 0:
             return
-        outfile.write(self.reps[0].print_variable_block(varnames, header=True))
-        for rep in self.reps:
-            if rep.getvar("YR") == year and rep.getvar("MO") == month:
-                outfile.write(rep.print_variable_block(varnames))
-                count_write += 1
+        outfile.write(self.rep(0).print_variable_block(varnames, header=True))
+        for i in np.flatnonzero(self.in_month(year, month)):
+            outfile.write(self.rep(i).print_variable_block(varnames))
+            count_write += 1
         outfile.close()
 
         # write out base QC
@@ -3506,14 +4383,38 @@ class Deck:
             "W": ["noval", "hardlimit", "consistency", "wind_blacklist"],
         }
 
-        self.write_qc(runid, icoads_dir, year, month, allvarnames, test=test)
+        self.write_qc(
+            runid,
+            icoads_dir,
+            year,
+            month,
+            allvarnames,
+            test=test,
+            compress=compress,
+            parquet=parquet,
+            index=index,
+        )
 
         print(f"wrote out {count_write} obs")
 
         return
 
-    def write_min_output(self, runid, icoads_dir, year, month, test=False):
-        """Write out the contents of the class`.Deck`."""
+    def write_min_output(
+        self,
+        runid,
+        icoads_dir,
+        year,
+        month,
+        test=False,
+        compress=False,
+        parquet=False,
+        index=False,
+    ):
+        """
+        Write out the contents of the class`.Deck`, gzipped if compress is True.
+        The QC flags are written to a Parquet dataset if parquet is True and
+        indexed by UID if index is True, see func:`write_qc`.
+        """
         count_write = 0
         syr = str(year)
         smn = f"{month:02}"
@@ -3522,7 +4423,7 @@ class Deck:
         if test:
             outfilename = "Test_" + outfilename
 
-        outfile = open(icoads_dir + "/" + outfilename, "w")
+        outfile = open_output(icoads_dir + "/" + outfilename, compress=compress)
 
         varnames = [
             ["ID"],
@@ -3540,11 +4441,10 @@ class Deck:
             ["DPT", "anom"],
         ]
 
-        outfile.write(self.reps[0].print_variable_block(varnames, header=True))
-        for rep in self.reps:
-            if rep.getvar("YR") == year and rep.getvar("MO") == month:
-                outfile.write(rep.print_variable_block(varnames))
-                count_write += 1
+        outfile.write(self.rep(0).print_variable_block(varnames, header=True))
+        for i in np.flatnonzero(self.in_month(year, month)):
+            outfile.write(self.rep(i).print_variable_block(varnames))
+            count_write += 1
         outfile.close()
 
         # write out base QC
@@ -3576,7 +4476,17 @@ class Deck:
             ],
         }
 
-        self.write_qc(runid, icoads_dir, year, month, allvarnames, test=test)
+        self.write_qc(
+            runid,
+            icoads_dir,
+            year,
+            month,
+            allvarnames,
+            test=test,
+            compress=compress,
+            parquet=parquet,
+            index=index,
+        )
 
         print(f"wrote out {count_write} obs")
 
@@ -0,0 +1,855 @@
+"""
+Column-wise versions of the base QC checks applied by class`.MarineReportQC`. Instead of
+building one report object per observation and running the checks report by report, the
+functions in this module take whole columns (numpy arrays or pandas Series) and return
+integer flag arrays. Missing values are represented by NaN where the report-based checks
+expect None.
+
+The main entry point is :func:`perform_base_qc`, which takes a pandas DataFrame holding
+the report variables (named as in the VARLIST of Extended_IMMA_sb) and the climatological
+averages and standard deviations for each report, and returns a DataFrame of QC flags with
+columns named <QC type>_<flag> e.g. POS_date or SST_clim. The flags are identical to those
+set by class`.MarineReportQC.perform_base_qc`.
+
+The checks which work on all the reports from one platform, such as the track check, have
+column-wise versions too, e.g. func:`track_check` and func:`find_repeated_values`. These take
+the columns of the reports from one platform, as given by func:`Extended_IMMA_sb.Deck.check_platforms`,
+and return dictionaries of flag arrays named in the same way. The flags are identical to those
+set by the methods of class`.Voyage` of the same name.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from . import Blacklist as bl
+from . import CalcHums, qc
+from . import track_check as tc
+
+HUMIDITY_VARIABLES = ["SHU", "VAP", "CRH", "CWB", "DPD"]
+
+
+def _column(frame, varname):
+    """
+    Get a column from a DataFrame as a float array. A column of NaNs is returned if the
+    variable is not in the DataFrame, mirroring class`.MarineReport.getvar` which returns
+    None for unknown variable names.
+
+    :param frame: DataFrame holding the reports
+    :param varname: name of the column to be retrieved
+    :type frame: pandas.DataFrame
+    :type varname: string
+    :return: column as a float array
+    :rtype: numpy array
+    """
+    if varname in frame:
+        return frame[varname].to_numpy(dtype=float)
+    return np.full(len(frame), np.nan)
+
+
+def _flag(condition):
+    """Convert a boolean array to an array of 0 (pass) and 1 (fail) flags."""
+    return np.asarray(condition).astype(int)
+
+
+def _lon180(lon):
+    """Return longitudes in the range [-180,180] in the same way as class`.MarineReport.lon`."""
+    return np.where(lon > 180, lon - 360.0, lon)
+
+
+def value_check(inval):
+    """
+    Check which values are missing
+
+    :param inval: the input values
+    :type inval: numpy array
+    :return: 1 where the input value is missing, 0 otherwise
+    :rtype: numpy array
+    """
+    return _flag(np.isnan(inval))
+
+
+def no_normal_check(inclimav):
+    """
+    Check which climatological averages are missing
+
+    :param inclimav: the input climatological averages
+    :type inclimav: numpy array
+    :return: 1 where the climatological average is missing, 0 otherwise
+    :rtype: numpy array
+    """
+    return _flag(np.isnan(inclimav))
+
+
+def hard_limit(val, limits):
+    """
+    Check which values are outside specified limits
+
+    :param val: values to be tested
+    :param limits: two membered list of lower and upper limit
+    :type val: numpy array
+    :type limits: list of floats
+    :return: 1 where the input is outside the limits or missing, 0 otherwise
+    :rtype: numpy array
+    """
+    assert limits[1] > limits[0], "limits are not well specified"
+    return _flag(~((val >= limits[0]) & (val <= limits[1])))
+
+
+def climatology_check(inval, inclimav, limit=8.0):
+    """
+    Compare values with climatological averages with some arbitrary limit on the difference
+
+    :param inval: values to be compared to climatology
+    :param inclimav: the climatological averages to which the values will be compared
+    :param limit: the maximum allowed difference between the two
+    :type inval: numpy array
+    :type inclimav: numpy array
+    :type limit: float
+    :return: 1 where the difference is outside the specified limit or either input is missing, 0 otherwise
+    :rtype: numpy array
+    """
+    missing = np.isnan(inval) | np.isnan(inclimav)
+    if limit is None:
+        return _flag(np.ones(len(missing), dtype=bool))
+    with np.errstate(invalid="ignore"):
+        return _flag(missing | (np.abs(inval - inclimav) > limit))
+
+
+def climatology_plus_stdev_check(inval, inclimav, instdev, stdev_limits, limit):
+    """
+    Climatology check which uses standardised anomalies.
+
+    :param inval: values to be compared to climatology
+    :param inclimav: the climatological averages to which the values will be compared
+    :param instdev: the climatological standard deviations which will be used to standardise the anomalies
+    :param stdev_limits: upper and lower limits for standard deviation used in check
+    :param limit: the maximum allowed normalised anomaly
+    :type inval: numpy array
+    :type inclimav: numpy array
+    :type instdev: numpy array
+    :type stdev_limits: two-membered list
+    :type limit: float
+    :return: 1 where the difference is outside the specified limit or any input is missing, 0 otherwise
+    :rtype: numpy array
+    """
+    assert stdev_limits[1] > stdev_limits[0], "limits are awry"
+    assert limit > 0, "multiplier must be positive and non-zero"
+
+    missing = np.isnan(inval) | np.isnan(inclimav) | np.isnan(instdev)
+    stdev = np.clip(instdev, stdev_limits[0], stdev_limits[1])
+    with np.errstate(invalid="ignore"):
+        return _flag(missing | (np.abs(inval - inclimav) / stdev > limit))
+
+
+def climatology_plus_stdev_with_lowbar(inval, inclimav, instdev, limit, lowbar):
+    """
+    Climatology check with standard deviation-based limits but with a minimum width
+
+    :param inval: values to be compared to climatology
+    :param inclimav: the climatological averages to which they will be compared
+    :param instdev: the standard deviations which will be used to test the anomalies
+    :param limit: maximum standardised anomaly
+    :param lowbar: the anomaly must be greater than lowbar to fail regardless of standard deviation
+    :type inval: numpy array
+    :type inclimav: numpy array
+    :type instdev: numpy array
+    :type limit: float
+    :type lowbar: float
+    :return: 1 where the difference is outside the specified range or any input is missing, 0 otherwise
+    :rtype: numpy array
+    """
+    assert limit > 0, "multiplier must be positive and non-zero"
+
+    missing = np.isnan(inval) | np.isnan(inclimav) | np.isnan(instdev)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        anomaly = np.abs(inval - inclimav)
+        return _flag(missing | ((anomaly / instdev > limit) & (anomaly > lowbar)))
+
+
+def supersat_check(invaltd, invalt):
+    """
+    Check which dewpoint temperatures are greater than the air temperatures
+
+    :param invaltd: the input values for dewpoint temperature
+    :param invalt: the input values for air temperature
+    :type invaltd: numpy array
+    :type invalt: numpy array
+    :return: 1 where either input is missing or the dewpoint temperature is greater than the air temperature,
+        0 otherwise
+    :rtype: numpy array
+    """
+    missing = np.isnan(invaltd) | np.isnan(invalt)
+    with np.errstate(invalid="ignore"):
+        return _flag(missing | (invaltd > invalt))
+
+
+def sst_freeze_check(insst, sst_uncertainty=0.0, freezing_point=-1.80, n_sigma=2.0):
+    """
+    Compare input SSTs to see if they are above freezing. See func:`qc.sst_freeze_check`
+
+    :param insst: the input SSTs
+    :param sst_uncertainty: the uncertainty in the SST value, defaults to zero
+    :param freezing_point: the freezing point of the water, defaults to -1.8C
+    :param n_sigma: number of sigma to use in the check
+    :type insst: numpy array
+    :type sst_uncertainty: float
+    :type freezing_point: float
+    :type n_sigma: float
+    :return: 1 where the input SST is below freezing point by more than n_sigma times the uncertainty, 0 otherwise
+    :rtype: numpy array
+    """
+    assert sst_uncertainty is not None and freezing_point is not None
+    with np.errstate(invalid="ignore"):
+        return _flag(insst < (freezing_point - n_sigma * sst_uncertainty))
+
+
+def position_check(inlat, inlon):
+    """
+    Check that latitudes are between -90 and 90 and longitudes are between -180 and 360
+
+    :param inlat: latitudes
+    :param inlon: longitudes
+    :type inlat: numpy array
+    :type inlon: numpy array
+    :return: 1 where either latitude or longitude is invalid, 0 otherwise
+    :rtype: numpy array
+    """
+    assert not np.any(np.isnan(inlat))
+    assert not np.any(np.isnan(inlon))
+    return _flag((inlat < -90) | (inlat > 90) | (inlon < -180) | (inlon > 360))
+
+
+def time_check(inhour):
+    """
+    Check that the times are valid
+
+    :param inhour: hours of the times to be checked
+    :type inhour: numpy array
+    :return: 1 where the hour is invalid or missing, 0 otherwise
+    :rtype: numpy array
+    """
+    return _flag(~((inhour >= 0) & (inhour < 24)))
+
+
+def date_check(inyear, inmonth, inday):
+    """
+    Check that the dates are valid
+
+    :param inyear: years of the dates to be checked
+    :param inmonth: months of the dates to be checked
+    :param inday: days of the dates to be checked
+    :type inyear: numpy array
+    :type inmonth: numpy array
+    :type inday: numpy array
+    :return: 1 where any one of the inputs (or the combined inputs) is invalid, 0 otherwise
+    :rtype: numpy array
+    """
+    assert not np.any(np.isnan(inyear))
+    assert not np.any(np.isnan(inmonth))
+
+    year = inyear.astype(int)
+    month = inmonth.astype(int)
+
+    bad_month = (month < 1) | (month > 12)
+
+    month_lengths = np.array(
+        [qc.get_month_lengths(2003), qc.get_month_lengths(2004)], dtype=float
+    )
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_length = month_lengths[leap.astype(int), np.clip(month, 1, 12) - 1]
+
+    result = (year > 2024) | (year < 1850) | bad_month
+    result |= ~((inday >= 1) & (inday <= month_length))
+
+    return _flag(result)
+
+
+def wind_consistency(windspeed, winddirection, variablelimit):
+    """
+    Compare wind speeds to wind directions.
+
+    :param windspeed: wind speeds
+    :param winddirection: wind directions in range 1-362
+    :param variablelimit: maximum wind speed consistent with variable wind direction
+    :type windspeed: numpy array
+    :type winddirection: numpy array
+    :type variablelimit: float
+    :return: pass (0) or fail (1)
+    :rtype: numpy array
+    """
+    missing = np.isnan(windspeed) | np.isnan(winddirection)
+    with np.errstate(invalid="ignore"):
+        calm = (winddirection == 361) & (windspeed != 0)
+        variable = (winddirection == 362) & (windspeed > variablelimit)
+    return _flag(missing | calm | variable)
+
+
+def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt, rules=None):
+    """
+    Blacklisting of observations from Deck 732 and others as needed. See func:`qc.blacklist`.
+    The rules are applied by a class`.Blacklist`, by default the one read from
+    Blacklist.DEFAULT_BLACKLIST_FILE.
+
+    :param inid: IDs of the reports
+    :param indeck: Decks of the reports
+    :param inyear: years of the reports
+    :param inmonth: months of the reports
+    :param inlat: latitudes of the reports
+    :param inlon: longitudes of the reports
+    :param inpt: platform types of the reports
+    :type inid: numpy array
+    :type indeck: numpy array
+    :type inyear: numpy array
+    :type inmonth: numpy array
+    :type inlat: numpy array
+    :type inlon: numpy array
+    :type inpt: numpy array
+    :param rules: blacklist rules
+    :type rules: class`.Blacklist`
+    :return: 1 where the report is blacklisted, 0 otherwise
+    :rtype: numpy array
+    """
+    if rules is None:
+        rules = bl.read_blacklist()
+    return _flag(rules.test(inid, indeck, inyear, inmonth, inlat, _lon180(inlon), inpt))
+
+
+def day_check(
+    inyear,
+    inmonth,
+    inday,
+    inhour,
+    inlat,
+    inlon,
+    pos,
+    date,
+    time,
+    time_since_sun_above_horizon,
+):
+    """
+    Set the day/night flag. Reports which fail the position, date or time checks are set to 1,
+    the others are tested using func:`qc.day_test_array`.
+
+    :param inyear: years of the reports
+    :param inmonth: months of the reports
+    :param inday: days of the reports
+    :param inhour: hours of the reports
+    :param inlat: latitudes of the reports
+    :param inlon: longitudes of the reports
+    :param pos: position QC flags
+    :param date: date QC flags
+    :param time: time QC flags
+    :param time_since_sun_above_horizon: time since sun was above horizon for test
+    :type inyear: numpy array
+    :type inmonth: numpy array
+    :type inday: numpy array
+    :type inhour: numpy array
+    :type inlat: numpy array
+    :type inlon: numpy array
+    :type pos: numpy array
+    :type date: numpy array
+    :type time: numpy array
+    :type time_since_sun_above_horizon: float
+    :return: 1 for day, 0 for night
+    :rtype: numpy array
+    """
+    result = np.ones(len(inyear), dtype=int)
+    inlon = _lon180(inlon)
+    tested = (pos == 0) & (date == 0) & (time == 0)
+    result[tested] = qc.day_test_array(
+        inyear[tested],
+        inmonth[tested],
+        inday[tested],
+        inhour[tested],
+        inlat[tested],
+        inlon[tested],
+        time_since_sun_above_horizon,
+    )
+    return result
+
+
+def mat_blacklist(indeck, inyear, inlat, inlon, inpt):
+    """
+    Flag certain decks, areas and other sources as ineligible for MAT QC. See
+    func:`Extended_IMMA_sb.MarineReportQC.mat_blacklist`
+
+    :param indeck: Decks of the reports
+    :param inyear: years of the reports
+    :param inlat: latitudes of the reports
+    :param inlon: longitudes of the reports
+    :param inpt: platform types of the reports
+    :type indeck: numpy array
+    :type inyear: numpy array
+    :type inlat: numpy array
+    :type inlon: numpy array
+    :type inpt: numpy array
+    :return: 1 where the report is blacklisted, 0 otherwise
+    :rtype: numpy array
+    """
+    lon = _lon180(inlon)
+    lat = inlat
+
+    result = (inpt == 5) & (indeck == 780)
+
+    # North Atlantic, Suez and indian ocean to be excluded from MAT processing
+    region = (
+        ((-80.0 <= lon) & (lon <= 0.0) & (40.0 <= lat) & (lat <= 55.0))
+        | ((-10.0 <= lon) & (lon <= 30.0) & (35.0 <= lat) & (lat <= 45.0))
+        | ((15.0 <= lon) & (lon <= 45.0) & (-10.0 <= lat) & (lat <= 40.0))
+        | ((15.0 <= lon) & (lon <= 95.0) & (lat >= -10.0) & (lat <= 15.0))
+        | ((95.0 <= lon) & (lon <= 105.0) & (-10.0 <= lat) & (lat <= 5.0))
+    )
+    result |= (indeck == 193) & (1880 <= inyear) & (inyear <= 1892) & region
+
+    return _flag(result)
+
+
+def fix_missing_hour(indeck, inyear, inhour):
+    """
+    Deck 701 has a whole bunch of otherwise good obs with missing Hours. Set these to 0000UTC.
+
+    :param indeck: Decks of the reports
+    :param inyear: years of the reports
+    :param inhour: hours of the reports
+    :type indeck: numpy array
+    :type inyear: numpy array
+    :type inhour: numpy array
+    :return: hours with the missing Deck 701 hours filled in
+    :rtype: numpy array
+    """
+    return np.where((indeck == 701) & (inyear < 1860) & np.isnan(inhour), 0.0, inhour)
+
+
+def calculate_humidity_variables(frame):
+    """
+    Calculate the humidity variables SHU, VAP, CRH, CWB and DPD from the AT and DPT columns
+    and the climatological SLP. See func:`Extended_IMMA_sb.MarineReport.calculate_humidity_variables`
+
+    :param frame: DataFrame holding the reports, it must have AT, DPT and clim_SLP columns
+    :type frame: pandas.DataFrame
+    :return: dictionary of humidity variable arrays, NaN where they could not be calculated
+    :rtype: dict
+    """
+    at = _column(frame, "AT")
+    dpt = _column(frame, "DPT")
+    slpclim = _column(frame, "clim_SLP")
+
+    results = {var: np.full(len(frame), np.nan) for var in HUMIDITY_VARIABLES}
+    functions = {
+        "VAP": CalcHums.vap_array,
+        "SHU": CalcHums.sh_array,
+        "CRH": CalcHums.rh_array,
+        "CWB": CalcHums.wb_array,
+    }
+
+    valid = ~np.isnan(at) & ~np.isnan(dpt) & ~np.isnan(slpclim)
+    for var, function in functions.items():
+        results[var][valid] = function(dpt[valid], at[valid], slpclim[valid])
+    results["DPD"][valid] = CalcHums.dpd_array(dpt[valid], at[valid])
+
+    # Test for silliness - if silly, set all to missing
+    silly = ~((results["CRH"] >= 0.0) & (results["CRH"] <= 150.0))
+    for var in HUMIDITY_VARIABLES:
+        results[var][silly] = np.nan
+
+    return results
+
+
+def perform_base_qc(frame, parameters):
+    """
+    Run all the base QC checks on a DataFrame of reports. This is the column-wise equivalent of
+    func:`Extended_IMMA_sb.MarineReportQC.perform_base_qc`.
+
+    :param frame: DataFrame holding the reports. Reports variables are named as in the VARLIST and
+        climatological averages and standard deviations are in columns clim_<VAR> and stdev_<VAR>. Missing
+        values are NaN. Missing Deck 701 hours are filled in place.
+    :param parameters: QC parameters. Extra blacklist rules, or a different blacklist file, can be given
+        in parameters["base"], see func:`Blacklist.get_blacklist`
+    :type frame: pandas.DataFrame
+    :type parameters: dict
+    :return: DataFrame of QC flags with columns <QC type>_<flag> and the same index as frame
+    :rtype: pandas.DataFrame
+    """
+    yr = _column(frame, "YR")
+    mo = _column(frame, "MO")
+    dy = _column(frame, "DY")
+    dck = _column(frame, "DCK")
+    pt = _column(frame, "PT")
+    lat = _column(frame, "LAT")
+    lon = _column(frame, "LON")
+
+    frame["HR"] = fix_missing_hour(dck, yr, _column(frame, "HR"))
+    hr = _column(frame, "HR")
+
+    def clim(varname, intype="clim"):
+        return _column(frame, f"{intype}_{varname}")
+
+    flags = {}
+
+    flags["POS_isbuoy"] = _flag(np.isin(pt, [6, 7]))
+    flags["POS_isdrifter"] = _flag(pt == 7)
+    flags["POS_isship"] = _flag(np.isin(pt, [0, 1, 2, 3, 4, 5, 10, 11, 12, 17]))
+    flags["POS_is780"] = _flag(dck == 780)
+
+    flags["POS_pos"] = position_check(lat, lon)
+    flags["POS_date"] = date_check(yr, mo, dy)
+    flags["POS_time"] = time_check(hr)
+    flags["POS_blklst"] = blacklist(
+        frame["ID"].to_numpy(),
+        dck,
+        yr,
+        mo,
+        lat,
+        lon,
+        pt,
+        bl.get_blacklist(parameters["base"]),
+    )
+    flags["POS_day"] = day_check(
+        yr,
+        mo,
+        dy,
+        hr,
+        lat,
+        lon,
+        flags["POS_pos"],
+        flags["POS_date"],
+        flags["POS_time"],
+        parameters["base"]["time_since_sun_above_horizon"],
+    )
+
+    flags["DPT_hum_blacklist"] = _flag(
+        ~np.isin(pt, [0, 1, 2, 3, 4, 5, 6, 8, 9, 10, 15])
+    )
+    flags["AT_mat_blacklist"] = mat_blacklist(dck, yr, lat, lon, pt)
+    flags["W_wind_blacklist"] = _flag(np.isin(dck, [708, 780]))
+
+    # SST
+    sst_parameters = parameters["SST"]
+    assert "freezing_point" in sst_parameters
+    assert "freeze_check_n_sigma" in sst_parameters
+    assert "maximum_anomaly" in sst_parameters
+    sst = _column(frame, "SST")
+    flags["SST_noval"] = value_check(sst)
+    flags["SST_freez"] = sst_freeze_check(
+        sst,
+        0.0,
+        sst_parameters["freezing_point"],
+        sst_parameters["freeze_check_n_sigma"],
+    )
+    flags["SST_clim"] = climatology_check(
+        sst, clim("SST"), sst_parameters["maximum_anomaly"]
+    )
+    flags["SST_nonorm"] = no_normal_check(clim("SST"))
+    flags["SST_hardlimit"] = hard_limit(sst, sst_parameters["hard_limits"])
+
+    # MAT
+    at_parameters = parameters["AT"]
+    assert "maximum_anomaly" in at_parameters
+    at = _column(frame, "AT")
+    flags["AT_noval"] = value_check(at)
+    flags["AT_clim"] = climatology_check(
+        at, clim("AT"), at_parameters["maximum_anomaly"]
+    )
+    flags["AT_nonorm"] = no_normal_check(clim("AT"))
+    flags["AT_hardlimit"] = hard_limit(at, at_parameters["hard_limits"])
+
+    # DPT
+    dpt_parameters = parameters["DPT"]
+    dpt = _column(frame, "DPT")
+    flags["DPT_clim"] = climatology_plus_stdev_check(
+        dpt,
+        clim("DPT"),
+        clim("DPT", "stdev"),
+        dpt_parameters["minmax_standard_deviation"],
+        dpt_parameters["maximum_standardised_anomaly"],
+    )
+    flags["DPT_noval"] = value_check(dpt)
+    flags["DPT_nonorm"] = no_normal_check(clim("DPT"))
+    flags["DPT_ssat"] = supersat_check(dpt, _column(frame, "AT2"))
+
+    # SLP
+    slp_parameters = parameters["SLP"]
+    assert "maximum_anomaly" in slp_parameters
+    slp = _column(frame, "SLP")
+    flags["SLP_noval"] = value_check(slp)
+    flags["SLP_clim"] = climatology_plus_stdev_with_lowbar(
+        slp,
+        clim("SLP"),
+        clim("SLP", "stdev"),
+        slp_parameters["maximum_standardised_anomaly"],
+        slp_parameters["lowbar"],
+    )
+    flags["SLP_nonorm"] = no_normal_check(clim("SLP"))
+
+    # Wind
+    w_parameters = parameters["W"]
+    w = _column(frame, "W")
+    flags["W_noval"] = value_check(w)
+    flags["W_hardlimit"] = hard_limit(w, w_parameters["hard_limits"])
+    flags["W_consistency"] = wind_consistency(
+        w, _column(frame, "D"), w_parameters["variable_limit"]
+    )
+
+    # special check for silly values in all humidity-related variables
+    # and set DPT hardlimit flag if necessary
+    hardlimit = np.zeros(len(frame), dtype=int)
+    for var in ["AT", "DPT", "SHU", "RH"]:
+        hardlimit |= hard_limit(_column(frame, var), parameters[var]["hard_limits"])
+    flags["DPT_hardlimit"] = hardlimit
+
+    # Kate's modified MAT checks
+    at2 = _column(frame, "AT2")
+    flags["AT2_clim"] = climatology_plus_stdev_check(
+        at2,
+        clim("AT2"),
+        clim("AT2", "stdev"),
+        at_parameters["minmax_standard_deviation"],
+        at_parameters["maximum_standardised_anomaly"],
+    )
+    flags["AT2_noval"] = value_check(at2)
+    flags["AT2_nonorm"] = no_normal_check(clim("AT2"))
+    flags["AT2_hardlimit"] = hard_limit(at, at_parameters["hard_limits"])
+
+    return pd.DataFrame(flags, index=frame.index)
+
+
+def _first(values):
+    """
+    Get the first of a column of integer variables of the reports from one platform in the same
+    way as class`.MarineReport.getvar`, None if it is missing.
+    """
+    if np.isnan(values[0]):
+        return None
+    return int(values[0])
+
+
+def track_check(platform_id, columns, parameters):
+    """
+    Perform one pass of the track check on the reports from one platform. Column-wise version of
+    func:`Extended_IMMA_sb.Voyage.track_check`.
+
+    :param platform_id: ID of the platform
+    :param columns: columns of the reports from the platform, including the arrays from
+        func:`track_check.track_arrays` and func:`track_check.add_track_speeds`
+    :param parameters: parameters of the track check
+    :type platform_id: string
+    :type columns: dict
+    :type parameters: dict
+    :return: dictionary of the POS_trk and POS_few flags, empty if there are no reports
+    :rtype: dict
+    """
+    nobs = len(columns["lat"])
+
+    # no obs in, no qc outcomes out
+    if nobs == 0:
+        return {}
+
+    trk = np.zeros(nobs, dtype=int)
+    few = np.zeros(nobs, dtype=int)
+    year = _first(columns["YR"])
+
+    # Generic ids and buoys get a free pass on the track check
+    if qc.id_is_generic(platform_id, year) or _first(columns["PT"]) in [6, 7]:
+        pass
+    # fewer than three obs - set the fewsome flag, deck 720 gets a pass prior to 1891
+    elif nobs < 3:
+        if not (_first(columns["DCK"]) == 720 and year < 1891):
+            few[:] = 1
+    else:
+        trk = tc.mds_track_check_array(
+            columns,
+            parameters["max_direction_change"],
+            parameters["max_speed_change"],
+            parameters["max_absolute_speed"],
+            parameters["max_midpoint_discrepancy"],
+        )
+
+    return {"POS_trk": trk, "POS_few": few}
+
+
+def iquam_track_check(platform_id, columns, parameters):
+    """
+    Perform the IQUAM track check on the reports from one platform. Column-wise version of
+    func:`Extended_IMMA_sb.Voyage.iquam_track_check`.
+
+    :param platform_id: ID of the platform
+    :param columns: columns of the reports from the platform, including the arrays from
+        func:`track_check.track_arrays`
+    :param parameters: parameters of the IQUAM track check
+    :type platform_id: string
+    :type columns: dict
+    :type parameters: dict
+    :return: dictionary of the POS_iquam_track flags, empty if there are no reports
+    :rtype: dict
+    """
+    nobs = len(columns["lat"])
+
+    if nobs == 0:
+        return {}
+
+    if qc.id_is_generic(platform_id, _first(columns["YR"])):
+        return {"POS_iquam_track": np.zeros(nobs, dtype=int)}
+
+    if _first(columns["PT"]) in [6, 7]:
+        speed_limit = parameters["buoy_speed_limit"]
+    else:
+        speed_limit = parameters["ship_speed_limit"]
+
+    qcs = tc.iquam_track_check_array(
+        columns["lat"],
+        columns["lon"],
+        columns["time"],
+        speed_limit,
+        parameters["delta_d"],
+        parameters["delta_t"],
+        parameters["number_of_neighbours"],
+    )
+
+    return {"POS_iquam_track": qcs}
+
+
+def spike_check(columns, parameters, intype="SST"):
+    """
+    Perform the IQUAM like spike check on the reports from one platform. Column-wise version of
+    func:`Extended_IMMA_sb.Voyage.spike_check`.
+
+    :param columns: columns of the reports from the platform, including the arrays from
+        func:`track_check.track_arrays`
+    :param parameters: parameters of the spike check
+    :param intype: variable to spike check
+    :type columns: dict
+    :type parameters: dict
+    :type intype: string
+    :return: dictionary of the <intype>_spike flags, empty if there are no reports
+    :rtype: dict
+    """
+    nobs = len(columns["lat"])
+
+    if nobs == 0:
+        return {}
+
+    if _first(columns["PT"]) in [6, 7]:
+        delta_t = parameters["buoy_delta_t"]
+    else:
+        delta_t = parameters["ship_delta_t"]
+
+    qcs = tc.spike_check_array(
+        columns["lat"],
+        columns["lon"],
+        columns["time"],
+        columns[intype],
+        delta_t,
+        parameters["max_gradient_space"],
+        parameters["max_gradient_time"],
+        parameters["number_of_neighbours"],
+    )
+
+    return {intype + "_spike": qcs}
+
+
+def find_saturated_runs(columns, parameters):
+    """
+    Flag runs of saturated reports (AT equal to DPT) from one platform which are longer than
+    shortest_run reports and last at least min_time_threshold hours. Column-wise version of
+    func:`Extended_IMMA_sb.Voyage.find_saturated_runs`.
+
+    :param columns: columns of the reports from the platform, including the arrays from
+        func:`track_check.track_arrays`
+    :param parameters: dictionary with entries min_time_threshold and shortest_run
+    :type columns: dict
+    :type parameters: dict
+    :return: dictionary of the DPT_repsat flags
+    :rtype: dict
+    """
+    saturated = columns["DPT"] == columns["AT"]
+
+    # the first and one after the last report of each run of saturated reports
+    edges = np.diff(np.concatenate([[0], saturated.astype(int), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    time_diff = 24.0 * (columns["time"][ends - 1] - columns["time"][starts])
+    time_diff[np.isnan(time_diff)] = 0.0
+
+    flagged = (ends - starts > parameters["shortest_run"]) & (
+        time_diff >= parameters["min_time_threshold"]
+    )
+
+    marks = np.zeros(len(saturated) + 1, dtype=int)
+    np.add.at(marks, starts[flagged], 1)
+    np.add.at(marks, ends[flagged], -1)
+
+    return {"DPT_repsat": np.cumsum(marks[:-1])}
+
+
+def find_multiple_rounded_values(columns, parameters, intype="DPT"):
+    """
+    Flag the whole numbers of a variable from one platform if more than a threshold fraction of
+    the values are whole numbers. Column-wise version of
+    func:`Extended_IMMA_sb.Voyage.find_multiple_rounded_values`.
+
+    :param columns: columns of the reports from the platform
+    :param parameters: dictionary with entries threshold and min_count
+    :param intype: variable name being checked
+    :type columns: dict
+    :type parameters: dict
+    :type intype: string
+    :return: dictionary of the <intype>_round flags
+    :rtype: dict
+    """
+    assert intype in ["SST", "AT", "AT2", "DPT"]
+
+    min_count = parameters["min_count"]
+    threshold = parameters["threshold"]
+
+    assert 0.0 <= threshold <= 1.0
+
+    values = columns[intype]
+    allcount = np.count_nonzero(~np.isnan(values))
+    whole = np.isfinite(values) & (values == np.floor(values))
+
+    flags = np.zeros(len(values), dtype=int)
+    if allcount > min_count and np.count_nonzero(whole) / allcount >= threshold:
+        flags[whole] = 1
+
+    return {intype + "_round": flags}
+
+
+def find_repeated_values(columns, parameters, intype="SST"):
+    """
+    Flag the values of a variable from one platform which make up more than a threshold fraction
+    of the values. Column-wise version of func:`Extended_IMMA_sb.Voyage.find_repeated_values`.
+
+    :param columns: columns of the reports from the platform
+    :param parameters: dictionary with entries threshold and min_count
+    :param intype: variable name being checked
+    :type columns: dict
+    :type parameters: dict
+    :type intype: string
+    :return: dictionary of the <intype>_rep flags
+    :rtype: dict
+    """
+    assert intype in ["SST", "AT", "AT2", "DPT", "SLP"]
+
+    threshold = parameters["threshold"]
+    assert 0.0 <= threshold <= 1.0
+
+    min_count = parameters["min_count"]
+
+    values = columns[intype]
+    present = ~np.isnan(values)
+    allcount = np.count_nonzero(present)
+
+    flags = np.zeros(len(values), dtype=int)
+    if allcount > min_count:
+        # the values were counted as strings, so 0.0 and -0.0 are different values
+        _, inverse, counts = np.unique(
+            np.ascontiguousarray(values[present]).view(np.int64),
+            return_inverse=True,
+            return_counts=True,
+        )
+        flags[present] = counts[inverse] / allcount > threshold
+
+    return {intype + "_rep": flags}
@@ -15,6 +15,11 @@ import numpy as np
 # Conversion factor between degrees and radians
 degrad = np.pi / 180.0
 
+# month lengths in a leap year and day number of the day before the start of each month in
+# a regular year, used by the array versions of the date functions
+leap_year_month_lengths = np.array([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+month_start_days = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
 
 def month_match(y1, m1, y2, m2):
     """Check whether month matches."""
@@ -267,6 +272,22 @@ def which_pentad(inmonth, inday):
     return pentad
 
 
+def which_pentad_array(inmonth, inday):
+    """
+    Take arrays of months and days as inputs and return pentads in range 1-73.
+    Array version of func:`which_pentad`.
+
+    :param inmonth: months containing the days for which we want to calculate the pentad
+    :param inday: days for which we want to calculate the pentad
+    :type inmonth: numpy array of integers
+    :type inday: numpy array of integers
+
+    :return: pentads (5-day periods) containing input days, from 1 (1 Jan-5 Jan) to 73 (27-31 Dec)
+    :rtype: numpy array of integers
+    """
+    return (day_in_year_array(inmonth, inday) - 1) // 5 + 1
+
+
 def day_in_year(month, day):
     """
     Find the day number of a particular day from Jan 1st which is 1
@@ -297,6 +318,32 @@ def day_in_year(month, day):
     return dindex
 
 
+def day_in_year_array(month, day):
+    """
+    Find the day number of particular days from Jan 1st which is 1
+    to Dec 31st which is 365. Array version of func:`day_in_year`.
+
+    :param month: months to be processed
+    :param day: days in the month
+    :type month: numpy array of integers
+    :type day: numpy array of integers
+
+    :return: day numbers in year 1-365
+    :rtype: numpy array of integers
+
+    All months and days must be valid. February 29th is treated as though it were March 1st.
+    """
+    month = np.asarray(month, dtype=int)
+    day = np.asarray(day, dtype=int)
+
+    assert np.all((month >= 1) & (month <= 12))
+    assert np.all((day >= 1) & (day <= leap_year_month_lengths[month - 1]))
+
+    dindex = np.where((month == 2) & (day == 29), 60, month_start_days[month - 1] + day)
+
+    return dindex
+
+
 def get_hires_sst(lat, lon, month, day, hires_field):
     """
     Get a value from a high resolution ie 0.25 degree daily SST field
@@ -676,6 +723,84 @@ def get_sst_single_field(lat, lon, sst):
     return result
 
 
+# The tables below are used by func:`blacklist`. The column-wise blacklist in base_qc reads
+# the same rules from configuration_files/blacklist.json, see class`.Blacklist`
+
+# these are the definitions of the regions which are blacklisted for Deck 732
+deck_732_regions = {
+    1: [-175, 40, -170, 55],
+    2: [-165, 40, -160, 60],
+    3: [-145, 40, -140, 50],
+    4: [-140, 30, -135, 40],
+    5: [-140, 50, -130, 55],
+    6: [-70, 35, -60, 40],
+    7: [-50, 45, -40, 50],
+    8: [5, 70, 10, 80],
+    9: [0, -10, 10, 0],
+    10: [-30, -25, -25, -20],
+    11: [-60, -50, -55, -45],
+    12: [75, -20, 80, -15],
+    13: [50, -30, 60, -20],
+    14: [30, -40, 40, -30],
+    15: [20, 60, 25, 65],
+    16: [0, -40, 10, -30],
+    17: [-135, 30, -130, 40],
+}
+
+# this dictionary contains the regions that are to be excluded for each year
+deck_732_year_to_regions = {
+    1958: [1, 2, 3, 4, 5, 6, 14, 15],
+    1959: [1, 2, 3, 4, 5, 6, 14, 15],
+    1960: [1, 2, 3, 5, 6, 9, 14, 15],
+    1961: [1, 2, 3, 5, 6, 14, 15, 16],
+    1962: [1, 2, 3, 5, 12, 13, 14, 15, 16],
+    1963: [1, 2, 3, 5, 6, 12, 13, 14, 15, 16],
+    1964: [1, 2, 3, 5, 6, 12, 13, 14, 16],
+    1965: [1, 2, 6, 10, 12, 13, 14, 15, 16],
+    1966: [1, 2, 6, 9, 14, 15, 16],
+    1967: [1, 2, 5, 6, 9, 14, 15],
+    1968: [1, 2, 3, 5, 6, 9, 14, 15],
+    1969: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 13, 14, 15, 16],
+    1970: [1, 2, 3, 4, 5, 6, 8, 9, 14, 15],
+    1971: [1, 2, 3, 4, 5, 6, 7, 8, 9, 13, 14, 16],
+    1972: [4, 7, 8, 9, 10, 11, 13, 16, 17],
+    1973: [4, 7, 8, 10, 11, 13, 16, 17],
+    1974: [4, 7, 8, 10, 11, 16, 17],
+}
+
+# drifting buoys with bad SSTs in November 2005 to January 2006
+blacklisted_buoy_ids = [
+    "53521    ",
+    "53522    ",
+    "53566    ",
+    "53567    ",
+    "53568    ",
+    "53571    ",
+    "53578    ",
+    "53580    ",
+    "53582    ",
+    "53591    ",
+    "53592    ",
+    "53593    ",
+    "53594    ",
+    "53595    ",
+    "53596    ",
+    "53599    ",
+    "53600    ",
+    "53601    ",
+    "53602    ",
+    "53603    ",
+    "53604    ",
+    "53605    ",
+    "53606    ",
+    "53607    ",
+    "53608    ",
+    "53609    ",
+    "53901    ",
+    "53902    ",
+]
+
+
 def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
     """
     Blacklisting of observations from Deck 732 and others as needed
@@ -715,53 +840,11 @@ def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
     if inid == "SUPERIGORINA":
         result = 1
 
-    # these are the definitions of the regions which are blacklisted for Deck 732
-    region = {
-        1: [-175, 40, -170, 55],
-        2: [-165, 40, -160, 60],
-        3: [-145, 40, -140, 50],
-        4: [-140, 30, -135, 40],
-        5: [-140, 50, -130, 55],
-        6: [-70, 35, -60, 40],
-        7: [-50, 45, -40, 50],
-        8: [5, 70, 10, 80],
-        9: [0, -10, 10, 0],
-        10: [-30, -25, -25, -20],
-        11: [-60, -50, -55, -45],
-        12: [75, -20, 80, -15],
-        13: [50, -30, 60, -20],
-        14: [30, -40, 40, -30],
-        15: [20, 60, 25, 65],
-        16: [0, -40, 10, -30],
-        17: [-135, 30, -130, 40],
-    }
-
-    # this dictionary contains the regions that are to be excluded for this year
-    year_to_regions = {
-        1958: [1, 2, 3, 4, 5, 6, 14, 15],
-        1959: [1, 2, 3, 4, 5, 6, 14, 15],
-        1960: [1, 2, 3, 5, 6, 9, 14, 15],
-        1961: [1, 2, 3, 5, 6, 14, 15, 16],
-        1962: [1, 2, 3, 5, 12, 13, 14, 15, 16],
-        1963: [1, 2, 3, 5, 6, 12, 13, 14, 15, 16],
-        1964: [1, 2, 3, 5, 6, 12, 13, 14, 16],
-        1965: [1, 2, 6, 10, 12, 13, 14, 15, 16],
-        1966: [1, 2, 6, 9, 14, 15, 16],
-        1967: [1, 2, 5, 6, 9, 14, 15],
-        1968: [1, 2, 3, 5, 6, 9, 14, 15],
-        1969: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 13, 14, 15, 16],
-        1970: [1, 2, 3, 4, 5, 6, 8, 9, 14, 15],
-        1971: [1, 2, 3, 4, 5, 6, 7, 8, 9, 13, 14, 16],
-        1972: [4, 7, 8, 9, 10, 11, 13, 16, 17],
-        1973: [4, 7, 8, 10, 11, 13, 16, 17],
-        1974: [4, 7, 8, 10, 11, 16, 17],
-    }
-
     if indeck == 732:
-        if inyear in year_to_regions:
-            regions_to_check = year_to_regions[inyear]
+        if inyear in deck_732_year_to_regions:
+            regions_to_check = deck_732_year_to_regions[inyear]
             for regid in regions_to_check:
-                thisreg = region[regid]
+                thisreg = deck_732_regions[regid]
                 if (
                     thisreg[0] <= inlon <= thisreg[2]
                     and thisreg[1] <= inlat <= thisreg[3]
@@ -776,36 +859,7 @@ def blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt=1):
         or (inyear == 2005 and inmonth == 12)
         or (inyear == 2006 and inmonth == 1)
     ):
-        if inid in [
-            "53521    ",
-            "53522    ",
-            "53566    ",
-            "53567    ",
-            "53568    ",
-            "53571    ",
-            "53578    ",
-            "53580    ",
-            "53582    ",
-            "53591    ",
-            "53592    ",
-            "53593    ",
-            "53594    ",
-            "53595    ",
-            "53596    ",
-            "53599    ",
-            "53600    ",
-            "53601    ",
-            "53602    ",
-            "53603    ",
-            "53604    ",
-            "53605    ",
-            "53606    ",
-            "53607    ",
-            "53608    ",
-            "53609    ",
-            "53901    ",
-            "53902    ",
-        ]:
+        if inid in blacklisted_buoy_ids:
             result = 1
 
     return result
@@ -1488,6 +1542,100 @@ def sunangle(year, day, hour, minute, sec, zone, dasvtm, lat, lon):
     return azimuth, elevation, rta, hra, sid, declination
 
 
+def sun_elevation_array(year, day, hour, minute, sec, zone, dasvtm, lat, lon):
+    """
+    Calculate the elevation of the sun at specified locations and times. Array version of the
+    elevation calculated by func:`sunangle`, see func:`sunangle` for the meaning of the parameters.
+
+    :param year: year numbers
+    :param day: day numbers of year starting with 1 for Jan 1st and running up to 365/6
+    :param hour: hours
+    :param minute: minutes
+    :param sec: seconds
+    :param zone: the local international time zones, counted westward from Greenwich
+    :param dasvtm: 1 if daylight saving time is in effect, otherwise 0
+    :param lat: latitudes in degrees, north is positive
+    :param lon: longitudes in degrees, east is positive
+    :type year: numpy array
+    :type day: numpy array
+    :type hour: numpy array
+    :type minute: numpy array
+    :type sec: numpy array or scalar
+    :type zone: numpy array or scalar
+    :type dasvtm: numpy array or scalar
+    :type lat: numpy array
+    :type lon: numpy array
+    :return: elevation of sun (degrees)
+    :rtype: numpy array
+    """
+    year = np.asarray(year)
+    day = np.asarray(day)
+    hour = np.asarray(hour)
+    minute = np.asarray(minute)
+    lat = np.asarray(lat)
+
+    assert np.all((0 < day) & (day <= 366))
+    assert np.all((0 <= hour) & (hour < 24))
+    assert np.all((0 <= minute) & (minute < 60))
+    assert np.all((0 <= np.asarray(sec)) & (np.asarray(sec) < 60))
+    assert np.all((90 >= lat) & (lat >= -90))
+
+    # Find number of whole years since end of 1979 (reference point)
+    delyear = relative_year_number(year)
+    # Find time in whole hours since midnight (allow for "daylight saving").
+    time_in_hours = convert_time_in_hours(hour, minute, sec, zone, dasvtm)
+    # Make leap year correction
+    leap = np.floor(delyear / 4.0)
+    time = time_in_whole_days(time_in_hours, day, delyear, leap)
+    time = np.where(delyear == leap * 4.0, time - 1.0, time)
+    time = np.where((delyear < 0) & (delyear != leap * 4.0), time - 1.0, time)
+
+    # Get sun parameters
+    theta = sun_position(time)
+    mean_anomaly = mean_earth_anomaly(time, theta)
+    long_of_sun = (
+        4.900968
+        + 3.6747e-7 * time
+        + (0.033434 - 2.3e-9 * time) * np.sin(mean_anomaly)
+        + 0.000349 * np.sin(2.0 * mean_anomaly)
+        + theta
+    )
+    angle_of_elliptic = elliptic_angle(time)
+    sin_long_of_sun = np.sin(long_of_sun)
+
+    right_ascension = np.arctan2(
+        sin_long_of_sun * np.cos(angle_of_elliptic), np.cos(long_of_sun)
+    )
+    right_ascension = np.where(
+        right_ascension < 0.0, right_ascension + 2 * np.pi, right_ascension
+    )
+    declination = np.arcsin(sin_long_of_sun * np.sin(angle_of_elliptic))
+
+    siderial_time = 1.759335 + 2 * np.pi * (time / 365.25 - delyear) + 3.694e-7 * time
+    siderial_time = np.where(
+        siderial_time >= 2 * np.pi, siderial_time - 2 * np.pi, siderial_time
+    )
+    local_siderial_time = siderial_time + (time_in_hours * 15.0 + lon) * degrad
+    local_siderial_time = np.where(
+        local_siderial_time >= 2 * np.pi,
+        local_siderial_time - 2 * np.pi,
+        local_siderial_time,
+    )
+
+    # Hour Angle
+    hour_angle = local_siderial_time - right_ascension
+    hour_angle = np.where(hour_angle < 0, hour_angle + 2 * np.pi, hour_angle)
+
+    # Geometric elevation
+    phi = lat * degrad
+    sin_elevation = np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(
+        declination
+    ) * np.cos(hour_angle)
+    sin_elevation = np.clip(sin_elevation, -1.0, 1.0)
+
+    return np.arcsin(sin_elevation) / degrad  # Convert elevation to degrees
+
+
 def dayinyear(year, month, day):
     """
     Calculate the day in year, running from 1 for Jan 1st to 365 (or 366) for Dec 31st
@@ -1516,6 +1664,35 @@ def dayinyear(year, month, day):
     return result
 
 
+def dayinyear_array(year, month, day):
+    """
+    Calculate the days in year, running from 1 for Jan 1st to 365 (or 366) for Dec 31st.
+    Array version of func:`dayinyear`.
+
+    :param year: Years
+    :param month: Months
+    :param day: Days
+    :type year: numpy array of integers
+    :type month: numpy array of integers
+    :type day: numpy array of integers
+    :return: days in year, between 1 and 366
+    :rtype: numpy array of integers
+    """
+    year = np.asarray(year, dtype=int)
+    month = np.asarray(month, dtype=int)
+    day = np.asarray(day, dtype=int)
+
+    assert np.all((1 <= month) & (month <= 12))
+    assert np.all(day >= 1)
+
+    isleap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_lengths = leap_year_month_lengths[month - 1] - ((month == 2) & ~isleap)
+
+    assert np.all(day <= month_lengths), "Day out of range"
+
+    return month_start_days[month - 1] + day + ((month > 2) & isleap)
+
+
 def day_test(year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0):
     """
     Given year month day hour lat and long calculate if the sun was above the horizon an hour ago.
@@ -1589,6 +1766,62 @@ def day_test(year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0)
     return result
 
 
+def day_test_array(year, month, day, hour, lat, lon, time_since_sun_above_horizon=1.0):
+    """
+    Given arrays of year month day hour lat and long calculate if the sun was above the horizon
+    an hour ago. Array version of func:`day_test`, all the values must be present.
+
+    :param year: Years
+    :param month: Months
+    :param day: Days
+    :param hour: Hours
+    :param lat: Latitudes in degrees
+    :param lon: Longitudes in degrees
+    :param time_since_sun_above_horizon: time since sun was above horizon for test
+    :type year: numpy array of integers
+    :type month: numpy array of integers
+    :type day: numpy array of integers
+    :type hour: numpy array
+    :type lat: numpy array
+    :type lon: numpy array
+    :type time_since_sun_above_horizon: float
+    :return: 1 where the sun was above the horizon an hour ago, 0 otherwise.
+    :rtype: numpy array of integers
+    """
+    year = np.asarray(year, dtype=int)
+    month = np.asarray(month, dtype=int)
+    day = np.asarray(day, dtype=int)
+    hour = np.asarray(hour, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+
+    assert np.all((1 <= month) & (month <= 12))
+    assert np.all((1 <= day) & (day <= 31))
+    assert np.all((0 <= hour) & (hour <= 24))
+    assert np.all((90 >= lat) & (lat >= -90))
+
+    year2 = year
+    day2 = dayinyear_array(year, month, day)
+    hour2 = np.floor(hour)
+    minute2 = (hour - np.floor(hour)) * 60.0
+
+    # go back one hour and test if the sun was above the horizon
+    hour2 = hour2 - time_since_sun_above_horizon
+    yesterday = hour2 < 0
+    hour2 = np.where(yesterday, hour2 + 24.0, hour2)
+    day2 = np.where(yesterday, day2 - 1, day2)
+    last_year = day2 <= 0
+    year2 = np.where(last_year, year2 - 1, year2)
+    day2 = np.where(last_year, dayinyear_array(year2, 12, 31), day2)
+
+    lat2 = np.where(lat == 0, 0.0001, lat)
+    lon2 = np.where(lon == 0, 0.0001, lon)
+
+    elevation = sun_elevation_array(year2, day2, hour2, minute2, 0, 0, 0, lat2, lon2)
+
+    return (elevation > 0).astype(int)
+
+
 def jul_day(year, month, day):
     """
     Routine to calculate julian day. This is the weird Astronomical thing which counts from 1 Jan 4713 BC.
@@ -1613,6 +1846,29 @@ def jul_day(year, month, day):
     return day + ((153 * m + 2) // 5) + 365 * y + y // 4 - y // 100 + y // 400 - 32045
 
 
+def jul_day_array(year, month, day):
+    """
+    Calculate julian days from arrays of years, months and days. Array version of func:`jul_day`,
+    missing values are NaN and give NaN julian days.
+
+    :param year: Years
+    :param month: Months
+    :param day: Days
+    :type year: numpy array
+    :type month: numpy array
+    :type day: numpy array
+    :return: julian days
+    :rtype: numpy array
+    """
+    with np.errstate(invalid="ignore"):
+        a = (14 - month) // 12
+        y = year + 4800 - a
+        m = month + 12 * a - 3
+        return (
+            day + ((153 * m + 2) // 5) + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+        )
+
+
 def time_difference(year1, month1, day1, hour1, year2, month2, day2, hour2):
     """
     Calculate time difference in hours between any two times
@@ -1760,6 +2016,32 @@ def mds_lat_to_yindex(lat, res=1.0):
     pass
 
 
+def mds_lat_to_yindex_array(lat, res=1.0):
+    """
+    For given latitudes return the y-indices as they were in MDS2/3 in a 1x1 global grid.
+    Array version of func:`mds_lat_to_yindex`.
+
+    :param lat: Latitudes of the points
+    :param res: resolution of grid in degrees
+    :type lat: numpy array of floats
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    lat = np.asarray(lat, dtype=float)
+
+    lat_local = np.where(lat == -90, lat + 0.001, lat)
+    lat_local = np.where(lat_local == 90, lat_local - 0.001, lat_local)
+
+    yindex = np.where(
+        lat > 0.0,
+        90 / res - 1 - np.trunc(lat_local / res),
+        90 / res - np.trunc(lat_local / res),
+    )
+
+    return np.trunc(yindex).astype(int)
+
+
 def lat_to_yindex(lat, res=1):
     """
     For a given latitude return the y index in a 1x1x5-day global grid
@@ -1791,6 +2073,27 @@ def lat_to_yindex(lat, res=1):
         return yindex
 
 
+def lat_to_yindex_array(lat, res=1):
+    """
+    For given latitudes return the y indices in a global grid. Array version of func:`lat_to_yindex`.
+
+    :param lat: Latitudes of the points
+    :param res: resolution of the grid
+    :type lat: numpy array of floats
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    lat = np.asarray(lat, dtype=float)
+
+    if res == 1:
+        yindex = np.trunc(90 - lat)
+    else:
+        yindex = np.trunc((90 - lat) / res)
+
+    return np.clip(yindex, 0, int(180 / res - 1)).astype(int)
+
+
 def xindex_to_lon(xindex, res=1):
     """Convert xindex to longitude."""
     assert xindex >= 0
@@ -1826,6 +2129,32 @@ def mds_lon_to_xindex(lon, res=1.0):
         return int(int(long_local / res) + 180 / res - 1)
 
 
+def mds_lon_to_xindex_array(lon, res=1.0):
+    """
+    For given longitudes return the x-indices as they were in MDS2/3 in a 1x1 global grid.
+    Array version of func:`mds_lon_to_xindex`.
+
+    :param lon: Longitudes of the points
+    :param res: resolution of the field
+    :type lon: numpy array of floats
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    long_local = np.asarray(lon, dtype=float)
+
+    long_local = np.where(long_local == -180, long_local + 0.001, long_local)
+    long_local = np.where(long_local == 180, long_local - 0.001, long_local)
+
+    xindex = np.where(
+        long_local > 0.0,
+        np.trunc(long_local / res) + 180 / res,
+        np.trunc(long_local / res) + 180 / res - 1,
+    )
+
+    return np.trunc(xindex).astype(int)
+
+
 def lon_to_xindex(lon, res=1):
     """
     For a given longitude return the x index in a 1x1x5-day global grid
@@ -1863,6 +2192,32 @@ def lon_to_xindex(lon, res=1):
         return int(xindex)
 
 
+def lon_to_xindex_array(lon, res=1):
+    """
+    For given longitudes return the x indices in a global grid. Array version of func:`lon_to_xindex`.
+
+    :param lon: Longitudes of the points
+    :param res: resolution of the grid
+    :type lon: numpy array of floats
+    :type res: float
+    :return: grid box indices
+    :rtype: numpy array of integers
+    """
+    inlon = np.asarray(lon, dtype=float)
+
+    inlon = np.where(inlon >= 180.0, -180.0 + (inlon - 180.0), inlon)
+    inlon = np.where(inlon < -180.0, inlon + 360.0, inlon)
+
+    if res == 1:
+        xindex = np.trunc(inlon + 180.0)
+    else:
+        xindex = np.trunc((inlon + 180.0) / res)
+
+    xindex = np.where(xindex >= 360 / res, xindex % (360 / res), xindex)
+
+    return xindex.astype(int)
+
+
 def id_is_generic(inid, inyear):
     """
     Test to see if an ID is one of the generic IDs
@@ -39,6 +39,25 @@ def sphere_distance(lat1, lon1, lat2, lon2):
     return delta
 
 
+def sphere_distance_array(lat1, lon1, lat2, lon2):
+    """
+    Calculate the great circle distances between pairs of points on the sphere. Array
+    version of func:`sphere_distance`, missing values are NaN and give NaN distances.
+
+    :param lat1: latitudes of first points
+    :param lon1: longitudes of first points
+    :param lat2: latitudes of second points
+    :param lon2: longitudes of second points
+    :type lat1: numpy array of floats
+    :type lon1: numpy array of floats
+    :type lat2: numpy array of floats
+    :type lon2: numpy array of floats
+    :return: great circle distances in kilometres between the pairs of points
+    :rtype: numpy array of floats
+    """
+    return angular_distance_array(lat1, lon1, lat2, lon2) * earths_radius
+
+
 def angular_distance(lat1, lon1, lat2, lon2):
     """
     calculate distance between two points on a sphere
@@ -84,6 +103,42 @@ def angular_distance(lat1, lon1, lat2, lon2):
     return delta
 
 
+def angular_distance_array(lat1, lon1, lat2, lon2):
+    """
+    Calculate distances in radians between pairs of points on a sphere. Array version
+    of func:`angular_distance`, missing values are NaN and give NaN distances.
+
+    :param lat1: latitudes of first points in degrees
+    :param lon1: longitudes of first points in degrees
+    :param lat2: latitudes of second points in degrees
+    :param lon2: longitudes of second points in degrees
+    :type lat1: numpy array of floats
+    :type lon1: numpy array of floats
+    :type lat2: numpy array of floats
+    :type lon2: numpy array of floats
+    :return: angular great circle distances between the pairs of points in radians
+    :rtype: numpy array of floats
+    """
+    lat1 = np.asarray(lat1, dtype=float) * radians_per_degree
+    lon1 = np.asarray(lon1, dtype=float) * radians_per_degree
+    lat2 = np.asarray(lat2, dtype=float) * radians_per_degree
+    lon2 = np.asarray(lon2, dtype=float) * radians_per_degree
+
+    delta_lambda = np.abs(lon1 - lon2)
+    bit1 = np.cos(lat2) * np.sin(delta_lambda)
+    bit1 = bit1 * bit1
+    bit2 = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(
+        delta_lambda
+    )
+    bit2 = bit2 * bit2
+    topbit = np.sqrt(bit1 + bit2)
+    bottombit = np.sin(lat1) * np.sin(lat2) + np.cos(lat1) * np.cos(lat2) * np.cos(
+        delta_lambda
+    )
+
+    return np.arctan2(topbit, bottombit)
+
+
 def lat_lon_from_course_and_distance(lat1, lon1, tc, d):
     """
     calculate a latitude and longitude given a starting point, course (in radian) and
@@ -116,6 +171,41 @@ def lat_lon_from_course_and_distance(lat1, lon1, tc, d):
     return lat, lon
 
 
+def lat_lon_from_course_and_distance_array(lat1, lon1, tc, d):
+    """
+    Calculate latitudes and longitudes given starting points, courses and distances.
+    Array version of func:`lat_lon_from_course_and_distance`, missing values are NaN
+    and give NaN positions.
+
+    :param lat1: latitudes of starting points in degrees
+    :param lon1: longitudes of starting points in degrees
+    :param tc: true courses measured clockwise from north in degrees
+    :param d: distances travelled in kilometres
+    :type lat1: numpy array of floats
+    :type lon1: numpy array of floats
+    :type tc: numpy array of floats
+    :type d: numpy array of floats
+    :return: return the new latitudes and longitudes
+    :rtype: numpy array of floats
+    """
+    lat1 = np.asarray(lat1, dtype=float) * radians_per_degree
+    lon1 = np.asarray(lon1, dtype=float) * radians_per_degree
+    tcr = np.asarray(tc, dtype=float) * radians_per_degree
+
+    dr = np.asarray(d, dtype=float) / earths_radius
+
+    lat = np.arcsin(np.sin(lat1) * np.cos(dr) + np.cos(lat1) * np.sin(dr) * np.cos(tcr))
+    dlon = np.arctan2(
+        np.sin(tcr) * np.sin(dr) * np.cos(lat1), np.cos(dr) - np.sin(lat1) * np.sin(lat)
+    )
+    lon = np.fmod(lon1 + dlon + np.pi, 2.0 * np.pi) - np.pi
+
+    lat = lat / radians_per_degree
+    lon = lon / radians_per_degree
+
+    return lat, lon
+
+
 def course_between_points(lat1, lon1, lat2, lon2):
     """
     given two points find the initial true course at point1
@@ -190,6 +280,55 @@ def course_between_points(lat1, lon1, lat2, lon2):
     return tc1 / radians_per_degree
 
 
+def course_between_points_array(lat1, lon1, lat2, lon2):
+    """
+    Given pairs of points find the initial true courses at the first points. Array
+    version of func:`course_between_points`, missing values are NaN and give NaN courses.
+
+    :param lat1: latitudes of first points in degrees
+    :param lon1: longitudes of first points in degrees
+    :param lat2: latitudes of second points in degrees
+    :param lon2: longitudes of second points in degrees
+    :type lat1: numpy array of floats
+    :type lon1: numpy array of floats
+    :type lat2: numpy array of floats
+    :type lon2: numpy array of floats
+    :return: initial true courses in degrees at the first points along the great circles
+        between the first and second points
+    :rtype: numpy array of floats
+    """
+    d = angular_distance_array(lat1, lon1, lat2, lon2)
+
+    lat1 = np.asarray(lat1, dtype=float) * radians_per_degree
+    lon1 = np.asarray(lon1, dtype=float) * radians_per_degree
+    lat2 = np.asarray(lat2, dtype=float) * radians_per_degree
+    lon2 = np.asarray(lon2, dtype=float) * radians_per_degree
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = (np.sin(lat2) - np.sin(lat1) * np.cos(d)) / (np.sin(d) * np.cos(lat1))
+        tc1 = np.where((ratio <= 1.0) & (ratio >= -1.0), np.arccos(ratio), np.nan)
+    tc1 = np.where(np.sin(lon2 - lon1) > 0, tc1, 2.0 * np.pi - tc1)
+
+    # at the poles all courses are north or south
+    tc1 = np.where(
+        np.cos(lat1) < 0.0000001, np.where(lat1 > 0, np.pi, 2.0 * np.pi), tc1
+    )
+
+    fallback = np.fmod(
+        np.arctan2(
+            np.sin(lon1 - lon2) * np.cos(lat2),
+            np.cos(lat1) * np.sin(lat2)
+            - np.sin(lat1) * np.cos(lat2) * np.cos(lon1 - lon2),
+        ),
+        2 * np.pi,
+    )
+    tc1 = np.where(np.isnan(tc1), fallback, tc1)
+    tc1 = np.where(d != 0, tc1, 0.0)
+
+    # [()] gives a scalar rather than a 0-d array for scalar inputs, as a ufunc would
+    return (tc1 / radians_per_degree)[()]
+
+
 def intermediate_point(lat1, lon1, lat2, lon2, f):
     """
     given two lat,lon point find the latitude and longitude that are a fraction f
@@ -232,3 +371,50 @@ def intermediate_point(lat1, lon1, lat2, lon2, f):
         lon = lon1
 
     return lat, lon
+
+
+def intermediate_point_array(lat1, lon1, lat2, lon2, f):
+    """
+    Given pairs of points find the latitudes and longitudes that are a fraction f of the
+    great circle distance between them. Array version of func:`intermediate_point`,
+    missing values are NaN and give NaN positions.
+
+    :param lat1: latitudes of first points in degrees
+    :param lon1: longitudes of first points in degrees
+    :param lat2: latitudes of second points in degrees
+    :param lon2: longitudes of second points in degrees
+    :param f: fractions of distance between the two points
+    :type lat1: numpy array of floats
+    :type lon1: numpy array of floats
+    :type lat2: numpy array of floats
+    :type lon2: numpy array of floats
+    :type f: numpy array of floats
+    :return: return the latitudes and longitudes of the points a fraction f along the great
+        circles between the first and second points.
+    :rtype: numpy array of floats
+    """
+    f = np.asarray(f, dtype=float)
+    assert np.all(~(f > 1.0)), f[f > 1.0]
+
+    d = angular_distance_array(lat1, lon1, lat2, lon2)
+
+    lat1 = np.asarray(lat1, dtype=float)
+    lon1 = np.asarray(lon1, dtype=float)
+    lat1r = lat1 * radians_per_degree
+    lon1r = lon1 * radians_per_degree
+    lat2r = np.asarray(lat2, dtype=float) * radians_per_degree
+    lon2r = np.asarray(lon2, dtype=float) * radians_per_degree
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.sin((1 - f) * d) / np.sin(d)
+        b = np.sin(f * d) / np.sin(d)
+    x = a * np.cos(lat1r) * np.cos(lon1r) + b * np.cos(lat2r) * np.cos(lon2r)
+    y = a * np.cos(lat1r) * np.sin(lon1r) + b * np.cos(lat2r) * np.sin(lon2r)
+    z = a * np.sin(lat1r) + b * np.sin(lat2r)
+    lat = np.arctan2(z, np.sqrt(x * x + y * y)) / radians_per_degree
+    lon = np.arctan2(y, x) / radians_per_degree
+
+    lat = np.where(d != 0.0, lat, lat1)[()]
+    lon = np.where(d != 0.0, lon, lon1)[()]
+
+    return lat, lon
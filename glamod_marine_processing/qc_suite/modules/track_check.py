@@ -9,9 +9,8 @@ assumed.
 
 from __future__ import annotations
 
-import math
+import numpy as np
 
-from . import Extended_IMMA as ex
 from . import qc
 from . import spherical_geometry as sph
 
@@ -42,33 +41,19 @@ def modesp(awork):
 
     km_to_nm = 0.539957
 
-    ikmode = -32768
     acint = []
-    ifreq = []
     for i in range(1, 13):
         acint.append(i * 3.0)
-        ifreq.append(0.0)
 
     ntime = len(awork)
-    atmode = 0
-    icmode = 0
     if ntime > 1:
-        for i in range(1, ntime):
-            # fixed so that indexing starts at zero
-            index = int(math.floor(km_to_nm * awork[i] / 3.0))
-            if index < 0:
-                index = 0
-            elif index > 11:
-                index = 11
-            ifreq[index] = ifreq[index] + 1
-
-        for index in range(0, 12):
-            if ifreq[index] > ikmode:
-                ikmode = ifreq[index]
-                icmode = 1
-                atmode = acint[index] - 1.50
-
-        amode = atmode / icmode
+        # fixed so that indexing starts at zero
+        index = np.floor(km_to_nm * np.asarray(awork[1:], dtype=float) / 3.0)
+        index = np.clip(index, 0, 11).astype(int)
+        ifreq = np.bincount(index, minlength=12)
+
+        # the first of the most populated bins is the mode
+        amode = acint[int(np.argmax(ifreq))] - 1.50
         if amode <= 8.50:
             amode = 8.50
 
@@ -81,6 +66,310 @@ def modesp(awork):
     return amode
 
 
+def report_arrays(reps):
+    """
+    Gather the positions, times, reported speeds and reported headings of a list of
+    class`.MarineReport` into arrays. Missing values are NaN.
+
+    :param reps: reports in time order
+    :type reps: list of class`.MarineReport`
+    :return: dictionary of arrays with keys LAT and LON (the reported positions), lat and lon
+        (with longitudes in the range [-180,180]), time (in julian days), vsi and dsi
+    :rtype: dict
+    """
+    columns = {}
+    for varname in ["YR", "MO", "DY", "HR", "LAT", "LON", "vsi", "dsi"]:
+        columns[varname] = np.array([rep.getvar(varname) for rep in reps], dtype=float)
+
+    return track_arrays(columns)
+
+
+def track_arrays(columns):
+    """
+    Gather the positions, times, reported speeds and reported headings of the reports from one
+    platform from columns of their data, such as the columns of the table of a class`.Deck`.
+    Missing values are NaN.
+
+    :param columns: dictionary of columns holding at least YR, MO, DY, HR, LAT, LON, vsi and dsi
+    :type columns: dict
+    :return: dictionary of arrays as returned by func:`report_arrays`
+    :rtype: dict
+    """
+    arrays = {
+        varname: np.asarray(columns[varname], dtype=float)
+        for varname in ["YR", "MO", "DY", "HR", "LAT", "LON", "vsi", "dsi"]
+    }
+
+    arrays["lat"] = arrays["LAT"]
+    arrays["lon"] = np.where(arrays["LON"] > 180, arrays["LON"] - 360.0, arrays["LON"])
+    arrays["time"] = (
+        qc.jul_day_array(arrays.pop("YR"), arrays.pop("MO"), arrays.pop("DY"))
+        + arrays.pop("HR") / 24.0
+    )
+
+    return arrays
+
+
+def voyage_arrays(invoyage):
+    """
+    Gather the positions, times, reported speeds and reported headings of the reports in a
+    class`.Voyage` into arrays with func:`report_arrays`.
+
+    :param invoyage: Object of class`.Voyage`
+    :type invoyage: class`.Voyage`
+    :return: dictionary of arrays as returned by func:`report_arrays`
+    :rtype: dict
+    """
+    return report_arrays(list(invoyage.rep_feed()))
+
+
+def pair_separations(lat, lon, time, first, second):
+    """
+    Calculate the distances and time differences between pairs of reports in a track in the same
+    way as subtracting the first class`.MarineReport` of each pair from the second.
+
+    :param lat: latitudes of the reports
+    :param lon: longitudes of the reports in the range [-180,180]
+    :param time: times of the reports in julian days
+    :param first: positions of the first reports of the pairs
+    :param second: positions of the second reports of the pairs
+    :type lat: numpy array of floats
+    :type lon: numpy array of floats
+    :type time: numpy array of floats
+    :type first: numpy array of integers or slice
+    :type second: numpy array of integers or slice
+    :return: distances in km and time differences in hours, time differences are zero where
+        either time is missing
+    :rtype: numpy array of floats
+    """
+    distance = sph.sphere_distance_array(
+        lat[second], lon[second], lat[first], lon[first]
+    )
+
+    time_diff = 24.0 * (time[second] - time[first])
+    time_diff[np.isnan(time_diff)] = 0.0
+
+    return distance, time_diff
+
+
+def neighbour_pairs(nobs, n_neighbours):
+    """
+    Find all the pairs of reports in a track that are no more than n_neighbours reports apart,
+    including each report paired with itself.
+
+    :param nobs: number of reports in the track
+    :param n_neighbours: largest separation of the pairs
+    :type nobs: integer
+    :type n_neighbours: integer
+    :return: positions of the first and second reports of the pairs, in order of the first and
+        then the second report
+    :rtype: numpy array of integers
+    """
+    offsets = np.arange(-n_neighbours, n_neighbours + 1)
+
+    first = np.repeat(np.arange(nobs), len(offsets))
+    second = first + np.tile(offsets, nobs)
+
+    in_track = (second >= 0) & (second < nobs)
+
+    return first[in_track], second[in_track]
+
+
+def track_speeds(lat, lon, time, step=1):
+    """
+    Calculate the speeds, distances, courses and time differences between the reports in a
+    track in the same way as subtracting one class`.MarineReport` from another.
+
+    :param lat: latitudes of the reports
+    :param lon: longitudes of the reports in the range [-180,180]
+    :param time: times of the reports in julian days
+    :param step: 1 to compare each report with the one before it, 2 to compare alternate reports
+    :type lat: numpy array of floats
+    :type lon: numpy array of floats
+    :type time: numpy array of floats
+    :type step: integer
+    :return: speeds in km/hr, distances in km, courses in degrees and time differences in hours.
+        With step 1, element i is for report i relative to report i-1. With step 2, element i is
+        for report i+1 relative to report i-1. Elements with no pair of reports are NaN.
+    :rtype: numpy array of floats
+    """
+    nobs = len(lat)
+
+    speed = np.full(nobs, np.nan)
+    distance = np.full(nobs, np.nan)
+    course = np.full(nobs, np.nan)
+    time_diff = np.full(nobs, np.nan)
+
+    if nobs > step:
+        later = slice(step, nobs)
+        earlier = slice(0, nobs - step)
+        out = slice(1, nobs - step + 1)
+
+        distance[out], tdiff = pair_separations(lat, lon, time, earlier, later)
+        # missing times give a time difference of zero and the speed is set to the distance
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed[out] = np.where(tdiff != 0, distance[out] / tdiff, distance[out])
+        time_diff[out] = tdiff
+        course[out] = sph.course_between_points_array(
+            lat[earlier], lon[earlier], lat[later], lon[later]
+        )
+
+    return speed, distance, course, time_diff
+
+
+def add_track_speeds(arrays):
+    """
+    Add the speeds, distances, courses and time differences between consecutive and alternate
+    reports to the arrays from func:`voyage_arrays`.
+
+    :param arrays: dictionary of arrays from func:`voyage_arrays`
+    :type arrays: dict
+    :return: the dictionary with speed, distance, course, time_diff, alt_speed, alt_distance,
+        alt_course and alt_time_diff added
+    :rtype: dict
+    """
+    for prefix, step in [("", 1), ("alt_", 2)]:
+        values = track_speeds(arrays["lat"], arrays["lon"], arrays["time"], step)
+        for name, value in zip(["speed", "distance", "course", "time_diff"], values):
+            arrays[prefix + name] = value
+
+    return arrays
+
+
+def iquam_track_check_array(
+    lat, lon, time, speed_limit, delta_d, delta_t, n_neighbours
+):
+    """
+    Perform the IQUAM track check as detailed in Xu and Ignatov 2013 on a whole track.
+
+    The track check calculates speeds between pairs of observations and
+    counts how many exceed a threshold speed. The ob with the most
+    violations of this limit is flagged as bad and removed from the
+    calculation. Then the next worst is found and removed until no
+    violations remain.
+
+    :param lat: latitudes of the reports
+    :param lon: longitudes of the reports in the range [-180,180]
+    :param time: times of the reports in julian days
+    :param speed_limit: speed limit in km/hr
+    :param delta_d: allowance for error in position in km
+    :param delta_t: allowance for error in time in hours
+    :param n_neighbours: number of reports either side of each report to compare it with
+    :type lat: numpy array of floats
+    :type lon: numpy array of floats
+    :type time: numpy array of floats
+    :type speed_limit: float
+    :type delta_d: float
+    :type delta_t: float
+    :type n_neighbours: integer
+    :return: QC flags 0 for pass and 1 for fail
+    :rtype: numpy array of integers
+    """
+    numobs = len(lat)
+
+    # the speed between every report and each of its neighbours
+    first, second = neighbour_pairs(numobs, n_neighbours)
+    distance, time_diff = pair_separations(lat, lon, time, first, second)
+
+    iquam_condition = np.maximum(np.abs(distance) - delta_d, 0.0) / (
+        np.abs(time_diff) + delta_t
+    )
+    violation = iquam_condition > speed_limit
+
+    speed_violations = [[] for _ in range(numobs)]
+    for t1, t2 in zip(first[violation], second[violation]):
+        speed_violations[t1].append(t2)
+    count_speed_violations = np.array([float(len(v)) for v in speed_violations])
+
+    qcs = np.zeros(numobs, dtype=int)
+
+    while np.sum(count_speed_violations) > 0.0:
+        most_fails = np.argmax(count_speed_violations)
+        qcs[most_fails] = 1
+
+        for index in speed_violations[most_fails]:
+            if most_fails in speed_violations[index]:
+                speed_violations[index].remove(most_fails)
+                count_speed_violations[index] -= 1.0
+
+        count_speed_violations[most_fails] = 0
+
+    return qcs
+
+
+def spike_check_array(
+    lat,
+    lon,
+    time,
+    values,
+    delta_t,
+    max_gradient_space,
+    max_gradient_time,
+    n_neighbours,
+):
+    """
+    Perform the IQUAM like spike check on a whole track. Each report is compared with its
+    neighbours and the report with the most changes in value larger than allowed for the
+    distance and time between them is flagged and removed from the calculation, until no
+    violations remain.
+
+    :param lat: latitudes of the reports
+    :param lon: longitudes of the reports in the range [-180,180]
+    :param time: times of the reports in julian days
+    :param values: values to be spike checked, missing values are NaN and never fail
+    :param delta_t: smallest change in value that can be flagged
+    :param max_gradient_space: largest allowed change in value per km
+    :param max_gradient_time: largest allowed change in value per hour
+    :param n_neighbours: number of reports either side of each report to compare it with
+    :type lat: numpy array of floats
+    :type lon: numpy array of floats
+    :type time: numpy array of floats
+    :type values: numpy array of floats
+    :type delta_t: float
+    :type max_gradient_space: float
+    :type max_gradient_time: float
+    :type n_neighbours: integer
+    :return: QC flags 0 for pass and 1 for fail
+    :rtype: numpy array of integers
+    """
+    numobs = len(lat)
+
+    # the change in value between every report and each of its neighbours
+    first, second = neighbour_pairs(numobs, n_neighbours)
+    distance, time_diff = pair_separations(lat, lon, time, first, second)
+
+    val_change = np.abs(values[second] - values[first])
+    iquam_condition = np.maximum(
+        delta_t,
+        np.maximum(
+            np.abs(distance) * max_gradient_space,
+            np.abs(time_diff) * max_gradient_time,
+        ),
+    )
+    # missing values give a NaN change, which is never a violation
+    violation = val_change > iquam_condition
+
+    gradient_violations = [[] for _ in range(numobs)]
+    for t1, t2 in zip(first[violation], second[violation]):
+        gradient_violations[t1].append(t2)
+    count_gradient_violations = np.array([float(len(v)) for v in gradient_violations])
+
+    qcs = np.zeros(numobs, dtype=int)
+
+    while np.sum(count_gradient_violations) > 0.0:
+        most_fails = np.argmax(count_gradient_violations)
+        qcs[most_fails] = 1
+
+        for index in gradient_violations[most_fails]:
+            if most_fails in gradient_violations[index]:
+                gradient_violations[index].remove(most_fails)
+                count_gradient_violations[index] -= 1.0
+
+        count_gradient_violations[most_fails] = 0
+
+    return qcs
+
+
 def set_speed_limits(amode):
     """
     Takes a modal speed and calculates speed limits for the track checker
@@ -138,6 +427,29 @@ def increment_position(alat1, alon1, avs, ads, timdif):
     return lat, lon
 
 
+def increment_position_array(alat1, alon1, avs, ads, timdif):
+    """
+    Array version of func:`increment_position`. Missing values are NaN and give NaN increments.
+
+    :param alat1: Latitudes at starting points
+    :param alon1: Longitudes at starting points
+    :param avs: speeds of ship in km/hr
+    :param ads: headings of ship in degrees
+    :param timdif: time differences between the points in hours
+    :type alat1: numpy array of floats
+    :type alon1: numpy array of floats
+    :type avs: numpy array of floats
+    :type ads: numpy array of floats
+    :type timdif: numpy array of floats
+    :return: increments of latitude and longitude
+    :rtype: numpy array of floats
+    """
+    distance = avs * timdif / 2.0
+    lat, lon = sph.lat_lon_from_course_and_distance_array(alat1, alon1, ads, distance)
+
+    return lat - alat1, lon - alon1
+
+
 def distr1(invoyage):
     """
     Given an object of class`.Voyage`,
@@ -155,55 +467,50 @@ def distr1(invoyage):
     direction for the next report, to which the projected location
     is then compared. The distances between the projected and actual locations is returned
     """
-    # Compute difference between actual and expected positions after
-    # two observations.
-    # Each vessel travels at its reported speed and direction for
-    # half the time interval; the difference (in miles) between
-    # the calculated and observed positions is calculatered.
-    km_to_nm = 0.539957
+    arrays = add_track_speeds(voyage_arrays(invoyage))
+    distance_from_est_location = distr1_array(arrays)
 
-    nobs = len(invoyage)
+    # in the absence of reported speed and direction set to None
+    return [None if np.isnan(x) else x for x in distance_from_est_location]
 
-    distance_from_est_location = [None]
 
-    for i in range(1, nobs):
-        if (
-            invoyage.getvar(i, "vsi") is not None
-            and invoyage.getvar(i - 1, "vsi") is not None
-            and invoyage.getvar(i, "dsi") is not None
-            and invoyage.getvar(i - 1, "dsi") is not None
-            and invoyage.getvar(i, "time_diff") is not None
-        ):
-            # get increment from initial position
-            lat1, lon1 = increment_position(
-                invoyage.getvar(i - 1, "LAT"),
-                invoyage.getvar(i - 1, "LON"),
-                invoyage.getvar(i - 1, "vsi") / km_to_nm,
-                invoyage.getvar(i - 1, "dsi"),
-                invoyage.getvar(i, "time_diff"),
-            )
+def distr1_array(arrays):
+    """
+    Array version of func:`distr1`. Calculate the distances between the positions projected from
+    the reported speeds and headings at the current and previous time steps and the actual
+    positions.
+
+    :param arrays: dictionary of arrays from func:`voyage_arrays` and func:`add_track_speeds`
+    :type arrays: dict
+    :return: distances from estimated positions in km, NaN where they cannot be calculated
+    :rtype: numpy array of floats
+    """
+    km_to_nm = 0.539957
 
-            lat2, lon2 = increment_position(
-                invoyage.getvar(i, "LAT"),
-                invoyage.getvar(i, "LON"),
-                invoyage.getvar(i, "vsi") / km_to_nm,
-                invoyage.getvar(i, "dsi"),
-                invoyage.getvar(i, "time_diff"),
-            )
-            # apply increments to the lat and lon at i-1
-            alatx = invoyage.getvar(i - 1, "LAT") + lat1 + lat2
-            alonx = invoyage.getvar(i - 1, "LON") + lon1 + lon2
+    lat = arrays["LAT"]
+    lon = arrays["LON"]
+    vsi = arrays["vsi"]
+    dsi = arrays["dsi"]
+    time_diff = arrays["time_diff"]
 
-            # calculate distance between calculated position and the second reported position
-            discrepancy = sph.sphere_distance(
-                invoyage.getvar(i, "LAT"), invoyage.getvar(i, "LON"), alatx, alonx
-            )
+    distance_from_est_location = np.full(len(lat), np.nan)
 
-            distance_from_est_location.append(discrepancy)
+    if len(lat) > 1:
+        # get increment from initial position
+        lat1, lon1 = increment_position_array(
+            lat[:-1], lon[:-1], vsi[:-1] / km_to_nm, dsi[:-1], time_diff[1:]
+        )
+        lat2, lon2 = increment_position_array(
+            lat[1:], lon[1:], vsi[1:] / km_to_nm, dsi[1:], time_diff[1:]
+        )
+        # apply increments to the lat and lon at i-1
+        alatx = lat[:-1] + lat1 + lat2
+        alonx = lon[:-1] + lon1 + lon2
 
-        else:
-            # in the absence of reported speed and direction set to None
-            distance_from_est_location.append(None)
+        # calculate distance between calculated position and the second reported position
+        distance_from_est_location[1:] = sph.sphere_distance_array(
+            lat[1:], lon[1:], alatx, alonx
+        )
 
     return distance_from_est_location
 
@@ -226,62 +533,53 @@ def distr2(invoyage):
     it forwards another half time step using the speed and direction for the next report, to which the projected
     location is then compared. The distances between the projected and actual locations is returned
     """
-    # Compute difference between actual and expected positions after
-    # two observations IN REVERSE ORDER
-    # Each vessel travels at its reported speed and direction for
-    # half the time interval; the difference (in miles) between
-    # the calculated and observed positions is calculatered.
-    km_to_nm = 0.539957
+    arrays = add_track_speeds(voyage_arrays(invoyage))
+    distance_from_est_location = distr2_array(arrays)
 
-    nobs = len(invoyage)
+    # in the absence of reported speed and direction set to None
+    return [None if np.isnan(x) else x for x in distance_from_est_location]
 
-    distance_from_est_location = [None]
 
-    for i in range(nobs - 1, 0, -1):
-        if (
-            invoyage.getvar(i, "vsi") is not None
-            and invoyage.getvar(i - 1, "vsi") is not None
-            and invoyage.getvar(i, "dsi") is not None
-            and invoyage.getvar(i - 1, "dsi") is not None
-            and invoyage.getvar(i, "time_diff") is not None
-        ):
-            # get increment from initial position - backwards in time
-            # means reversing the direction by 180 degrees
-            lat1, lon1 = increment_position(
-                invoyage.getvar(i, "LAT"),
-                invoyage.getvar(i, "LON"),
-                invoyage.getvar(i, "vsi") / km_to_nm,
-                invoyage.getvar(i, "dsi") - 180.0,
-                invoyage.getvar(i, "time_diff"),
-            )
+def distr2_array(arrays):
+    """
+    Array version of func:`distr2`. Calculate the distances between the positions projected
+    backwards in time from the reported speeds and headings and the actual positions.
+
+    :param arrays: dictionary of arrays from func:`voyage_arrays` and func:`add_track_speeds`
+    :type arrays: dict
+    :return: distances from estimated positions in km, NaN where they cannot be calculated.
+        As for func:`distr2`, element i is for reports i and i+1.
+    :rtype: numpy array of floats
+    """
+    km_to_nm = 0.539957
 
-            lat2, lon2 = increment_position(
-                invoyage.getvar(i - 1, "LAT"),
-                invoyage.getvar(i - 1, "LON"),
-                invoyage.getvar(i - 1, "vsi") / km_to_nm,
-                invoyage.getvar(i - 1, "dsi") - 180.0,
-                invoyage.getvar(i, "time_diff"),
-            )
+    lat = arrays["LAT"]
+    lon = arrays["LON"]
+    vsi = arrays["vsi"]
+    dsi = arrays["dsi"]
+    time_diff = arrays["time_diff"]
 
-            # apply increments to the lat and lon at i-1
-            alatx = invoyage.getvar(i, "LAT") + lat1 + lat2
-            alonx = invoyage.getvar(i, "LON") + lon1 + lon2
+    distance_from_est_location = np.full(len(lat), np.nan)
 
-            # calculate distance between calculated position and the second reported position
-            discrepancy = sph.sphere_distance(
-                invoyage.getvar(i - 1, "LAT"),
-                invoyage.getvar(i - 1, "LON"),
-                alatx,
-                alonx,
-            )
-            distance_from_est_location.append(discrepancy)
+    if len(lat) > 1:
+        # get increment from initial position - backwards in time
+        # means reversing the direction by 180 degrees
+        lat1, lon1 = increment_position_array(
+            lat[1:], lon[1:], vsi[1:] / km_to_nm, dsi[1:] - 180.0, time_diff[1:]
+        )
+        lat2, lon2 = increment_position_array(
+            lat[:-1], lon[:-1], vsi[:-1] / km_to_nm, dsi[:-1] - 180.0, time_diff[1:]
+        )
+        # apply increments to the lat and lon at i
+        alatx = lat[1:] + lat1 + lat2
+        alonx = lon[1:] + lon1 + lon2
 
-        else:
-            # in the absence of reported speed and direction set to None
-            distance_from_est_location.append(None)
+        # calculate distance between calculated position and the first reported position
+        distance_from_est_location[:-1] = sph.sphere_distance_array(
+            lat[:-1], lon[:-1], alatx, alonx
+        )
 
-    # that fancy bit at the end reverses the array
-    return distance_from_est_location[::-1]
+    return distance_from_est_location
 
 
 def midpt(invoyage):
@@ -301,49 +599,48 @@ def midpt(invoyage):
     The calculation linearly interpolates the latitudes and longitudes (allowing for
     wrapping around the dateline and so on).
     """
-    #    Compute distance from time-proportional position between
-    #       outside reported positions to middle reported position.
-    nobs = len(invoyage)
+    arrays = add_track_speeds(voyage_arrays(invoyage))
+    midpoint_discrepancies = midpt_array(arrays)
 
-    midpoint_discrepancies = [None]
+    return [None if np.isnan(x) else x for x in midpoint_discrepancies]
 
-    for i in range(1, nobs - 1):
-        t0 = invoyage.getvar(i, "time_diff")
-        t1 = invoyage.getvar(i + 1, "time_diff")
 
-        if t0 is not None and t1 is not None:
-            if t0 + t1 != 0:
-                fraction_of_time_diff = t0 / (t0 + t1)
-            else:
-                fraction_of_time_diff = 0.0
-        else:
-            fraction_of_time_diff = 0.0
+def midpt_array(arrays):
+    """
+    Array version of func:`midpt`. Interpolate between alternate reports and calculate the
+    distances between the interpolated and actual locations.
+
+    :param arrays: dictionary of arrays from func:`voyage_arrays` and func:`add_track_speeds`
+    :type arrays: dict
+    :return: distances from estimated positions in km, NaN for the first and last reports
+    :rtype: numpy array of floats
+    """
+    lat = arrays["LAT"]
+    lon = arrays["LON"]
+    time_diff = arrays["time_diff"]
 
-        if fraction_of_time_diff > 1.0:
-            print(fraction_of_time_diff, t0, t1)
+    midpoint_discrepancies = np.full(len(lat), np.nan)
 
-        estimated_lat_at_midpt, estimated_lon_at_midpt = sph.intermediate_point(
-            invoyage.getvar(i - 1, "LAT"),
-            invoyage.getvar(i - 1, "LON"),
-            invoyage.getvar(i + 1, "LAT"),
-            invoyage.getvar(i + 1, "LON"),
-            fraction_of_time_diff,
-        )
+    if len(lat) > 2:
+        t0 = time_diff[1:-1]
+        t1 = time_diff[2:]
 
-        #      Time-proportional position is at AT3 (N/S) and AN3 (E/W)
-        #      Reported mid-point will be at    AT4 (N/S) and AN4 (E/W)
-        #      Compute distance between time/prop posn and reported mid-point.
-        #        SIDE1 is distance travelled North/South
-        discrepancy = sph.sphere_distance(
-            invoyage.getvar(i, "LAT"),
-            invoyage.getvar(i, "LON"),
-            estimated_lat_at_midpt,
-            estimated_lon_at_midpt,
-        )
+        total = t0 + t1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction_of_time_diff = np.where(
+                np.isnan(total) | (total == 0), 0.0, t0 / total
+            )
 
-        midpoint_discrepancies.append(discrepancy)
+        for i in np.flatnonzero(fraction_of_time_diff > 1.0):
+            print(fraction_of_time_diff[i], t0[i], t1[i])
 
-    midpoint_discrepancies.append(None)
+        estimated_lat_at_midpt, estimated_lon_at_midpt = sph.intermediate_point_array(
+            lat[:-2], lon[:-2], lat[2:], lon[2:], fraction_of_time_diff
+        )
+
+        midpoint_discrepancies[1:-1] = sph.sphere_distance_array(
+            lat[1:-1], lon[1:-1], estimated_lat_at_midpt, estimated_lon_at_midpt
+        )
 
     return midpoint_discrepancies
 
@@ -468,12 +765,126 @@ def check_distance_from_estimate(
     return result
 
 
-def mds_track_check(invoyage):
+def mds_track_check_array(
+    arrays,
+    max_direction_change=60.0,
+    max_speed_change=10.0,
+    max_absolute_speed=40.0,
+    max_midpoint_discrepancy=150.0,
+):
+    """
+    Perform one pass of the track check on a whole track at once. The tests are those of
+    func:`check_distance_from_estimate`, func:`direction_continuity` and func:`speed_continuity`
+    applied to arrays, with missing values (NaN) never failing a test.
+
+    :param arrays: dictionary of arrays from func:`voyage_arrays` and func:`add_track_speeds`
+    :param max_direction_change: largest deviation in direction that will not be flagged
+    :param max_speed_change: largest change of speed that will not be flagged
+    :param max_absolute_speed: speeds in knots above this are flagged
+    :param max_midpoint_discrepancy: distances from the interpolated midpoint in nautical miles
+        above this are flagged
+    :type arrays: dict
+    :type max_direction_change: float
+    :type max_speed_change: float
+    :type max_absolute_speed: float
+    :type max_midpoint_discrepancy: float
+    :return: QC flags 0 for pass and 1 for fail
+    :rtype: numpy array of integers
+    """
+    km_to_nm = 0.539957
+
+    nobs = len(arrays["lat"])
+    qcs = np.zeros(nobs, dtype=int)
+
+    if nobs < 3:
+        return qcs
+
+    speed = arrays["speed"]
+    alt_speed = arrays["alt_speed"]
+    course = arrays["course"]
+    time_diff = arrays["time_diff"]
+    vsi = arrays["vsi"]
+    dsi = arrays["dsi"]
+
+    reported_dsi = dsi[:-1][~np.isnan(dsi[:-1])]
+    assert np.all(np.isin(reported_dsi, [0, 45, 90, 135, 180, 225, 270, 315, 360]))
+
+    # what are the mean and mode speeds?
+    modal_speed = modesp(speed)
+    # set speed limits based on modal speed
+    amax, amaxx, amin = set_speed_limits(modal_speed)
+    del amaxx
+    del amin
+
+    # compare reported speeds and positions if we have them
+    forward_diff_from_estimated = distr1_array(arrays)[1:-1]
+    reverse_diff_from_estimated = distr2_array(arrays)[1:-1]
+    midpoint_diff_from_estimated = midpt_array(arrays)[1:-1]
+
+    # the current (i), previous (i-1) and next (i+1) values for reports 1 to nobs-2
+    this = slice(1, nobs - 1)
+    prev = slice(0, nobs - 2)
+    nxt = slice(2, nobs)
+
+    # together these cover the speeds calculate from point i
+    thisqc_a = (
+        ((speed[this] > amax) & (alt_speed[prev] > amax))
+        | ((speed[nxt] > amax) & (alt_speed[nxt] > amax))
+        | ((speed[this] > amax) & (speed[nxt] > amax))
+    )
+
+    # Quality-control by examining the distance
+    # between the calculated and reported second position.
+    alwdis = time_diff[this] * ((vsi[this] + vsi[prev]) / 2.0) / km_to_nm
+    distance_failure = (
+        (vsi[this] > 0)
+        & (vsi[prev] > 0)
+        & (time_diff[this] > 0)
+        & (forward_diff_from_estimated > alwdis)
+        & (reverse_diff_from_estimated > alwdis)
+    )
+    # Check for continuity of direction, which needs both headings
+    direction_failure = np.zeros(nobs - 2, dtype=bool)
+    both_reported = ~np.isnan(dsi[this]) & ~np.isnan(dsi[prev])
+    for heading in [dsi[this], dsi[prev]]:
+        change = np.abs(heading - course[this])
+        direction_failure |= (max_direction_change < change) & (
+            change < 360 - max_direction_change
+        )
+    direction_failure &= both_reported
+    # Check for continuity of speed.
+    speed_failure = (
+        np.abs(vsi[this] / km_to_nm - speed[this]) > max_speed_change / km_to_nm
+    ) & (np.abs(vsi[prev] / km_to_nm - speed[this]) > max_speed_change / km_to_nm)
+
+    thisqc_b = (
+        distance_failure
+        | direction_failure
+        | speed_failure
+        | (speed[this] > max_absolute_speed / km_to_nm)
+    )
+
+    # make the final decision
+    qcs[this] = (
+        (midpoint_diff_from_estimated > max_midpoint_discrepancy / km_to_nm)
+        & thisqc_a
+        & thisqc_b
+    )
+
+    return qcs
+
+
+def mds_track_check(invoyage, positions=None, arrays=None):
     """
     Perform one pass of the track check
 
     :param invoyage: A list of class`.Voyage` that you want track checked
+    :param positions: positions in invoyage of the reports to check, if None then check all of them
+    :param arrays: arrays from func:`voyage_arrays` for invoyage, if None then they are gathered
+        from invoyage
     :type invoyage: class`.Voyage`
+    :type positions: numpy array of integers
+    :type arrays: dict
     :return: list of QC flags 0 for pass and 1 for fail
     :rtype: integer
 
@@ -482,118 +893,42 @@ def mds_track_check(invoyage):
     historic trivia so exercises my mind, but it does: the 1990s! I wish my code
     would last so long.
     """
-    km_to_nm = 0.539957
-    nobs = len(invoyage)
+    if positions is None:
+        positions = np.arange(len(invoyage))
+    if arrays is None:
+        arrays = voyage_arrays(invoyage)
+
+    nobs = len(positions)
 
     # no obs in, no qc outcomes out
     if nobs == 0:
         return []
 
+    first = positions[0]
+
     # Generic ids get a free pass on the track check
-    if qc.id_is_generic(invoyage.getvar(0, "ID"), invoyage.getvar(0, "YR")):
-        qcs = []
-        nobs = len(invoyage)
-        for i in range(0, nobs):
+    if qc.id_is_generic(invoyage.getvar(first, "ID"), invoyage.getvar(first, "YR")):
+        for i in positions:
             invoyage.set_qc(i, "POS", "bad_track", 0)
-            qcs.append(0)
-        return qcs
+        return [0] * nobs
 
     # fewer than three obs - set the fewsome flag
     # deck 720 gets a pass prior to 1891 see Carella, Kent, Berry 2015 Appendix A3
     if nobs < 3 and not (
-        invoyage.getvar(0, "DCK") == 720 and invoyage.getvar(0, "YR") < 1891
+        invoyage.getvar(first, "DCK") == 720 and invoyage.getvar(first, "YR") < 1891
     ):
-        qcs = []
-        nobs = len(invoyage)
-        for i in range(0, nobs):
+        for i in positions:
             invoyage.set_qc(i, "POS", "fewsome_check", 1)
-            qcs.append(0)
-        return qcs
-
-    # work out speeds and distances between alternating points
-    invoyage.calc_alternate_speeds()
-
-    # what are the mean and mode speeds?
-    modal_speed = modesp(invoyage.get_speed())
-    # set speed limits based on modal speed
-    amax, amaxx, amin = set_speed_limits(modal_speed)
-    del amaxx
-    del amin
-
-    # compare reported speeds and positions if we have them
-    forward_diff_from_estimated = distr1(invoyage)
-    reverse_diff_from_estimated = distr2(invoyage)
-    midpoint_diff_from_estimated = midpt(invoyage)
+        return [0] * nobs
 
-    # do QC
-    qcs = [0]
-    invoyage.set_qc(0, "POS", "bad_track", 0)
-    invoyage.set_qc(0, "POS", "fewsome_check", 0)
+    # work out speeds and distances between consecutive and alternating points
+    track = add_track_speeds({name: value[positions] for name, value in arrays.items()})
 
-    for i in range(1, nobs - 1):
-        thisqc_a = 0
-        thisqc_b = 0
-
-        # together these cover the speeds calculate from point i
-        if (
-            invoyage.getvar(i, "speed") > amax
-            and invoyage.getvar(i - 1, "alt_speed") > amax
-        ):
-            thisqc_a += 1.00
-        elif (
-            invoyage.getvar(i + 1, "speed") > amax
-            and invoyage.getvar(i + 1, "alt_speed") > amax
-        ):
-            thisqc_a += 2.00
-        elif (
-            invoyage.getvar(i, "speed") > amax
-            and invoyage.getvar(i + 1, "speed") > amax
-        ):
-            thisqc_a += 3.00
-
-        # Quality-control by examining the distance
-        # between the calculated and reported second position.
-        thisqc_b += check_distance_from_estimate(
-            invoyage.getvar(i, "vsi"),
-            invoyage.getvar(i - 1, "vsi"),
-            invoyage.getvar(i, "time_diff"),
-            forward_diff_from_estimated[i],
-            reverse_diff_from_estimated[i],
-        )
-        # Check for continuity of direction
-        thisqc_b += direction_continuity(
-            invoyage.getvar(i, "dsi"),
-            invoyage.getvar(i - 1, "dsi"),
-            invoyage.getvar(i, "course"),
-        )
-        # Check for continuity of speed.
-        thisqc_b += speed_continuity(
-            invoyage.getvar(i, "vsi"),
-            invoyage.getvar(i - 1, "vsi"),
-            invoyage.getvar(i, "speed"),
-        )
+    qcs = mds_track_check_array(track).tolist()
 
-        # check for speeds in excess of 40.00 knots
-        if invoyage.getvar(i, "speed") > 40.00 / km_to_nm:
-            thisqc_b += 10.0
-
-        # make the final decision
-        if (
-            midpoint_diff_from_estimated[i] > 150.0 / km_to_nm
-            and thisqc_a > 0
-            and thisqc_b > 0
-        ):
-            qcs.append(1)
-            invoyage.set_qc(i, "POS", "bad_track", 1)
-            invoyage.set_qc(i, "POS", "fewsome_check", 0)
-        else:
-            qcs.append(0)
-            invoyage.set_qc(i, "POS", "bad_track", 0)
-            invoyage.set_qc(i, "POS", "fewsome_check", 0)
-
-    qcs.append(0)
-    invoyage.set_qc(nobs - 1, "POS", "bad_track", 0)
-    invoyage.set_qc(nobs - 1, "POS", "fewsome_check", 0)
+    for i, flag in zip(positions, qcs):
+        invoyage.set_qc(i, "POS", "bad_track", flag)
+        invoyage.set_qc(i, "POS", "fewsome_check", 0)
 
     return qcs
 
@@ -608,9 +943,12 @@ def mds_full_track_check(invoyage):
     :type invoyage: class`.Voyage`
 
     The basic 1-pass track check is repeated 5 times, with obs failing track check
-    excluded from subsequent passes.
+    excluded from subsequent passes. The reports are gathered into arrays once and each
+    pass works on the subset of the arrays which has passed so far.
     """
-    master_qc = mds_track_check(invoyage)
+    arrays = voyage_arrays(invoyage)
+
+    master_qc = np.array(mds_track_check(invoyage, arrays=arrays), dtype=int)
 
     repetitions = 0
 
@@ -618,29 +956,14 @@ def mds_full_track_check(invoyage):
 
     if len(qcs) > 0:
         while max(qcs) > 0 and repetitions < 4:
-            tempreps = ex.Voyage()
-            qc_refs = []
-
-            i = 0
-            for rep in invoyage.rep_feed():
-                if master_qc[i] == 0:
-                    tempreps.add_report(rep)
-                    qc_refs.append(i)
-                i += 1
+            positions = np.flatnonzero(master_qc == 0)
 
-            qcs = mds_track_check(tempreps)
-
-            for i, qc_ref in enumerate(qc_refs):
-                master_qc[qc_ref] = qcs[i]
+            qcs = mds_track_check(invoyage, positions, arrays)
+            master_qc[positions] = qcs
 
             repetitions += 1
 
-    i = 0
-    for rep in invoyage.rep_feed():
-        if master_qc[i] == 0:
-            invoyage.set_qc(i, "POS", "bad_track", 0)
-        if master_qc[i] == 1:
-            invoyage.set_qc(i, "POS", "bad_track", 1)
-        i += 1
+    for i, flag in enumerate(master_qc):
+        invoyage.set_qc(i, "POS", "bad_track", int(flag))
 
     return invoyage
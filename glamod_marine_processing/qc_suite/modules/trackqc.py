@@ -4,14 +4,20 @@
 
 from __future__ import annotations
 
-import copy
 import math
 
 import numpy as np
-
-from . import Extended_IMMA as ex
-from .qc import dayinyear, sunangle
-from .spherical_geometry import sphere_distance
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import track_check as tc
+from .qc import (
+    dayinyear,
+    dayinyear_array,
+    id_is_generic,
+    sun_elevation_array,
+    sunangle,
+)
+from .spherical_geometry import sphere_distance, sphere_distance_array
 
 """
 The trackqc module contains a set of functions for performing the tracking QC
@@ -102,6 +108,57 @@ def track_day_test(year, month, day, hour, lat, lon, elevdlim=-2.5):
     return daytime
 
 
+def track_day_test_array(year, month, day, hour, lat, lon, elevdlim=-2.5):
+    """
+    Given arrays of date, time, lat and lon calculate if the sun elevation is > elevdlim.
+    Array version of func:`track_day_test`.
+
+    :param year: Year
+    :param month: Month
+    :param day: Day
+    :param hour: Hour expressed as decimal fraction (e.g. 20.75 = 20:45 pm)
+    :param lat: Latitude in degrees
+    :param lon: Longitude in degrees
+    :param elevdlim: Elevation day/night delimiter in degrees above horizon
+    :type year: numpy array
+    :type month: numpy array
+    :type day: numpy array
+    :type hour: numpy array
+    :type lat: numpy array
+    :type lon: numpy array
+    :type elevdlim: float
+    :return: True where daytime, else False.
+    :rtype: numpy array of booleans
+    """
+    year = np.asarray(year, dtype=float)
+    month = np.asarray(month, dtype=float)
+    day = np.asarray(day, dtype=float)
+    hour = np.asarray(hour, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+
+    assert not np.any(np.isnan(year)), "year is missing"
+    assert not np.any(np.isnan(month)), "month is missing"
+    assert not np.any(np.isnan(day)), "day is missing"
+    assert not np.any(np.isnan(hour)), "hour is missing"
+    assert not np.any(np.isnan(lat)), "latitude is missing"
+    assert not np.any(np.isnan(lon)), "longitude is missing"
+    assert np.all((1 <= month) & (month <= 12)), "month is invalid"
+    assert np.all((1 <= day) & (day <= 31)), "day is invalid"
+    assert np.all((0 <= hour) & (hour <= 24)), "hour is invalid"
+    assert np.all((90 >= lat) & (lat >= -90)), "latitude is invalid"
+
+    day2 = dayinyear_array(year, month, day)
+    hour2 = np.floor(hour)
+    minute2 = (hour - np.floor(hour)) * 60.0
+    lat2 = np.where(lat == 0, 0.0001, lat)
+    lon2 = np.where(lon == 0, 0.0001, lon)
+
+    elevation = sun_elevation_array(year, day2, hour2, minute2, 0, 0, 0, lat2, lon2)
+
+    return elevation > elevdlim
+
+
 def trim_mean(inarr, trim):
     """
     Calculate a resistant (aka robust) mean of an input array given a trimming criteria.
@@ -120,7 +177,7 @@ def trim_mean(inarr, trim):
     length = len(arr)
     arr.sort()
 
-    index1 = length / trim
+    index1 = length // trim
 
     trim = np.mean(arr[index1 : length - index1])
 
@@ -146,7 +203,7 @@ def trim_std(inarr, trim):
     length = len(arr)
     arr.sort()
 
-    index1 = length / trim
+    index1 = length // trim
 
     trim = np.std(arr[index1 : length - index1])
 
@@ -286,6 +343,48 @@ def retrieve_lon_lat_hrs(reps):
     return lon, lat, hrs
 
 
+def retrieve_background_matches(reps):
+    """Retrieve SST, matched background values and day/night from marine reports."""
+    nrep = len(reps)
+    sst = np.array(nrep * [np.nan])
+    ostia = np.array(nrep * [np.nan])
+    ice = np.array(nrep * [np.nan])
+    bgvar = np.array(nrep * [np.nan])
+    dates = np.full((nrep, 6), np.nan)
+    for ind, rep in enumerate(reps):
+        try:
+            bg_val = rep.getext("OSTIA")  # raises assertion error if not found
+            ice_val = rep.getext("ICE")  # raises assertion error if not found
+            bgvar_val = rep.getext("BGVAR")  # raises assertion error if not found
+        except AssertionError as error:
+            raise AssertionError("matched report value is missing: " + str(error))
+
+        dates[ind] = [
+            rep.getvar(varname) for varname in ["YR", "MO", "DY", "HR", "LAT", "LON"]
+        ]  # returns None if missing
+
+        if ind > 0:
+            try:
+                time_diff = rep.getext(
+                    "time_diff"
+                )  # raises assertion error if 'time_diff' not found
+                assert time_diff >= 0, "times are not sorted"
+            except AssertionError as error:
+                raise AssertionError("problem with report value: " + str(error))
+
+        sst[ind] = rep.getvar("SST")  # returns None if missing
+        ostia[ind] = bg_val
+        ice[ind] = ice_val
+        bgvar[ind] = bgvar_val
+
+    try:
+        daytime = track_day_test_array(*dates.T, -2.5)
+    except AssertionError as error:
+        raise AssertionError("problem with report value: " + str(error))
+
+    return sst, ostia, ice, bgvar, daytime
+
+
 def create_smoothed_lon_lat_hrs(
     lon=np.array([np.nan]),
     lat=np.array([np.nan]),
@@ -294,22 +393,43 @@ def create_smoothed_lon_lat_hrs(
     smooth_win=1,
     half_win=0,
 ):
-    """Create smoothed lon/lat timeseries."""
-    lon_smooth = np.array(nrep * [np.nan])
-    lat_smooth = np.array(nrep * [np.nan])
-    hrs_smooth = np.array(nrep * [np.nan])
-
-    nrep_smooth = nrep - smooth_win + 1
-    for i in range(0, nrep_smooth):
-        lon_smooth[i] = np.median(lon[i : i + smooth_win])
-        lat_smooth[i] = np.median(lat[i : i + smooth_win])
-        hrs_smooth[i] = hrs[i + half_win]
+    """Create smoothed lon/lat timeseries from running medians over smooth_win reports."""
+    lon_smooth = np.median(sliding_window_view(lon[:nrep], smooth_win), axis=1)
+    lat_smooth = np.median(sliding_window_view(lat[:nrep], smooth_win), axis=1)
+    hrs_smooth = hrs[half_win : half_win + len(lon_smooth)]
     assert not any(np.isnan(lon_smooth)), "Nan(s) found in smoothed longitude"
     assert not any(np.isnan(lat_smooth)), "Nan(s) found in smoothed latitude"
     assert not any(np.isnan(hrs_smooth)), "Nan(s) found in smoothed time differences"
     return lon_smooth, lat_smooth, hrs_smooth
 
 
+def window_ends(hrs, min_win_period_hours, max_win_period_hours=None):
+    """
+    Find the windows over which movement is assessed.
+
+    A window starts at each report that has at least min_win_period_hours of the record
+    after it and ends at the last report within max_win_period_hours (or at the end of the
+    record if max_win_period_hours is None). Windows shorter than min_win_period_hours are
+    dropped.
+
+    :param hrs: time-sorted report times in hours
+    :param min_win_period_hours: minimum length of a window in hours
+    :param max_win_period_hours: maximum length of a window in hours
+    :type hrs: numpy array of floats
+    :type min_win_period_hours: float
+    :type max_win_period_hours: float, optional
+    :return: indices of the first and last report in each window
+    :rtype: numpy array of integers, numpy array of integers
+    """
+    start = np.flatnonzero(hrs[-1] - hrs >= min_win_period_hours)
+    if max_win_period_hours is None:
+        end = np.full(len(start), len(hrs) - 1)
+    else:
+        end = np.searchsorted(hrs, hrs[start] + max_win_period_hours, side="right") - 1
+    long_enough = hrs[end] - hrs[start] >= min_win_period_hours
+    return start[long_enough], end[long_enough]
+
+
 def check_drifter_aground(
     lon_smooth=np.array([np.nan]),
     lat_smooth=np.array([np.nan]),
@@ -318,9 +438,6 @@ def check_drifter_aground(
     max_win_period=None,
 ):
     """Check whether drifter has run aground."""
-    i = 0
-    is_aground = False  # keeps track of whether drifter is deemed aground
-    i_aground = np.nan  # keeps track of index when drifter first ran aground
     min_win_period_hours = min_win_period * 24.0
     if max_win_period is None:
         max_win_period_hours = None
@@ -328,39 +445,24 @@ def check_drifter_aground(
         max_win_period_hours = max_win_period * 24.0
     tolerance = sphere_distance(0, 0, 0.01, 0.01)
 
-    time_to_end = hrs_smooth[-1] - hrs_smooth[i]
-    while time_to_end >= min_win_period_hours:
-        if max_win_period_hours is not None:
-            f_win = hrs_smooth <= hrs_smooth[i] + max_win_period_hours
-            win_len = hrs_smooth[f_win][-1] - hrs_smooth[i]
-            if win_len < min_win_period_hours:
-                i += 1
-                time_to_end = hrs_smooth[-1] - hrs_smooth[i]
-                continue
-
-        displace = sphere_distance(
-            lat_smooth[i], lon_smooth[i], lat_smooth[f_win][-1], lon_smooth[f_win][-1]
-        )
-        if displace <= tolerance:
-            if is_aground:
-                i += 1
-                time_to_end = hrs_smooth[-1] - hrs_smooth[i]
-                continue
-            else:
-                is_aground = True
-                i_aground = i
-                i += 1
-                time_to_end = hrs_smooth[-1] - hrs_smooth[i]
-        else:
-            is_aground = False
-            i_aground = np.nan
-            i += 1
-            time_to_end = hrs_smooth[-1] - hrs_smooth[i]
-    return is_aground, i_aground
+    start, end = window_ends(hrs_smooth, min_win_period_hours, max_win_period_hours)
+
+    displace = sphere_distance_array(
+        lat_smooth[start], lon_smooth[start], lat_smooth[end], lon_smooth[end]
+    )
+    stationary = displace <= tolerance
+
+    # the drifter is aground if it has not moved in the last window, in which case
+    # it ran aground at the start of the run of windows in which it has not moved
+    if len(start) == 0 or not stationary[-1]:
+        return False, np.nan
+    moved = np.flatnonzero(~stationary)
+    if len(moved) == 0:
+        return True, int(start[0])
+    return True, int(start[moved[-1] + 1])
 
 
 def check_drifter_speed(
-    reps,
     lon=np.array([np.nan]),
     lat=np.array([np.nan]),
     hrs=np.array([np.nan]),
@@ -369,53 +471,73 @@ def check_drifter_speed(
     max_win_period=None,
     iquam_track_ship=None,
 ):
-    """Check whether drifter is moving too fast and flag any occurrences."""
-    nrep = len(reps)
-    index_arr = np.array(range(0, nrep))
-    i = 0
-    time_to_end = hrs[-1] - hrs[i]
+    """Check whether drifter is moving too fast and return flags for any occurrences."""
+    nrep = len(hrs)
     min_win_period_hours = min_win_period * 24.0
     if max_win_period is None:
         max_win_period_hours = None
     else:
         max_win_period_hours = max_win_period * 24.0
-    while time_to_end >= min_win_period_hours:
-        if iquam_track_ship is not None:
-            if iquam_track_ship[i] == 1:
-                i += 1
-                time_to_end = hrs[-1] - hrs[i]
-                continue
-            f_win = (hrs >= hrs[i] + min_win_period_hours) & (iquam_track_ship == 0)
-            if not any(f_win):
-                i += 1
-                time_to_end = hrs[-1] - hrs[i]
-                continue
-            win_len = hrs[f_win][0] - hrs[i]
-            ind = 0
-        else:
-            f_win = hrs <= hrs[i] + max_win_period_hours
-            win_len = hrs[f_win][-1] - hrs[i]
-            ind = -1
-            if win_len < min_win_period_hours:
-                i += 1
-                time_to_end = hrs[-1] - hrs[i]
-                continue
-
-        displace = sphere_distance(lat[i], lon[i], lat[f_win][ind], lon[f_win][ind])
+
+    if iquam_track_ship is not None:
+        # windows run from each report passing the ship IQUAM track check to the
+        # first report passing it at least min_win_period later
+        start = np.flatnonzero(hrs[-1] - hrs >= min_win_period_hours)
+        start = start[iquam_track_ship[start] == 0]
+        good = np.flatnonzero(iquam_track_ship == 0)
+        ind = np.searchsorted(hrs[good], hrs[start] + min_win_period_hours)
+        start = start[ind < len(good)]
+        end = good[ind[ind < len(good)]]
+    else:
+        start, end = window_ends(hrs, min_win_period_hours, max_win_period_hours)
+
+    win_len = hrs[end] - hrs[start]
+    displace = sphere_distance_array(lat[start], lon[start], lat[end], lon[end])
+    with np.errstate(divide="ignore", invalid="ignore"):
         speed = displace / win_len  # km per hr
-        speed = speed * 1000.0 / (60.0 * 60)  # metres per sec
-
-        if speed > speed_limit:
-            for ix in range(i, index_arr[f_win][ind] + 1):
-                if reps[ix].get_qc("POS", "drf_spd") == 0:
-                    reps[ix].set_qc("POS", "drf_spd", 1)
-            i += 1
-            time_to_end = hrs[-1] - hrs[i]
-        else:
-            i += 1
-            time_to_end = hrs[-1] - hrs[i]
+    speed = speed * 1000.0 / (60.0 * 60)  # metres per sec
+    too_fast = speed > speed_limit
+
+    # flag every report in each window that is too fast
+    change = np.zeros(nrep + 1, dtype=int)
+    np.add.at(change, start[too_fast], 1)
+    np.add.at(change, end[too_fast] + 1, -1)
+    return (np.cumsum(change[:-1]) > 0).astype(int)
+
+
+def filter_unsuitable_backgrounds_array(
+    sst=np.array([np.nan]),
+    ostia=np.array([np.nan]),
+    ice=np.array([np.nan]),
+    bgvar=np.array([np.nan]),
+    daytime=np.array([False]),
+    background_err_lim=0.3,
+):
+    """
+    Test and filter out obs with unsuitable background matches.
 
-    return reps
+    Missing values are NaN. Missing ice is treated as no ice.
+    """
+    ice = np.where(np.isnan(ice), 0.0, ice)
+    assert np.all((ice >= 0.0) & (ice <= 1.0)), "matched ice proportion is invalid"
+
+    land_match = np.isnan(ostia)
+    ice_match = ice > 0.15
+    bgvar_mask = bgvar > background_err_lim
+    bgvar_is_masked = bool(np.any(bgvar_mask))
+
+    reps_ind = np.flatnonzero(~(daytime | land_match | ice_match | bgvar_mask))
+    assert np.all(
+        (ostia[reps_ind] >= -5.0) & (ostia[reps_ind] <= 45.0)
+    ), "matched background sst is invalid"
+    assert np.all(
+        (bgvar[reps_ind] >= 0.0) & (bgvar[reps_ind] <= 10)
+    ), "matched background error variance is invalid"
+    assert not any(np.isnan(sst[reps_ind])), "sst is missing"
+
+    sst_anom = sst[reps_ind] - ostia[reps_ind]
+    bgerr = np.sqrt(bgvar[reps_ind])
+    return sst_anom, bgerr, bgvar_is_masked, reps_ind
 
 
 def filter_unsuitable_backgrounds(
@@ -423,70 +545,10 @@ def filter_unsuitable_backgrounds(
     background_err_lim=0.3,
 ):
     """Test and filter out obs with unsuitable background matches."""
-    reps_ind = []
-    sst_anom = []
-    bgvar = []
-    bgvar_is_masked = False
-    for ind, rep in enumerate(reps):
-        try:
-            bg_val = rep.getext("OSTIA")  # raises assertion error if not found
-            ice_val = rep.getext("ICE")  # raises assertion error if not found
-            bgvar_val = rep.getext("BGVAR")  # raises assertion error if not found
-        except AssertionError as error:
-            raise AssertionError("matched report value is missing: " + str(error))
-
-        if ice_val is None:
-            ice_val = 0.0
-        assert (
-            ice_val is not None and 0.0 <= ice_val <= 1.0
-        ), "matched ice proportion is invalid"
-
-        try:
-            daytime = track_day_test(
-                rep.getvar("YR"),
-                rep.getvar("MO"),
-                rep.getvar("DY"),
-                rep.getvar("HR"),
-                rep.getvar("LAT"),
-                rep.getvar("LON"),
-                -2.5,
-            )
-        except AssertionError as error:
-            raise AssertionError("problem with report value: " + str(error))
-
-        if ind > 0:
-            try:
-                time_diff = rep.getext(
-                    "time_diff"
-                )  # raises assertion error if 'time_diff' not found
-                assert time_diff >= 0, "times are not sorted"
-            except AssertionError as error:
-                raise AssertionError("problem with report value: " + str(error))
-
-        land_match = True if bg_val is None else False
-        ice_match = True if ice_val > 0.15 else False
-        bgvar_mask = (
-            True if bgvar_val is not None and bgvar_val > background_err_lim else False
-        )
-        if bgvar_mask:
-            bgvar_is_masked = True
-        if daytime or land_match or ice_match or bgvar_mask:
-            pass
-        else:
-            assert (
-                bg_val is not None and -5.0 <= bg_val <= 45.0
-            ), "matched background sst is invalid"
-            assert (
-                bgvar_val is not None and 0.0 <= bgvar_val <= 10
-            ), "matched background error variance is invalid"
-            reps_ind.append(ind)
-            sst_anom.append(rep.getvar("SST") - bg_val)
-            bgvar.append(bgvar_val)
-
-    reps_ind = np.array(reps_ind)
-    sst_anom = np.array(sst_anom)
-    bgerr = np.sqrt(np.array(bgvar))
-    return sst_anom, bgerr, bgvar_is_masked, reps_ind
+    sst, ostia, ice, bgvar, daytime = retrieve_background_matches(reps)
+    return filter_unsuitable_backgrounds_array(
+        sst, ostia, ice, bgvar, daytime, background_err_lim=background_err_lim
+    )
 
 
 def long_tail_check(
@@ -502,7 +564,7 @@ def long_tail_check(
     """Do long tail check."""
     start_tail_ind = -1  # keeps track of index where start tail stops
     end_tail_ind = nrep  # keeps track of index where end tail starts
-    mid_win_ind = (long_win_len - 1) / 2
+    mid_win_ind = (long_win_len - 1) // 2
 
     if nrep >= long_win_len:
         for forward in [True, False]:  # run forwards then backwards over timeseries
@@ -512,26 +574,31 @@ def long_tail_check(
             else:
                 sst_anom_temp = np.flipud(sst_anom)
                 bgerr_temp = np.flipud(bgerr)
-            # this is the long tail check
-            for ix in range(0, nrep - long_win_len + 1):
-                sst_anom_winvals = sst_anom_temp[ix : ix + long_win_len]
-                bgerr_winvals = bgerr_temp[ix : ix + long_win_len]
-                if np.any(bgerr_winvals > np.sqrt(background_err_lim)):
-                    break
-                sst_anom_avg = trim_mean(sst_anom_winvals, 100)
-                sst_anom_stdev = trim_std(sst_anom_winvals, 100)
-                bgerr_avg = np.mean(bgerr_winvals)
-                bgerr_rms = np.sqrt(np.mean(bgerr_winvals**2))
-                if (
-                    abs(sst_anom_avg)
-                    > long_err_std_n * np.sqrt(drif_inter**2 + bgerr_avg**2)
-                ) or (sst_anom_stdev > np.sqrt(drif_intra**2 + bgerr_rms**2)):
-                    if forward:
-                        start_tail_ind = ix + mid_win_ind
-                    else:
-                        end_tail_ind = (nrep - 1) - ix - mid_win_ind
+            # this is the long tail check, each row is one window
+            sst_anom_winvals = np.sort(
+                sliding_window_view(sst_anom_temp, long_win_len), axis=1
+            )
+            bgerr_winvals = sliding_window_view(bgerr_temp, long_win_len)
+            # trimmed as in trim_mean and trim_std with a trim of 100
+            index1 = long_win_len // 100
+            sst_anom_winvals = sst_anom_winvals[:, index1 : long_win_len - index1]
+            sst_anom_avg = np.mean(sst_anom_winvals, axis=1)
+            sst_anom_stdev = np.std(sst_anom_winvals, axis=1)
+            bgerr_avg = np.mean(bgerr_winvals, axis=1)
+            bgerr_rms = np.sqrt(np.mean(bgerr_winvals**2, axis=1))
+            unreliable = np.any(bgerr_winvals > np.sqrt(background_err_lim), axis=1)
+            failed = (
+                np.abs(sst_anom_avg)
+                > long_err_std_n * np.sqrt(drif_inter**2 + bgerr_avg**2)
+            ) | (sst_anom_stdev > np.sqrt(drif_intra**2 + bgerr_rms**2))
+            # the check stops at the first window that passes or has an unreliable background
+            failed = failed & ~unreliable
+            nfail = len(failed) if np.all(failed) else int(np.argmin(failed))
+            if nfail > 0:
+                if forward:
+                    start_tail_ind = nfail - 1 + mid_win_ind
                 else:
-                    break
+                    end_tail_ind = (nrep - 1) - (nfail - 1) - mid_win_ind
 
     return start_tail_ind, end_tail_ind
 
@@ -557,80 +624,60 @@ def short_tail_check(
         assert npass > 0, "short tail check: npass not > 0"
 
         if npass >= short_win_len:
+            sst_anom_pass = sst_anom[first_pass_ind : last_pass_ind + 1]
+            bgerr_pass = bgerr[first_pass_ind : last_pass_ind + 1]
+            limit = short_err_std_n * np.sqrt(
+                bgerr_pass**2 + drif_inter**2 + drif_intra**2
+            )
+            exceed_limit = np.logical_or(sst_anom_pass > limit, sst_anom_pass < -limit)
+            unreliable = bgerr_pass > np.sqrt(background_err_lim)
+            nwin = npass - short_win_len + 1
             for forward in [True, False]:  # run forwards then backwards over timeseries
                 if forward:
-                    sst_anom_temp = sst_anom[first_pass_ind : last_pass_ind + 1]
-                    bgerr_temp = bgerr[first_pass_ind : last_pass_ind + 1]
+                    exceed_temp = exceed_limit
+                    unreliable_temp = unreliable
+                else:
+                    exceed_temp = np.flipud(exceed_limit)
+                    unreliable_temp = np.flipud(unreliable)
+                # this is the short tail check, counts in each window from cumulative sums
+                n_exceed = np.concatenate(([0], np.cumsum(exceed_temp)))
+                n_exceed = n_exceed[short_win_len:] - n_exceed[:nwin]
+                n_unreliable = np.concatenate(([0], np.cumsum(unreliable_temp)))
+                n_unreliable = n_unreliable[short_win_len:] - n_unreliable[:nwin]
+                # the check stops at the first window that passes or has an unreliable background
+                failed = (n_exceed >= short_win_n_bad) & (n_unreliable == 0)
+                nfail = nwin if np.all(failed) else int(np.argmin(failed))
+                if nfail == nwin:  # if all windows have failed, flag everything
+                    nfail += short_win_len - 1
+                if forward:
+                    start_tail_ind += nfail
                 else:
-                    sst_anom_temp = np.flipud(
-                        sst_anom[first_pass_ind : last_pass_ind + 1]
-                    )
-                    bgerr_temp = np.flipud(bgerr[first_pass_ind : last_pass_ind + 1])
-                # this is the short tail check
-                for ix in range(0, npass - short_win_len + 1):
-                    sst_anom_winvals = sst_anom_temp[ix : ix + short_win_len]
-                    bgerr_winvals = bgerr_temp[ix : ix + short_win_len]
-                    if np.any(bgerr_winvals > np.sqrt(background_err_lim)):
-                        break
-                    limit = short_err_std_n * np.sqrt(
-                        bgerr_winvals**2 + drif_inter**2 + drif_intra**2
-                    )
-                    exceed_limit = np.logical_or(
-                        sst_anom_winvals > limit, sst_anom_winvals < -limit
-                    )
-                    if np.sum(exceed_limit) >= short_win_n_bad:
-                        if forward:
-                            if ix == (
-                                npass - short_win_len
-                            ):  # if all windows have failed, flag everything
-                                start_tail_ind += short_win_len
-                            else:
-                                start_tail_ind += 1
-                        else:
-                            if ix == (
-                                npass - short_win_len
-                            ):  # if all windows have failed, flag everything
-                                end_tail_ind -= short_win_len
-                            else:
-                                end_tail_ind -= 1
-                    else:
-                        break
+                    end_tail_ind -= nfail
 
     return start_tail_ind, end_tail_ind
 
 
-def aground_check(reps, smooth_win=41, min_win_period=8, max_win_period=10):
+def aground_check_array(
+    lon, lat, hrs, smooth_win=41, min_win_period=8, max_win_period=10
+):
     """
-    Check to see whether a drifter has run aground based on 1/100th degree precision positions.
-    A flag 'drf_agr' is set for each input report: flag=1 for reports deemed aground, else flag=0.
-
-    Positional errors introduced by lon/lat 'jitter' and data precision can be of order several km's.
-    Longitude and latitude timeseries are smoothed prior to assessment to reduce position 'jitter'.
-    Some post-smoothing position 'jitter' may remain and its expected magnitude is set within the
-    function by the 'tolerance' parameter. A drifter is deemed aground when, after a period of time,
-    the distance between reports is less than the 'tolerance'. The minimum period of time over which this
-    assessment is made is set by 'min_win_period'. This period must be long enough such that slow moving
-    drifters are not falsely flagged as aground given errors in position (e.g. a buoy drifting at around
-    1 cm/s will travel around 1 km/day; given 'tolerance' and precision errors of a few km's the 'min_win_period'
-    needs to be several days to ensure distance-travelled exceeds the error so that motion is reliably
-    detected and the buoy is not falsely flagged as aground). However, min_win_period should not be longer
-    than necessary as buoys that run aground for less than min_win_period will not be detected.
-
-    Because temporal sampling can be erratic the time period over which an assessment is made is specified
-    as a range (bound by 'min_win_period' and 'max_win_period') - assessment uses the longest time separation
-    available within this range. If a drifter is deemed aground and subsequently starts moving (e.g. if a drifter
-    has moved very slowly for a prolonged period) incorrectly flagged reports will be reinstated.
+    Check to see whether a drifter has run aground. This is func:`aground_check` working
+    on the positions and times of a drifter record.
 
-    :param reps: a time-sorted list of drifter observations in format class`.Voyage`,
-      each report must have a valid longitude, latitude and time-difference
+    :param lon: longitudes of the time-sorted drifter reports
+    :param lat: latitudes of the time-sorted drifter reports
+    :param hrs: times of the drifter reports in hours from the first report
     :param smooth_win: length of window (odd number) in datapoints used for smoothing lon/lat
-    :param min_win_period: minimum period of time in days over which position is assessed for no movement (see description)
-    :param max_win_period: maximum period of time in days over which position is assessed for no movement (this should be
-      greater than min_win_period and allow for erratic temporal sampling e.g. min_win_period+2 to allow for gaps of up to 2-days in sampling).
-    :type reps: a class`.Voyage`
+    :param min_win_period: minimum period of time in days over which position is assessed for no movement
+    :param max_win_period: maximum period of time in days over which position is assessed for no movement
+    :type lon: numpy array of floats
+    :type lat: numpy array of floats
+    :type hrs: numpy array of floats
     :type smooth_win: integer
     :type min_win_period: integer
     :type max_win_period: integer, optional
+    :return: flags 1 for reports deemed aground, else 0
+    :rtype: numpy array of integers
     """
     try:
         smooth_win, min_win_period, max_win_period = assert_window_and_periods(
@@ -641,19 +688,13 @@ def aground_check(reps, smooth_win=41, min_win_period=8, max_win_period=10):
     except AssertionError as error:
         raise AssertionError("invalid input parameter: " + str(error))
 
-    half_win = (smooth_win - 1) / 2
+    half_win = (smooth_win - 1) // 2
 
-    nrep = len(reps)
+    nrep = len(hrs)
+    flags = np.zeros(nrep, dtype=int)
     if nrep <= smooth_win:  # records shorter than smoothing-window can't be evaluated
         print("Voyage too short for QC, setting flags to pass")
-        for rep in reps:
-            rep.set_qc("POS", "drf_agr", 0)
-        return
-
-    try:
-        lon, lat, hrs = retrieve_lon_lat_hrs(reps)
-    except AssertionError as error:
-        raise AssertionError("problem with report values: " + str(error))
+        return flags
 
     try:
         lon_smooth, lat_smooth, hrs_smooth = create_smoothed_lon_lat_hrs(
@@ -680,14 +721,60 @@ def aground_check(reps, smooth_win=41, min_win_period=8, max_win_period=10):
             i_aground += half_win
         # this gets the first index the drifter is deemed aground for the original (un-smoothed) timeseries
         # n.b. if i_aground=0 then the entire drifter record is deemed aground and flagged as such
-    for ind, rep in enumerate(reps):
-        if is_aground:
-            if ind < i_aground:
-                rep.set_qc("POS", "drf_agr", 0)
-            else:
-                rep.set_qc("POS", "drf_agr", 1)
-        else:
-            rep.set_qc("POS", "drf_agr", 0)
+        flags[i_aground:] = 1
+
+    return flags
+
+
+def aground_check(reps, smooth_win=41, min_win_period=8, max_win_period=10):
+    """
+    Check to see whether a drifter has run aground based on 1/100th degree precision positions.
+    A flag 'drf_agr' is set for each input report: flag=1 for reports deemed aground, else flag=0.
+
+    Positional errors introduced by lon/lat 'jitter' and data precision can be of order several km's.
+    Longitude and latitude timeseries are smoothed prior to assessment to reduce position 'jitter'.
+    Some post-smoothing position 'jitter' may remain and its expected magnitude is set within the
+    function by the 'tolerance' parameter. A drifter is deemed aground when, after a period of time,
+    the distance between reports is less than the 'tolerance'. The minimum period of time over which this
+    assessment is made is set by 'min_win_period'. This period must be long enough such that slow moving
+    drifters are not falsely flagged as aground given errors in position (e.g. a buoy drifting at around
+    1 cm/s will travel around 1 km/day; given 'tolerance' and precision errors of a few km's the 'min_win_period'
+    needs to be several days to ensure distance-travelled exceeds the error so that motion is reliably
+    detected and the buoy is not falsely flagged as aground). However, min_win_period should not be longer
+    than necessary as buoys that run aground for less than min_win_period will not be detected.
+
+    Because temporal sampling can be erratic the time period over which an assessment is made is specified
+    as a range (bound by 'min_win_period' and 'max_win_period') - assessment uses the longest time separation
+    available within this range. If a drifter is deemed aground and subsequently starts moving (e.g. if a drifter
+    has moved very slowly for a prolonged period) incorrectly flagged reports will be reinstated.
+
+    :param reps: a time-sorted list of drifter observations in format class`.Voyage`,
+      each report must have a valid longitude, latitude and time-difference
+    :param smooth_win: length of window (odd number) in datapoints used for smoothing lon/lat
+    :param min_win_period: minimum period of time in days over which position is assessed for no movement (see description)
+    :param max_win_period: maximum period of time in days over which position is assessed for no movement (this should be
+      greater than min_win_period and allow for erratic temporal sampling e.g. min_win_period+2 to allow for gaps of up to 2-days in sampling).
+    :type reps: a class`.Voyage`
+    :type smooth_win: integer
+    :type min_win_period: integer
+    :type max_win_period: integer, optional
+    """
+    try:
+        lon, lat, hrs = retrieve_lon_lat_hrs(reps)
+    except AssertionError as error:
+        raise AssertionError("problem with report values: " + str(error))
+
+    flags = aground_check_array(
+        lon,
+        lat,
+        hrs,
+        smooth_win=smooth_win,
+        min_win_period=min_win_period,
+        max_win_period=max_win_period,
+    )
+
+    for rep, flag in zip(reps, flags):
+        rep.set_qc("POS", "drf_agr", int(flag))
 
     return reps
 
@@ -704,6 +791,89 @@ def new_aground_check(reps, smooth_win=41, min_win_period=8):
     )
 
 
+def iquam_track_ship_check(reps, iquam_parameters):
+    """
+    Run the IQUAM track check on drifter reports as though they came from a ship.
+
+    :param reps: a time-sorted list of drifter observations in format class`.Voyage`
+    :param iquam_parameters: Parameter dictionary for Voyage.iquam_track_check() function.
+    :type reps: a class`.Voyage`
+    :type iquam_parameters: dictionary
+    :return: IQUAM track check flags 0 for pass and 1 for fail
+    :rtype: numpy array of integers
+    """
+    nrep = len(reps)
+    if id_is_generic(reps[0].getvar("ID"), reps[0].getvar("YR")):
+        return np.zeros(nrep, dtype=int)
+
+    arrays = tc.report_arrays(reps)
+    return tc.iquam_track_check_array(
+        arrays["lat"],
+        arrays["lon"],
+        arrays["time"],
+        iquam_parameters["ship_speed_limit"],
+        iquam_parameters["delta_d"],
+        iquam_parameters["delta_t"],
+        iquam_parameters["number_of_neighbours"],
+    )
+
+
+def speed_check_array(
+    lon,
+    lat,
+    hrs,
+    speed_limit=2.5,
+    min_win_period=0.8,
+    max_win_period=1.0,
+    iquam_track_ship=None,
+):
+    """
+    Check to see whether a drifter has been picked up by a ship (out of water). This is
+    func:`speed_check` working on the positions and times of a drifter record.
+
+    :param lon: longitudes of the time-sorted drifter reports
+    :param lat: latitudes of the time-sorted drifter reports
+    :param hrs: times of the drifter reports in hours from the first report
+    :param speed_limit: maximum allowable speed for an in situ drifting buoy (metres per second)
+    :param min_win_period: minimum period of time in days over which position is assessed for speed estimates
+    :param max_win_period: maximum period of time in days over which position is assessed for speed estimates
+    :param iquam_track_ship: IQUAM track check flags for the reports treated as ship reports, if given
+      only reports passing this check are used to estimate speeds
+    :type lon: numpy array of floats
+    :type lat: numpy array of floats
+    :type hrs: numpy array of floats
+    :type speed_limit: float
+    :type min_win_period: float
+    :type max_win_period: float, optional
+    :type iquam_track_ship: numpy array of integers, optional
+    :return: flags 1 for reports deemed picked up, else 0
+    :rtype: numpy array of integers
+    """
+    try:
+        speed_limit, min_win_period, max_win_period = assert_limit_periods(
+            speed_limit=speed_limit,
+            min_win_period=min_win_period,
+            max_win_period=max_win_period,
+        )
+    except AssertionError as error:
+        raise AssertionError("invalid input parameter: " + str(error))
+
+    nrep = len(hrs)
+    if nrep <= 1:  # pairs of records are needed to evaluate speed
+        print("Voyage too short for QC, setting flags to pass")
+        return np.zeros(nrep, dtype=int)
+
+    return check_drifter_speed(
+        lon=lon,
+        lat=lat,
+        hrs=hrs,
+        speed_limit=speed_limit,
+        min_win_period=min_win_period,
+        max_win_period=max_win_period,
+        iquam_track_ship=iquam_track_ship,
+    )
+
+
 def speed_check(
     reps, speed_limit=2.5, min_win_period=0.8, max_win_period=1.0, iquam_parameters=None
 ):
@@ -747,58 +917,31 @@ def speed_check(
     :type max_win_period: float, optional
     :type iquam_parameters: dictionary, optional
     """
-    try:
-        speed_limit, min_win_period, max_win_period = assert_limit_periods(
-            speed_limit=speed_limit,
-            min_win_period=min_win_period,
-            max_win_period=max_win_period,
-        )
-    except AssertionError as error:
-        raise AssertionError("invalid input parameter: " + str(error))
-
-    nrep = len(reps)
-    if nrep <= 1:  # pairs of records are needed to evaluate speed
-        print("Voyage too short for QC, setting flags to pass")
-        for rep in reps:
-            rep.set_qc("POS", "drf_spd", 0)
-        return
-
     try:
         lon, lat, hrs = retrieve_lon_lat_hrs(reps)
     except AssertionError as error:
         raise AssertionError("problem with report values: " + str(error))
 
-    if isinstance(iquam_parameters, dict):
-        reps_copy = copy.deepcopy(reps)
-        v = ex.Voyage()
-        qc_list = []
-        for rep in reps_copy:
-            rep.setvar("PT", 5)  # ship
-            rep.set_qc("POS", "iquam_track", 0)  # reset iquam parameters
-            v.add_report(rep)
-        v.iquam_track_check(iquam_parameters)
-        for rep in v.rep_feed():
-            qc_list.append(rep.get_qc("POS", "iquam_track"))
-        iquam_track_ship = np.array(qc_list)
-        del reps_copy, v, qc_list
+    if isinstance(iquam_parameters, dict) and len(reps) > 1:
+        iquam_track_ship = iquam_track_ship_check(reps, iquam_parameters)
     else:
         iquam_track_ship = None
 
-    # begin by setting all reports to pass
-    for rep in reps:
-        rep.set_qc("POS", "drf_spd", 0)
-
-    return check_drifter_speed(
-        reps,
-        lon=lon,
-        lat=lat,
-        hrs=hrs,
+    flags = speed_check_array(
+        lon,
+        lat,
+        hrs,
         speed_limit=speed_limit,
         min_win_period=min_win_period,
         max_win_period=max_win_period,
         iquam_track_ship=iquam_track_ship,
     )
 
+    for rep, flag in zip(reps, flags):
+        rep.set_qc("POS", "drf_spd", int(flag))
+
+    return reps
+
 
 def new_speed_check(reps, iquam_parameters, speed_limit=3.0, min_win_period=0.375):
     """
@@ -817,8 +960,12 @@ def new_speed_check(reps, iquam_parameters, speed_limit=3.0, min_win_period=0.37
     )
 
 
-def sst_tail_check(
-    reps,
+def sst_tail_check_array(
+    sst,
+    ostia,
+    ice,
+    bgvar,
+    daytime,
     long_win_len=121,
     long_err_std_n=3.0,
     short_win_len=30,
@@ -829,33 +976,14 @@ def sst_tail_check(
     background_err_lim=0.3,
 ):
     """
-    Check to see whether there is erroneous sea surface temperature data at the beginning or end of a drifter record
-    (referred to as 'tails'). The flags 'drf_tail1' and 'drf_tail2' are set for each input report: flag=1 for reports
-    with erroneous data, else flag=0, 'drf_tail1' is used for bad data at the beginning of a record, 'drf_tail2' is
-    used for bad data at the end of a record.
-
-    The tail check makes an assessment of the quality of data at the start and end of a drifting buoy record by
-    comparing to a background reference field. Data found to be unacceptably biased or noisy relative to the
-    background are flagged by the check. When making the comparison an allowance is made for background error
-    variance and also normal drifter error (both bias and random measurement error). The correlation of the
-    background error is treated as unknown and takes on a value which maximises background error dependent on the
-    assessment being made. A background error variance limit is also specified, beyond which the background is deemed
-    unreliable. Observations made during the day, in icy regions or where the background value is missing are
-    excluded from the comparison.
-
-    The check proceeds in two steps; a 'long tail-check' followed by a 'short tail-check'. The idea is that the short
-    tail-check has finer resolution but lower sensitivity than the long tail-check and may pick off noisy data not
-    picked up by the long tail check. Only observations that pass the long tail-check are passed to the short
-    tail-check. Both of these tail checks proceed by moving a window over the data and assessing the data in each
-    window. Once good data are found the check stops and any bad data preceding this are flagged. If unreliable
-    background data are encountered the check stops. The checks are run forwards and backwards over the record so as
-    to assess data at the start and end of the record. If the whole record fails no observations are flagged as there
-    are then no 'tails' in the data (this is left for other checks). The long tail check looks for groups of
-    observations that are too biased or noisy as a whole. The short tail check looks for individual observations
-    exceeding a noise limit within the window.
-
-    :param reps: a time-sorted list of drifter observations in format class`.Voyage`, each report must have a
-      valid longitude, latitude and time and matched values for OSTIA, ICE and BGVAR in its extended data
+    Check to see whether there is erroneous sea surface temperature data at the beginning or end of a drifter
+    record. This is func:`sst_tail_check` working on the values matched to a drifter record. Missing values are NaN.
+
+    :param sst: sea surface temperatures of the time-sorted drifter reports
+    :param ostia: matched background sea surface temperatures
+    :param ice: matched ice proportions
+    :param bgvar: matched background error variances
+    :param daytime: True for reports made during the day
     :param long_win_len: length of window (in data-points) over which to make long tail-check (must be an odd number)
     :param long_err_std_n: number of standard deviations of combined background and drifter bias error, beyond which
       data fail bias check
@@ -868,7 +996,11 @@ def sst_tail_check(
       degC)
     :param background_err_lim: background error variance beyond which the SST background is deemed unreliable (degC
       squared)
-    :type reps: a class`.Voyage`
+    :type sst: numpy array of floats
+    :type ostia: numpy array of floats
+    :type ice: numpy array of floats
+    :type bgvar: numpy array of floats
+    :type daytime: numpy array of booleans
     :type long_win_len: integer
     :type long_err_std_n: float
     :type short_win_len: integer
@@ -877,6 +1009,8 @@ def sst_tail_check(
     :type drif_inter: float
     :type drif_intra: float
     :type background_err_lim: float
+    :return: flags 1 for reports in the start tail, else 0 and flags 1 for reports in the end tail, else 0
+    :rtype: numpy array of integers, numpy array of integers
     """
     try:
         (
@@ -901,19 +1035,22 @@ def sst_tail_check(
     except AssertionError as error:
         raise AssertionError("invalid input parameter: " + str(error))
 
-    sst_anom, bgerr, bgvar_is_masked, reps_ind = filter_unsuitable_backgrounds(
-        reps,
+    sst_anom, bgerr, bgvar_is_masked, reps_ind = filter_unsuitable_backgrounds_array(
+        sst,
+        ostia,
+        ice,
+        bgvar,
+        daytime,
         background_err_lim=background_err_lim,
     )
     del bgvar_is_masked
 
     # set start and end tail flags to pass to ensure all obs receive flag
     # then exit if there are no obs suitable for assessment
-    for rep in reps:
-        rep.set_qc("SST", "drf_tail1", 0)
-        rep.set_qc("SST", "drf_tail2", 0)
+    tail1 = np.zeros(len(sst), dtype=int)
+    tail2 = np.zeros(len(sst), dtype=int)
     if len(sst_anom) == 0:
-        return
+        return tail1, tail2
 
     # prepare numpy arrays and variables needed for tail checks
     nrep = len(sst_anom)
@@ -946,58 +1083,120 @@ def sst_tail_check(
         start_tail_ind = -1
         end_tail_ind = nrep
     if not start_tail_ind == -1:
-        for ind, rep in enumerate(reps):
-            if ind <= reps_ind[start_tail_ind]:
-                rep.set_qc("SST", "drf_tail1", 1)
+        tail1[: reps_ind[start_tail_ind] + 1] = 1
     if not end_tail_ind == nrep:
-        for ind, rep in enumerate(reps):
-            if ind >= reps_ind[end_tail_ind]:
-                rep.set_qc("SST", "drf_tail2", 1)
-    return reps
+        tail2[reps_ind[end_tail_ind] :] = 1
+    return tail1, tail2
 
 
-def sst_biased_noisy_check(
+def sst_tail_check(
     reps,
-    n_eval=30,
-    bias_lim=1.10,
-    drif_intra=1.0,
+    long_win_len=121,
+    long_err_std_n=3.0,
+    short_win_len=30,
+    short_err_std_n=3.0,
+    short_win_n_bad=2,
     drif_inter=0.29,
-    err_std_n=3.0,
-    n_bad=2,
+    drif_intra=1.00,
     background_err_lim=0.3,
 ):
     """
-    Check to see whether a drifter sea surface temperature record is unacceptably biased or noisy as a whole.
+    Check to see whether there is erroneous sea surface temperature data at the beginning or end of a drifter record
+    (referred to as 'tails'). The flags 'drf_tail1' and 'drf_tail2' are set for each input report: flag=1 for reports
+    with erroneous data, else flag=0, 'drf_tail1' is used for bad data at the beginning of a record, 'drf_tail2' is
+    used for bad data at the end of a record.
 
-    The check makes an assessment of the quality of data in a drifting buoy record by comparing to a background
-    reference field. If the record is found to be unacceptably biased or noisy relative to the background all
-    observations are flagged by the check. For longer records the flags 'drf_bias' and 'drf_noise' are set for each
-    input report: flag=1 for records with erroneous data, else flag=0. For shorter records 'drf_short' is set for
-    each input report: flag=1 for reports with erroneous data, else flag=0.
+    The tail check makes an assessment of the quality of data at the start and end of a drifting buoy record by
+    comparing to a background reference field. Data found to be unacceptably biased or noisy relative to the
+    background are flagged by the check. When making the comparison an allowance is made for background error
+    variance and also normal drifter error (both bias and random measurement error). The correlation of the
+    background error is treated as unknown and takes on a value which maximises background error dependent on the
+    assessment being made. A background error variance limit is also specified, beyond which the background is deemed
+    unreliable. Observations made during the day, in icy regions or where the background value is missing are
+    excluded from the comparison.
 
-    When making the comparison an allowance is made for background error variance and also normal drifter error (both
-    bias and random measurement error). A background error variance limit is also specified, beyond which the
-    background is deemed unreliable and is excluded from comparison. Observations made during the day, in icy regions
-    or where the background value is missing are also excluded from the comparison.
+    The check proceeds in two steps; a 'long tail-check' followed by a 'short tail-check'. The idea is that the short
+    tail-check has finer resolution but lower sensitivity than the long tail-check and may pick off noisy data not
+    picked up by the long tail check. Only observations that pass the long tail-check are passed to the short
+    tail-check. Both of these tail checks proceed by moving a window over the data and assessing the data in each
+    window. Once good data are found the check stops and any bad data preceding this are flagged. If unreliable
+    background data are encountered the check stops. The checks are run forwards and backwards over the record so as
+    to assess data at the start and end of the record. If the whole record fails no observations are flagged as there
+    are then no 'tails' in the data (this is left for other checks). The long tail check looks for groups of
+    observations that are too biased or noisy as a whole. The short tail check looks for individual observations
+    exceeding a noise limit within the window.
 
-    The check has two separate streams; a 'long-record check' and a 'short-record check'. Records with at least
-    n_eval observations are passed to the long-record check, else they are passed to the short-record check. The
-    long-record check looks for records that are too biased or noisy as a whole. The short record check looks for
-    individual observations exceeding a noise limit within a record. The purpose of n_eval is to ensure records with
-    too few observations for their bias and noise to be reliably estimated are handled separately by the short-record
-    check.
+    :param reps: a time-sorted list of drifter observations in format class`.Voyage`, each report must have a
+      valid longitude, latitude and time and matched values for OSTIA, ICE and BGVAR in its extended data
+    :param long_win_len: length of window (in data-points) over which to make long tail-check (must be an odd number)
+    :param long_err_std_n: number of standard deviations of combined background and drifter bias error, beyond which
+      data fail bias check
+    :param short_win_len: length of window (in data-points) over which to make the short tail-check
+    :param short_err_std_n: number of standard deviations of combined background and drifter error, beyond which data
+      are deemed suspicious
+    :param short_win_n_bad: minimum number of suspicious data points required for failure of short check window
+    :param drif_inter: spread of biases expected in drifter data (standard deviation, degC)
+    :param drif_intra: maximum random measurement uncertainty reasonably expected in drifter data (standard deviation,
+      degC)
+    :param background_err_lim: background error variance beyond which the SST background is deemed unreliable (degC
+      squared)
+    :type reps: a class`.Voyage`
+    :type long_win_len: integer
+    :type long_err_std_n: float
+    :type short_win_len: integer
+    :type short_err_std_n: float
+    :type short_win_n_bad: integer
+    :type drif_inter: float
+    :type drif_intra: float
+    :type background_err_lim: float
+    """
+    sst, ostia, ice, bgvar, daytime = retrieve_background_matches(reps)
+
+    tail1, tail2 = sst_tail_check_array(
+        sst,
+        ostia,
+        ice,
+        bgvar,
+        daytime,
+        long_win_len=long_win_len,
+        long_err_std_n=long_err_std_n,
+        short_win_len=short_win_len,
+        short_err_std_n=short_err_std_n,
+        short_win_n_bad=short_win_n_bad,
+        drif_inter=drif_inter,
+        drif_intra=drif_intra,
+        background_err_lim=background_err_lim,
+    )
 
-    The correlation of the background error is treated as unknown and handled differently for each assessment. For
-    the long-record noise-check and the short-record check the background error is treated as uncorrelated,
-    which maximises the possible impact of background error on these assessments. For the long-record bias-check a
-    limit (bias_lim) is specified beyond which the record is considered biased. The default value for this limit was
-    chosen based on histograms of drifter-background bias. An alternative approach would be to treat the background
-    error as entirely correlated across a long-record, which maximises its possible impact on the bias assessment. In
-    this case the histogram approach was used as the limit could be tuned to give better results.
+    for rep, flag1, flag2 in zip(reps, tail1, tail2):
+        rep.set_qc("SST", "drf_tail1", int(flag1))
+        rep.set_qc("SST", "drf_tail2", int(flag2))
+    return reps
 
-    :param reps: a time-sorted list of drifter observations in format from class`.Voyage`,
-      each report must have a valid longitude, latitude and time and matched values for OSTIA, ICE and BGVAR in its
-      extended data
+
+def sst_biased_noisy_check_array(
+    sst,
+    ostia,
+    ice,
+    bgvar,
+    daytime,
+    n_eval=30,
+    bias_lim=1.10,
+    drif_intra=1.0,
+    drif_inter=0.29,
+    err_std_n=3.0,
+    n_bad=2,
+    background_err_lim=0.3,
+):
+    """
+    Check to see whether a drifter sea surface temperature record is unacceptably biased or noisy as a whole. This
+    is func:`sst_biased_noisy_check` working on the values matched to a drifter record. Missing values are NaN.
+
+    :param sst: sea surface temperatures of the time-sorted drifter reports
+    :param ostia: matched background sea surface temperatures
+    :param ice: matched ice proportions
+    :param bgvar: matched background error variances
+    :param daytime: True for reports made during the day
     :param n_eval: the minimum number of drifter observations required to be assessed by the long-record check
     :param bias_lim: maximum allowable drifter-background bias, beyond which a record is considered biased (degC)
     :param drif_intra: maximum random measurement uncertainty reasonably expected in drifter data (standard
@@ -1008,7 +1207,11 @@ def sst_biased_noisy_check(
     :param n_bad: minimum number of suspicious data points required for failure of short-record check
     :param background_err_lim: background error variance beyond which the SST background is deemed unreliable
       (degC squared)
-    :type reps: a class`.Voyage`
+    :type sst: numpy array of floats
+    :type ostia: numpy array of floats
+    :type ice: numpy array of floats
+    :type bgvar: numpy array of floats
+    :type daytime: numpy array of booleans
     :type n_eval: integer
     :type bias_lim: float
     :type drif_intra: float
@@ -1016,6 +1219,8 @@ def sst_biased_noisy_check(
     :type err_std_n: float
     :type n_bad: integer
     :type background_err_lim: float
+    :return: bias, noise and short-record flags, 1 for reports with erroneous data, else 0
+    :rtype: numpy array of integers, numpy array of integers, numpy array of integers
     """
     try:
         (
@@ -1027,31 +1232,34 @@ def sst_biased_noisy_check(
             n_bad,
             background_err_lim,
         ) = assert_drifters(
-            n_eval=1,
-            bias_lim=1.10,
-            drif_intra=1.0,
-            drif_inter=0.29,
-            err_std_n=3.0,
-            n_bad=2,
-            background_err_lim=0.3,
+            n_eval=n_eval,
+            bias_lim=bias_lim,
+            drif_intra=drif_intra,
+            drif_inter=drif_inter,
+            err_std_n=err_std_n,
+            n_bad=n_bad,
+            background_err_lim=background_err_lim,
         )
     except AssertionError as error:
         raise AssertionError("invalid input parameter: " + str(error))
 
-    sst_anom, bgerr, bgvar_is_masked, reps_ind = filter_unsuitable_backgrounds(
-        reps,
+    sst_anom, bgerr, bgvar_is_masked, reps_ind = filter_unsuitable_backgrounds_array(
+        sst,
+        ostia,
+        ice,
+        bgvar,
+        daytime,
         background_err_lim=background_err_lim,
     )
     del reps_ind
 
     # set bias and noise flags to pass to ensure all obs receive flag
     # then exit if there are no obs suitable for assessment
-    for rep in reps:
-        rep.set_qc("SST", "drf_bias", 0)
-        rep.set_qc("SST", "drf_noise", 0)
-        rep.set_qc("SST", "drf_short", 0)
+    bias = np.zeros(len(sst), dtype=int)
+    noise = np.zeros(len(sst), dtype=int)
+    short = np.zeros(len(sst), dtype=int)
     if len(sst_anom) == 0:
-        return
+        return bias, noise, short
 
     nrep = len(sst_anom)
     long_record = True
@@ -1064,11 +1272,9 @@ def sst_biased_noisy_check(
         sst_anom_stdev = np.std(sst_anom)
         bgerr_rms = np.sqrt(np.mean(bgerr**2))
         if abs(sst_anom_avg) > bias_lim:
-            for rep in reps:
-                rep.set_qc("SST", "drf_bias", 1)
+            bias[:] = 1
         if sst_anom_stdev > np.sqrt(drif_intra**2 + bgerr_rms**2):
-            for rep in reps:
-                rep.set_qc("SST", "drf_noise", 1)
+            noise[:] = 1
     else:
         if bgvar_is_masked:
             pass  # short record may still have unreliable values
@@ -1076,6 +1282,90 @@ def sst_biased_noisy_check(
             limit = err_std_n * np.sqrt(bgerr**2 + drif_inter**2 + drif_intra**2)
             exceed_limit = np.logical_or(sst_anom > limit, sst_anom < -limit)
             if np.sum(exceed_limit) >= n_bad:
-                for rep in reps:
-                    rep.set_qc("SST", "drf_short", 1)
+                short[:] = 1
+    return bias, noise, short
+
+
+def sst_biased_noisy_check(
+    reps,
+    n_eval=30,
+    bias_lim=1.10,
+    drif_intra=1.0,
+    drif_inter=0.29,
+    err_std_n=3.0,
+    n_bad=2,
+    background_err_lim=0.3,
+):
+    """
+    Check to see whether a drifter sea surface temperature record is unacceptably biased or noisy as a whole.
+
+    The check makes an assessment of the quality of data in a drifting buoy record by comparing to a background
+    reference field. If the record is found to be unacceptably biased or noisy relative to the background all
+    observations are flagged by the check. For longer records the flags 'drf_bias' and 'drf_noise' are set for each
+    input report: flag=1 for records with erroneous data, else flag=0. For shorter records 'drf_short' is set for
+    each input report: flag=1 for reports with erroneous data, else flag=0.
+
+    When making the comparison an allowance is made for background error variance and also normal drifter error (both
+    bias and random measurement error). A background error variance limit is also specified, beyond which the
+    background is deemed unreliable and is excluded from comparison. Observations made during the day, in icy regions
+    or where the background value is missing are also excluded from the comparison.
+
+    The check has two separate streams; a 'long-record check' and a 'short-record check'. Records with at least
+    n_eval observations are passed to the long-record check, else they are passed to the short-record check. The
+    long-record check looks for records that are too biased or noisy as a whole. The short record check looks for
+    individual observations exceeding a noise limit within a record. The purpose of n_eval is to ensure records with
+    too few observations for their bias and noise to be reliably estimated are handled separately by the short-record
+    check.
+
+    The correlation of the background error is treated as unknown and handled differently for each assessment. For
+    the long-record noise-check and the short-record check the background error is treated as uncorrelated,
+    which maximises the possible impact of background error on these assessments. For the long-record bias-check a
+    limit (bias_lim) is specified beyond which the record is considered biased. The default value for this limit was
+    chosen based on histograms of drifter-background bias. An alternative approach would be to treat the background
+    error as entirely correlated across a long-record, which maximises its possible impact on the bias assessment. In
+    this case the histogram approach was used as the limit could be tuned to give better results.
+
+    :param reps: a time-sorted list of drifter observations in format from class`.Voyage`,
+      each report must have a valid longitude, latitude and time and matched values for OSTIA, ICE and BGVAR in its
+      extended data
+    :param n_eval: the minimum number of drifter observations required to be assessed by the long-record check
+    :param bias_lim: maximum allowable drifter-background bias, beyond which a record is considered biased (degC)
+    :param drif_intra: maximum random measurement uncertainty reasonably expected in drifter data (standard
+      deviation, degC)
+    :param drif_inter: spread of biases expected in drifter data (standard deviation, degC)
+    :param err_std_n: number of standard deviations of combined background and drifter error, beyond which
+      short-record data are deemed suspicious
+    :param n_bad: minimum number of suspicious data points required for failure of short-record check
+    :param background_err_lim: background error variance beyond which the SST background is deemed unreliable
+      (degC squared)
+    :type reps: a class`.Voyage`
+    :type n_eval: integer
+    :type bias_lim: float
+    :type drif_intra: float
+    :type drif_inter: float
+    :type err_std_n: float
+    :type n_bad: integer
+    :type background_err_lim: float
+    """
+    sst, ostia, ice, bgvar, daytime = retrieve_background_matches(reps)
+
+    bias, noise, short = sst_biased_noisy_check_array(
+        sst,
+        ostia,
+        ice,
+        bgvar,
+        daytime,
+        n_eval=n_eval,
+        bias_lim=bias_lim,
+        drif_intra=drif_intra,
+        drif_inter=drif_inter,
+        err_std_n=err_std_n,
+        n_bad=n_bad,
+        background_err_lim=background_err_lim,
+    )
+
+    for rep, flag_bias, flag_noise, flag_short in zip(reps, bias, noise, short):
+        rep.set_qc("SST", "drf_bias", int(flag_bias))
+        rep.set_qc("SST", "drf_noise", int(flag_noise))
+        rep.set_qc("SST", "drf_short", int(flag_short))
     return reps
@@ -11,205 +11,343 @@ from __future__ import annotations
 
 # external py modules
 import argparse
+import contextlib
 import json
 import logging
 import os
 import sys
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from _qc_settings import outcols_
 
-from glamod_marine_processing.qc_suite.modules import IMMA1
 from glamod_marine_processing.qc_suite.modules import BackgroundField as bf
 from glamod_marine_processing.qc_suite.modules import Climatology as clim
 from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
-from glamod_marine_processing.qc_suite.modules import noc_auxiliary, qc
+from glamod_marine_processing.qc_suite.modules import base_qc, noc_auxiliary, qc
 from glamod_marine_processing.utilities import load_json
 
 
-def read_icoads_file(
-    year,
-    month,
+def climatology_lookup(getter, frame):
+    """
+    Look up climatological values for every report in a DataFrame.
+
+    :param getter: bound get_values or get_values_mds_style method of a Climatology
+    :param frame: DataFrame holding LAT, LON, MO and DY of the reports
+    :type getter: method
+    :type frame: pandas.DataFrame
+    :return: climatological values, NaN where there is no value
+    :rtype: numpy array
+    """
+    lon = frame["LON"].to_numpy(dtype=float)
+    lon = np.where(lon > 180, lon - 360.0, lon)
+    return getter(
+        frame["LAT"].to_numpy(dtype=float),
+        lon,
+        frame["MO"].to_numpy(dtype=float),
+        frame["DY"].to_numpy(dtype=float),
+    )
+
+
+def ext_values(values, dtype):
+    """
+    Convert an array of looked-up values to a list for the extended data of the reports.
+
+    :param values: looked-up values, NaN where there is no value
+    :param dtype: data type of the field the values were taken from
+    :type values: numpy array
+    :type dtype: numpy dtype
+    :return: values as numpy scalars of the field's data type, None where there is no value
+    :rtype: list
+    """
+    return [None if np.isnan(value) else value for value in values.astype(dtype)]
+
+
+def ostia_lookup(
+    frame,
+    ext,
+    readyear,
+    readmonth,
+    ostia_bg_var,
+    background,
+    climlib,
+):
+    """
+    Add OSTIA SST, sea-ice fraction and background variance to the extended data of each report.
+    The reports for each day are matched to the OSTIA field for the previous day all at once. The
+    fields are taken from the background field cache, which reads the field for the following day
+    in advance.
+    """
+    lat = frame["LAT"].to_numpy(dtype=float)
+    lon = frame["LON"].to_numpy(dtype=float)
+    lon = np.where(lon > 180, lon - 360.0, lon)
+    days = frame["DY"].to_numpy(dtype=float)
+
+    for dy in np.unique(days[~np.isnan(days)]):
+        dy = int(dy)
+        fields = background.get_fields(*qc.yesterday(readyear, readmonth, dy))
+
+        climlib.add_field("OSTIA", "background", fields["analysed_sst"])
+        climlib.add_field("OSTIA", "ice", fields["sea_ice_fraction"])
+
+        rows = np.nonzero(days == dy)[0]
+
+        sst = climlib.get_field("OSTIA", "background")
+        # subtract in the field's precision as the value-by-value lookup did
+        rep_clim = sst.get_values_ostia(lat[rows], lon[rows])
+        rep_clim = rep_clim.astype(sst.field.dtype) - 273.15
+        rep_clim = ext_values(rep_clim, rep_clim.dtype)
+
+        ice = climlib.get_field("OSTIA", "ice")
+        rep_ice = ice.get_values_ostia(lat[rows], lon[rows])
+        rep_ice = ext_values(rep_ice, ice.field.dtype)
+
+        rep_bgvar = ostia_bg_var.get_values_mds_style(
+            lat[rows],
+            lon[rows],
+            np.full(len(rows), readmonth),
+            np.full(len(rows), dy),
+        )
+        rep_bgvar = ext_values(rep_bgvar, ostia_bg_var.field.dtype)
+
+        for i, ostia, ice_value, bgvar in zip(rows, rep_clim, rep_ice, rep_bgvar):
+            ext[i]["OSTIA"] = ostia
+            ext[i]["ICE"] = ice_value
+            ext[i]["BGVAR"] = bgvar
+
+
+def track_check_platform(platform_id, columns, parameters):
+    """
+    Run the track check and the other checks which work on the reports from one ship.
+
+    :param platform_id: ID of the ship
+    :param columns: columns of all the reports from one ship, as given by func:`Deck.check_platforms`
+    :param parameters: QC parameters
+    :type platform_id: string
+    :type columns: dict
+    :type parameters: dict
+    :return: QC flags named <QC type>_<flag>
+    :rtype: dict
+    """
+    flags = {}
+    flags.update(base_qc.track_check(platform_id, columns, parameters["track_check"]))
+    flags.update(
+        base_qc.iquam_track_check(platform_id, columns, parameters["IQUAM_track_check"])
+    )
+    flags.update(base_qc.spike_check(columns, parameters["IQUAM_spike_check"]))
+    flags.update(base_qc.find_saturated_runs(columns, parameters["saturated_runs"]))
+    flags.update(
+        base_qc.find_multiple_rounded_values(
+            columns, parameters["multiple_rounded_values"]
+        )
+    )
+
+    for varname in ["SST", "AT", "AT2", "DPT", "SLP"]:
+        flags.update(
+            base_qc.find_repeated_values(
+                columns, parameters["find_repeated_values"], intype=varname
+            )
+        )
+
+    return flags
+
+
+def read_month(
+    readyear,
+    readmonth,
     icoads_dir,
     ids_to_exclude,
     tracking,
-    external_dir,
     parameters,
     climlib,
     config,
+    background,
 ):
-    """Read ICOADS file."""
+    """
+    Read one month of ICOADS data and apply the base QC to it.
+
+    :return: DataFrame of the reports and their climatological values, DataFrame of their base QC flags
+        and list of dictionaries of their extended data, or None if there is no file for the month
+    :rtype: tuple
+    """
     logging.info(
         "INFO({}): {} {}".format(
-            datetime.now().time().isoformat(timespec="milliseconds"), year, month
+            datetime.now().time().isoformat(timespec="milliseconds"),
+            readyear,
+            readmonth,
         )
     )
 
-    last_year, last_month = qc.last_month_was(year, month)
-    next_year, next_month = qc.next_month_is(year, month)
+    ostia_bg_var = None
+    if tracking:
+        ostia_bg_var = clim.Climatology.from_filename(
+            config.get("Climatologies").get(qc.season(readmonth) + "_ostia_background"),
+            "bg_var",
+            config.get("Directories").get("climatology_cache"),
+        )
 
-    reps = ex.Deck()
-    count = 0
-    lastday = -99
+    filename = os.path.join(icoads_dir, f"{readyear:4d}-{readmonth:02d}.psv")
+    if not os.path.isfile(filename):
+        logging.warning(f"File not available: {filename}.")
+        return None
+    imma_obj = pd.read_csv(
+        filename,
+        sep="|",
+        header=None,
+        names=outcols_,
+        low_memory=False,
+    )
 
-    for readyear, readmonth in qc.year_month_gen(
-        last_year, last_month, next_year, next_month
-    ):
-        logging.info(
-            "INFO({}): {} {}".format(
-                datetime.now().time().isoformat(timespec="milliseconds"),
-                readyear,
-                readmonth,
-            )
+    # replace ' ' in ID field with '' (corrections introduce bug)
+    imma_obj["ID"] = imma_obj["ID"].replace(" ", "")
+    imma_obj = imma_obj.sort_values(
+        ["YR", "MO", "DY", "HR", "ID"], axis=0, ascending=True
+    )
+    imma_obj = imma_obj.reset_index(drop=True)
+
+    imma_obj = imma_obj[
+        ~imma_obj["ID"].isin(ids_to_exclude)
+        & (imma_obj["YR"] == readyear)
+        & (imma_obj["MO"] == readmonth)
+        & (imma_obj["DY"] != noc_auxiliary.imiss)
+    ].reset_index(drop=True)
+
+    logging.info(
+        "INFO({}): Data read, applying first QC".format(
+            datetime.now().time().isoformat(timespec="milliseconds")
         )
+    )
 
-        ostia_bg_var = None
-        if tracking:
-            ostia_bg_var = clim.Climatology.from_filename(
-                config.get("Climatologies").get(
-                    qc.season(readmonth) + "_ostia_background"
-                ),
-                "bg_var",
+    # set missing values to NaN
+    frame = pd.DataFrame({"ID": imma_obj["ID"], "UID": imma_obj["UID"]})
+    for varname in ex.VARLIST:
+        if varname in imma_obj:
+            frame[varname] = pd.to_numeric(
+                imma_obj[varname].replace(noc_auxiliary.imiss, np.nan),
+                errors="coerce",
             )
 
-        filename = os.path.join(icoads_dir, f"{readyear:4d}-{readmonth:02d}.psv")
-        if not os.path.isfile(filename):
-            logging.warning(f"File not available: {filename}.")
-            continue
-        imma_obj = pd.read_csv(
-            filename,
-            sep="|",
-            header=None,
-            names=outcols_,
-            low_memory=False,
+    frame["AT2"] = frame["AT"]
+
+    ext = [{} for _ in range(len(frame))]
+    if tracking and readyear >= 1985:
+        ostia_lookup(
+            frame,
+            ext,
+            readyear,
+            readmonth,
+            ostia_bg_var,
+            background,
+            climlib,
         )
 
-        # replace ' ' in ID field with '' (corrections introduce bug)
-        imma_obj["ID"] = imma_obj["ID"].replace(" ", "")
-        imma_obj = imma_obj.sort_values(
-            ["YR", "MO", "DY", "HR", "ID"], axis=0, ascending=True
+    for varname in ["SST", "AT"]:
+        frame["clim_" + varname] = climatology_lookup(
+            climlib.get_field(varname, "mean").get_values_mds_style, frame
         )
-        imma_obj = imma_obj.reset_index(drop=True)
 
-        data_index = imma_obj.index
+    for varname in ["SLP2", "SHU", "CRH", "CWB", "DPD"]:
+        frame["clim_" + varname] = climatology_lookup(
+            climlib.get_field(varname, "mean").get_values, frame
+        )
 
-        rec = IMMA1.IMMA()
-        logging.info(
-            "INFO({}): Data read, applying first QC".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
-            )
+    for varname in ["DPT", "AT2", "SLP"]:
+        frame["clim_" + varname] = climatology_lookup(
+            climlib.get_field(varname, "mean").get_values, frame
+        )
+        frame["stdev_" + varname] = climatology_lookup(
+            climlib.get_field(varname, "stdev").get_values, frame
         )
-        dyb_count = 0
-        for idx in data_index:
-            # set missing values to None
-            for k, v in imma_obj.loc[idx,].to_dict().items():
-                rec.data[k] = noc_auxiliary.to_none(v)
-            readob = True
-            if (
-                rec.data["ID"] not in ids_to_exclude
-                and readob
-                and rec.data["YR"] == readyear
-                and rec.data["MO"] == readmonth
-                and rec.data["DY"] is not None
-            ):
-                rep = ex.MarineReportQC(rec)
-                del rec
-
-                rep.setvar("AT2", rep.getvar("AT"))
-
-                # if day has changed then read in OSTIA field if available and append SST and sea-ice fraction
-                # to the observation metadata
-                if tracking and readyear >= 1985 and rep.getvar("DY") is not None:
-                    if rep.getvar("DY") != lastday:
-                        lastday = rep.getvar("DY")
-                        y_year, y_month, y_day = qc.yesterday(
-                            readyear, readmonth, lastday
-                        )
 
-                        ofname = bf.get_background_filename(
-                            os.path.join(external_dir, parameters["background_dir"]),
-                            parameters["background_filenames"],
-                            y_year,
-                            y_month,
-                            y_day,
-                        )
+    for varname, values in base_qc.calculate_humidity_variables(frame).items():
+        frame[varname] = values
 
-                        climlib.add_field(
-                            "OSTIA",
-                            "background",
-                            clim.Climatology.from_filename(ofname, "analysed_sst"),
-                        )
-                        climlib.add_field(
-                            "OSTIA",
-                            "ice",
-                            clim.Climatology.from_filename(ofname, "sea_ice_fraction"),
-                        )
+    flags = base_qc.perform_base_qc(frame, parameters)
 
-                    rep_clim = climlib.get_field("OSTIA", "background").get_value_ostia(
-                        rep.lat(), rep.lon()
-                    )
-                    if rep_clim is not None:
-                        rep_clim -= 273.15
-
-                    rep.setext("OSTIA", rep_clim)
-                    rep.setext(
-                        "ICE",
-                        climlib.get_field("OSTIA", "ice").get_value_ostia(
-                            rep.lat(), rep.lon()
-                        ),
-                    )
-                    rep.setext(
-                        "BGVAR",
-                        ostia_bg_var.get_value_mds_style(
-                            rep.lat(), rep.lon(), rep.getvar("MO"), rep.getvar("DY")
-                        ),
-                    )
+    logging.info(
+        "INFO({}): {} processed".format(
+            datetime.now().time().isoformat(timespec="milliseconds"),
+            len(frame),
+        )
+    )
+    return frame, flags, ext
 
-                for varname in ["SST", "AT"]:
-                    rep_clim = climlib.get_field(varname, "mean").get_value_mds_style(
-                        rep.lat(), rep.lon(), rep.getvar("MO"), rep.getvar("DY")
-                    )
-                    rep.add_climate_variable(varname, rep_clim)
 
-                for varname in ["SLP2", "SHU", "CRH", "CWB", "DPD"]:
-                    rep_clim = climlib.get_field(varname, "mean").get_value(
-                        rep.lat(), rep.lon(), rep.getvar("MO"), rep.getvar("DY")
-                    )
-                    rep.add_climate_variable(varname, rep_clim)
+def read_icoads_file(
+    year,
+    month,
+    icoads_dir,
+    ids_to_exclude,
+    tracking,
+    parameters,
+    climlib,
+    config,
+    background=None,
+    months=None,
+):
+    """
+    Read ICOADS file.
 
-                for varname in ["DPT", "AT2", "SLP"]:
-                    rep_clim = climlib.get_field(varname, "mean").get_value(
-                        rep.lat(), rep.lon(), rep.getvar("MO"), rep.getvar("DY")
-                    )
-                    rep_stdev = climlib.get_field(varname, "stdev").get_value(
-                        rep.lat(), rep.lon(), rep.getvar("MO"), rep.getvar("DY")
-                    )
-                    rep.add_climate_variable(varname, rep_clim, rep_stdev)
+    The reports for the month and the months either side of it are read and base QCed. Months which
+    are already in months, which holds the base QCed months keyed by year and month, are not read
+    again. Months outside the three-month window are dropped from it, so passing the same dictionary
+    for successive months slides the window forward one month at a time.
+    """
+    logging.info(
+        "INFO({}): {} {}".format(
+            datetime.now().time().isoformat(timespec="milliseconds"), year, month
+        )
+    )
 
-                rep.calculate_humidity_variables(["SHU", "VAP", "CRH", "CWB", "DPD"])
+    last_year, last_month = qc.last_month_was(year, month)
+    next_year, next_month = qc.next_month_is(year, month)
 
-                rep.perform_base_qc(parameters)
-                rep.set_qc(
-                    "POS",
-                    "month_match",
-                    qc.month_match(year, month, rep.getvar("YR"), rep.getvar("MO")),
-                )
+    window = list(qc.year_month_gen(last_year, last_month, next_year, next_month))
+    if months is None:
+        months = {}
+    for key in list(months):
+        if key not in window:
+            del months[key]
 
-                reps.append(rep)
-                count += 1
+    frames = []
+    flag_frames = []
+    exts = []
 
-            rec = IMMA1.IMMA()
-            dyb_count += 1
-            if dyb_count % 1000 == 0:
-                logging.info(
-                    "INFO({}): {} out of {} processed".format(
-                        datetime.now().time().isoformat(timespec="milliseconds"),
-                        dyb_count,
-                        imma_obj.index.size,
-                    )
-                )
-    return reps, count
+    for readyear, readmonth in window:
+        if (readyear, readmonth) not in months:
+            months[(readyear, readmonth)] = read_month(
+                readyear,
+                readmonth,
+                icoads_dir,
+                ids_to_exclude,
+                tracking,
+                parameters,
+                climlib,
+                config,
+                background,
+            )
+        if months[(readyear, readmonth)] is None:
+            continue
+        frame, flags, ext = months[(readyear, readmonth)]
+
+        month_match = (frame["YR"] == year) & (frame["MO"] == month)
+        frames.append(frame)
+        flag_frames.append(flags.assign(POS_month_match=month_match.astype(int)))
+        exts.extend(ext)
+
+    if not frames:
+        return ex.Deck(), 0
+
+    # the reports are only made when the track check or the output needs them
+    reps = ex.Deck.from_table(
+        pd.concat(frames, ignore_index=True),
+        pd.concat(flag_frames, ignore_index=True),
+        exts,
+        ex.MarineReportQC,
+    )
+
+    return reps, len(reps)
 
 
 def main(argv):
@@ -244,6 +382,21 @@ def main(argv):
     parser.add_argument("-tracking", action="store_true", help="perform tracking QC")
     parser.add_argument("-jobs", type=str, default="jobs.json", help="name of job file")
     parser.add_argument("-job_index", type=int, default=0, help="job index")
+    parser.add_argument(
+        "-processes",
+        type=int,
+        default=None,
+        help="number of processes for the track check, default is all the CPUs it may run on",
+    )
+    parser.add_argument("-compress", action="store_true", help="gzip the output files")
+    parser.add_argument(
+        "-parquet",
+        action="store_true",
+        help="write the QC flags to a Parquet dataset instead of csv files",
+    )
+    parser.add_argument(
+        "-index", action="store_true", help="write an index of the QC flags by UID"
+    )
 
     args = parser.parse_args()
 
@@ -272,12 +425,14 @@ def main(argv):
     icoads_dir = config.get("Directories").get("ICOADS_dir")
     out_dir = config.get("Directories").get("out_dir")
     external_dir = config.get("Directories").get("external_files")
+    cache_dir = config.get("Directories").get("climatology_cache")
     bad_id_file = config.get("Files").get("IDs_to_exclude")
     version = config.get("Icoads").get("icoads_version")
 
     logging.info(f"ICOADS directory = {icoads_dir}")
     logging.info(f"ICOADS version = {version}")
     logging.info(f"Output to {out_dir}")
+    logging.info(f"Climatology cache = {cache_dir}")
     logging.info(f"List of bad IDs = {bad_id_file}")
     logging.info(
         "Parameter file = {}".format(config.get("Files").get("parameter_file"))
@@ -288,17 +443,19 @@ def main(argv):
 
     # read in climatology files
     sst_pentad_stdev = clim.Climatology.from_filename(
-        config.get("Climatologies").get("Old_SST_stdev_climatology"), "sst"
+        config.get("Climatologies").get("Old_SST_stdev_climatology"), "sst", cache_dir
     )
 
     sst_stdev_1 = clim.Climatology.from_filename(
-        config.get("Climatologies").get("SST_buddy_one_box_to_buddy_avg"), "sst"
+        config.get("Climatologies").get("SST_buddy_one_box_to_buddy_avg"),
+        "sst",
+        cache_dir,
     )
     sst_stdev_2 = clim.Climatology.from_filename(
-        config.get("Climatologies").get("SST_buddy_one_ob_to_box_avg"), "sst"
+        config.get("Climatologies").get("SST_buddy_one_ob_to_box_avg"), "sst", cache_dir
     )
     sst_stdev_3 = clim.Climatology.from_filename(
-        config.get("Climatologies").get("SST_buddy_avg_sampling"), "sst"
+        config.get("Climatologies").get("SST_buddy_avg_sampling"), "sst", cache_dir
     )
     with open(config.get("Files").get("parameter_file")) as f:
         parameters = json.load(f)
@@ -309,186 +466,204 @@ def main(argv):
         logging.info(f"{entry[0]} {entry[1]}")
         path = os.path.join(external_dir, entry[2])
         climlib.add_field(
-            entry[0], entry[1], clim.Climatology.from_filename(path, entry[3])
+            entry[0],
+            entry[1],
+            clim.Climatology.from_filename(path, entry[3], cache_dir),
         )
 
-    for year, month in qc.year_month_gen(year1, month1, year2, month2):
-        reps, count = read_icoads_file(
-            year,
-            month,
-            icoads_dir,
-            ids_to_exclude,
-            tracking,
-            external_dir,
-            parameters,
-            climlib,
-            config,
-        )
-
-    logging.info(
-        "INFO({}): Read {} ICOADS records".format(
-            datetime.now().time().isoformat(timespec="milliseconds"), count
+    # daily OSTIA fields for the tracking QC, read on a thread which is stopped when the loop ends
+    background = (
+        bf.BackgroundFieldCache(
+            os.path.join(external_dir, parameters["background_dir"]),
+            parameters["background_filenames"],
         )
+        if tracking
+        else contextlib.nullcontext()
     )
 
-    # filter the obs into passes and fails of basic positional QC
-    filt = ex.QC_filter()
-    filt.add_qc_filter("POS", "date", 0)
-    filt.add_qc_filter("POS", "time", 0)
-    filt.add_qc_filter("POS", "pos", 0)
-    filt.add_qc_filter("POS", "blklst", 0)
-
-    reps.add_filter(filt)
-
-    if verbose:
-        logging.info(
-            "INFO ({}) .... Track checking individual ships".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
+    months = {}
+    with background as background:
+        for year, month in qc.year_month_gen(year1, month1, year2, month2):
+            reps, count = read_icoads_file(
+                year,
+                month,
+                icoads_dir,
+                ids_to_exclude,
+                tracking,
+                parameters,
+                climlib,
+                config,
+                background,
+                months,
             )
-        )
 
-        # track check the passes one ship at a time
-    count_ships = 0
-    for one_ship in reps.get_one_platform_at_a_time():
-        one_ship.track_check(parameters["track_check"])
-        one_ship.iquam_track_check(parameters["IQUAM_track_check"])
-        one_ship.spike_check(parameters["IQUAM_spike_check"])
-        one_ship.find_saturated_runs(parameters["saturated_runs"])
-        one_ship.find_multiple_rounded_values(parameters["multiple_rounded_values"])
-
-        for varname in ["SST", "AT", "AT2", "DPT", "SLP"]:
-            one_ship.find_repeated_values(
-                parameters["find_repeated_values"], intype=varname
+            logging.info(
+                "INFO({}): Read {} ICOADS records".format(
+                    datetime.now().time().isoformat(timespec="milliseconds"), count
+                )
             )
 
-        count_ships += 1
+            # filter the obs into passes and fails of basic positional QC
+            filt = ex.QC_filter()
+            filt.add_qc_filter("POS", "date", 0)
+            filt.add_qc_filter("POS", "time", 0)
+            filt.add_qc_filter("POS", "pos", 0)
+            filt.add_qc_filter("POS", "blklst", 0)
 
-    logging.info(f"Track checked {count_ships} ships")
+            reps.add_filter(filt)
 
-    if verbose:
-        logging.info(
-            "INFO ({}) .... Applying buddy checks".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
-            )
-        )
-    if verbose:
-        logging.info(
-            "INFO ({}) ........ SST".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
-            )
-        )
-        # SST buddy check
-    filt = ex.QC_filter()
-    filt.add_qc_filter("POS", "is780", 0)
-    filt.add_qc_filter("POS", "date", 0)
-    filt.add_qc_filter("POS", "time", 0)
-    filt.add_qc_filter("POS", "pos", 0)
-    filt.add_qc_filter("POS", "blklst", 0)
-    filt.add_qc_filter("POS", "trk", 0)
-    filt.add_qc_filter("SST", "noval", 0)
-    filt.add_qc_filter("SST", "freez", 0)
-    filt.add_qc_filter("SST", "clim", 0)
-    filt.add_qc_filter("SST", "nonorm", 0)
-
-    reps.add_filter(filt)
-
-    reps.bayesian_buddy_check("SST", sst_stdev_1, sst_stdev_2, sst_stdev_3, parameters)
-    reps.mds_buddy_check("SST", sst_pentad_stdev, parameters["mds_buddy_check"])
-
-    if verbose:
-        logging.info(
-            "INFO ({}) ........ NMAT".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
-            )
-        )
-        # NMAT buddy check
-    filt = ex.QC_filter()
-    filt.add_qc_filter("POS", "isship", 1)  # only do ships mat_blacklist
-    filt.add_qc_filter("AT", "mat_blacklist", 0)
-    filt.add_qc_filter("POS", "date", 0)
-    filt.add_qc_filter("POS", "time", 0)
-    filt.add_qc_filter("POS", "pos", 0)
-    filt.add_qc_filter("POS", "blklst", 0)
-    filt.add_qc_filter("POS", "trk", 0)
-    filt.add_qc_filter("POS", "day", 0)
-    filt.add_qc_filter("AT", "noval", 0)
-    filt.add_qc_filter("AT", "clim", 0)
-    filt.add_qc_filter("AT", "nonorm", 0)
-
-    reps.add_filter(filt)
-
-    reps.bayesian_buddy_check("AT", sst_stdev_1, sst_stdev_2, sst_stdev_3, parameters)
-    reps.mds_buddy_check("AT", sst_pentad_stdev, parameters["mds_buddy_check"])
-
-    # DPT buddy check #NB no day check for this one
-    filt = ex.QC_filter()
-    filt.add_qc_filter("DPT", "hum_blacklist", 0)
-    filt.add_qc_filter("POS", "date", 0)
-    filt.add_qc_filter("POS", "time", 0)
-    filt.add_qc_filter("POS", "pos", 0)
-    filt.add_qc_filter("POS", "blklst", 0)
-    filt.add_qc_filter("POS", "trk", 0)
-    filt.add_qc_filter("DPT", "noval", 0)
-    filt.add_qc_filter("DPT", "clim", 0)
-    filt.add_qc_filter("DPT", "nonorm", 0)
-
-    reps.add_filter(filt)
-
-    reps.mds_buddy_check(
-        "DPT", climlib.get_field("DPT", "stdev"), parameters["mds_buddy_check"]
-    )
+            if verbose:
+                logging.info(
+                    "INFO ({}) .... Track checking individual ships".format(
+                        datetime.now().time().isoformat(timespec="milliseconds")
+                    )
+                )
 
-    if verbose:
-        logging.info(
-            "INFO ({}) ........ SLP".format(
-                datetime.now().time().isoformat(timespec="milliseconds")
+                # track check the passes one ship at a time
+            count_ships = reps.check_platforms(
+                track_check_platform, (parameters,), args.processes
             )
-        )
-        # SLP buddy check
-    filt = ex.QC_filter()
-    filt.add_qc_filter("POS", "date", 0)
-    filt.add_qc_filter("POS", "time", 0)
-    filt.add_qc_filter("POS", "pos", 0)
-    filt.add_qc_filter("POS", "blklst", 0)
-    filt.add_qc_filter("POS", "trk", 0)
-    filt.add_qc_filter("SLP", "noval", 0)
-    filt.add_qc_filter("SLP", "clim", 0)
-    filt.add_qc_filter("SLP", "nonorm", 0)
-
-    reps.add_filter(filt)
-
-    reps.mds_buddy_check(
-        "SLP", climlib.get_field("SLP", "stdev"), parameters["slp_buddy_check"]
-    )
 
-    extdir = bf.safe_make_dir(out_dir, year, month)
-    reps.write_output(parameters["runid"], extdir, year, month)
+            logging.info(f"Track checked {count_ships} ships")
 
-    if tracking:
-        if verbose:
-            logging.info(
-                "INFO ({}) .... Tracking".format(
-                    datetime.now().time().isoformat(timespec="milliseconds")
+            if verbose:
+                logging.info(
+                    "INFO ({}) .... Applying buddy checks".format(
+                        datetime.now().time().isoformat(timespec="milliseconds")
+                    )
                 )
+            if verbose:
+                logging.info(
+                    "INFO ({}) ........ SST".format(
+                        datetime.now().time().isoformat(timespec="milliseconds")
+                    )
+                )
+                # SST buddy check
+            filt = ex.QC_filter()
+            filt.add_qc_filter("POS", "is780", 0)
+            filt.add_qc_filter("POS", "date", 0)
+            filt.add_qc_filter("POS", "time", 0)
+            filt.add_qc_filter("POS", "pos", 0)
+            filt.add_qc_filter("POS", "blklst", 0)
+            filt.add_qc_filter("POS", "trk", 0)
+            filt.add_qc_filter("SST", "noval", 0)
+            filt.add_qc_filter("SST", "freez", 0)
+            filt.add_qc_filter("SST", "clim", 0)
+            filt.add_qc_filter("SST", "nonorm", 0)
+
+            reps.add_filter(filt)
+
+            reps.bayesian_buddy_check(
+                "SST", sst_stdev_1, sst_stdev_2, sst_stdev_3, parameters
             )
+            reps.mds_buddy_check("SST", sst_pentad_stdev, parameters["mds_buddy_check"])
 
-            # set QC for output by ID - buoys only and passes base SST QC
-        filt = ex.QC_filter()
-        filt.add_qc_filter("POS", "month_match", 1)
-        filt.add_qc_filter("POS", "isdrifter", 1)
+            if verbose:
+                logging.info(
+                    "INFO ({}) ........ NMAT".format(
+                        datetime.now().time().isoformat(timespec="milliseconds")
+                    )
+                )
+                # NMAT buddy check
+            filt = ex.QC_filter()
+            filt.add_qc_filter("POS", "isship", 1)  # only do ships mat_blacklist
+            filt.add_qc_filter("AT", "mat_blacklist", 0)
+            filt.add_qc_filter("POS", "date", 0)
+            filt.add_qc_filter("POS", "time", 0)
+            filt.add_qc_filter("POS", "pos", 0)
+            filt.add_qc_filter("POS", "blklst", 0)
+            filt.add_qc_filter("POS", "trk", 0)
+            filt.add_qc_filter("POS", "day", 0)
+            filt.add_qc_filter("AT", "noval", 0)
+            filt.add_qc_filter("AT", "clim", 0)
+            filt.add_qc_filter("AT", "nonorm", 0)
+
+            reps.add_filter(filt)
+
+            reps.bayesian_buddy_check(
+                "AT", sst_stdev_1, sst_stdev_2, sst_stdev_3, parameters
+            )
+            reps.mds_buddy_check("AT", sst_pentad_stdev, parameters["mds_buddy_check"])
+
+            # DPT buddy check #NB no day check for this one
+            filt = ex.QC_filter()
+            filt.add_qc_filter("DPT", "hum_blacklist", 0)
+            filt.add_qc_filter("POS", "date", 0)
+            filt.add_qc_filter("POS", "time", 0)
+            filt.add_qc_filter("POS", "pos", 0)
+            filt.add_qc_filter("POS", "blklst", 0)
+            filt.add_qc_filter("POS", "trk", 0)
+            filt.add_qc_filter("DPT", "noval", 0)
+            filt.add_qc_filter("DPT", "clim", 0)
+            filt.add_qc_filter("DPT", "nonorm", 0)
+
+            reps.add_filter(filt)
+
+            reps.mds_buddy_check(
+                "DPT", climlib.get_field("DPT", "stdev"), parameters["mds_buddy_check"]
+            )
 
-        reps.add_filter(filt)
+            if verbose:
+                logging.info(
+                    "INFO ({}) ........ SLP".format(
+                        datetime.now().time().isoformat(timespec="milliseconds")
+                    )
+                )
+                # SLP buddy check
+            filt = ex.QC_filter()
+            filt.add_qc_filter("POS", "date", 0)
+            filt.add_qc_filter("POS", "time", 0)
+            filt.add_qc_filter("POS", "pos", 0)
+            filt.add_qc_filter("POS", "blklst", 0)
+            filt.add_qc_filter("POS", "trk", 0)
+            filt.add_qc_filter("SLP", "noval", 0)
+            filt.add_qc_filter("SLP", "clim", 0)
+            filt.add_qc_filter("SLP", "nonorm", 0)
+
+            reps.add_filter(filt)
+
+            reps.mds_buddy_check(
+                "SLP", climlib.get_field("SLP", "stdev"), parameters["slp_buddy_check"]
+            )
 
-        idfile = open(extdir + "/ID_file.txt", "w")
-        for one_ship in reps.get_one_platform_at_a_time():
-            if len(one_ship) > 0:
-                thisid = one_ship.getrep(0).getvar("ID")
-                if thisid is not None:
-                    idfile.write(thisid + "," + ex.safe_filename(thisid) + "\n")
-                    one_ship.write_output(parameters["runid"], extdir, year, month)
-        idfile.close()
+            extdir = bf.safe_make_dir(out_dir, year, month)
+            reps.write_output(
+                parameters["runid"],
+                extdir,
+                year,
+                month,
+                compress=args.compress,
+                parquet=args.parquet,
+                index=args.index,
+            )
+
+            if tracking:
+                if verbose:
+                    logging.info(
+                        "INFO ({}) .... Tracking".format(
+                            datetime.now().time().isoformat(timespec="milliseconds")
+                        )
+                    )
 
-    del reps
+                    # set QC for output by ID - buoys only and passes base SST QC
+                filt = ex.QC_filter()
+                filt.add_qc_filter("POS", "month_match", 1)
+                filt.add_qc_filter("POS", "isdrifter", 1)
+
+                reps.add_filter(filt)
+
+                idfile = open(extdir + "/ID_file.txt", "w")
+                for one_ship in reps.get_one_platform_at_a_time():
+                    if len(one_ship) > 0:
+                        thisid = one_ship.getrep(0).getvar("ID")
+                        if thisid is not None:
+                            idfile.write(thisid + "," + ex.safe_filename(thisid) + "\n")
+                            one_ship.write_output(
+                                parameters["runid"], extdir, year, month
+                            )
+                idfile.close()
+
+            del reps
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import calendar
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import IMMA1
+from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
+from glamod_marine_processing.qc_suite.modules import base_qc, qc
+from glamod_marine_processing.qc_suite.modules import track_check as tc
+
+
+def seeds(n=3):
+    """Parametrize a test with the seeds of its random data."""
+    return pytest.mark.parametrize("seed", range(n))
+
+
+def nanify(rng, values, fraction=0.1):
+    """Set a random fraction of the values to NaN."""
+    values = values.astype(float)
+    values[rng.random(len(values)) < fraction] = np.nan
+    return values
+
+
+def random_reports(seed, n=1000):
+    """Reports with values in and out of the ranges of the base QC, some missing."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "ID": rng.choice(["SHIP1", "53521    ", "SUPERIGORINA", np.nan, "ABC"], n),
+            "UID": [f"U{i}" for i in range(n)],
+            "YR": rng.choice([1880, 1885, 1958, 1969, 2005, 2006, 2030, 1840], n),
+            "MO": rng.choice([1, 2, 11, 12], n),
+            "DY": nanify(rng, rng.integers(0, 32, n), 0.05),
+            "HR": nanify(rng, rng.uniform(0, 23.99, n), 0.15),
+            "LAT": np.round(rng.uniform(-95, 95, n)),
+            "LON": np.round(rng.uniform(-185, 365, n)),
+            "DCK": rng.choice([701, 732, 874, 193, 780, 708, 100], n),
+            "PT": nanify(rng, rng.choice([0, 5, 6, 7, 13, 15, 20], n)),
+            "SST": nanify(rng, rng.uniform(-5, 40, n)),
+            "AT": nanify(rng, rng.uniform(-30, 50, n)),
+            "DPT": nanify(rng, rng.uniform(-30, 40, n)),
+            "SLP": nanify(rng, rng.uniform(950, 1050, n)),
+            "W": nanify(rng, rng.uniform(0, 60, n)),
+            "D": nanify(rng, rng.choice([10, 361, 362, 200], n)),
+        }
+    )
+    frame = frame.astype({"YR": float, "MO": float, "DCK": float})
+    # reports at 0N 0E
+    frame.loc[rng.random(n) < 0.1, "LAT"] = 0
+    frame.loc[rng.random(n) < 0.1, "LON"] = 0
+    frame["AT2"] = frame["AT"]
+    for var in ["SST", "AT", "DPT", "AT2", "SLP2"]:
+        frame["clim_" + var] = nanify(
+            rng, frame["AT"].fillna(10).to_numpy() + rng.normal(0, 8, n)
+        )
+    frame["clim_SLP"] = nanify(rng, rng.uniform(950, 1050, n))
+    for var in ["DPT", "AT2", "SLP"]:
+        frame["stdev_" + var] = nanify(rng, rng.uniform(0, 6, n))
+    for var, values in base_qc.calculate_humidity_variables(frame).items():
+        frame[var] = values
+    return frame
+
+
+def random_platforms(seed, nplatforms=40):
+    """Reports of platforms moving along tracks with jumps, spikes, runs and repeats."""
+    rng = np.random.default_rng(seed)
+    platforms = []
+    for k in range(nplatforms):
+        n = int(rng.choice([1, 2, 3, 10, 30, 60]))
+        hours = np.cumsum(rng.choice([0.0, 0.5, 1.0, 3.0, 6.0, 12.0], n))
+        times = pd.Timestamp(
+            int(rng.choice([1880, 1885, 1958, 2005])), int(rng.integers(1, 13)), 1
+        ) + pd.to_timedelta(hours, "h")
+        course = np.cumsum(rng.normal(0, 20, n)) + rng.uniform(0, 360)
+        step = rng.uniform(0, 30) * np.diff(hours, prepend=0.0) / 111.0
+        lat = np.clip(
+            rng.uniform(-60, 60) + np.cumsum(step * np.cos(np.radians(course))), -89, 89
+        )
+        lon = rng.uniform(0, 360) + np.cumsum(step * np.sin(np.radians(course)))
+        jumps = rng.random(n) < 0.05
+        lat[jumps] = np.clip(lat[jumps] + rng.choice([-8, 8], jumps.sum()), -89, 89)
+        sst = 15 + np.cumsum(rng.normal(0, 0.3, n))
+        sst[rng.random(n) < 0.05] += 10
+        at = 15 + np.cumsum(rng.normal(0, 0.5, n))
+        dpt = at - rng.uniform(0.1, 3, n)
+        run = slice(int(rng.integers(0, n)), int(rng.integers(0, n + 1)))
+        dpt[run] = at[run]
+        slp = 1013 + np.cumsum(rng.normal(0, 1, n))
+        if rng.random() < 0.3:
+            sst[rng.random(n) < 0.8] = 20.0
+            slp[rng.random(n) < 0.8] = 1013.0
+        if rng.random() < 0.3:
+            at, dpt = np.round(at), np.round(dpt)
+        frame = pd.DataFrame(
+            {
+                "ID": rng.choice(
+                    [f"P{k:03d}     ", "SHIP     ", ""], p=[0.9, 0.05, 0.05]
+                ),
+                "YR": times.year,
+                "MO": times.month,
+                "DY": times.day,
+                "HR": times.hour + times.minute / 60.0,
+                "LAT": np.round(lat, 2),
+                "LON": np.round(lon % 360, 2),
+                "DS": rng.choice([0, 45, 90, 135, 180, 225, 270, 315, np.nan], n),
+                "VS": rng.choice([0, 1, 3, 5, 9, np.nan], n),
+                "DCK": rng.choice([720, 732, 100]),
+                "PT": rng.choice([0, 5, 6, 7, np.nan]),
+                "SST": sst,
+                "AT": at,
+                "AT2": at,
+                "DPT": dpt,
+                "SLP": slp,
+            }
+        )
+        for var in ["SST", "AT", "DPT", "SLP"]:
+            frame.loc[rng.random(n) < 0.1, var] = np.nan
+        platforms.append(frame)
+    frame = pd.concat(platforms, ignore_index=True).astype(
+        {"YR": float, "MO": float, "DY": float, "DCK": float}
+    )
+    frame["UID"] = [f"U{i}" for i in range(len(frame))]
+    flags = pd.DataFrame(
+        {
+            f"POS_{flag}": (rng.random(len(frame)) < 0.05).astype(int)
+            for flag in ["date", "time", "pos", "blklst"]
+        }
+    )
+    return frame, flags
+
+
+def random_track(seed, nobs=60):
+    """Track columns of a ship with jumps in position and some missing speeds and courses."""
+    rng = np.random.default_rng(seed)
+    step = rng.uniform(0.05, 1.0)
+    lat = np.clip(
+        rng.uniform(-60, 60) + np.cumsum(rng.normal(0, step, nobs)), -89.0, 89.0
+    )
+    lon = (rng.uniform(-180, 180) + np.cumsum(rng.normal(0.2, step, nobs))) % 360
+    lon = np.where(lon > 180, lon - 360.0, lon)
+    # a few jumps in position
+    jumps = rng.random(nobs) < 0.1
+    lat[jumps] = np.clip(lat[jumps] + rng.uniform(2, 8, jumps.sum()), -89.0, 89.0)
+    time = 2451545.0 + np.cumsum(rng.choice([0.0, 1.0, 3.0, 6.0, 12.0], nobs)) / 24.0
+    vsi = rng.integers(0, 20, nobs).astype(float)
+    dsi = rng.choice([0, 45, 90, 135, 180, 225, 270, 315, 360], nobs).astype(float)
+    vsi[rng.random(nobs) < 0.05] = np.nan
+    dsi[rng.random(nobs) < 0.05] = np.nan
+    arrays = {
+        "LAT": lat,
+        "LON": lon,
+        "lat": lat,
+        "lon": lon,
+        "time": time,
+        "vsi": vsi,
+        "dsi": dsi,
+    }
+    return tc.add_track_speeds(arrays)
+
+
+def random_drifter(seed, nrep=300):
+    """Positions and hours of a drifter with a fast spell, ending run aground."""
+    rng = np.random.default_rng(seed)
+    hrs = np.cumsum(rng.choice([0.5, 1.0, 1.0, 1.0, 2.0, 6.0], nrep))
+    hrs -= hrs[0]
+    speed = rng.uniform(0, 1.5, nrep)
+    # fast spells and a spell run aground
+    fast = rng.integers(0, nrep)
+    speed[fast : fast + rng.integers(5, 60)] = 100.0
+    aground = rng.integers(nrep // 2, nrep)
+    speed[aground:] = 0.0
+    angle = rng.uniform(0, 2 * np.pi, nrep)
+    lat = np.clip(
+        rng.uniform(-60, 60) + np.cumsum(speed * np.cos(angle)) / 111.0, -89, 89
+    )
+    lon = (rng.uniform(0, 359) + np.cumsum(speed * np.sin(angle)) / 111.0) % 360
+    return np.round(lon, 2), np.round(lat, 2), hrs
+
+
+def random_anomalies(seed, nrep=300):
+    """SST anomalies of a drifter with biased tails and spikes, and background errors."""
+    rng = np.random.default_rng(seed)
+    sst_anom = rng.normal(0, 0.3, nrep) + rng.choice([0, 0.5])
+    sst_anom[: rng.integers(0, 80)] += rng.normal(3, 2)
+    if seed % 2:
+        sst_anom[nrep - rng.integers(0, 80) :] += rng.normal(3, 2)
+    spikes = rng.random(nrep) < 0.05
+    sst_anom[spikes] += rng.normal(0, 5, spikes.sum())
+    bgerr = np.sqrt(rng.uniform(0.01, 0.08, nrep))
+    bgerr[rng.random(nrep) < 0.005] = np.sqrt(0.5)
+    return sst_anom, bgerr
+
+
+def random_deck(seed, flag_names, n=500):
+    """Deck of ship reports in and around January 2000, with random QC flags of flag_names."""
+    rng = np.random.default_rng(seed)
+    deck = ex.Deck()
+    for i in range(n):
+        imma = IMMA1.IMMA()
+        imma.data = {
+            "ID": f"SHIP{i % 7}",
+            "UID": f"U{seed}{i:07d}",
+            "YR": 2000,
+            "MO": int(rng.choice([1, 1, 1, 2])),
+            "DY": int(rng.integers(1, 29)),
+            "HR": float(rng.uniform(0, 23.9)),
+            "LAT": float(rng.uniform(-60, 60)),
+            "LON": float(rng.uniform(0, 360)),
+        }
+        rep = ex.MarineReport(imma)
+        for var, flags in flag_names.items():
+            for flag in flags:
+                rep.set_qc(var, flag, int(rng.integers(0, 10)))
+        deck.append(rep)
+    return deck
+
+
+def random_humidities(seed, n=5000):
+    """Dew point temperatures, air temperatures and pressures, some saturated."""
+    rng = np.random.default_rng(seed)
+    t = np.round(rng.uniform(-40, 45, n), 1)
+    td = np.round(t - rng.exponential(5, n), 1)
+    # saturated air
+    td[: n // 10] = t[: n // 10]
+    p = np.round(rng.uniform(950, 1050, n), 1)
+    return td, t, p
+
+
+def random_times(seed, n=3000):
+    """Dates, hours and positions, some in the first hour of the year or at 0N or 0E."""
+    rng = np.random.default_rng(seed)
+    year = rng.choice([1850, 1900, 1999, 2000, 2004, 2023], n)
+    month = rng.integers(1, 13, n)
+    month_lengths = [calendar.monthrange(y, m)[1] for y, m in zip(year, month)]
+    day = rng.integers(1, np.array(month_lengths) + 1)
+    hour = rng.integers(0, 2400, n) / 100.0
+    lat = np.round(rng.uniform(-90, 90, n), 1)
+    lon = np.round(rng.uniform(-180, 360, n), 1)
+    # the first hour of the year, and positions on the equator and meridian
+    month[:100], day[:100], hour[:100] = 1, 1, rng.uniform(0, 1, 100)
+    lat[100:200] = 0.0
+    lon[200:300] = 0.0
+    return year, month, day, hour, lat, lon
+
+
+def random_blacklist_reports(seed, n=20000):
+    """IDs, decks, dates, positions and platform types, some of blacklisted buoys or at 0N 0E."""
+    rng = np.random.default_rng(seed)
+    inid = np.array(
+        rng.choice(qc.blacklisted_buoy_ids + ["SUPERIGORINA", "ABC      "], n),
+        dtype=object,
+    )
+    inid[rng.random(n) < 0.05] = np.nan
+    indeck = rng.choice([732, 874, 926, 700, 732, 732], n).astype(float)
+    inyear = rng.integers(1955, 2010, n).astype(float)
+    # the years of the buoy IDs
+    recent = rng.random(n) < 0.2
+    inyear[recent] = rng.choice([2005, 2006], recent.sum())
+    inmonth = rng.integers(1, 13, n).astype(float)
+    inlat = np.round(rng.uniform(-90, 90, n))
+    inlon = np.round(rng.uniform(-180, 360, n))
+    # reports at 0N 0E
+    inlat[:300] = 0.0
+    inlon[:300] = rng.choice([0.0, 360.0], 300)
+    inpt = rng.choice([13, 7, 5], n).astype(float)
+    return inid, indeck, inyear, inmonth, inlat, inlon, inpt
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import BackgroundField as bf
+
+
+class _CountingCache(bf.BackgroundFieldCache):
+    """Cache whose fields are the day they were read for, counting the reads"""
+
+    def __init__(self, maxsize=3, gate=None):
+        super().__init__("dir", "file", maxsize=maxsize)
+        self.reads = []
+        self.gate = gate
+
+    def read(self, year, month, day):
+        if self.gate is not None:
+            self.gate.wait()
+        self.reads.append((year, month, day))
+        return {var: (year, month, day) for var in self.variables}
+
+
+def test_default_variables_not_shared():
+    one = bf.BackgroundFieldCache("dir", "file")
+    two = bf.BackgroundFieldCache("dir", "file")
+    one.variables.append("extra")
+    assert two.variables == ["analysed_sst", "sea_ice_fraction"]
+    one.close()
+    two.close()
+
+
+def test_get_fields_prefetches_next_day():
+    with _CountingCache() as cache:
+        fields = cache.get_fields(2000, 2, 28)
+        assert fields["analysed_sst"] == (2000, 2, 28)
+        cache.fields[(2000, 2, 29)].result()
+        assert cache.reads == [(2000, 2, 28), (2000, 2, 29)]
+
+        # the prefetched day is not read again
+        assert cache.get_fields(2000, 2, 29)["sea_ice_fraction"] == (2000, 2, 29)
+        cache.fields[(2000, 3, 1)].result()
+        assert cache.reads == [(2000, 2, 28), (2000, 2, 29), (2000, 3, 1)]
+
+
+def test_prefetch_is_read_in_background():
+    gate = threading.Event()
+    with _CountingCache(gate=gate) as cache:
+        cache.request(2001, 12, 31)
+        future = cache.request(2002, 1, 1)
+        assert not future.done()
+        gate.set()
+        assert future.result()["analysed_sst"] == (2002, 1, 1)
+
+
+def test_least_recently_used_evicted():
+    with _CountingCache(maxsize=3) as cache:
+        cache.get_fields(2003, 5, 1)
+        cache.get_fields(2003, 5, 2)
+        # the requested day is the most recently used, the day after it the next
+        assert list(cache.fields) == [(2003, 5, 1), (2003, 5, 3), (2003, 5, 2)]
+
+        # using day 1 again leaves day 3 the least recently used
+        cache.get_fields(2003, 5, 1)
+        assert list(cache.fields) == [(2003, 5, 3), (2003, 5, 2), (2003, 5, 1)]
+        cache.get_fields(2003, 5, 10)
+        assert list(cache.fields) == [(2003, 5, 1), (2003, 5, 11), (2003, 5, 10)]
+
+        cache.get_fields(2003, 5, 2)
+        cache.fields[(2003, 5, 3)].result()
+        assert cache.reads.count((2003, 5, 1)) == 1
+        assert cache.reads.count((2003, 5, 2)) == 2
+        assert cache.reads.count((2003, 5, 3)) == 2
+
+
+def test_close_stops_reading():
+    with _CountingCache() as cache:
+        cache.get_fields(2004, 7, 1)
+    assert len(cache.fields) == 0
+    with pytest.raises(RuntimeError):
+        cache.request(2004, 7, 2)
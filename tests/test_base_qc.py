@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from _random_data import nanify, random_platforms, random_reports, seeds
+import pytest
+
+import glamod_marine_processing
+from glamod_marine_processing.qc_suite.modules import IMMA1
+from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
+from glamod_marine_processing.qc_suite.modules import base_qc, qc
+from glamod_marine_processing.qc_suite.modules.Climatology import Climatology
+
+parameters_file = os.path.join(
+    os.path.dirname(glamod_marine_processing.__file__),
+    "qc_suite",
+    "configuration_files",
+    "ParametersCCI.json",
+)
+humidity_variables = ["SHU", "VAP", "CRH", "CWB", "DPD"]
+
+
+def _none(value):
+    return None if np.isnan(value) else value
+
+
+def _scalar_report(record):
+    """Set up a MarineReportQC from a row as marine_qc did before the column-wise QC."""
+    imma = IMMA1.IMMA()
+    imma.data = {k: v for k, v in record.items() if k not in humidity_variables}
+    rep = ex.MarineReportQC(imma)
+    for var in ["SST", "AT", "SLP2"]:
+        rep.add_climate_variable(var, _none(record["clim_" + var]))
+    for var in ["DPT", "AT2", "SLP"]:
+        rep.add_climate_variable(
+            var, _none(record["clim_" + var]), _none(record["stdev_" + var])
+        )
+    rep.calculate_humidity_variables(humidity_variables)
+    return rep
+
+
+@seeds()
+def test_perform_base_qc(seed):
+    with open(parameters_file) as fh:
+        parameters = json.load(fh)
+    frame = random_reports(seed)
+    flags = base_qc.perform_base_qc(frame.copy(), parameters)
+
+    for i, record in enumerate(frame.to_dict("records")):
+        rep = _scalar_report(record)
+        for var in humidity_variables:
+            assert rep.getvar(var) == _none(frame[var].iloc[i])
+        rep.perform_base_qc(parameters)
+        expected = dict(rep.qc.items())
+        # the flag columns are named <QC type>_<flag>
+        result = {c.replace("_", "", 1): int(flags[c].iloc[i]) for c in flags.columns}
+        assert result == expected, record["UID"]
+
+
+def _scalar_deck(frame, flags, ext):
+    """Make a Deck one report at a time as marine_qc did before Deck.from_table."""
+    qc_keys = [name.replace("_", "", 1) for name in flags.columns]
+    clim_names = [name[5:] for name in frame.columns if name.startswith("clim_")]
+    deck = ex.Deck()
+    for record, qc_values, rep_ext in zip(
+        frame.to_dict("records"), flags.to_numpy().tolist(), ext
+    ):
+        imma = IMMA1.IMMA()
+        imma.data = dict(record)
+        rep = ex.MarineReportQC(imma)
+        for var in clim_names:
+            rep.add_climate_variable(
+                var,
+                _none(record["clim_" + var]),
+                _none(record.get("stdev_" + var, np.nan)),
+            )
+        for k, v in rep_ext.items():
+            rep.setext(k, v)
+        rep.qc = dict(zip(qc_keys, qc_values))
+        deck.append(rep)
+    return deck
+
+
+def _assert_same_report(rep, expected):
+    np.testing.assert_array_equal(rep.data, expected.data)
+    assert type(rep) is type(expected)
+    assert (rep.id, rep.uid, rep.dt) == (expected.id, expected.uid, expected.dt)
+    assert rep.qc == expected.qc
+    assert rep.ext == expected.ext
+    assert {k: (v.clim, v.stdev) for k, v in rep.climate_variables.items()} == {
+        k: (v.clim, v.stdev) for k, v in expected.climate_variables.items()
+    }
+
+
+@seeds()
+def test_deck_from_table(seed, tmp_path, capsys):
+    with open(parameters_file) as fh:
+        parameters = json.load(fh)
+    frame = random_reports(seed)
+    frame["DS"] = np.random.default_rng(seed).choice([0, 3, 9, np.nan], len(frame))
+    frame["VS"] = np.random.default_rng(seed + 1).choice([0, 2, np.nan], len(frame))
+    frame["clim_OTHER"] = frame["clim_SST"]
+    frame.loc[::7, "ID"] = np.nan
+    flags = base_qc.perform_base_qc(frame.copy(), parameters)
+    flags["POS_month_match"] = (frame["MO"] == 1).astype(int)
+    ext = [{"OSTIA": 20.0, "ICE": None} if i % 3 else {} for i in range(len(frame))]
+
+    deck = ex.Deck.from_table(frame, flags, ext, ex.MarineReportQC)
+    expected = _scalar_deck(frame, flags, ext)
+    assert len(deck) == len(expected)
+    assert [str(k) for k in deck.idtracker] == [str(k) for k in expected.idtracker]
+    assert list(deck.idtracker.values()) == list(expected.idtracker.values())
+    np.testing.assert_array_equal(deck.table(), expected.table())
+
+    # make some of the reports and set flags before and after they are made
+    made = np.random.default_rng(seed).random(len(frame)) < 0.3
+    values = np.random.default_rng(seed + 2).integers(0, 10, len(frame))
+    for one_deck in [deck, expected]:
+        one_deck.set_qc_array("SST", "bud", values)
+        for i in np.flatnonzero(made):
+            one_deck.rep(i).set_qc("POS", "trk", 1)
+        one_deck.set_qc("AT", "bbud", 3)
+        one_deck.set_qc_array("POS", "extra_flag", values[::-1].copy())
+        one_deck.set_qc_array("POS", "drf_spd", values[::-1] % 2)
+    # the flags are packed into 64-bit columns, with the last POS flags in a second column
+    assert "_qc_POS1" in deck._rows.qc
+    assert all(packed.dtype == np.uint64 for packed in deck._rows.qc.values())
+
+    for qc_type, flag_names in ex.QC_FLAGS.items():
+        for flag in flag_names + ["extra_flag"]:
+            np.testing.assert_array_equal(
+                deck.get_qc(qc_type, flag), expected.get_qc(qc_type, flag)
+            )
+    for rep, expected_rep in zip(deck.reps, expected.reps):
+        _assert_same_report(rep, expected_rep)
+
+    # only the reports of the month are made to write them out
+    deck = ex.Deck.from_table(frame, flags, ext, ex.MarineReportQC)
+    expected = _scalar_deck(frame, flags, ext)
+    for one_deck, name in [(deck, "table"), (expected, "scalar")]:
+        (tmp_path / name).mkdir()
+        one_deck.write_output("run", str(tmp_path / name), 1969, 2)
+    in_month = np.flatnonzero(deck.in_month(1969, 2))
+    assert set(deck._rows.made) == {0, *in_month.tolist()}
+    for path in sorted((tmp_path / "scalar").iterdir()):
+        assert (tmp_path / "table" / path.name).read_text() == path.read_text()
+
+
+def _voyage_checks(one_ship, parameters):
+    """The platform checks as marine_qc ran them on a Voyage before Deck.check_platforms."""
+    one_ship.track_check(parameters["track_check"])
+    one_ship.iquam_track_check(parameters["IQUAM_track_check"])
+    one_ship.spike_check(parameters["IQUAM_spike_check"])
+    one_ship.find_saturated_runs(parameters["saturated_runs"])
+    one_ship.find_multiple_rounded_values(parameters["multiple_rounded_values"])
+    for varname in ["SST", "AT", "AT2", "DPT", "SLP"]:
+        one_ship.find_repeated_values(
+            parameters["find_repeated_values"], intype=varname
+        )
+
+
+@pytest.fixture
+def marine_qc(monkeypatch):
+    """The marine_qc script, whose track_check_platform is run on each platform."""
+    monkeypatch.syspath_prepend(
+        os.path.join(
+            os.path.dirname(glamod_marine_processing.__file__), "qc_suite", "scripts"
+        )
+    )
+    import marine_qc
+
+    return marine_qc
+
+
+@seeds()
+def test_check_platforms(seed, marine_qc):
+    with open(parameters_file) as fh:
+        parameters = json.load(fh)
+    frame, flags = random_platforms(seed)
+    ext = [{} for _ in range(len(frame))]
+    filt = ex.QC_filter()
+    for flag in ["date", "time", "pos", "blklst"]:
+        filt.add_qc_filter("POS", flag, 0)
+
+    expected = _scalar_deck(frame, flags, ext)
+    expected.add_filter(filt)
+    for one_ship in expected.get_one_platform_at_a_time():
+        _voyage_checks(one_ship, parameters)
+
+    # a Deck made from the table, with some of the reports made, and one made report by report
+    deck = ex.Deck.from_table(frame, flags, ext, ex.MarineReportQC)
+    for i in np.flatnonzero(np.random.default_rng(seed).random(len(frame)) < 0.3):
+        deck.rep(i)
+    for one_deck in [deck, _scalar_deck(frame, flags, ext)]:
+        one_deck.add_filter(filt)
+        count = one_deck.check_platforms(
+            marine_qc.track_check_platform, (parameters,), processes=1
+        )
+        assert count == len(expected.idtracker)
+        for rep, expected_rep in zip(one_deck.reps, expected.reps):
+            _assert_same_report(rep, expected_rep)
+
+
+def test_check_platforms_pool(marine_qc):
+    with open(parameters_file) as fh:
+        parameters = json.load(fh)
+    frame, flags = random_platforms(3)
+    filt = ex.QC_filter()
+    for flag in ["date", "time", "pos", "blklst"]:
+        filt.add_qc_filter("POS", flag, 0)
+
+    decks = []
+    for processes in [1, 2]:
+        deck = ex.Deck.from_table(frame, flags, None, ex.MarineReportQC)
+        deck.rep(0)
+        deck.add_filter(filt)
+        deck.check_platforms(marine_qc.track_check_platform, (parameters,), processes)
+        decks.append(deck)
+
+    np.testing.assert_array_equal(decks[0].table(), decks[1].table())
+    for rep, expected_rep in zip(decks[1].reps, decks[0].reps):
+        _assert_same_report(rep, expected_rep)
+
+
+class _Background:
+    """Daily OSTIA fields made from one random field, the day added to its values."""
+
+    def __init__(self, seed):
+        rng = np.random.default_rng(seed)
+        shape = (1, 3600, 7200)
+        self.sst = rng.uniform(270, 305, shape).astype(np.float32)
+        self.ice = rng.uniform(0, 1, shape).astype(np.float32)
+        self.mask = rng.random(shape) < 0.3
+        self.fields = {}
+
+    def get_fields(self, year, month, day):
+        if day not in self.fields:
+            self.fields[day] = {
+                "analysed_sst": Climatology(
+                    np.ma.array(self.sst + day, mask=self.mask)
+                ),
+                "sea_ice_fraction": Climatology(
+                    np.ma.array(self.ice / day, mask=self.mask[:, ::-1])
+                ),
+            }
+        return self.fields[day]
+
+
+@seeds()
+def test_ostia_lookup(seed, marine_qc):
+    rng = np.random.default_rng(seed)
+    n = 3000
+    frame = pd.DataFrame(
+        {
+            "LAT": np.round(rng.uniform(-90, 90, n), 3),
+            "LON": np.round(rng.uniform(-180, 360, n), 3),
+            "DY": nanify(rng, rng.choice([1, 2, 3], n), 0.05),
+        }
+    )
+    # positions on the OSTIA grid cell borders
+    border = frame.index < n // 3
+    frame.loc[border, ["LAT", "LON"]] = (
+        np.round(frame.loc[border, ["LAT", "LON"]] * 20) / 20
+    )
+    background = _Background(seed)
+    bg_var = rng.uniform(0, 2, (73, 180, 360))
+    ostia_bg_var = Climatology(np.ma.array(bg_var, mask=rng.random(bg_var.shape) < 0.2))
+    ext = [{} for _ in range(n)]
+    marine_qc.ostia_lookup(
+        frame, ext, 2000, 3, ostia_bg_var, background, ex.ClimatologyLibrary()
+    )
+
+    # the fields of the day before each report, looked up report by report
+    for i, record in enumerate(frame.to_dict("records")):
+        if np.isnan(record["DY"]):
+            assert ext[i] == {}
+            continue
+        fields = background.get_fields(*qc.yesterday(2000, 3, int(record["DY"])))
+        lat = record["LAT"]
+        lon = record["LON"] - 360.0 if record["LON"] > 180 else record["LON"]
+        ostia = fields["analysed_sst"].get_value_ostia(lat, lon)
+        if ostia is not None:
+            ostia -= 273.15
+        ice = fields["sea_ice_fraction"].get_value_ostia(lat, lon)
+        bgvar = ostia_bg_var.get_value_mds_style(lat, lon, 3, int(record["DY"]))
+        assert ext[i] == {"OSTIA": ostia, "ICE": ice, "BGVAR": bgvar}
+        for name, value in [("OSTIA", ostia), ("ICE", ice), ("BGVAR", bgvar)]:
+            assert type(ext[i][name]) is type(value)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+from _random_data import random_blacklist_reports, seeds
+
+from glamod_marine_processing.qc_suite.modules import Blacklist as bl
+from glamod_marine_processing.qc_suite.modules import base_qc, qc
+
+
+def _scalar_blacklist(inid, indeck, inyear, inmonth, inlat, inlon, inpt):
+    return [
+        qc.blacklist(i, int(d), int(y), int(m), la, lo, int(p))
+        for i, d, y, m, la, lo, p in zip(
+            inid, indeck, inyear, inmonth, inlat, inlon, inpt
+        )
+    ]
+
+
+@seeds()
+def test_blacklist(seed):
+    reports = random_blacklist_reports(seed)
+    expected = _scalar_blacklist(*reports)
+    np.testing.assert_array_equal(base_qc.blacklist(*reports), expected)
+
+
+def test_blacklist_rules():
+    reports = random_blacklist_reports(3)
+    inid, indeck, inyear, inmonth, inlat, inlon, inpt = reports
+    rules = bl.get_blacklist(
+        {
+            "blacklist_rules": [
+                {"DCK": [926], "YR": [1990], "regions": [[-10, -10, 10, 10]]},
+                {"YRMO": [[1960, 2]], "PT": [7]},
+            ]
+        }
+    )
+    result = base_qc.blacklist(*reports, rules)
+    inlon = np.where(inlon > 180, inlon - 360, inlon)
+    extra = (indeck == 926) & (inyear == 1990) & (abs(inlat) <= 10) & (abs(inlon) <= 10)
+    extra |= (inyear == 1960) & (inmonth == 2) & (inpt == 7)
+    assert extra.any()
+    expected = np.array(_scalar_blacklist(*reports)) | extra
+    np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
+from glamod_marine_processing.qc_suite.modules import qc
+from glamod_marine_processing.qc_suite.modules.Climatology import Climatology
+
+
+def _naive_circular_window_sum(field, span, axis):
+    field = np.moveaxis(field, axis, 0)
+    length = field.shape[0]
+    result = np.zeros(field.shape)
+    for i in range(length):
+        for offset in range(-span, span + 1):
+            result[i] += field[(i + offset) % length]
+    return np.moveaxis(result, 0, axis)
+
+
+def _random_grid(seed, n=300):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-60, 60, n)
+    # some reports near the poles, where the longitude window wraps around
+    lat[:20] = rng.uniform(85, 90, 20)
+    lat[20:30] = rng.uniform(-90, -88, 10)
+    lon = rng.uniform(-180, 180, n)
+    # clusters of reports so that gridcells have neighbours
+    lat[30:200] = rng.uniform(10, 14, 170)
+    lon[30:200] = rng.uniform(-30, -26, 170)
+    month = rng.choice([1, 2, 12], n)
+    day = rng.integers(1, 29, n)
+    anom = rng.normal(0, 1, n)
+    grid = ex.Np_Super_Ob()
+    for values in zip(lat, lon, month, day, anom):
+        grid.add_rep(values[0], values[1], 2000, values[2], values[3], values[4])
+    grid.take_average()
+    return grid
+
+
+def _occupied(grid):
+    for pindex in grid.nobs:
+        for xindex, yindex in zip(*np.nonzero(grid.nobs[pindex])):
+            yield xindex, yindex, pindex
+
+
+@pytest.mark.parametrize("span", [0, 1, 2, 5, 6, 7, 13])
+@pytest.mark.parametrize("axis", [0, 1])
+def test_circular_window_sum(span, axis):
+    field = np.random.default_rng(span).normal(0, 1, (6, 5))
+    np.testing.assert_allclose(
+        ex._circular_window_sum(field, span, axis),
+        _naive_circular_window_sum(field, span, axis),
+        rtol=0,
+        atol=1e-12,
+    )
+
+
+def test_longitude_window_sum():
+    rng = np.random.default_rng(0)
+    field = rng.normal(0, 1, (360, 180))
+    full_xspan = rng.choice([0, 1, 2, 200, 400], 180).tolist()
+    result = ex._longitude_window_sum(field, full_xspan)
+    for yindex in rng.choice(180, 20, replace=False):
+        expected = _naive_circular_window_sum(field[:, [yindex]], full_xspan[yindex], 0)
+        np.testing.assert_allclose(result[:, yindex], expected[:, 0], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("search_radius", [[1, 1, 2], [2, 2, 4]])
+def test_get_neighbour_sums(search_radius):
+    grid = _random_grid(0)
+    count, anomaly_sum, nobs_sum, inverse_nobs_sum = grid.get_neighbour_sums(
+        search_radius
+    )
+    for xindex, yindex, pindex in _occupied(grid):
+        anomalies, nobs = grid.get_neighbour_anomalies(
+            search_radius, xindex, yindex, pindex
+        )
+        assert count[pindex][xindex, yindex] == len(anomalies)
+        assert anomaly_sum[pindex][xindex, yindex] == pytest.approx(
+            sum(anomalies), abs=1e-9
+        )
+        assert nobs_sum[pindex][xindex, yindex] == sum(nobs)
+        assert inverse_nobs_sum[pindex][xindex, yindex] == pytest.approx(
+            sum(1.0 / np.array(nobs)), abs=1e-9
+        )
+
+
+def _random_stdevs(seed, masked=False):
+    rng = np.random.default_rng(seed)
+    field = rng.uniform(-0.5, 2.0, (73, 180, 360))
+    if masked:
+        field = np.ma.array(field, mask=rng.random(field.shape) < 0.2)
+    return Climatology(field)
+
+
+def _stdev(value):
+    if value is None or value < 0.0:
+        return 1.0
+    return value
+
+
+def _gridcell_date(xindex, yindex, pindex):
+    month, day = qc.pentad_to_month_day(pindex + 1)
+    return 89.5 - yindex, -179.5 + xindex, month, day
+
+
+def test_get_neighbour_sums_for_some_pentads():
+    grid = _random_grid(1)
+    pentads = list(grid.nobs)[:2]
+    full = grid.get_neighbour_sums([1, 1, 2])
+    some = grid.get_neighbour_sums([1, 1, 2], pentads)
+    for full_sums, sums in zip(full, some):
+        assert list(sums) == pentads
+        for pindex in pentads:
+            np.testing.assert_array_equal(sums[pindex], full_sums[pindex])
+
+
+def test_get_buddy_limits():
+    limits = [[1, 1, 2], [2, 2, 2], [1, 1, 4], [2, 2, 4]]
+    thresholds = [[0, 5, 15, 100], [0], [0, 5, 15, 100], [0]]
+    multipliers = [[4.0, 3.5, 3.0, 2.5], [4.0], [4.0, 3.5, 3.0, 2.5], [4.0]]
+    pentad_stdev = _random_stdevs(2, masked=True)
+    grid = _random_grid(2)
+    grid.get_buddy_limits(pentad_stdev)
+
+    for xindex, yindex, pindex in _occupied(grid):
+        stdev = _stdev(
+            pentad_stdev.get_value_mds_style(*_gridcell_date(xindex, yindex, pindex))
+        )
+        # the first neighbourhood with neighbours sets the limits
+        buddy_mean, buddy_stdev = 0.0, 500.0
+        for j, limit in enumerate(limits):
+            anomalies, nobs = grid.get_neighbour_anomalies(
+                limit, xindex, yindex, pindex
+            )
+            if len(anomalies) > 0:
+                buddy_mean = np.mean(anomalies)
+                buddy_stdev = stdev * ex.get_threshold_multiplier(
+                    np.sum(nobs), thresholds[j], multipliers[j]
+                )
+                break
+        assert grid.buddy_mean[pindex][xindex, yindex] == pytest.approx(
+            buddy_mean, abs=1e-9
+        )
+        assert grid.buddy_stdev[pindex][xindex, yindex] == pytest.approx(
+            buddy_stdev, abs=1e-9
+        )
+
+
+def test_get_new_buddy_limits():
+    stdev1, stdev2, stdev3 = (_random_stdevs(seed) for seed in [3, 4, 5])
+    sigma_m, noise_scaling = 1.0, 3.0
+    grid = _random_grid(3)
+    grid.get_new_buddy_limits(stdev1, stdev2, stdev3, [2, 2, 4], sigma_m, noise_scaling)
+
+    for xindex, yindex, pindex in _occupied(grid):
+        date = _gridcell_date(xindex, yindex, pindex)
+        s1, s2, s3 = (
+            _stdev(stdev.get_value(*date)) for stdev in [stdev1, stdev2, stdev3]
+        )
+        anomalies, nobs = grid.get_neighbour_anomalies(
+            [2, 2, 4], xindex, yindex, pindex
+        )
+        buddy_mean, buddy_stdev = 0.0, 500.0
+        if len(anomalies) > 0:
+            buddy_mean = np.mean(anomalies)
+            tot = sum((sigma_m**2 + noise_scaling * s2**2) / n for n in nobs)
+            ntot = len(nobs)
+            sigma_buddy = tot / ntot**2 + s3**2 / ntot
+            buddy_stdev = np.sqrt(
+                sigma_m**2 + s1**2 + noise_scaling * s2**2 + sigma_buddy
+            )
+        assert grid.buddy_mean[pindex][xindex, yindex] == pytest.approx(
+            buddy_mean, abs=1e-9
+        )
+        assert grid.buddy_stdev[pindex][xindex, yindex] == pytest.approx(
+            buddy_stdev, abs=1e-9
+        )
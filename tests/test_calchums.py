@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import numpy as np
+from _random_data import random_humidities, seeds
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import CalcHums
+
+
+@seeds()
+@pytest.mark.parametrize("roundit", [True, False])
+@pytest.mark.parametrize(
+    "scalar_function, array_function",
+    [
+        (CalcHums.vap, CalcHums.vap_array),
+        (CalcHums.sh, CalcHums.sh_array),
+        (CalcHums.rh, CalcHums.rh_array),
+        (CalcHums.wb, CalcHums.wb_array),
+    ],
+)
+def test_array_functions(seed, roundit, scalar_function, array_function):
+    td, t, p = random_humidities(seed)
+    expected = [scalar_function(*values, roundit=roundit) for values in zip(td, t, p)]
+    np.testing.assert_array_equal(array_function(td, t, p, roundit=roundit), expected)
+
+
+@seeds()
+@pytest.mark.parametrize("roundit", [True, False])
+def test_dpd_array(seed, roundit):
+    td, t, _ = random_humidities(seed)
+    expected = [CalcHums.dpd(*values, roundit=roundit) for values in zip(td, t)]
+    np.testing.assert_array_equal(CalcHums.dpd_array(td, t, roundit=roundit), expected)
+
+
+def test_ice_and_water():
+    # the pseudo-wet bulb decides between ice and water either side of 0 deg C
+    td = np.array([-5.0, -0.1, 0.0, 0.1, 5.0])
+    t = td + 1.0
+    p = np.full(len(td), 1013.0)
+    expected = [CalcHums.vap(*values, roundit=False) for values in zip(td, t, p)]
+    np.testing.assert_array_equal(CalcHums.vap_array(td, t, p, roundit=False), expected)
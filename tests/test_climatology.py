@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pytest
+from _random_data import seeds
+from netCDF4 import Dataset
+
+from glamod_marine_processing.qc_suite.modules.Climatology import Climatology
+
+
+def _write_climatology(filename, ntimes, seed=0, var="sst"):
+    """Write a 1x1 degree climatology of ntimes fields, with some missing values."""
+    rng = np.random.default_rng(seed)
+    field = rng.normal(15, 10, (ntimes, 180, 360)).astype(np.float32)
+    field[rng.random(field.shape) < 0.2] = -999.0
+    with Dataset(filename, "w") as nc:
+        nc.createDimension("time", ntimes)
+        nc.createDimension("latitude", 180)
+        nc.createDimension("longitude", 360)
+        lat = nc.createVariable("latitude", "f4", ("latitude",))
+        lat[:] = np.arange(89.5, -90, -1)
+        lon = nc.createVariable("longitude", "f4", ("longitude",))
+        lon[:] = np.arange(-179.5, 180, 1)
+        values = nc.createVariable(
+            var, "f4", ("time", "latitude", "longitude"), fill_value=-999.0
+        )
+        values[:] = field
+
+
+def _random_points(seed, n=300):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-90, 90, n)
+    lon = rng.uniform(-180, 180, n)
+    # some points on the grid cell borders
+    lat[:30] = np.round(lat[:30])
+    lon[:30] = np.round(lon[:30])
+    month = rng.integers(1, 13, n)
+    day = rng.integers(1, 32, n)
+    return lat, lon, month, day
+
+
+def _scalar_values(getter, lat, lon, month, day):
+    values = [getter(*point) for point in zip(lat, lon, month.tolist(), day.tolist())]
+    return np.array([np.nan if value is None else value for value in values])
+
+
+@pytest.mark.parametrize("ntimes", [1, 73, 365])
+def test_cached_climatology(tmp_path, ntimes):
+    infile = str(tmp_path / "clim.nc")
+    _write_climatology(infile, ntimes)
+    cache_dir = str(tmp_path / "cache")
+
+    uncached = Climatology.from_filename(infile, "sst")
+    # the first read saves the cache and the second reads it
+    first = Climatology.from_filename(infile, "sst", cache_dir)
+    cached = Climatology.from_filename(infile, "sst", cache_dir)
+    assert isinstance(cached.field.data, np.memmap)
+
+    lat, lon, month, day = _random_points(ntimes)
+    expected = uncached.get_values(lat, lon, month, day)
+    for clim in [first, cached]:
+        np.testing.assert_array_equal(clim.get_values(lat, lon, month, day), expected)
+        np.testing.assert_array_equal(
+            _scalar_values(clim.get_value, lat, lon, month, day),
+            _scalar_values(uncached.get_value, lat, lon, month, day),
+        )
+        np.testing.assert_array_equal(
+            clim.get_values_mds_style(lat, lon, month, day),
+            uncached.get_values_mds_style(lat, lon, month, day),
+        )
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
+
+
+def test_cache_pruned(tmp_path):
+    infile = str(tmp_path / "clim.v1.nc")
+    other = str(tmp_path / "other" / "clim.v1.nc")
+    os.makedirs(os.path.dirname(other))
+    cache_dir = str(tmp_path / "cache")
+    _write_climatology(infile, 1, var="sst")
+    _write_climatology(other, 1, var="sst")
+    Climatology.from_filename(infile, "sst", cache_dir)
+    Climatology.from_filename(other, "sst", cache_dir)
+    old_name = Climatology.cache_filename(infile, "sst", cache_dir)
+    other_name = Climatology.cache_filename(other, "sst", cache_dir)
+
+    # a new version of the file replaces the cached copy of the old one
+    _write_climatology(infile, 1, seed=1, var="sst")
+    os.utime(infile, ns=(0, os.stat(old_name + ".npy").st_mtime_ns + 10**9))
+    new = Climatology.from_filename(infile, "sst", cache_dir)
+    new_name = Climatology.cache_filename(infile, "sst", cache_dir)
+    assert new_name != old_name
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        os.path.basename(name) + extension
+        for name in [new_name, other_name]
+        for extension in [".npy", ".mask.npy"]
+    )
+    np.testing.assert_array_equal(
+        new.field, Climatology.from_filename(infile, "sst").field
+    )
+
+
+def test_write_cache_cleans_up(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / "cache" / "clim_sst")
+    field = np.ma.array(np.ones((1, 180, 360)), mask=False)
+
+    def fail(fp, array):
+        fp.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(np, "save", fail)
+    with pytest.raises(OSError, match="disk full"):
+        Climatology.write_cache(cache_file, field)
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def _random_lookups(seed, n=2000):
+    """Positions and dates, some missing or invalid, on pentad boundaries or leap days."""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-90, 90, n)
+    lon = rng.uniform(-180, 360, n)
+    # grid cell borders, the poles and the date line
+    lat[:100] = rng.integers(-90, 91, 100)
+    lon[:100] = rng.integers(-180, 361, 100)
+    lat[100:110] = rng.choice([-90.0, 90.0], 10)
+    lon[110:120] = rng.choice([-180.0, 180.0, 0.0, 360.0], 10)
+    month = rng.integers(1, 13, n).astype(float)
+    day = rng.integers(1, 29, n).astype(float)
+    # pentad boundaries, leap days and the ends of months
+    dates = [(1, 5), (1, 6), (2, 28), (2, 29), (3, 1), (12, 26), (12, 27), (12, 31)]
+    chosen = rng.integers(0, len(dates), 400)
+    month[200:600] = [dates[i][0] for i in chosen]
+    day[200:600] = [dates[i][1] for i in chosen]
+    # missing and invalid dates and positions
+    month[600:650] = np.nan
+    day[650:700] = np.nan
+    month[700:720] = rng.choice([0, 13], 20)
+    day[720:760] = rng.choice([0, 30, 31, 32], 40)
+    month[720:760] = 2
+    lat[760:780] = np.nan
+    lon[780:800] = np.nan
+    return lat, lon, month, day
+
+
+def _random_field(seed, ntimes, nlat=180, dtype=np.float32):
+    rng = np.random.default_rng(seed)
+    field = rng.normal(15, 10, (ntimes, nlat, 2 * nlat)).astype(dtype)
+    return np.ma.array(field, mask=rng.random(field.shape) < 0.2)
+
+
+def _scalar_lookups(getter, lat, lon, month, day):
+    """Values of a scalar getter, NaN where it gives None or the position is missing."""
+    values = []
+    for la, lo, mo, dy in zip(lat, lon, month, day):
+        if np.isnan(la) or np.isnan(lo):
+            values.append(np.nan)
+            continue
+        mo = None if np.isnan(mo) else int(mo)
+        dy = None if np.isnan(dy) else int(dy)
+        value = getter(la, lo, mo, dy)
+        values.append(np.nan if value is None else float(value))
+    return np.array(values)
+
+
+@seeds()
+@pytest.mark.parametrize("ntimes", [1, 73, 365])
+@pytest.mark.parametrize("nlat", [180, 36])
+def test_get_values(seed, ntimes, nlat):
+    clim = Climatology(_random_field(seed, ntimes, nlat))
+    lat, lon, month, day = _random_lookups(seed)
+    np.testing.assert_array_equal(
+        clim.get_values(lat, lon, month, day),
+        _scalar_lookups(clim.get_value, lat, lon, month, day),
+    )
+
+
+@seeds()
+@pytest.mark.parametrize("ntimes", [1, 73, 365])
+def test_get_values_mds_style(seed, ntimes):
+    clim = Climatology(_random_field(seed, ntimes))
+    lat, lon, month, day = _random_lookups(seed)
+    # the MDS method takes longitudes from -180 to 180
+    lon = np.where(lon > 180, lon - 360.0, lon)
+    np.testing.assert_array_equal(
+        clim.get_values_mds_style(lat, lon, month, day),
+        _scalar_lookups(clim.get_value_mds_style, lat, lon, month, day),
+    )
+
+
+def test_get_values_ostia():
+    clim = Climatology(_random_field(0, 1, nlat=3600))
+    lat, lon, _, _ = _random_lookups(0)
+    lon = np.where(lon > 180, lon - 360.0, lon)
+    # OSTIA grid cell borders
+    lat[120:200] = np.round(lat[120:200], 2)
+    lon[120:200] = np.round(lon[120:200], 2)
+    np.testing.assert_array_equal(
+        clim.get_values_ostia(lat, lon),
+        _scalar_lookups(
+            lambda la, lo, mo, dy: clim.get_value_ostia(la, lo), lat, lon, lat, lon
+        ),
+    )
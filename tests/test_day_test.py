@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+from _random_data import random_times, seeds
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import qc, trackqc
+
+
+@seeds()
+def test_dayinyear_array(seed):
+    year, month, day, _, _, _ = random_times(seed)
+    expected = [qc.dayinyear(*values) for values in zip(year, month, day)]
+    np.testing.assert_array_equal(qc.dayinyear_array(year, month, day), expected)
+
+
+@seeds()
+def test_sun_elevation_array(seed):
+    year, month, day, hour, lat, lon = random_times(seed)
+    dayinyear = qc.dayinyear_array(year, month, day)
+    # as in the day tests, which keep away from the equator
+    lat = np.where(lat == 0, 0.0001, lat)
+    minute = (hour - np.floor(hour)) * 60.0
+    expected = [
+        qc.sunangle(y, d, h, m, 0, 0, 0, la, lo)[1]
+        for y, d, h, m, la, lo in zip(year, dayinyear, np.floor(hour), minute, lat, lon)
+    ]
+    result = qc.sun_elevation_array(
+        year, dayinyear, np.floor(hour), minute, 0, 0, 0, lat, lon
+    )
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+
+@seeds()
+@pytest.mark.parametrize("time_since_sun_above_horizon", [1.0, 0.0])
+def test_day_test_array(seed, time_since_sun_above_horizon):
+    times = random_times(seed)
+    expected = [
+        qc.day_test(*values, time_since_sun_above_horizon) for values in zip(*times)
+    ]
+    result = qc.day_test_array(*times, time_since_sun_above_horizon)
+    np.testing.assert_array_equal(result, expected)
+
+
+@seeds()
+@pytest.mark.parametrize("elevdlim", [-2.5, 0.0])
+def test_track_day_test_array(seed, elevdlim):
+    times = random_times(seed)
+    expected = [trackqc.track_day_test(*values, elevdlim) for values in zip(*times)]
+    result = trackqc.track_day_test_array(*times, elevdlim)
+    np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import importlib
+import os
+import pickle  # noqa: S403
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from cdm_reader_mapper.cdm_mapper import properties
+from cdm_reader_mapper.cdm_mapper.tables.tables import get_cdm_atts
+
+import glamod_marine_processing
+
+scripts_dir = os.path.join(
+    os.path.dirname(glamod_marine_processing.__file__), "obs_suite", "scripts"
+)
+file_id = "2022-01-release_8.0-000000"
+
+
+@pytest.fixture
+def level1a(monkeypatch):
+    monkeypatch.syspath_prepend(scripts_dir)
+    return importlib.import_module("level1a")
+
+
+def _cdm_tables(tables, first_id, n):
+    """Mapped CDM tables of n reports, with a value for every column of each table."""
+    frames = {}
+    for table in tables:
+        columns = list(get_cdm_atts(table)[table])
+        rows = [
+            [f"{table}{first_id + i}{column}" for column in columns] for i in range(n)
+        ]
+        frames[table] = pd.DataFrame(rows, columns=columns)
+    return pd.concat(frames, axis=1)
+
+
+def test_write_out_tables(level1a, tmp_path):
+    params = SimpleNamespace(level_path=str(tmp_path), fileID=file_id)
+    stats = SimpleNamespace(totals=Counter(), written_files=set())
+    # the first chunk has no SST table and the second no wet bulb temperatures
+    first = _cdm_tables(["header", "observations-at", "observations-wbt"], 0, 3)
+    second = _cdm_tables(["header", "observations-at", "observations-sst"], 3, 2)
+    level1a.write_out_tables(first, params, stats)
+    level1a.write_out_tables(second, params, stats)
+
+    for table in properties.cdm_tables:
+        filename = tmp_path / f"{table}-{file_id}.psv"
+        expected = pd.concat(
+            [chunk[table] for chunk in [first, second] if table in chunk]
+            or [pd.DataFrame(columns=list(get_cdm_atts(table)[table]))]
+        )
+        pd.testing.assert_frame_equal(
+            pd.read_csv(filename, sep="|", dtype=object),
+            expected.reset_index(drop=True),
+            check_index_type=False,
+        )
+        assert stats.totals[table] == len(expected)
+
+
+def _read_lines(filename, pd_kwargs=None, **kwargs):
+    """Read the records of a file with a record on each line, and a validation mask."""
+    data = pd.read_csv(
+        filename, header=None, names=["report"], dtype=object, **pd_kwargs
+    )
+    data["id"] = data["report"].str[:8]
+    mask = pd.DataFrame(True, index=data.index, columns=data.columns)
+    return SimpleNamespace(data=data, mask=mask)
+
+
+def _write_lines(filename, n, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJ"))
+    with open(filename, "w") as fh:
+        for i in range(n):
+            fh.write(f"{i:08d}" + "".join(rng.choice(letters, 92)) + "\n")
+
+
+def _params(job_memo_mb, map_processes=None, data_model="imma1"):
+    return SimpleNamespace(
+        job_memo_mb=job_memo_mb, map_processes=map_processes, data_model=data_model
+    )
+
+
+def test_get_chunksize(level1a):
+    assert level1a.get_chunksize(_params(None), 1000.0, 10**6) is None
+    assert level1a.get_chunksize(_params(10), 1000.0, 10000) is None
+    assert level1a.get_chunksize(_params(10), 1000.0, 10**6) == 10485
+    assert level1a.get_chunksize(_params(0.1), 1000.0, 10**6) == level1a.probe_records
+
+
+@pytest.mark.parametrize("map_processes", [None, 1, 4])
+def test_record_memory(level1a, tmp_path, map_processes):
+    _write_lines(tmp_path / "lines.txt", 500)
+    probe = _read_lines(tmp_path / "lines.txt", {})
+    nbytes = (
+        probe.data.memory_usage(deep=True).sum()
+        + probe.mask.memory_usage(deep=True).sum()
+    )
+    # the chunk being processed, and two pending chunks and their pickles per process
+    expected = level1a.processing_factor * nbytes * (1 + 2 * (map_processes or 0))
+    if map_processes:
+        expected += (
+            2 * map_processes * len(pickle.dumps(probe.data, pickle.HIGHEST_PROTOCOL))
+        )
+    assert level1a.record_memory(
+        probe.data, probe.mask, map_processes
+    ) == pytest.approx(expected / 500)
+
+
+@pytest.mark.parametrize("map_processes", [None, 2])
+def test_probe_chunksize(level1a, tmp_path, monkeypatch, map_processes):
+    n = 20000
+    filename = tmp_path / "lines.txt"
+    _write_lines(filename, n)
+    monkeypatch.setattr(level1a, "read_mdf", _read_lines)
+    probe = _read_lines(filename, {"nrows": level1a.probe_records})
+    bytes_per_record = level1a.record_memory(probe.data, probe.mask, map_processes)
+
+    # the number of records is estimated from the size of the first lines
+    job_memo_mb = bytes_per_record * (n + 10) / 2**20
+    params = _params(job_memo_mb, map_processes)
+    assert level1a.probe_chunksize(params, filename, {}) is None
+    job_memo_mb = bytes_per_record * (n - 10.5) / 2**20
+    params = _params(job_memo_mb, map_processes)
+    assert level1a.probe_chunksize(params, filename, {}) == n - 11
+    # the records are only counted from the lines for data models with a line per record
+    params = _params(job_memo_mb, map_processes, data_model="gdac")
+    assert level1a.probe_chunksize(params, filename, {}) is None
+
+
+def _baseline_invalid(chunks, dtypes):
+    """Invalid values of the quicklook as level1a summarized them from all the values.
+
+    The histogram counts were numpy integers, written to the quicklook json as null,
+    here they are converted to int. Nulls, which could fail the sorting of the values
+    of object columns, are counted as nan.
+    """
+    invalid = {}
+    columns = {}
+    for data, mask in chunks:
+        mask = mask.copy()
+        mask["global_mask"] = mask.all(axis=1)
+        for col in [x for x in mask if not all(mask[x].isna())]:
+            k = ".".join(col)
+            invalid.setdefault(k, {"total": 0, "values": []})
+            columns[k] = col
+            invalid[k]["total"] += len(mask[col].loc[~mask[col]])
+            if col in data:
+                invalid[k]["values"].extend(data[col].loc[~mask[col]].values)
+    for k, col in columns.items():
+        if invalid[k]["total"] == 0:
+            invalid.pop(k)
+            continue
+        all_values = invalid[k]["values"]
+        if dtypes.get(col) in properties.object_types:
+            invalid[k].pop("values")
+            ivalues = {value for value in all_values if not pd.isna(value)}
+            invalid[k].update({i: all_values.count(i) for i in sorted(ivalues)})
+            nulls = sum(pd.isna(value) for value in all_values)
+            if nulls:
+                invalid[k]["nan"] = nulls
+        elif dtypes.get(col) in properties.numeric_types:
+            invalid[k].pop("values")
+            values = np.array(all_values)[~pd.isnull(all_values)]
+            if len(values > 0):
+                counts, edges = np.histogram(values)
+                bins = [f"{edges[i]:.1f}-{edges[i + 1]:.1f}" for i in range(10)]
+                invalid[k].update({b: int(c) for b, c in zip(bins, counts)})
+            else:
+                invalid[k]["nan?"] = len(all_values)
+    return invalid
+
+
+def _invalid_chunks(seed, nchunks=4, n=200):
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for _ in range(nchunks):
+        data = pd.DataFrame(
+            {
+                ("core", "ID"): rng.choice(["A1", "B2", "C3", None], n),
+                ("core", "SST"): np.round(rng.normal(15, 10, n), 1),
+                ("core", "AT"): np.full(n, np.nan),
+                ("core", "SLP"): np.round(rng.normal(1000, 20, n), 1),
+            }
+        )
+        data.loc[rng.random(n) < 0.1, ("core", "SST")] = np.nan
+        mask = pd.DataFrame(rng.random((n, 4)) > 0.3, columns=data.columns)
+        mask[("core", "SLP")] = True
+        # a mask of a column that is not in the data
+        mask[("core", "DATE")] = rng.random(n) > 0.5
+        chunks.append((data, mask))
+    return chunks
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_invalid_quicklook(level1a, seed):
+    dtypes = {
+        ("core", "ID"): "str",
+        ("core", "SST"): "float",
+        ("core", "AT"): "float",
+        ("core", "SLP"): "float",
+        ("core", "DATE"): "datetime",
+    }
+    chunks = _invalid_chunks(seed)
+    stats = SimpleNamespace(invalid={}, invalid_values={}, invalid_columns={})
+    for data, mask in chunks:
+        mask = mask.copy()
+        mask["global_mask"] = mask.all(axis=1)
+        level1a.count_invalid(data, mask, dtypes, stats)
+    invalid = level1a.invalid_quicklook(SimpleNamespace(dtypes=dtypes), stats)
+    assert invalid == _baseline_invalid(chunks, dtypes)
+
+
+def test_value_histogram_bounded(level1a):
+    rng = np.random.default_rng(0)
+    chunks = [rng.normal(i, 1 + i, 5000) for i in range(10)]
+    values = np.concatenate(chunks)
+    hist = level1a.ValueHistogram(nbins=1000)
+    for chunk in chunks:
+        hist.add(np.append(chunk, [np.nan, np.inf]))
+        assert len(hist.values) <= 1000
+        assert hist.counts is None or len(hist.counts) == 1000
+    assert hist.nulls == 20
+    assert hist.counts.sum() == len(values)
+
+    counts, edges = hist.histogram()
+    expected, expected_edges = np.histogram(values)
+    np.testing.assert_allclose(edges, expected_edges)
+    # values are misplaced by at most one of the bins they are counted in at each edge
+    assert np.abs(counts - expected).max() <= 2 * hist.counts.max()
+    assert np.abs(counts - expected).max() <= 0.05 * len(values)
+
+    # while there are few distinct values the histogram is the same as of all values
+    few = level1a.ValueHistogram(nbins=1000)
+    for chunk in chunks:
+        few.add(np.round(chunk / 10) * 10)
+    counts, edges = few.histogram()
+    expected, expected_edges = np.histogram(np.round(values / 10) * 10)
+    np.testing.assert_array_equal(counts, expected)
+    np.testing.assert_array_equal(edges, expected_edges)
+
+
+def _map_chunk(data, imodel):
+    """Map a chunk to CDM tables, taking longer for some chunks than for later ones."""
+    first_id = int(data["id"].iloc[0])
+    time.sleep(0.05 * (first_id % 3))
+    tables = ["header", "observations-at"]
+    if first_id % 2:
+        tables.append("observations-sst")
+    return _cdm_tables(tables, first_id, len(data))
+
+
+@pytest.mark.parametrize("map_processes", [1, 3])
+def test_map_processes(level1a, tmp_path, monkeypatch, map_processes):
+    sizes = [5, 3, 0, 7, 1, 4, 2, 6, 3]
+    first_ids = np.cumsum([0] + sizes[:-1])
+    chunks = [
+        (pd.DataFrame({"id": range(first, first + n)}), None)
+        for first, n in zip(first_ids, sizes)
+    ]
+    data_in = SimpleNamespace(dtypes={})
+    monkeypatch.setattr(level1a, "read_input", lambda params, filename: (data_in, 0))
+    monkeypatch.setattr(level1a, "iter_chunks", lambda data_in, chunksize: chunks)
+    monkeypatch.setattr(
+        level1a,
+        "process_chunk",
+        lambda data, mask, data_in, params, stats: level1a.DataBundle(
+            data=data, imodel=params.data_model
+        ),
+    )
+    monkeypatch.setattr(level1a, "map_chunk", _map_chunk)
+
+    # the tables are written in the order of the chunks, as they are without a pool
+    tables = {}
+    for processes in [None, map_processes]:
+        path = tmp_path / str(processes)
+        path.mkdir()
+        params = SimpleNamespace(
+            data_model="imma1",
+            filter_reports_by=None,
+            map_processes=processes,
+            level_path=str(path),
+            level_ql_path=str(path),
+            fileID=file_id,
+            fileID_date="2022-01",
+        )
+        level1a.process_file(params, "input.imma")
+        tables[processes] = {
+            table: (path / f"{table}-{file_id}.psv").read_bytes()
+            for table in properties.cdm_tables
+        }
+    assert tables[map_processes] == tables[None]
+    assert tables[None]["header"].count(b"\n") == sum(sizes) + 1
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import gzip
+import importlib
+import os
+
+import numpy as np
+from _random_data import random_deck, seeds
+import pandas as pd
+import pytest
+
+import glamod_marine_processing
+from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
+
+scripts_dir = os.path.join(
+    os.path.dirname(glamod_marine_processing.__file__), "obs_suite", "scripts"
+)
+allvarnames = {
+    "POS": ["date", "time", "pos", "blklst", "trk", "day"],
+    "SST": ["noval", "freez", "clim", "nonorm", "bud", "bbud"],
+    "AT": ["noval", "clim", "nonorm", "bud"],
+}
+
+
+def _scalar_qc_file(deck, var, year, month):
+    """The file as it was written by Deck.write_qc report by report."""
+    lines = [deck.reps[0].print_qc_block(var, allvarnames[var], header=True)]
+    for rep in deck.reps:
+        if rep.getvar("YR") == year and rep.getvar("MO") == month:
+            lines.append(rep.print_qc_block(var, allvarnames[var], header=False))
+    return "".join(lines).encode()
+
+
+@seeds()
+def test_write_qc_file(seed, tmp_path):
+    deck = random_deck(seed, allvarnames)
+    reps = [rep for rep in deck.reps if rep.getvar("MO") == 1]
+    uids = [rep.getvar("UID") for rep in reps]
+    flags = np.array(
+        [[rep.get_qc("SST", f) for f in allvarnames["SST"]] for rep in reps]
+    )
+    filename = tmp_path / "SST.csv"
+    ex.write_qc_file(str(filename), uids, allvarnames["SST"], flags)
+    assert filename.read_bytes() == _scalar_qc_file(deck, "SST", 2000, 1)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_deck_write_qc(compress, tmp_path):
+    deck = random_deck(3, allvarnames)
+    deck.write_qc("r1", str(tmp_path), 2000, 1, allvarnames, compress=compress)
+    for var in allvarnames:
+        filename = tmp_path / f"{var}_qc_200001_r1.csv"
+        if compress:
+            with gzip.open(str(filename) + ".gz", "rb") as fh:
+                contents = fh.read()
+        else:
+            contents = filename.read_bytes()
+        assert contents == _scalar_qc_file(deck, var, 2000, 1)
+
+
+@pytest.fixture
+def obs_qc(monkeypatch):
+    """The QC module of the obs_suite scripts, with which level1e reads the QC flags."""
+    monkeypatch.syspath_prepend(scripts_dir)
+    return importlib.import_module("_qc")
+
+
+def _requested_uids(deck, seed):
+    """UIDs of some of the reports, some from outside the month and some unknown."""
+    rng = np.random.default_rng(seed)
+    uids = [rep.getvar("UID") for rep in deck.reps]
+    uids = list(rng.choice(uids, len(uids) // 2, replace=False)) + ["U9", "V0"]
+    return pd.Index(uids)
+
+
+def _expected_flags(deck, var, columns, uids):
+    """The flags of the reports of the month as they are read from the csv file."""
+    reps = [rep for rep in deck.reps if rep.getvar("MO") == 1]
+    qc_df = pd.DataFrame(
+        {col: [rep.get_qc(var, col) for rep in reps] for col in columns},
+        index=[rep.getvar("UID") for rep in reps],
+        dtype="int64",
+    )
+    return qc_df.reindex(uids)
+
+
+def _read_flags(qc_df, uids):
+    return qc_df.set_index("UID").reindex(uids)
+
+
+@pytest.mark.parametrize(
+    "var, columns", [("SST", ["bud", "clim", "noval"]), ("POS", ["trk", "date"])]
+)
+def test_read_qc_dataset(var, columns, obs_qc, tmp_path):
+    pytest.importorskip("pyarrow")
+    deck = random_deck(4, allvarnames)
+    deck.write_qc("r1", str(tmp_path), 2000, 1, allvarnames, parquet=True)
+    uids = _requested_uids(deck, 4)
+    qc_df = obs_qc.read_qc_dataset(
+        str(tmp_path / "qc_200001_r1.parquet" / f"qc={var}"), ["UID"] + columns, uids
+    )
+    pd.testing.assert_frame_equal(
+        _read_flags(qc_df, uids),
+        _expected_flags(deck, var, columns, uids),
+        check_names=False,
+        check_like=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "var, columns", [("SST", ["bud", "clim", "noval"]), ("POS", ["trk", "date"])]
+)
+def test_read_qc_index(var, columns, obs_qc, tmp_path):
+    deck = random_deck(5, allvarnames)
+    deck.write_qc("r1", str(tmp_path), 2000, 1, allvarnames, index=True)
+    uids = _requested_uids(deck, 5)
+    qc_df = obs_qc.read_qc_index(
+        str(tmp_path / "qc_200001_r1.index"), var, ["UID"] + columns, uids
+    )
+    pd.testing.assert_frame_equal(
+        _read_flags(qc_df, uids),
+        _expected_flags(deck, var, columns, uids),
+        check_names=False,
+        check_like=True,
+    )
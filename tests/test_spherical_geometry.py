@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import spherical_geometry as sph
+
+
+def _random_points(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    lat1 = rng.uniform(-90, 90, n)
+    lon1 = rng.uniform(-180, 180, n)
+    lat2 = rng.uniform(-90, 90, n)
+    lon2 = rng.uniform(-180, 180, n)
+    # coincident, antipodal, polar and dateline-crossing points
+    lat2[:50], lon2[:50] = lat1[:50], lon1[:50]
+    lat2[50:100], lon2[50:100] = -lat1[50:100], lon1[50:100] + 180.0
+    lat1[100:150] = 90.0
+    lat2[150:200] = -90.0
+    lon1[200:250], lon2[200:250] = 179.9, -179.9
+    lat2[250:300], lon2[250:300] = lat1[250:300], lon1[250:300] + 1.0
+    return lat1, lon1, lat2, lon2
+
+
+def _scalar(function, *args):
+    return np.array([function(*values) for values in zip(*args)])
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize(
+    "scalar_function, array_function",
+    [
+        (sph.sphere_distance, sph.sphere_distance_array),
+        (sph.angular_distance, sph.angular_distance_array),
+        (sph.course_between_points, sph.course_between_points_array),
+    ],
+)
+def test_point_pairs(seed, scalar_function, array_function):
+    points = _random_points(seed)
+    np.testing.assert_allclose(
+        array_function(*points), _scalar(scalar_function, *points), rtol=0, atol=1e-9
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_lat_lon_from_course_and_distance(seed):
+    rng = np.random.default_rng(seed)
+    lat1, lon1, _, _ = _random_points(seed)
+    course = rng.uniform(-360, 360, len(lat1))
+    distance = rng.uniform(0, 3000, len(lat1))
+    expected = _scalar(
+        sph.lat_lon_from_course_and_distance, lat1, lon1, course, distance
+    )
+    lat, lon = sph.lat_lon_from_course_and_distance_array(lat1, lon1, course, distance)
+    np.testing.assert_allclose(lat, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(lon, expected[:, 1], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_intermediate_point(seed):
+    rng = np.random.default_rng(seed)
+    points = _random_points(seed)
+    f = rng.uniform(0, 1, len(points[0]))
+    expected = _scalar(sph.intermediate_point, *points, f)
+    lat, lon = sph.intermediate_point_array(*points, f)
+    np.testing.assert_allclose(lat, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(lon, expected[:, 1], rtol=0, atol=1e-9)
+
+
+def test_scalar_input():
+    assert sph.sphere_distance_array(10.0, 20.0, 11.0, 21.0) == pytest.approx(
+        sph.sphere_distance(10.0, 20.0, 11.0, 21.0), abs=1e-9
+    )
+    assert np.isnan(sph.sphere_distance_array(np.nan, 20.0, 11.0, 21.0))
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import numpy as np
+from _random_data import random_track, seeds
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import spherical_geometry as sph
+from glamod_marine_processing.qc_suite.modules import track_check as tc
+
+km_to_nm = 0.539957
+
+
+def _none(x):
+    return None if np.isnan(x) else float(x)
+
+
+def _scalar_track_speeds(arrays, step):
+    lat, lon, time = arrays["lat"], arrays["lon"], arrays["time"]
+    nobs = len(lat)
+    speed = np.full(nobs, np.nan)
+    distance = np.full(nobs, np.nan)
+    course = np.full(nobs, np.nan)
+    time_diff = np.full(nobs, np.nan)
+    for i in range(step, nobs):
+        j = i - step + 1
+        distance[j] = sph.sphere_distance(lat[i], lon[i], lat[i - step], lon[i - step])
+        time_diff[j] = 24.0 * (time[i] - time[i - step])
+        if time_diff[j] != 0:
+            speed[j] = distance[j] / time_diff[j]
+        else:
+            speed[j] = distance[j]
+        course[j] = sph.course_between_points(
+            lat[i - step], lon[i - step], lat[i], lon[i]
+        )
+    return speed, distance, course, time_diff
+
+
+def _scalar_distr(arrays, reverse):
+    lat, lon = arrays["LAT"], arrays["LON"]
+    vsi, dsi, time_diff = arrays["vsi"], arrays["dsi"], arrays["time_diff"]
+    nobs = len(lat)
+    result = np.full(nobs, np.nan)
+    for i in range(1, nobs):
+        values = [vsi[i], vsi[i - 1], dsi[i], dsi[i - 1], time_diff[i]]
+        if np.any(np.isnan(values)):
+            continue
+        # start from the later report and turn round when going back in time
+        start, other = (i, i - 1) if reverse else (i - 1, i)
+        turn = 180.0 if reverse else 0.0
+        lat1, lon1 = tc.increment_position(
+            lat[start],
+            lon[start],
+            vsi[start] / km_to_nm,
+            dsi[start] - turn,
+            time_diff[i],
+        )
+        lat2, lon2 = tc.increment_position(
+            lat[other],
+            lon[other],
+            vsi[other] / km_to_nm,
+            dsi[other] - turn,
+            time_diff[i],
+        )
+        alatx = lat[start] + lat1 + lat2
+        alonx = lon[start] + lon1 + lon2
+        result[other] = sph.sphere_distance(lat[other], lon[other], alatx, alonx)
+    return result
+
+
+def _scalar_midpt(arrays):
+    lat, lon, time_diff = arrays["LAT"], arrays["LON"], arrays["time_diff"]
+    nobs = len(lat)
+    result = np.full(nobs, np.nan)
+    for i in range(1, nobs - 1):
+        t0 = time_diff[i]
+        t1 = time_diff[i + 1]
+        fraction = 0.0
+        if not np.isnan(t0) and not np.isnan(t1) and t0 + t1 != 0:
+            fraction = t0 / (t0 + t1)
+        est_lat, est_lon = sph.intermediate_point(
+            lat[i - 1], lon[i - 1], lat[i + 1], lon[i + 1], fraction
+        )
+        result[i] = sph.sphere_distance(lat[i], lon[i], est_lat, est_lon)
+    return result
+
+
+def _scalar_mds_track_check(arrays):
+    """The per-report decisions of the track check before it worked on arrays."""
+    nobs = len(arrays["lat"])
+    speed, alt_speed = arrays["speed"], arrays["alt_speed"]
+    forward = _scalar_distr(arrays, reverse=False)
+    reverse = _scalar_distr(arrays, reverse=True)
+    midpoint = _scalar_midpt(arrays)
+    amax, _, _ = tc.set_speed_limits(tc.modesp(speed))
+
+    qcs = [0]
+    for i in range(1, nobs - 1):
+        thisqc_a = (
+            (speed[i] > amax and alt_speed[i - 1] > amax)
+            or (speed[i + 1] > amax and alt_speed[i + 1] > amax)
+            or (speed[i] > amax and speed[i + 1] > amax)
+        )
+        thisqc_b = tc.check_distance_from_estimate(
+            _none(arrays["vsi"][i]),
+            _none(arrays["vsi"][i - 1]),
+            _none(arrays["time_diff"][i]),
+            _none(forward[i]),
+            _none(reverse[i]),
+        )
+        thisqc_b += tc.direction_continuity(
+            _none(arrays["dsi"][i]),
+            _none(arrays["dsi"][i - 1]),
+            _none(arrays["course"][i]),
+        )
+        thisqc_b += tc.speed_continuity(
+            _none(arrays["vsi"][i]),
+            _none(arrays["vsi"][i - 1]),
+            _none(speed[i]),
+        )
+        if speed[i] > 40.00 / km_to_nm:
+            thisqc_b += 10.0
+        qcs.append(int(midpoint[i] > 150.0 / km_to_nm and thisqc_a and thisqc_b > 0))
+    qcs.append(0)
+    return qcs
+
+
+@seeds(10)
+@pytest.mark.parametrize("step", [1, 2])
+def test_track_speeds(seed, step):
+    arrays = random_track(seed)
+    expected = _scalar_track_speeds(arrays, step)
+    result = tc.track_speeds(arrays["lat"], arrays["lon"], arrays["time"], step)
+    for value, expected_value in zip(result, expected):
+        np.testing.assert_allclose(value, expected_value, rtol=0, atol=1e-9)
+
+
+@seeds(10)
+def test_distr1_array(seed):
+    arrays = random_track(seed)
+    np.testing.assert_allclose(
+        tc.distr1_array(arrays),
+        _scalar_distr(arrays, reverse=False),
+        rtol=0,
+        atol=1e-9,
+    )
+
+
+@seeds(10)
+def test_distr2_array(seed):
+    arrays = random_track(seed)
+    np.testing.assert_allclose(
+        tc.distr2_array(arrays),
+        _scalar_distr(arrays, reverse=True),
+        rtol=0,
+        atol=1e-9,
+    )
+
+
+@seeds(10)
+def test_midpt_array(seed):
+    arrays = random_track(seed)
+    np.testing.assert_allclose(
+        tc.midpt_array(arrays), _scalar_midpt(arrays), rtol=0, atol=1e-9
+    )
+
+
+@seeds(40)
+def test_mds_track_check_array(seed):
+    arrays = random_track(seed, nobs=10 + 3 * seed)
+    result = tc.mds_track_check_array(arrays)
+    assert result.tolist() == _scalar_mds_track_check(arrays)
+
+
+def test_mds_track_check_array_short_track():
+    arrays = random_track(0, nobs=2)
+    assert tc.mds_track_check_array(arrays).tolist() == [0, 0]
+
+
+def _scalar_iquam_track_check(lat, lon, time, speed_limit, delta_d, delta_t, n):
+    """The IQUAM track check as it was run report by report on a Voyage."""
+    numobs = len(lat)
+    speed_violations = []
+    count_speed_violations = []
+    for t1 in range(numobs):
+        violations = []
+        for t2 in range(max(0, t1 - n), min(numobs, t1 + n + 1)):
+            distance = sph.sphere_distance(lat[t2], lon[t2], lat[t1], lon[t1])
+            time_diff = 24.0 * (time[t2] - time[t1])
+            if np.isnan(time_diff):
+                time_diff = 0.0
+            condition = max([abs(distance) - delta_d, 0.0]) / (abs(time_diff) + delta_t)
+            if condition > speed_limit:
+                violations.append(t2)
+        speed_violations.append(violations)
+        count_speed_violations.append(float(len(violations)))
+
+    qcs = [0] * numobs
+    while np.sum(count_speed_violations) > 0.0:
+        most_fails = np.argmax(count_speed_violations)
+        qcs[most_fails] = 1
+        for index in speed_violations[most_fails]:
+            if most_fails in speed_violations[index]:
+                speed_violations[index].remove(most_fails)
+                count_speed_violations[index] -= 1.0
+        count_speed_violations[most_fails] = 0
+    return qcs
+
+
+@seeds(20)
+@pytest.mark.parametrize("speed_limit", [15.0, 60.0])
+def test_iquam_track_check_array(seed, speed_limit):
+    arrays = random_track(seed, nobs=10 + 5 * seed)
+    args = (arrays["lat"], arrays["lon"], arrays["time"], speed_limit, 1.11, 0.01, 5)
+    result = tc.iquam_track_check_array(*args)
+    assert result.tolist() == _scalar_iquam_track_check(*args)
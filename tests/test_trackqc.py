@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from _random_data import random_anomalies, random_drifter, seeds
+import pytest
+
+from glamod_marine_processing.qc_suite.modules import IMMA1
+from glamod_marine_processing.qc_suite.modules import Extended_IMMA_sb as ex
+from glamod_marine_processing.qc_suite.modules import trackqc
+from glamod_marine_processing.qc_suite.modules.spherical_geometry import (
+    sphere_distance,
+)
+
+
+def _drifter_voyage(lon, lat, hrs, sst=None, ostia=0.0):
+    """Set up a Voyage of drifter reports at the given positions and hours."""
+    voyage = ex.Voyage()
+    start = datetime(2003, 1, 1)
+    for i in range(len(hrs)):
+        time = start + timedelta(hours=float(hrs[i]))
+        imma = IMMA1.IMMA()
+        imma.data = {
+            "ID": "DRIFTER1",
+            "YR": time.year,
+            "MO": time.month,
+            "DY": time.day,
+            "HR": time.hour + time.minute / 60.0,
+            "LAT": float(lat[i]),
+            "LON": float(lon[i]),
+            "SST": None if sst is None else float(sst[i]),
+        }
+        rep = ex.MarineReportQC(imma)
+        rep.setext("OSTIA", ostia)
+        rep.setext("ICE", 0.0)
+        rep.setext("BGVAR", 0.01)
+        voyage.add_report(rep)
+    return voyage
+
+
+def _flags(voyage, qc_type, flag):
+    return [rep.get_qc(qc_type, flag) for rep in voyage.reps]
+
+
+def test_trim_mean_and_std():
+    arr = np.arange(20.0)[::-1]
+    # one tenth of the values are trimmed off each end, the trimming index is an integer
+    assert trackqc.trim_mean(arr, 10) == np.mean(np.arange(2.0, 18.0))
+    assert trackqc.trim_std(arr, 10) == np.std(np.arange(2.0, 18.0))
+    assert trackqc.trim_mean(arr, 0) == np.mean(arr)
+    assert trackqc.trim_std(arr, 0) == np.std(arr)
+
+
+def test_create_smoothed_lon_lat_hrs():
+    lon = np.array([0.0, 1.0, 5.0, 2.0, 3.0, 9.0, 4.0])
+    lat = -lon
+    hrs = np.arange(7.0) * 6
+    lon_smooth, lat_smooth, hrs_smooth = trackqc.create_smoothed_lon_lat_hrs(
+        lon=lon, lat=lat, hrs=hrs, nrep=7, smooth_win=3, half_win=1
+    )
+    # the smoothed track holds one running median per full window, with no NaN padding
+    np.testing.assert_array_equal(lon_smooth, [1.0, 2.0, 3.0, 3.0, 4.0])
+    np.testing.assert_array_equal(lat_smooth, [-1.0, -2.0, -3.0, -3.0, -4.0])
+    np.testing.assert_array_equal(hrs_smooth, hrs[1:6])
+
+
+@pytest.mark.parametrize("max_win_period", [2, None])
+def test_aground_check(max_win_period):
+    # a drifter that moves east for five days then stops
+    hrs = np.arange(40) * 6.0
+    lon = np.minimum(np.arange(40), 20) * 0.1
+    lat = np.zeros(40)
+    voyage = _drifter_voyage(lon, lat, hrs)
+    trackqc.aground_check(
+        voyage.reps, smooth_win=3, min_win_period=1, max_win_period=max_win_period
+    )
+    # the first report of the first window without movement and all those after it
+    # are aground; the window index is moved back onto the un-smoothed track
+    assert _flags(voyage, "POS", "drf_agr") == [0] * 20 + [1] * 20
+
+
+def test_aground_check_moving():
+    hrs = np.arange(40) * 6.0
+    lon = np.arange(40) * 0.1
+    lat = np.zeros(40)
+    voyage = _drifter_voyage(lon, lat, hrs)
+    trackqc.new_aground_check(voyage.reps, smooth_win=3, min_win_period=1)
+    assert _flags(voyage, "POS", "drf_agr") == [0] * 40
+
+
+@pytest.mark.parametrize(
+    "n_eval, bias_lim, expected_bias", [(30, 1.10, 0), (5, 1.10, 1), (5, 3.0, 0)]
+)
+def test_sst_biased_noisy_check_parameters(n_eval, bias_lim, expected_bias):
+    # ten night-time reports 2K warmer than the background, within the short-record limit
+    hrs = np.arange(10) * 0.25
+    voyage = _drifter_voyage(
+        np.zeros(10), np.zeros(10), hrs, sst=np.full(10, 17.0), ostia=15.0
+    )
+    trackqc.sst_biased_noisy_check(voyage.reps, n_eval=n_eval, bias_lim=bias_lim)
+    # records shorter than n_eval go to the short-record check and the bias is
+    # assessed against bias_lim; both used to be ignored in favour of the defaults
+    assert _flags(voyage, "SST", "drf_bias") == [expected_bias] * 10
+    assert _flags(voyage, "SST", "drf_short") == [0] * 10
+    assert _flags(voyage, "SST", "drf_noise") == [0] * 10
+
+
+def _scalar_check_drifter_aground(lon, lat, hrs, min_win_period, max_win_period):
+    """The aground check as it was run window by window."""
+    i = 0
+    is_aground = False
+    i_aground = np.nan
+    min_win_period_hours = min_win_period * 24.0
+    max_win_period_hours = max_win_period * 24.0
+    tolerance = sphere_distance(0, 0, 0.01, 0.01)
+
+    time_to_end = hrs[-1] - hrs[i]
+    while time_to_end >= min_win_period_hours:
+        f_win = hrs <= hrs[i] + max_win_period_hours
+        win_len = hrs[f_win][-1] - hrs[i]
+        if win_len >= min_win_period_hours:
+            displace = sphere_distance(lat[i], lon[i], lat[f_win][-1], lon[f_win][-1])
+            if displace > tolerance:
+                is_aground = False
+                i_aground = np.nan
+            elif not is_aground:
+                is_aground = True
+                i_aground = i
+        i += 1
+        time_to_end = hrs[-1] - hrs[i]
+    return is_aground, i_aground
+
+
+def _scalar_check_drifter_speed(
+    lon, lat, hrs, speed_limit, min_win_period, max_win_period, iquam_track_ship
+):
+    """The speed check as it was run window by window."""
+    nrep = len(hrs)
+    flags = np.zeros(nrep, dtype=int)
+    min_win_period_hours = min_win_period * 24.0
+    max_win_period_hours = max_win_period * 24.0
+    i = 0
+    time_to_end = hrs[-1] - hrs[i]
+    while time_to_end >= min_win_period_hours:
+        if iquam_track_ship is not None:
+            f_win = (hrs >= hrs[i] + min_win_period_hours) & (iquam_track_ship == 0)
+            usable = iquam_track_ship[i] == 0 and any(f_win)
+            ind = 0
+        else:
+            f_win = hrs <= hrs[i] + max_win_period_hours
+            ind = -1
+            usable = hrs[f_win][ind] - hrs[i] >= min_win_period_hours
+        if usable:
+            win_len = hrs[f_win][ind] - hrs[i]
+            displace = sphere_distance(lat[i], lon[i], lat[f_win][ind], lon[f_win][ind])
+            speed = displace / win_len * 1000.0 / (60.0 * 60)
+            if speed > speed_limit:
+                flags[i : np.arange(nrep)[f_win][ind] + 1] = 1
+        i += 1
+        time_to_end = hrs[-1] - hrs[i]
+    return flags
+
+
+def _scalar_long_tail_check(
+    nrep, sst_anom, bgerr, drif_inter, drif_intra, long_win_len, long_err_std_n, lim
+):
+    """The long tail check as it was run window by window."""
+    start_tail_ind = -1
+    end_tail_ind = nrep
+    mid_win_ind = (long_win_len - 1) // 2
+    if nrep >= long_win_len:
+        for forward in [True, False]:
+            sst_anom_temp = sst_anom if forward else np.flipud(sst_anom)
+            bgerr_temp = bgerr if forward else np.flipud(bgerr)
+            for ix in range(0, nrep - long_win_len + 1):
+                sst_anom_winvals = sst_anom_temp[ix : ix + long_win_len]
+                bgerr_winvals = bgerr_temp[ix : ix + long_win_len]
+                if np.any(bgerr_winvals > np.sqrt(lim)):
+                    break
+                sst_anom_avg = trackqc.trim_mean(sst_anom_winvals, 100)
+                sst_anom_stdev = trackqc.trim_std(sst_anom_winvals, 100)
+                bgerr_avg = np.mean(bgerr_winvals)
+                bgerr_rms = np.sqrt(np.mean(bgerr_winvals**2))
+                if (
+                    abs(sst_anom_avg)
+                    > long_err_std_n * np.sqrt(drif_inter**2 + bgerr_avg**2)
+                ) or (sst_anom_stdev > np.sqrt(drif_intra**2 + bgerr_rms**2)):
+                    if forward:
+                        start_tail_ind = ix + mid_win_ind
+                    else:
+                        end_tail_ind = (nrep - 1) - ix - mid_win_ind
+                else:
+                    break
+    return start_tail_ind, end_tail_ind
+
+
+def _scalar_short_tail_check(
+    start_tail_ind,
+    end_tail_ind,
+    sst_anom,
+    bgerr,
+    drif_inter,
+    drif_intra,
+    short_win_len,
+    short_err_std_n,
+    short_win_n_bad,
+    lim,
+):
+    """The short tail check as it was run window by window."""
+    if start_tail_ind < end_tail_ind:
+        first_pass_ind = start_tail_ind + 1
+        last_pass_ind = end_tail_ind - 1
+        npass = last_pass_ind - first_pass_ind + 1
+        if npass >= short_win_len:
+            for forward in [True, False]:
+                sst_anom_temp = sst_anom[first_pass_ind : last_pass_ind + 1]
+                bgerr_temp = bgerr[first_pass_ind : last_pass_ind + 1]
+                if not forward:
+                    sst_anom_temp = np.flipud(sst_anom_temp)
+                    bgerr_temp = np.flipud(bgerr_temp)
+                for ix in range(0, npass - short_win_len + 1):
+                    sst_anom_winvals = sst_anom_temp[ix : ix + short_win_len]
+                    bgerr_winvals = bgerr_temp[ix : ix + short_win_len]
+                    if np.any(bgerr_winvals > np.sqrt(lim)):
+                        break
+                    limit = short_err_std_n * np.sqrt(
+                        bgerr_winvals**2 + drif_inter**2 + drif_intra**2
+                    )
+                    exceed_limit = (sst_anom_winvals > limit) | (
+                        sst_anom_winvals < -limit
+                    )
+                    if np.sum(exceed_limit) < short_win_n_bad:
+                        break
+                    # if all windows have failed, flag everything
+                    step = short_win_len if ix == npass - short_win_len else 1
+                    if forward:
+                        start_tail_ind += step
+                    else:
+                        end_tail_ind -= step
+    return start_tail_ind, end_tail_ind
+
+
+@seeds(20)
+@pytest.mark.parametrize("min_win_period, max_win_period", [(1, 2), (2, 3), (0.5, 10)])
+def test_check_drifter_aground(seed, min_win_period, max_win_period):
+    lon, lat, hrs = random_drifter(seed)
+    expected = _scalar_check_drifter_aground(
+        lon, lat, hrs, min_win_period, max_win_period
+    )
+    result = trackqc.check_drifter_aground(
+        lon, lat, hrs, min_win_period, max_win_period
+    )
+    assert result[0] == expected[0]
+    np.testing.assert_equal(result[1], expected[1])
+
+
+@seeds(20)
+@pytest.mark.parametrize(
+    "speed_limit, min_win_period, max_win_period", [(2.5, 0.8, 1.0), (0.1, 0.5, 2.0)]
+)
+@pytest.mark.parametrize("ship_check", [False, True])
+def test_check_drifter_speed(
+    seed, speed_limit, min_win_period, max_win_period, ship_check
+):
+    lon, lat, hrs = random_drifter(seed)
+    iquam_track_ship = None
+    if ship_check:
+        rng = np.random.default_rng(seed)
+        iquam_track_ship = (rng.random(len(hrs)) < 0.1).astype(int)
+    args = (
+        lon,
+        lat,
+        hrs,
+        speed_limit,
+        min_win_period,
+        max_win_period,
+        iquam_track_ship,
+    )
+    expected = _scalar_check_drifter_speed(*args)
+    np.testing.assert_array_equal(trackqc.check_drifter_speed(*args), expected)
+
+
+@seeds(20)
+@pytest.mark.parametrize(
+    "long_win_len, long_err_std_n", [(121, 3.0), (21, 3.0), (201, 2.0)]
+)
+def test_long_tail_check(seed, long_win_len, long_err_std_n):
+    sst_anom, bgerr = random_anomalies(seed)
+    args = (
+        len(sst_anom),
+        sst_anom,
+        bgerr,
+        0.29,
+        1.0,
+        long_win_len,
+        long_err_std_n,
+        0.3,
+    )
+    expected = _scalar_long_tail_check(*args)
+    assert trackqc.long_tail_check(*args) == expected
+
+
+@seeds(20)
+@pytest.mark.parametrize(
+    "short_win_len, short_err_std_n, short_win_n_bad",
+    [(30, 3.0, 2), (5, 3.0, 2), (3, 2.0, 1)],
+)
+def test_short_tail_check(seed, short_win_len, short_err_std_n, short_win_n_bad):
+    sst_anom, bgerr = random_anomalies(seed)
+    start_tail_ind, end_tail_ind = trackqc.long_tail_check(
+        len(sst_anom), sst_anom, bgerr, 0.29, 1.0, 21, 3.0, 0.3
+    )
+    args = (
+        start_tail_ind,
+        end_tail_ind,
+        sst_anom,
+        bgerr,
+        0.29,
+        1.0,
+        short_win_len,
+        short_err_std_n,
+        short_win_n_bad,
+        0.3,
+    )
+    expected = _scalar_short_tail_check(*args)
+    assert trackqc.short_tail_check(*args) == expected